@@ -0,0 +1,54 @@
+"""
+인증 관련 캐시
+
+검증이 끝난 토큰(principal)과 사용자 정보를 프로세스 안에 잠시 보관해,
+정상 상태에서는 인증이 필요한 요청이 JWT 검증이나 DB 조회 없이 처리되도록 합니다.
+한 요청 안에서는 FastAPI가 의존성 결과를 재사용하므로 같은 요청에서 두 번 조회하지 않습니다.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from . import models
+from .cache import TTLCache
+from .settings import settings
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """세션과 무관하게 캐시에 보관하는 사용자 정보"""
+
+    id: str
+    email: str
+    first_name: str
+    last_name: str
+    is_admin: bool
+
+    @staticmethod
+    def from_model(user: models.User) -> CachedUser:
+        return CachedUser(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            is_admin=user.is_admin,
+        )
+
+
+# 토큰 -> 사용자 ID
+principal_cache: TTLCache[str, str] = TTLCache(
+    maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl
+)
+# 사용자 ID -> CachedUser
+user_cache: TTLCache[str, CachedUser] = TTLCache(
+    maxsize=settings.auth_cache_size, ttl=settings.auth_cache_ttl
+)
+
+
+def invalidate_user(user_id: str) -> None:
+    """사용자 정보가 바뀌었을 때 캐시에서 지웁니다."""
+    user_cache.invalidate(user_id)
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    return {"principal": principal_cache.stats(), "user": user_cache.stats()}
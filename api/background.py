@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(
+    name: str, interval: float, func: Callable[[], Awaitable[object]]
+) -> None:
+    """func를 interval(초)마다 실행합니다. 실패해도 루프는 계속됩니다."""
+    while True:
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("background task %s failed", name)
+        await asyncio.sleep(interval)
+
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any) -> Any:
+    """func를 프로세스 풀에서 실행합니다. func와 인자는 pickle할 수 있어야 합니다."""
+    global _process_pool  # noqa: WPS420
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.job_process_workers)
+    return await asyncio.get_running_loop().run_in_executor(_process_pool, func, *args)
+
+
+async def shutdown_process_pool() -> None:
+    """
+    대기 중인 작업은 취소하고, 실행 중인 작업이 끝나 worker 프로세스가 모두 종료될
+    때까지 기다립니다. 기다리지 않으면 남은 worker가 부모의 파이프를 쥔 채 고아가 됩니다.
+    """
+    global _process_pool  # noqa: WPS420
+    if _process_pool is not None:
+        pool, _process_pool = _process_pool, None
+        await run_in_threadpool(pool.shutdown, wait=True, cancel_futures=True)
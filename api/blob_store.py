@@ -0,0 +1,228 @@
+"""
+내용 주소 기반(content-addressed) blob 저장소
+
+파일 내용은 sha256을 이름으로 저장소의 blobs/ab/cd/<hash> 키에 한 번만 저장하고,
+FileModel은 content_hash로 blob을 참조합니다. blobs.ref_count가 0이 되면
+실제 객체를 지웁니다.
+
+저장소는 DB 트랜잭션에 묶이지 않으므로, 새 객체는 롤백될 때 지우고 참조가 없어진
+객체는 커밋된 뒤에 지웁니다. 그 사이 프로세스가 죽어 남은 객체는 정합성 검사
+(api.integrity)가 정리합니다.
+"""
+import asyncio
+import os
+import uuid
+from collections import Counter
+from typing import AsyncIterator
+
+from fastapi import UploadFile
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .compression import ZSTD, iter_decompressed, maybe_compress_file
+from .database import Session, SessionLocal
+from .settings import settings
+from .storage import StoredUpload, get_storage, remove_quietly, save_upload_file
+
+# 해시 계산 전 임시 저장 위치. 저장소 종류와 관계없이 항상 로컬 디스크
+TMP_DIR = os.path.join(settings.upload_dir, ".tmp")
+
+
+def blob_key(content_hash: str) -> str:
+    # 한 디렉토리에 파일이 너무 많아지지 않도록 해시 앞 4글자로 2단계 샤딩
+    return f"blobs/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+
+def new_tmp_path() -> str:
+    os.makedirs(TMP_DIR, exist_ok=True)
+    return os.path.join(TMP_DIR, uuid.uuid4().hex)
+
+
+async def _increment_ref(db: Session, content_hash: str) -> bool:
+    result = await db.execute(
+        update(models.Blob)
+        .where(models.Blob.hash == content_hash)
+        .values(ref_count=models.Blob.ref_count + 1)
+    )
+    return result.rowcount == 1
+
+
+async def add_blob(db: Session, tmp_path: str, stored: StoredUpload) -> models.Blob:
+    """
+    임시 파일을 blob으로 등록하고 참조 수를 1 늘립니다.
+
+    같은 내용의 blob이 이미 있으면 임시 파일은 버리고 기존 blob을 공유합니다.
+    커밋은 호출한 쪽에서 FileModel 변경과 함께 해야 합니다.
+    """
+    content_hash = stored.content_hash
+    if await _increment_ref(db, content_hash):
+        await run_in_threadpool(remove_quietly, tmp_path)
+        return await db.get(models.Blob, content_hash, populate_existing=True)
+
+    path = blob_key(content_hash)
+    encoding, stored_size = None, stored.size
+    if settings.storage_compression == ZSTD:
+        # 해시와 중복 제거는 원본 기준이고, 압축은 새 blob을 저장할 때만 함
+        encoding, stored_size = await run_in_threadpool(
+            maybe_compress_file, tmp_path, settings.storage_compression_level
+        )
+    try:
+        async with db.begin_nested():
+            await db.execute(
+                insert(models.Blob).values(
+                    hash=content_hash,
+                    size=stored.size,
+                    path=path,
+                    encoding=encoding,
+                    stored_size=stored_size,
+                    ref_count=1,
+                )
+            )
+    except IntegrityError:
+        # 같은 내용이 동시에 올라와 다른 요청이 먼저 등록하고 객체도 쓴 경우
+        await _increment_ref(db, content_hash)
+        await run_in_threadpool(remove_quietly, tmp_path)
+        return await db.get(models.Blob, content_hash, populate_existing=True)
+
+    # 행을 먼저 넣은 뒤에 객체를 씀. 같은 내용을 동시에 올리는 요청은 INSERT에서 이
+    # 트랜잭션이 끝나기를 기다리므로, 롤백하며 지우는 객체를 다른 요청이 덮어쓰지 않음
+    storage = get_storage()
+    db.on_rollback(lambda: storage.delete(path))
+    await storage.put_file(path, tmp_path)
+    return await db.get(models.Blob, content_hash, populate_existing=True)
+
+
+async def retain_blob(db: Session, content_hash: str) -> models.Blob | None:
+    """
+    이미 있는 blob의 참조 수를 1 늘립니다. (이전 버전으로 되돌릴 때 등)
+    blob이 없으면 None. 커밋은 호출한 쪽에서 합니다.
+    """
+    if not await _increment_ref(db, content_hash):
+        return None
+    return await db.get(models.Blob, content_hash, populate_existing=True)
+
+
+async def discard_new_blobs(db: Session) -> None:
+    """
+    add_blob 뒤에 커밋하지 않고 취소할 때 부릅니다. (저장 공간 부족 등)
+
+    롤백하면서 이번 트랜잭션에서 새로 쓴 객체를 지웁니다. blob 행 잠금을 쥔 채로
+    지우므로, 같은 내용을 기다리던 업로드는 롤백 뒤에 객체를 다시 씁니다.
+    """
+    await db.rollback()
+
+
+def open_blob(
+    path: str, encoding: str | None, start: int = 0, end: int | None = None
+) -> AsyncIterator[bytes]:
+    """blob의 원본 기준 [start, end] 구간을 읽습니다. 압축된 blob은 풀면서 읽습니다."""
+    storage = get_storage()
+    if encoding == ZSTD:
+        return iter_decompressed(storage.open_range(path), start, end)
+    return storage.open_range(path, start, end)
+
+
+async def store_upload(db: Session, upload: UploadFile) -> models.Blob:
+    """업로드 파일을 해시하면서 임시 파일로 받은 뒤 blob으로 등록합니다."""
+    tmp_path = await run_in_threadpool(new_tmp_path)
+    stored = await save_upload_file(upload, tmp_path)
+    return await add_blob(db, tmp_path, stored)
+
+
+async def release_blob(db: Session, content_hash: str) -> bool:
+    """
+    blob 참조 수를 1 줄이고, 0이 되면 blob 행을 지웁니다.
+
+    저장소 객체는 커밋이 성공한 뒤에 지우므로, 롤백되면 blob이 그대로 남습니다.
+    커밋은 호출한 쪽에서 합니다.
+    """
+    await db.execute(
+        update(models.Blob)
+        .where(models.Blob.hash == content_hash)
+        .values(ref_count=models.Blob.ref_count - 1)
+    )
+    blob = await db.scalar(
+        select(models.Blob)
+        .where(models.Blob.hash == content_hash)
+        .execution_options(populate_existing=True)
+    )
+    if blob is None or blob.ref_count > 0:
+        return False
+
+    await db.execute(
+        delete(models.Blob).where(
+            models.Blob.hash == content_hash, models.Blob.ref_count <= 0
+        )
+    )
+    db.after_commit(lambda: delete_unreferenced([content_hash]))
+    return True
+
+
+async def release_blobs(db: Session, content_hashes: list[str]) -> int:
+    """
+    여러 blob의 참조 수를 한 번에 줄이고, 0이 된 blob을 지웁니다.
+
+    줄일 양이 같은 blob끼리 UPDATE ... WHERE hash IN (...) 한 번으로 처리하고,
+    저장소 객체는 커밋된 뒤에 동시에 지웁니다. 지운 blob 수를 반환하며, 커밋은
+    호출한 쪽에서 합니다.
+    """
+    counts = Counter(content_hashes)
+    by_amount: dict[int, list[str]] = {}
+    for content_hash, amount in counts.items():
+        by_amount.setdefault(amount, []).append(content_hash)
+    for amount, hashes in by_amount.items():
+        await db.execute(
+            update(models.Blob)
+            .where(models.Blob.hash.in_(hashes))
+            .values(ref_count=models.Blob.ref_count - amount)
+        )
+
+    released = (
+        await db.scalars(
+            select(models.Blob)
+            .where(models.Blob.hash.in_(list(counts)), models.Blob.ref_count <= 0)
+            .execution_options(populate_existing=True)
+        )
+    ).all()
+    if not released:
+        return 0
+
+    released_hashes = [blob.hash for blob in released]
+    await db.execute(
+        delete(models.Blob).where(
+            models.Blob.hash.in_(released_hashes),
+            models.Blob.ref_count <= 0,
+        )
+    )
+    db.after_commit(lambda: delete_unreferenced(released_hashes))
+    return len(released)
+
+
+async def delete_unreferenced(content_hashes: list[str]) -> int:
+    """
+    blob 행이 없는 저장소 객체를 지웁니다. release_blob(s)가 커밋된 뒤에 부릅니다.
+
+    그 사이 같은 내용이 다시 올라와 행이 생겼으면 객체를 남깁니다. 지운 수를 반환합니다.
+    """
+    storage = get_storage()
+    semaphore = asyncio.Semaphore(settings.batch_delete_concurrency)
+
+    async def delete_object(content_hash: str) -> None:
+        async with semaphore:
+            await storage.delete(blob_key(content_hash))
+
+    async with SessionLocal() as db:
+        # 행이 없으면 InnoDB가 그 자리에 gap lock을 걸어, 지우는 동안 같은 내용의 blob 등록을 막음
+        existing = set(
+            await db.scalars(
+                select(models.Blob.hash)
+                .where(models.Blob.hash.in_(content_hashes))
+                .with_for_update()
+            )
+        )
+        unreferenced = [h for h in content_hashes if h not in existing]
+        await asyncio.gather(*(delete_object(h) for h in unreferenced))
+        await db.commit()
+    return len(unreferenced)
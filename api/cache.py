@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    만료 시간과 최대 크기가 있는 프로세스 내 LRU 캐시
+
+    이벤트 루프 한 곳에서만 쓰는 것을 전제로 하므로 잠금을 두지 않습니다.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class DiskLRUCache:
+    """
+    전체 크기 제한(bytes)이 있는 디스크 LRU 캐시
+
+    파일 목록과 크기는 메모리에 두고, 처음 쓸 때 디렉터리를 훑어 다시 만듭니다.
+    조회할 때마다 파일의 mtime을 갱신하므로 재시작한 뒤에도 사용 순서가 유지됩니다.
+    파일 입출력을 하므로 run_in_threadpool로 부르는 것을 전제로 잠금을 둡니다.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, int] | None = None
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _load(self) -> OrderedDict[str, int]:
+        if self._entries is None:
+            found = []
+            for dirpath, _, filenames in os.walk(self.root):
+                for name in filenames:
+                    if name.startswith("."):
+                        continue
+                    stat = os.stat(os.path.join(dirpath, name))
+                    found.append((stat.st_mtime, name, stat.st_size))
+            found.sort()
+            self._entries = OrderedDict((name, size) for _, name, size in found)
+            self._total = sum(self._entries.values())
+        return self._entries
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entries = self._load()
+            if key not in entries:
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # 다른 프로세스가 지운 경우
+            with self._lock:
+                self._total -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}")
+        with open(tmp_path, "wb") as fp:
+            fp.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            entries = self._load()
+            self._total += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            while self._total > self.max_bytes and len(entries) > 1:
+                old_key, old_size = entries.popitem(last=False)
+                self._total -= old_size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries = self._load()
+            return {
+                "size": len(entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,111 @@
+"""
+파일 변경 기록(change feed) 조회와 대기
+
+클라이언트는 처음에 목록을 한 번 받고 /changes/latest로 받은 번호부터
+/changes?since=를 반복하거나 /changes/stream(SSE)을 열어 둡니다. 변경이 없으면
+요청은 커넥션 풀을 잡지 않은 채 기다리다가, 같은 프로세스에서 변경이 커밋되면
+바로 깨어납니다. 다른 프로세스(uvicorn worker, 다른 서버)의 변경은
+changes_poll_interval마다 다시 조회해 알아챕니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+from fastapi import HTTPException
+
+from . import models
+from .crud import change_crud
+from .database import SessionLocal
+from .settings import settings
+
+CURSOR_EXPIRED_DETAIL = "변경 기록이 만료되었습니다. 전체 목록을 다시 받아야 합니다"
+
+
+class CursorExpiredError(HTTPException):
+    """since 이후의 기록 일부가 지워져(또는 잘못된 번호라) 이어서 받을 수 없는 경우"""
+
+    def __init__(self) -> None:
+        super().__init__(status_code=410, detail=CURSOR_EXPIRED_DETAIL)
+
+
+class ChangeNotifier:
+    """변경을 기다리는 요청을 사용자별로 깨웁니다. (프로세스 안에서만)"""
+
+    def __init__(self) -> None:
+        self._waiters: dict[str, set[asyncio.Event]] = defaultdict(set)
+
+    def notify(self, user_ids: Iterable[str]) -> None:
+        for user_id in user_ids:
+            for event in self._waiters.get(user_id, ()):
+                event.set()
+
+    @contextmanager
+    def listen(self, user_id: str) -> Iterator[asyncio.Event]:
+        """조회하기 전에 등록해 두어, 조회와 대기 사이에 온 알림도 놓치지 않도록 합니다."""
+        event = asyncio.Event()
+        self._waiters[user_id].add(event)
+        try:
+            yield event
+        finally:
+            waiters = self._waiters[user_id]
+            waiters.discard(event)
+            if not waiters:
+                del self._waiters[user_id]
+
+
+notifier = ChangeNotifier()
+
+
+async def get_latest_cursor(user_id: str) -> int:
+    async with SessionLocal() as db:
+        return await change_crud.get_latest_seq(db, user_id) or 0
+
+
+async def read_changes(
+    user_id: str, since: int, limit: int
+) -> list[tuple[models.FileChange, str | None]]:
+    """
+    since 다음 변경을 조회합니다. 번호는 빈틈없이 매겨지므로, 첫 번호가 since + 1이
+    아니거나 변경이 없는데 마지막 번호가 since와 다르면 CursorExpiredError
+    """
+    async with SessionLocal() as db:
+        rows = await change_crud.list_changes(db, user_id, since, limit)
+        if rows:
+            if rows[0][0].seq != since + 1:
+                raise CursorExpiredError
+        elif (await change_crud.get_latest_seq(db, user_id) or 0) != since:
+            raise CursorExpiredError
+    return rows
+
+
+async def wait_for_changes(
+    user_id: str, since: int, limit: int, timeout: float
+) -> list[tuple[models.FileChange, str | None]]:
+    """변경이 생기거나 timeout(초)이 지날 때까지 기다렸다가 변경을 반환합니다."""
+    deadline = time.monotonic() + timeout
+    while True:
+        with notifier.listen(user_id) as event:
+            rows = await read_changes(user_id, since, limit)
+            remaining = deadline - time.monotonic()
+            if rows or remaining <= 0:
+                return rows
+            try:
+                await asyncio.wait_for(
+                    event.wait(), min(remaining, settings.changes_poll_interval)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+async def prune_changes() -> int:
+    """보관 기간이 지난 변경 기록을 지웁니다."""
+    async with SessionLocal() as db:
+        return await change_crud.prune_changes(
+            db,
+            older_than=datetime.now() - timedelta(days=settings.changes_retention_days),
+        )
@@ -0,0 +1,192 @@
+"""
+저장 시 압축(zstd)과 응답 압축에 쓰는 도구
+
+zstandard 패키지는 선택 사항입니다. 설치되어 있지 않으면 저장 시 압축은
+꺼지고, 응답 압축은 gzip만 사용합니다.
+"""
+from __future__ import annotations
+
+import io
+import os
+import zlib
+from typing import AsyncIterator
+
+from anyio import from_thread
+from starlette.concurrency import run_in_threadpool
+
+from .settings import settings
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+ZSTD = "zstd"
+
+# 압축 여부를 판단할 때 살펴보는 앞부분 크기
+SNIFF_SIZE = 64 * 1024
+# 앞부분을 시험 압축했을 때 이 비율보다 작아져야 압축해서 저장
+MIN_RATIO = 0.9
+
+# 이미 압축된 형식의 시그니처 (파일 앞부분)
+_COMPRESSED_MAGIC = (
+    b"\x1f\x8b",  # gzip
+    b"PK\x03\x04",  # zip, docx/xlsx/pptx, jar, apk
+    b"\x89PNG",
+    b"\xff\xd8\xff",  # jpeg
+    b"GIF8",
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"\xfd7zXZ",  # xz
+    b"BZh",
+    b"7z\xbc\xaf\x27\x1c",
+    b"Rar!",
+    b"OggS",
+    b"fLaC",
+    b"ID3",  # mp3
+    b"\x1a\x45\xdf\xa3",  # mkv, webm
+)
+
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+
+def looks_compressible(sample: bytes) -> bool:
+    """
+    앞부분을 보고 압축할 가치가 있는지 판단합니다.
+
+    알려진 압축 형식의 시그니처면 바로 제외하고, 아니면 앞부분을 빠르게
+    시험 압축해 줄어드는 비율로 판단합니다.
+    """
+    if len(sample) < 512 or sample.startswith(_COMPRESSED_MAGIC):
+        return False
+    # RIFF(webp, avi 등)와 ISO BMFF(mp4, mov, heic 등) 컨테이너
+    if sample[:4] == b"RIFF" and sample[8:12] in (b"WEBP", b"AVI "):
+        return False
+    if sample[4:8] == b"ftyp":
+        return False
+    return len(zlib.compress(sample, 1)) < len(sample) * MIN_RATIO
+
+
+def compress_file(src_path: str, dest_path: str, level: int) -> int:
+    """
+    src_path를 zstd로 압축해 dest_path에 기록하고 압축된 크기를 반환합니다. (블로킹 함수)
+
+    스트리밍으로 압축하므로 파일 전체를 메모리에 올리지 않습니다.
+    """
+    compressor = zstandard.ZstdCompressor(level=level)
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        compressor.copy_stream(src, dest, size=os.fstat(src.fileno()).st_size)
+    return os.path.getsize(dest_path)
+
+
+def maybe_compress_file(src_path: str, level: int) -> tuple[str | None, int]:
+    """
+    src_path가 압축할 만하면 그 자리에서 zstd로 바꿉니다. (블로킹 함수)
+
+    (encoding, 저장된 크기)를 반환하며, 압축하지 않았으면 encoding은 None입니다.
+    """
+    size = os.path.getsize(src_path)
+    if not zstd_available():
+        return None, size
+    with open(src_path, "rb") as fp:
+        sample = fp.read(SNIFF_SIZE)
+    if not looks_compressible(sample):
+        return None, size
+
+    dest_path = f"{src_path}.zst"
+    try:
+        compressed_size = compress_file(src_path, dest_path, level)
+        if compressed_size >= size * MIN_RATIO:
+            os.remove(dest_path)
+            return None, size
+        os.replace(dest_path, src_path)
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return ZSTD, compressed_size
+
+
+class _ChunkReader(io.RawIOBase):
+    """
+    비동기 청크 이터레이터를 스레드풀에서 읽는 파일 객체로 감쌉니다.
+
+    read()는 스레드풀 안에서만 부르며, 청크가 더 필요하면 이벤트 루프에서 받아 옵니다.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks.__aiter__()
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    async def _next_chunk(self) -> bytes:
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._buffer:
+            self._buffer = from_thread.run(self._next_chunk)
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+async def iter_decompressed(
+    chunks: AsyncIterator[bytes],
+    start: int = 0,
+    end: int | None = None,
+    chunk_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    zstd 스트림을 풀면서 원본 기준 [start, end] 구간만 내보냅니다.
+
+    한 번에 chunk_size바이트까지만 풀기 때문에, 아주 잘 압축된 blob(0으로 채운 파일 등)도
+    메모리 사용량이 청크 크기를 넘지 않습니다. zstd 프레임은 임의 위치에서 풀 수 없으므로
+    앞에서부터 풀어 start 이전은 버립니다.
+    """
+    if chunk_size is None:
+        chunk_size = settings.upload_chunk_size
+    reader = zstandard.ZstdDecompressor().stream_reader(_ChunkReader(chunks))
+    offset = 0
+    try:
+        while data := await run_in_threadpool(reader.read, chunk_size):
+            data_start, offset = offset, offset + len(data)
+            if offset <= start:
+                continue
+            if end is not None and data_start > end:
+                return
+            lo = max(start - data_start, 0)
+            hi = len(data) if end is None else min(end - data_start + 1, len(data))
+            yield data[lo:hi]
+            if end is not None and offset > end:
+                return
+    finally:
+        reader.close()
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
+
+
+def accepted_encodings(header: str | None) -> set[str]:
+    """Accept-Encoding 헤더에서 q=0이 아닌 인코딩 목록을 구합니다."""
+    if not header:
+        return set()
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
@@ -1,25 +1,30 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession as Session
 from .. import models
+from ..auth_cache import invalidate_user
 from ..schemas import auth_schema
 from datetime import datetime
 
 
-def get_user(db: Session, user_id: str):
+async def get_user(db: Session, user_id: str):
     """ID로 사용자를 조회합니다."""
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    return await db.get(models.User, user_id)
 
 
-def get_user_by_email(db: Session, email: str):
+async def get_user_by_email(db: Session, email: str):
     """이메일로 사용자를 조회합니다."""
-    return db.query(models.User).filter(models.User.email == email).first()
+    return await db.scalar(
+        select(models.User).where(models.User.email == email).limit(1)
+    )
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 10):
+async def get_users(db: Session, skip: int = 0, limit: int = 10):
     """사용자 목록을 조회합니다."""
-    return db.query(models.User).offset(skip).limit(limit).all()
+    result = await db.scalars(select(models.User).offset(skip).limit(limit))
+    return result.all()
 
 
-def create_user(
+async def create_user(
     db: Session,
     user_id: str,
     email: str,
@@ -36,12 +41,12 @@ def create_user(
         last_name=last_name,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-def update_user(
+async def update_user(
     db: Session,
     db_user: models.User,
     email: str = None,
@@ -56,6 +61,7 @@ def update_user(
     if last_name is not None:
         db_user.last_name = last_name
 
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_user(db_user.id)
     return db_user
@@ -0,0 +1,50 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import models
+
+
+async def get_blob(db: Session, content_hash: str):
+    return await db.get(models.Blob, content_hash)
+
+
+async def get_blobs(db: Session, content_hashes: list[str]) -> dict[str, models.Blob]:
+    result = await db.scalars(
+        select(models.Blob).where(models.Blob.hash.in_(content_hashes))
+    )
+    return {blob.hash: blob for blob in result.all()}
+
+
+async def get_storage_stats(db: Session) -> dict[str, int]:
+    """
+    논리 용량(파일 크기 합), 중복 제거 후 용량(blob 원본 크기 합)과
+    실제 저장 용량(압축 후 blob 크기 합)을 구합니다. 파일 수와 논리 용량에는
+    아직 실제로 지우지 않은 휴지통 파일도 들어갑니다.
+    """
+    file_count, logical_bytes = (
+        await db.execute(
+            select(
+                func.count(models.FileModel.id),
+                func.coalesce(func.sum(models.FileModel.size), 0),
+            )
+        )
+    ).one()
+    blob_count, unique_bytes, physical_bytes = (
+        await db.execute(
+            select(
+                func.count(models.Blob.hash),
+                func.coalesce(func.sum(models.Blob.size), 0),
+                func.coalesce(
+                    func.sum(func.coalesce(models.Blob.stored_size, models.Blob.size)),
+                    0,
+                ),
+            )
+        )
+    ).one()
+    return {
+        "file_count": file_count,
+        "blob_count": blob_count,
+        "logical_bytes": int(logical_bytes),
+        "unique_bytes": int(unique_bytes),
+        "physical_bytes": int(physical_bytes),
+    }
@@ -0,0 +1,83 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import models
+
+
+async def record_changes(
+    db: Session, action: str, file_models: list[models.FileModel]
+) -> set[str]:
+    """
+    파일 변경을 소유자별 변경 기록에 추가하고, 기록한 사용자 id를 반환합니다.
+
+    소유자 행을 UPDATE해 번호를 매기므로 같은 사용자의 다른 트랜잭션은 커밋할
+    때까지 기다립니다. 소유자가 없는(예전) 파일은 기록하지 않습니다.
+    커밋은 호출한 쪽에서 파일 변경과 함께 합니다.
+    """
+    by_owner: dict[str, list[models.FileModel]] = defaultdict(list)
+    for file_model in file_models:
+        if file_model.owner_id is not None:
+            by_owner[file_model.owner_id].append(file_model)
+
+    now = datetime.now()
+    for owner_id, owned in by_owner.items():
+        await db.execute(
+            update(models.User)
+            .where(models.User.id == owner_id)
+            .values(change_seq=models.User.change_seq + len(owned))
+        )
+        last_seq = await db.scalar(
+            select(models.User.change_seq).where(models.User.id == owner_id)
+        )
+        first_seq = last_seq - len(owned) + 1
+        await db.execute(
+            insert(models.FileChange),
+            [
+                {
+                    "user_id": owner_id,
+                    "seq": first_seq + i,
+                    "action": action,
+                    "file_id": file_model.id,
+                    "name": file_model.name,
+                    "folder_id": file_model.folder_id,
+                    "size": file_model.size,
+                    "content_hash": file_model.content_hash,
+                    "content_type": file_model.content_type,
+                    "created_at": now,
+                }
+                for i, file_model in enumerate(owned)
+            ],
+        )
+    return set(by_owner)
+
+
+async def get_latest_seq(db: Session, user_id: str) -> int | None:
+    return await db.scalar(
+        select(models.User.change_seq).where(models.User.id == user_id)
+    )
+
+
+async def list_changes(
+    db: Session, user_id: str, since: int, limit: int
+) -> list[tuple[models.FileChange, str | None]]:
+    """since 다음부터 변경 기록을 (변경, 현재 폴더 경로) 목록으로 순서대로 조회합니다."""
+    result = await db.execute(
+        select(models.FileChange, models.Folder.path)
+        .outerjoin(models.Folder, models.FileChange.folder_id == models.Folder.id)
+        .where(models.FileChange.user_id == user_id, models.FileChange.seq > since)
+        .order_by(models.FileChange.seq)
+        .limit(limit)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def prune_changes(db: Session, older_than: datetime) -> int:
+    """older_than보다 오래된 변경 기록을 지웁니다."""
+    result = await db.execute(
+        delete(models.FileChange).where(models.FileChange.created_at < older_than)
+    )
+    await db.commit()
+    return result.rowcount
@@ -1,38 +1,433 @@
-from sqlalchemy.orm import Session
-from .. import models
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 
-# 기존에 생성한 모델과 스키마 불러오기
-from .. import models
-from ..schemas.file_schema import FileResponse
+from sqlalchemy import and_, delete, insert, or_, select, union_all, update
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from sqlalchemy.orm import aliased
 
+from .. import models, quota
+from ..blob_store import release_blob, release_blobs
+from ..settings import settings
+from . import change_crud, version_crud
 
-def get_file(db: Session, file_id: str):
-    return db.query(models.FileModel).filter(models.FileModel.id == file_id).first()
+
+def accessible_by(user_id: str):
+    """user_id가 접근할 수 있는 파일 조건 (본인 소유이거나 소유자가 없는 파일)"""
+    return or_(
+        models.FileModel.owner_id == user_id, models.FileModel.owner_id.is_(None)
+    )
+
+
+def can_access(db_file: models.FileModel, user_id: str) -> bool:
+    return db_file.owner_id is None or db_file.owner_id == user_id
+
+
+def not_deleted():
+    """휴지통에 있지 않은 파일 조건"""
+    return models.FileModel.deleted_at.is_(None)
+
+
+async def get_file(
+    db: Session, file_id: str, user_id: str | None = None, trashed: bool = False
+):
+    """
+    파일을 조회합니다. user_id를 주면 그 사용자가 접근할 수 없는 파일은 None
+    휴지통에 있는 파일은 None이고, trashed=True면 휴지통에 있는 파일만 조회합니다.
+    """
+    db_file = await db.get(models.FileModel, file_id)
+    if db_file is None or (db_file.deleted_at is not None) != trashed:
+        return None
+    if user_id is not None and not can_access(db_file, user_id):
+        return None
+    return db_file
+
+
+async def get_files(
+    db: Session, file_ids: list[str], user_id: str | None = None, trashed: bool = False
+):
+    query = select(models.FileModel).where(models.FileModel.id.in_(file_ids))
+    query = query.where(models.FileModel.deleted_at.is_not(None) if trashed else not_deleted())
+    if user_id is not None:
+        query = query.where(accessible_by(user_id))
+    result = await db.scalars(query)
+    return result.all()
+
+
+async def get_file_by_name(db: Session, file_name: str):
+    return await db.scalar(
+        select(models.FileModel)
+        .where(models.FileModel.name == file_name, not_deleted())
+        .limit(1)
+    )
+
+
+# 목록 조회에서 정렬 가능한 컬럼 (각각 (folder_id, deleted_at, owner_id, 컬럼, id) 인덱스가 있음)
+SORT_COLUMNS = {
+    "name": models.FileModel.name,
+    "size": models.FileModel.size,
+    "created_at": models.FileModel.created_at,
+}
 
 
-def get_file_by_name(db: Session, file_name: str):
-    return db.query(models.FileModel).filter(models.FileModel.name == file_name).first()
+async def list_files(
+    db: Session,
+    folder_id: str | None,
+    sort: str = "name",
+    descending: bool = False,
+    limit: int = 50,
+    after: tuple | None = None,
+    user_id: str | None = None,
+):
+    """
+    폴더의 파일 목록을 키셋(커서) 방식으로 조회합니다.
+
+    after는 직전 페이지 마지막 항목의 (정렬 값, id)이며, OFFSET을 쓰지 않으므로
+    몇 번째 페이지든 인덱스 범위 스캔 한 번으로 조회됩니다. user_id를 주면
+    본인 파일과 소유자가 없는 파일을 (folder_id, deleted_at, owner_id, 정렬 컬럼, id)
+    인덱스에서 각각 limit개까지 읽은 뒤 합쳐서 limit개를 고릅니다. OR 조건 하나로
+    조회하면 다른 사용자의 파일까지 모두 읽은 뒤 걸러야 하기 때문입니다.
+    """
+    column = SORT_COLUMNS[sort]
+    id_column = models.FileModel.id
+    query = select(models.FileModel).where(
+        models.FileModel.folder_id == folder_id, not_deleted()
+    )
+
+    if after is not None:
+        value, last_id = after
+        if descending:
+            query = query.where(
+                or_(column < value, and_(column == value, id_column < last_id))
+            )
+        else:
+            query = query.where(
+                or_(column > value, and_(column == value, id_column > last_id))
+            )
+
+    def ordered(query, column, id_column):
+        if descending:
+            return query.order_by(column.desc(), id_column.desc())
+        return query.order_by(column.asc(), id_column.asc())
+
+    if user_id is None:
+        result = await db.scalars(ordered(query, column, id_column).limit(limit))
+        return result.all()
+
+    owner_id = models.FileModel.owner_id
+    branches = [
+        ordered(branch, column, id_column).limit(limit).subquery()
+        for branch in (query.where(owner_id == user_id), query.where(owner_id.is_(None)))
+    ]
+    merged = union_all(*(select(branch) for branch in branches)).subquery()
+    file = aliased(models.FileModel, merged)
+    result = await db.scalars(
+        ordered(select(file), getattr(file, column.key), file.id).limit(limit)
+    )
+    return result.all()
+
+
+# MySQL ngram 파서의 기본 토큰 길이(ngram_token_size), 이보다 짧은 검색어는 인덱스로 찾을 수 없음
+NGRAM_TOKEN_SIZE = 2
+
+
+def _fulltext_phrase(query: str) -> str:
+    """사용자 입력을 BOOLEAN MODE 구문 검색어로 바꿉니다. (연산자 문자는 공백으로)"""
+    return '"' + re.sub(r'[+\-<>()~*"@]', " ", query).strip() + '"'
+
+
+async def search_files(
+    db: Session,
+    *,
+    name: str | None = None,
+    name_match: str = "substring",
+    text: str | None = None,
+    content_type: str | None = None,
+    min_size: int | None = None,
+    max_size: int | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    limit: int = 50,
+    after: tuple | None = None,
+    user_id: str | None = None,
+) -> list[tuple[models.FileModel, models.Folder | None]]:
+    """
+    조건에 맞는 파일을 (파일, 폴더) 목록으로 최신순 조회합니다.
+
+    MySQL에서는 이름 부분 일치와 본문(OCR 등으로 추출한 글자) 검색에 ngram
+    FULLTEXT 인덱스를 쓰고, 다른 DB(SQLite 등)에서는 LIKE로 대신합니다.
+    after는 직전 페이지 마지막 항목의 (created_at, id)이며, user_id를 주면
+    그 사용자가 접근할 수 있는 파일만 조회합니다.
+    """
+    use_fulltext = db.get_bind().dialect.name == "mysql"
+    FileModel = models.FileModel
+    query = (
+        select(FileModel, models.Folder)
+        .outerjoin(models.Folder, FileModel.folder_id == models.Folder.id)
+        .where(not_deleted())
+    )
+    if user_id is not None:
+        query = query.where(accessible_by(user_id))
 
+    if name:
+        if name_match == "prefix":
+            query = query.where(FileModel.name.startswith(name, autoescape=True))
+        else:
+            query = query.where(FileModel.name.contains(name, autoescape=True))
+            if use_fulltext and len(name) >= NGRAM_TOKEN_SIZE:
+                # 인덱스로 후보를 좁히고 LIKE로 정확히 거름
+                query = query.where(
+                    match(FileModel.name, against=_fulltext_phrase(name)).in_boolean_mode()
+                )
 
-def get_files(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.FileModel).offset(skip).limit(limit).all()
+    if text:
+        if use_fulltext:
+            text_condition = match(
+                models.FileText.text, against=_fulltext_phrase(text)
+            ).in_boolean_mode()
+        else:
+            text_condition = models.FileText.text.contains(text, autoescape=True)
+        query = query.join(
+            models.FileText, models.FileText.content_hash == FileModel.content_hash
+        ).where(text_condition)
 
+    if content_type:
+        # 'image/*'처럼 주면 주 형식 전체
+        if content_type.endswith("/*"):
+            query = query.where(
+                FileModel.content_type.startswith(content_type[:-1], autoescape=True)
+            )
+        else:
+            query = query.where(FileModel.content_type == content_type)
+    if min_size is not None:
+        query = query.where(FileModel.size >= min_size)
+    if max_size is not None:
+        query = query.where(FileModel.size <= max_size)
+    if created_after is not None:
+        query = query.where(FileModel.created_at >= created_after)
+    if created_before is not None:
+        query = query.where(FileModel.created_at < created_before)
 
-def create_file(db: Session, file_id: str, file_name: str, file_path: str, file_size: int):
+    if after is not None:
+        created_at, last_id = after
+        query = query.where(
+            or_(
+                FileModel.created_at < created_at,
+                and_(FileModel.created_at == created_at, FileModel.id < last_id),
+            )
+        )
+    query = query.order_by(FileModel.created_at.desc(), FileModel.id.desc())
+
+    result = await db.execute(query.limit(limit))
+    return [tuple(row) for row in result.all()]
+
+
+async def create_file(
+    db: Session,
+    file_id: str,
+    file_name: str,
+    file_path: str,
+    file_size: int,
+    content_hash: str | None = None,
+    content_type: str | None = None,
+    folder_id: str | None = None,
+    owner_id: str | None = None,
+):
+    """
+    파일 행과 변경 기록을 추가하고 flush합니다.
+    커밋은 호출한 쪽에서 사용량 변경과 함께 합니다.
+    """
     db_file = models.FileModel(
         id=file_id,
         name=file_name,
+        folder_id=folder_id,
+        owner_id=owner_id,
         path=file_path,
         size=file_size,
+        content_hash=content_hash,
+        content_type=content_type,
         created_at=datetime.now(),
     )
     db.add(db_file)
-    db.commit()
-    db.refresh(db_file)
+    await db.flush()
+    await change_crud.record_changes(db, "created", [db_file])
     return db_file
 
 
-def delete_file(db: Session, db_file: models.FileModel) -> None:
-    db.delete(db_file)
-    db.commit()
+async def trash_file(db: Session, db_file: models.FileModel) -> None:
+    """파일을 휴지통으로 옮깁니다. 커밋은 호출한 쪽에서 합니다."""
+    await trash_files(db, [db_file])
+
+
+async def replace_content(
+    db: Session, db_file: models.FileModel, blob: models.Blob, base_hash: str
+) -> bool:
+    """
+    파일 내용을 blob으로 바꾸고 버전 번호를 올립니다.
+
+    이전 내용은 버전으로 남기고(버전을 보관하지 않도록 설정했으면 blob 참조를 놓음),
+    내용이 base_hash이고 버전이 db_file.version일 때만 바꿉니다. 그 사이 다른
+    요청이 내용을 바꿨으면 False. created_at을 수정 시각으로도 쓰므로 함께 갱신합니다.
+    사용량 차이는 호출한 쪽에서 반영하고, 커밋도 호출한 쪽에서 합니다.
+    """
+    now = datetime.now()
+    result = await db.execute(
+        update(models.FileModel)
+        .where(
+            models.FileModel.id == db_file.id,
+            models.FileModel.content_hash == base_hash,
+            models.FileModel.version == db_file.version,
+        )
+        .values(
+            path=blob.path,
+            size=blob.size,
+            content_hash=blob.hash,
+            created_at=now,
+            version=models.FileModel.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    # db_file은 아직 바뀌기 전 값
+    if settings.version_keep_count > 0:
+        version_crud.add_version(db, db_file, replaced_at=now)
+    else:
+        await release_blob(db, base_hash)
+    await db.refresh(db_file)
+    await change_crud.record_changes(db, "modified", [db_file])
+    return True
+
+
+async def create_files(db: Session, rows: list[dict]) -> None:
+    """여러 파일 행을 INSERT 한 번으로 추가하고 변경을 기록합니다. 커밋은 호출한 쪽에서 합니다."""
+    if rows:
+        await db.execute(insert(models.FileModel), rows)
+        await change_crud.record_changes(
+            db, "created", [models.FileModel(**row) for row in rows]
+        )
+
+
+async def trash_files(db: Session, db_files: list[models.FileModel]) -> None:
+    """
+    파일들을 휴지통으로 옮깁니다. (deleted_at 기록)
+
+    UPDATE 한 번이면 되고 저장소는 건드리지 않으므로 파일 크기나 수와 관계없이
+    빨리 끝납니다. 실제로 지우는 일은 trash_retention_days 뒤 정리 작업이 하며,
+    그때까지는 사용량에도 그대로 포함됩니다. 동기화 클라이언트에는 삭제로 기록합니다.
+    커밋은 호출한 쪽에서 합니다.
+    """
+    if not db_files:
+        return
+    now = datetime.now()
+    purge_at = now + timedelta(days=settings.trash_retention_days)
+    await db.execute(
+        update(models.FileModel)
+        .where(models.FileModel.id.in_([db_file.id for db_file in db_files]), not_deleted())
+        .values(deleted_at=now, purge_at=purge_at)
+        .execution_options(synchronize_session=False)
+    )
+    for db_file in db_files:
+        db_file.deleted_at, db_file.purge_at = now, purge_at
+    await change_crud.record_changes(db, "deleted", db_files)
+
+
+async def restore_files(db: Session, db_files: list[models.FileModel]) -> None:
+    """휴지통에 있는 파일들을 원래 자리로 되돌립니다. 커밋은 호출한 쪽에서 합니다."""
+    if not db_files:
+        return
+    await db.execute(
+        update(models.FileModel)
+        .where(
+            models.FileModel.id.in_([db_file.id for db_file in db_files]),
+            models.FileModel.deleted_at.is_not(None),
+        )
+        .values(deleted_at=None, purge_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    for db_file in db_files:
+        db_file.deleted_at = db_file.purge_at = None
+    await change_crud.record_changes(db, "created", db_files)
+
+
+async def list_trash(
+    db: Session, user_id: str, limit: int = 50, after: tuple | None = None
+) -> list[tuple[models.FileModel, models.Folder | None]]:
+    """
+    휴지통에 있는 파일을 (파일, 폴더) 목록으로 최근에 지운 순서대로 조회합니다.
+    after는 직전 페이지 마지막 항목의 (deleted_at, id)입니다.
+    """
+    FileModel = models.FileModel
+    query = (
+        select(FileModel, models.Folder)
+        .outerjoin(models.Folder, FileModel.folder_id == models.Folder.id)
+        .where(FileModel.deleted_at.is_not(None), accessible_by(user_id))
+    )
+    if after is not None:
+        deleted_at, last_id = after
+        query = query.where(
+            or_(
+                FileModel.deleted_at < deleted_at,
+                and_(FileModel.deleted_at == deleted_at, FileModel.id < last_id),
+            )
+        )
+    query = query.order_by(FileModel.deleted_at.desc(), FileModel.id.desc())
+    result = await db.execute(query.limit(limit))
+    return [tuple(row) for row in result.all()]
+
+
+async def schedule_purge(db: Session, user_id: str, file_ids: list[str] | None = None) -> int:
+    """
+    휴지통에 있는 파일(file_ids가 없으면 전부)을 바로 지우도록 정리 작업에 넘깁니다.
+    실제로 지우는 일은 정리 작업이 하므로 요청은 바로 끝납니다. 커밋은 호출한 쪽에서 합니다.
+    """
+    query = (
+        update(models.FileModel)
+        .where(models.FileModel.deleted_at.is_not(None), accessible_by(user_id))
+        .values(purge_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    if file_ids is not None:
+        query = query.where(models.FileModel.id.in_(file_ids))
+    result = await db.execute(query)
+    return result.rowcount
+
+
+async def get_purgeable_files(
+    db: Session, now: datetime, limit: int
+) -> list[models.FileModel]:
+    """
+    지울 때가 된 휴지통 파일을 limit개까지 조회하고 행을 잠급니다.
+
+    잠금은 커밋까지 유지되므로 그 사이 되돌리기 요청은 기다리게 되고, 다른 서버의
+    정리 작업은 잠긴 행을 건너뜁니다.
+    """
+    result = await db.scalars(
+        select(models.FileModel)
+        .where(models.FileModel.purge_at <= now)
+        .order_by(models.FileModel.purge_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return result.all()
+
+
+async def purge_files(db: Session, db_files: list[models.FileModel]) -> None:
+    """
+    파일 행과 버전 기록을 실제로 지우고, 더 이상 참조되지 않는 blob은 저장소에서
+    커밋한 뒤에 지웁니다. 소유자별 사용량도 줄입니다. (변경 기록은 휴지통으로 옮길 때 남김)
+    커밋은 호출한 쪽에서 합니다.
+    """
+    if not db_files:
+        return
+    await version_crud.delete_file_versions(db, [db_file.id for db_file in db_files])
+    await db.execute(
+        delete(models.FileModel).where(
+            models.FileModel.id.in_([db_file.id for db_file in db_files])
+        )
+    )
+    await quota.refund(db, quota.usage_by_owner(db_files))
+    await release_blobs(
+        db,
+        [db_file.content_hash for db_file in db_files if db_file.content_hash is not None],
+    )
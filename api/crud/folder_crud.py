@@ -0,0 +1,190 @@
+import posixpath
+from datetime import datetime
+
+from sqlalchemy import func, literal, not_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import models
+from . import file_crud
+
+
+def _subtree_filter(path: str):
+    """path 폴더 자신과 모든 하위 폴더를 고르는 조건 (path 인덱스 범위 스캔)"""
+    return or_(
+        models.Folder.path == path,
+        models.Folder.path.startswith(path + "/", autoescape=True),
+    )
+
+
+async def get_folder(db: Session, folder_id: str):
+    return await db.get(models.Folder, folder_id)
+
+
+async def get_folders(db: Session, folder_ids: list[str]):
+    result = await db.scalars(
+        select(models.Folder).where(models.Folder.id.in_(folder_ids))
+    )
+    return result.all()
+
+
+async def get_folder_by_path(db: Session, path: str):
+    return await db.scalar(select(models.Folder).where(models.Folder.path == path))
+
+
+async def list_child_folders(
+    db: Session, parent_id: str | None, limit: int = 50, after: str | None = None
+):
+    """하위 폴더를 이름순으로 조회합니다. after는 직전 페이지 마지막 폴더 이름입니다."""
+    query = select(models.Folder).where(models.Folder.parent_id == parent_id)
+    if after is not None:
+        query = query.where(models.Folder.name > after)
+    result = await db.scalars(query.order_by(models.Folder.name).limit(limit))
+    return result.all()
+
+
+async def create_folder(
+    db: Session, folder_id: str, name: str, parent: models.Folder | None
+):
+    parent_path = parent.path if parent is not None else "/"
+    db_folder = models.Folder(
+        id=folder_id,
+        name=name,
+        parent_id=parent.id if parent is not None else None,
+        path=posixpath.join(parent_path, name),
+        created_at=datetime.now(),
+    )
+    db.add(db_folder)
+    await db.commit()
+    await db.refresh(db_folder)
+    return db_folder
+
+
+async def move_folder(
+    db: Session,
+    db_folder: models.Folder,
+    new_parent: models.Folder | None,
+    new_name: str,
+):
+    """
+    폴더를 옮기거나 이름을 바꿉니다.
+
+    하위 폴더가 몇 개든 path 접두사를 바꾸는 UPDATE 한 번으로 끝나며,
+    파일은 folder_id로 폴더를 참조하므로 파일 행과 실제 파일은 그대로입니다.
+    """
+    old_path = db_folder.path
+    new_path = posixpath.join(new_parent.path if new_parent else "/", new_name)
+
+    await db.execute(
+        update(models.Folder)
+        .where(_subtree_filter(old_path))
+        .values(
+            path=literal(new_path) + func.substr(models.Folder.path, len(old_path) + 1)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(models.Folder)
+        .where(models.Folder.id == db_folder.id)
+        .values(
+            name=new_name, parent_id=new_parent.id if new_parent else None
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(db_folder)
+    return db_folder
+
+
+async def get_subtree_stats(
+    db: Session, db_folder: models.Folder, user_id: str
+) -> dict[str, int]:
+    """
+    하위 폴더를 포함한 폴더 수와, user_id가 접근할 수 있는 파일의 수와 전체 크기를 구합니다.
+    """
+    folder_ids = select(models.Folder.id).where(_subtree_filter(db_folder.path))
+    folder_count = await db.scalar(
+        select(func.count()).select_from(folder_ids.subquery())
+    )
+    file_count, total_size = (
+        await db.execute(
+            select(
+                func.count(models.FileModel.id),
+                func.coalesce(func.sum(models.FileModel.size), 0),
+            ).where(
+                models.FileModel.folder_id.in_(folder_ids),
+                models.FileModel.deleted_at.is_(None),
+                file_crud.accessible_by(user_id),
+            )
+        )
+    ).one()
+    return {
+        # 자기 자신은 제외
+        "folder_count": folder_count - 1,
+        "file_count": file_count,
+        "total_size": int(total_size),
+    }
+
+
+async def list_subtree(
+    db: Session, db_folder: models.Folder, user_id: str | None = None
+):
+    """
+    하위 트리의 폴더 목록과 (파일, 폴더 경로) 목록을 경로순으로 조회합니다.
+    user_id를 주면 그 사용자가 접근할 수 있는 파일만 조회합니다.
+    """
+    folders = (
+        await db.scalars(
+            select(models.Folder)
+            .where(_subtree_filter(db_folder.path))
+            .order_by(models.Folder.path)
+        )
+    ).all()
+    query = (
+        select(models.FileModel, models.Folder.path)
+        .join(models.Folder, models.FileModel.folder_id == models.Folder.id)
+        .where(_subtree_filter(db_folder.path), models.FileModel.deleted_at.is_(None))
+        .order_by(models.Folder.path, models.FileModel.name, models.FileModel.id)
+    )
+    if user_id is not None:
+        query = query.where(file_crud.accessible_by(user_id))
+    files = (await db.execute(query)).all()
+    return folders, files
+
+
+async def is_empty(db: Session, db_folder: models.Folder, user_id: str) -> bool:
+    """
+    하위 폴더와 파일이 없는지 확인합니다. 휴지통에 있는 파일은 user_id가 접근할 수
+    있는 것만 무시합니다. (다른 사용자의 휴지통 파일은 폴더를 지우면 되돌릴 곳이 바뀜)
+    """
+    has_child = await db.scalar(
+        select(models.Folder.id).where(models.Folder.parent_id == db_folder.id).limit(1)
+    )
+    if has_child is not None:
+        return False
+    has_file = await db.scalar(
+        select(models.FileModel.id)
+        .where(
+            models.FileModel.folder_id == db_folder.id,
+            or_(
+                models.FileModel.deleted_at.is_(None),
+                not_(file_crud.accessible_by(user_id)),
+            ),
+        )
+        .limit(1)
+    )
+    return has_file is None
+
+
+async def delete_folder(db: Session, db_folder: models.Folder, user_id: str) -> None:
+    """빈 폴더를 지웁니다. is_empty(db, db_folder, user_id)로 확인한 뒤 부릅니다."""
+    # 휴지통에 남은 파일은 되돌리면 루트로 가도록 폴더 참조를 끊음
+    await db.execute(
+        update(models.FileModel)
+        .where(
+            models.FileModel.folder_id == db_folder.id, file_crud.accessible_by(user_id)
+        )
+        .values(folder_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.delete(db_folder)
+    await db.commit()
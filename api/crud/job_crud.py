@@ -0,0 +1,126 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import models
+
+
+def add_job(
+    db: Session,
+    job_type: str,
+    file_id: str | None = None,
+    payload: dict | None = None,
+    priority: int = 0,
+    max_attempts: int = 3,
+) -> models.Job:
+    """작업을 세션에 추가합니다. 커밋은 호출한 쪽에서 파일 변경과 함께 합니다."""
+    job = models.Job(
+        id=str(uuid.uuid4()),
+        type=job_type,
+        file_id=file_id,
+        payload=payload,
+        status="pending",
+        priority=priority,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=datetime.now(),
+    )
+    db.add(job)
+    return job
+
+
+async def claim_jobs(
+    db: Session, job_type: str, limit: int, worker_id: str
+) -> list[models.Job]:
+    """
+    실행할 작업을 가져와 running으로 바꿉니다.
+
+    SKIP LOCKED로 다른 워커가 잡은 행은 건너뛰므로 같은 작업을 두 번 가져가지 않습니다.
+    """
+    now = datetime.now()
+    jobs = (
+        await db.scalars(
+            select(models.Job)
+            .where(
+                models.Job.status == "pending",
+                models.Job.type == job_type,
+                models.Job.run_after <= now,
+            )
+            .order_by(models.Job.priority.desc(), models.Job.run_after)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    ).all()
+    for job in jobs:
+        job.status = "running"
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_at = now
+    await db.commit()
+    return list(jobs)
+
+
+async def finish_job(db: Session, job_id: str, result: dict | None) -> None:
+    await db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id)
+        .values(
+            status="succeeded",
+            result=result,
+            last_error=None,
+            locked_by=None,
+            locked_at=None,
+            updated_at=datetime.now(),
+        )
+    )
+    await db.commit()
+
+
+async def fail_job(db: Session, job: models.Job, error: str, retry_delay: float) -> None:
+    """실패를 기록하고, 시도 횟수가 남았으면 retry_delay초 뒤에 다시 실행되게 합니다."""
+    retry = job.attempts < job.max_attempts
+    await db.execute(
+        update(models.Job)
+        .where(models.Job.id == job.id)
+        .values(
+            status="pending" if retry else "failed",
+            last_error=error,
+            run_after=datetime.now() + timedelta(seconds=retry_delay),
+            locked_by=None,
+            locked_at=None,
+            updated_at=datetime.now(),
+        )
+    )
+    await db.commit()
+
+
+async def release_stale_jobs(db: Session, older_than: datetime) -> int:
+    """워커가 죽어 running으로 남은 작업을 다시 pending으로 돌립니다."""
+    result = await db.execute(
+        update(models.Job)
+        .where(models.Job.status == "running", models.Job.locked_at < older_than)
+        .values(status="pending", locked_by=None, locked_at=None)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_file_jobs(db: Session, file_id: str) -> list[models.Job]:
+    result = await db.scalars(
+        select(models.Job)
+        .where(models.Job.file_id == file_id)
+        .order_by(models.Job.created_at)
+    )
+    return list(result.all())
+
+
+async def get_job_counts(db: Session) -> list[tuple[str, str, int]]:
+    """작업 종류와 상태별 개수를 구합니다."""
+    result = await db.execute(
+        select(models.Job.type, models.Job.status, func.count())
+        .group_by(models.Job.type, models.Job.status)
+        .order_by(models.Job.type, models.Job.status)
+    )
+    return [tuple(row) for row in result.all()]
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import models
+from ..settings import settings
+
+
+def _next_expiry() -> datetime:
+    return datetime.now() + timedelta(seconds=settings.upload_session_ttl)
+
+
+async def get_session(db: Session, session_id: str):
+    return await db.get(models.UploadSession, session_id)
+
+
+async def get_parts(db: Session, session_id: str):
+    result = await db.scalars(
+        select(models.UploadPart)
+        .where(models.UploadPart.session_id == session_id)
+        .order_by(models.UploadPart.part_number)
+    )
+    return result.all()
+
+
+async def create_session(
+    db: Session,
+    session_id: str,
+    file_name: str,
+    total_size: int | None,
+    folder_id: str | None = None,
+    owner_id: str | None = None,
+):
+    db_session = models.UploadSession(
+        id=session_id,
+        file_name=file_name,
+        folder_id=folder_id,
+        owner_id=owner_id,
+        total_size=total_size,
+        status="pending",
+        created_at=datetime.now(),
+        expires_at=_next_expiry(),
+    )
+    db.add(db_session)
+    await db.commit()
+    await db.refresh(db_session)
+    return db_session
+
+
+async def upsert_part(
+    db: Session,
+    db_session: models.UploadSession,
+    part_number: int,
+    size: int,
+    content_hash: str,
+):
+    """파트를 기록합니다. 같은 번호의 파트가 다시 올라오면 덮어씁니다."""
+    db_part = await db.get(models.UploadPart, (db_session.id, part_number))
+    if db_part is None:
+        db_part = models.UploadPart(session_id=db_session.id, part_number=part_number)
+        db.add(db_part)
+    db_part.size = size
+    db_part.content_hash = content_hash
+    db_part.created_at = datetime.now()
+    # 활동이 있는 세션은 만료 시간을 연장
+    db_session.expires_at = _next_expiry()
+    await db.commit()
+    await db.refresh(db_part)
+    return db_part
+
+
+async def claim_session(db: Session, db_session: models.UploadSession) -> bool:
+    """
+    pending 상태의 세션을 completing으로 바꿉니다.
+
+    조건부 UPDATE로 처리하므로 완료 요청이 동시에 들어와도 하나만 성공합니다.
+    """
+    result = await db.execute(
+        update(models.UploadSession)
+        .where(
+            models.UploadSession.id == db_session.id,
+            models.UploadSession.status == "pending",
+        )
+        .values(status="completing", expires_at=_next_expiry())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await db.refresh(db_session)
+    return result.rowcount == 1
+
+
+async def release_session(db: Session, db_session: models.UploadSession) -> None:
+    """완료 처리에 실패한 세션을 다시 pending 상태로 되돌립니다."""
+    await db.rollback()
+    db_session.status = "pending"
+    await db.commit()
+
+
+async def complete_session(
+    db: Session, db_session: models.UploadSession, file_id: str
+) -> None:
+    """세션을 완료 상태로 바꾸고 더 이상 필요 없는 파트 기록을 지웁니다."""
+    await db.execute(
+        delete(models.UploadPart).where(models.UploadPart.session_id == db_session.id)
+    )
+    db_session.status = "completed"
+    db_session.file_id = file_id
+
+
+async def delete_session(db: Session, db_session: models.UploadSession) -> None:
+    await db.execute(
+        delete(models.UploadPart).where(models.UploadPart.session_id == db_session.id)
+    )
+    await db.delete(db_session)
+    await db.commit()
+
+
+async def get_expired_sessions(db: Session, now: datetime, limit: int = 100):
+    """
+    정리할 만료 세션을 조회합니다.
+
+    완료 처리 중(completing)인 세션은 파트를 이어 붙이는 중일 수 있으므로 제외하고,
+    완료 도중 서버가 죽어 그 상태로 남은 세션만 upload_completing_grace가 더 지난 뒤 정리합니다.
+    """
+    session = models.UploadSession
+    result = await db.scalars(
+        select(session)
+        .where(
+            or_(
+                and_(session.status != "completing", session.expires_at < now),
+                and_(
+                    session.status == "completing",
+                    session.expires_at
+                    < now - timedelta(seconds=settings.upload_completing_grace),
+                ),
+            )
+        )
+        .limit(limit)
+    )
+    return result.all()
@@ -0,0 +1,134 @@
+from datetime import datetime
+
+from sqlalchemy import delete, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import models
+from ..blob_store import release_blobs
+
+
+def add_version(
+    db: Session, db_file: models.FileModel, replaced_at: datetime
+) -> models.FileVersion:
+    """
+    파일의 현재 내용(db_file, 바뀌기 전 값)을 버전으로 남깁니다.
+
+    파일이 가지고 있던 blob 참조를 버전이 넘겨받으므로 참조 수는 바꾸지 않습니다.
+    커밋은 호출한 쪽에서 합니다.
+    """
+    db_version = models.FileVersion(
+        file_id=db_file.id,
+        version=db_file.version,
+        content_hash=db_file.content_hash,
+        size=db_file.size,
+        blob_hash=db_file.content_hash,
+        base_hash=None,
+        created_at=db_file.created_at,
+        replaced_at=replaced_at,
+    )
+    db.add(db_version)
+    return db_version
+
+
+async def get_version(db: Session, file_id: str, version: int):
+    return await db.get(models.FileVersion, (file_id, version))
+
+
+async def list_versions(db: Session, file_id: str) -> list[models.FileVersion]:
+    """파일의 이전 버전을 최신순으로 조회합니다."""
+    result = await db.scalars(
+        select(models.FileVersion)
+        .where(models.FileVersion.file_id == file_id)
+        .order_by(models.FileVersion.version.desc())
+    )
+    return result.all()
+
+
+async def replace_storage(
+    db: Session, db_version: models.FileVersion, blob_hash: str, base_hash: str | None
+) -> bool:
+    """
+    버전 내용을 저장한 방식(blob_hash, base_hash)을 바꿉니다.
+
+    그 사이 다른 작업이 먼저 바꿨거나 버전이 지워졌으면 False. 새 blob 참조는
+    호출한 쪽에서 미리 늘리고, 이전 blob 참조는 여기서 놓습니다. 커밋은 호출한 쪽에서 합니다.
+    """
+    version = models.FileVersion
+    base_condition = (
+        version.base_hash.is_(None)
+        if db_version.base_hash is None
+        else version.base_hash == db_version.base_hash
+    )
+    result = await db.execute(
+        update(version)
+        .where(
+            version.file_id == db_version.file_id,
+            version.version == db_version.version,
+            version.blob_hash == db_version.blob_hash,
+            base_condition,
+        )
+        .values(blob_hash=blob_hash, base_hash=base_hash)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    await release_blobs(db, _blob_refs([db_version]))
+    await db.refresh(db_version)
+    return True
+
+
+def _blob_refs(db_versions: list[models.FileVersion]) -> list[str]:
+    refs = []
+    for db_version in db_versions:
+        refs.append(db_version.blob_hash)
+        if db_version.base_hash is not None:
+            refs.append(db_version.base_hash)
+    return refs
+
+
+async def delete_versions(db: Session, db_versions: list[models.FileVersion]) -> int:
+    """버전 행을 지우고 blob 참조를 놓습니다. 커밋은 호출한 쪽에서 합니다."""
+    if not db_versions:
+        return 0
+    result = await db.execute(
+        delete(models.FileVersion).where(
+            tuple_(models.FileVersion.file_id, models.FileVersion.version).in_(
+                [(db_version.file_id, db_version.version) for db_version in db_versions]
+            )
+        )
+    )
+    await release_blobs(db, _blob_refs(db_versions))
+    return result.rowcount
+
+
+async def delete_file_versions(db: Session, file_ids: list[str]) -> int:
+    """파일들의 모든 버전을 지웁니다. 커밋은 호출한 쪽에서 합니다."""
+    if not file_ids:
+        return 0
+    db_versions = (
+        await db.scalars(
+            select(models.FileVersion).where(models.FileVersion.file_id.in_(file_ids))
+        )
+    ).all()
+    return await delete_versions(db, list(db_versions))
+
+
+async def get_expired_versions(
+    db: Session, keep_count: int, older_than: datetime | None, limit: int
+) -> list[models.FileVersion]:
+    """
+    보관 조건을 벗어난 버전을 limit개까지 조회합니다.
+
+    최근 keep_count개(현재 버전 바로 앞부터)에 들지 않거나 older_than 전에 바뀐 버전입니다.
+    """
+    version = models.FileVersion
+    expired = version.version < models.FileModel.version - keep_count
+    if older_than is not None:
+        expired = or_(expired, version.replaced_at < older_than)
+    result = await db.scalars(
+        select(version)
+        .join(models.FileModel, models.FileModel.id == version.file_id)
+        .where(expired)
+        .limit(limit)
+    )
+    return result.all()
@@ -1,23 +1,81 @@
-from datetime import datetime
+import logging
+from typing import Awaitable, Callable
 
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 
+from . import metrics
+from .settings import settings
 
-db_url = "mysql+pymysql://root@db:3306/demo?charset=utf8"
+logger = logging.getLogger(__name__)
 
-engine = create_engine(db_url, echo=True)
+_AFTER_COMMIT = "after_commit"
+_ON_ROLLBACK = "on_rollback"
+
+
+class Session(AsyncSession):
+    """
+    트랜잭션 결과에 맞춰 실행할 작업을 등록할 수 있는 세션
+
+    저장소 객체처럼 DB 트랜잭션에 묶이지 않는 변경을 커밋된 경우에만 반영하거나,
+    롤백될 때 되돌리는 데 씁니다. 커밋하지 않고 닫으면 롤백과 같이 처리합니다.
+    """
+
+    def after_commit(self, callback: Callable[[], Awaitable[object]]) -> None:
+        """커밋이 성공한 뒤에 실행합니다. 실패해도 커밋은 되돌리지 않고 로그만 남깁니다."""
+        self.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+    def on_rollback(self, callback: Callable[[], Awaitable[object]]) -> None:
+        """롤백하기 직전, 이 트랜잭션이 잡은 잠금을 쥔 채로 실행합니다."""
+        self.info.setdefault(_ON_ROLLBACK, []).append(callback)
+
+    async def _run_callbacks(self, name: str) -> None:
+        for callback in self.info.pop(name, []):
+            try:
+                await callback()
+            except Exception:
+                logger.exception("세션 %s 작업 실패", name)
+
+    async def commit(self) -> None:
+        await super().commit()
+        self.info.pop(_ON_ROLLBACK, None)
+        await self._run_callbacks(_AFTER_COMMIT)
+
+    async def rollback(self) -> None:
+        self.info.pop(_AFTER_COMMIT, None)
+        try:
+            await self._run_callbacks(_ON_ROLLBACK)
+        finally:
+            await super().rollback()
+
+    async def close(self) -> None:
+        self.info.pop(_AFTER_COMMIT, None)
+        try:
+            await self._run_callbacks(_ON_ROLLBACK)
+        finally:
+            await super().close()
+
+
+engine = create_async_engine(
+    str(settings.db_url),
+    echo=settings.db_echo,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    # MySQL wait_timeout보다 먼저 연결을 재생성해 끊어진 연결을 쓰지 않도록 함
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=True,
+)
+metrics.instrument_engine(engine)
 
 # DB 세션 생성하기
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(
+    bind=engine, class_=Session, autoflush=False, expire_on_commit=False
+)
 
 # Base class 생성하기
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,375 @@
+"""
+rsync 방식의 블록 단위 차분(delta) 업로드
+
+서명(signature)은 기존 내용을 block_size 단위로 나눈 블록마다 굴릴 수 있는(rolling)
+약한 체크섬(adler32)과 강한 해시(blake2b 16 bytes)를 모은 것으로, 내용 해시마다
+한 번만 계산해 blob_signatures 테이블에 보관합니다.
+
+클라이언트는 새 내용을 한 바이트씩 굴리며 서명과 같은 블록을 찾고, 차분을 다음
+명령의 연속으로 보냅니다. (정수는 big-endian)
+
+    b"C" + u32 시작 블록 번호 + u32 블록 수    기존 내용에서 복사
+    b"L" + u32 길이 + 데이터                   새 데이터
+
+서버는 차분을 읽으면서 기존 blob의 필요한 구간과 새 데이터를 이어 임시 파일에
+쓰므로, 두 버전 모두 메모리에 올리지 않습니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import mmap
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .background import run_in_process
+from .blob_store import open_blob
+from .compression import ZSTD
+from .settings import settings
+from .storage import StoredUpload, get_storage
+
+STRONG_SIZE = 16
+_ENTRY = struct.Struct(f">I{STRONG_SIZE}s")  # 블록 하나의 서명 (약한 체크섬, 강한 해시)
+_COMMAND = struct.Struct(">cII")  # 복사 명령
+_LITERAL = struct.Struct(">cI")  # 새 데이터 명령의 머리
+_ADLER_MOD = 65521
+
+
+class DeltaError(Exception):
+    """형식이 잘못되었거나 서명과 맞지 않는 차분"""
+
+
+def choose_block_size(size: int) -> int:
+    """
+    파일 크기의 제곱근에 가까운 2의 거듭제곱을 설정한 범위 안에서 고릅니다.
+
+    블록이 작을수록 차분이 작아지지만 서명이 커지므로, rsync처럼 둘의 균형을 맞춥니다.
+    (2 GiB -> 64 KiB, 1 MiB -> 4 KiB)
+    """
+    block_size = 1 << max(math.isqrt(max(size, 1)) - 1, 0).bit_length()
+    return min(max(block_size, settings.delta_min_block_size), settings.delta_max_block_size)
+
+
+def strong_hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=STRONG_SIZE).digest()
+
+
+class SignatureBuilder:
+    """청크를 받아 블록 단위 서명을 만듭니다."""
+
+    def __init__(self, block_size: int) -> None:
+        self.block_size = block_size
+        self._pending = bytearray()
+        self._entries: list[bytes] = []
+
+    def _add_block(self, block: bytes) -> None:
+        self._entries.append(_ENTRY.pack(zlib.adler32(block), strong_hash(block)))
+
+    def update(self, chunk: bytes) -> None:
+        self._pending += chunk
+        full = len(self._pending) - len(self._pending) % self.block_size
+        view = memoryview(self._pending)
+        for start in range(0, full, self.block_size):
+            self._add_block(view[start : start + self.block_size])
+        view.release()
+        del self._pending[:full]
+
+    def finish(self) -> bytes:
+        if self._pending:
+            self._add_block(bytes(self._pending))
+            self._pending.clear()
+        return b"".join(self._entries)
+
+
+def signature_of_file(path: str, encoding: str | None, block_size: int) -> bytes:
+    """로컬 blob 파일의 (원본 기준) 서명을 만듭니다. (프로세스 풀에서 실행)"""
+    builder = SignatureBuilder(block_size)
+    with open(path, "rb") as fp:
+        if encoding == ZSTD:
+            import zstandard
+
+            fp = zstandard.ZstdDecompressor().stream_reader(fp)
+        while chunk := fp.read(settings.upload_chunk_size):
+            builder.update(chunk)
+    return builder.finish()
+
+
+@dataclass
+class Signature:
+    block_size: int
+    size: int
+    weak: list[int]
+    strong: list[bytes]
+
+    @classmethod
+    def unpack(cls, block_size: int, size: int, data: bytes) -> "Signature":
+        entries = [entry for entry in _ENTRY.iter_unpack(data)]
+        return cls(
+            block_size=block_size,
+            size=size,
+            weak=[weak for weak, _ in entries],
+            strong=[strong for _, strong in entries],
+        )
+
+    @property
+    def block_count(self) -> int:
+        return len(self.weak)
+
+
+async def _compute_signature(blob: models.Blob, block_size: int) -> bytes:
+    local_path = get_storage().local_path(blob.path)
+    if local_path is not None:
+        return await run_in_process(signature_of_file, local_path, blob.encoding, block_size)
+    builder = SignatureBuilder(block_size)
+    async for chunk in open_blob(blob.path, blob.encoding):
+        await run_in_threadpool(builder.update, chunk)
+    return await run_in_threadpool(builder.finish)
+
+
+# 같은 내용의 서명을 동시에 여러 번 계산하지 않도록 진행 중인 작업을 공유
+_inflight: dict[str, asyncio.Task[bytes]] = {}
+
+
+async def get_signature(db: Session, blob: models.Blob) -> Signature:
+    """blob의 서명을 반환합니다. 없으면 계산해 저장합니다. (커밋함)"""
+    cached = await db.get(models.BlobSignature, blob.hash)
+    if cached is None:
+        # 계산하는 동안 DB 커넥션을 붙잡지 않도록 트랜잭션을 먼저 끝냄
+        await db.commit()
+        block_size = choose_block_size(blob.size)
+        task = _inflight.get(blob.hash)
+        if task is None:
+            task = asyncio.create_task(_compute_signature(blob, block_size))
+            _inflight[blob.hash] = task
+            task.add_done_callback(lambda _: _inflight.pop(blob.hash, None))
+        data = await asyncio.shield(task)
+        cached = models.BlobSignature(
+            content_hash=blob.hash, block_size=block_size, signature=data
+        )
+        db.add(cached)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # 다른 프로세스가 먼저 저장한 경우
+            await db.rollback()
+            cached = await db.get(models.BlobSignature, blob.hash)
+    return Signature.unpack(cached.block_size, blob.size, cached.signature)
+
+
+class _ChunkReader:
+    """비동기 청크 스트림에서 정해진 길이만큼씩 읽습니다."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks.__aiter__()
+        self._buffer = bytearray()
+
+    async def _fill(self, size: int) -> None:
+        while len(self._buffer) < size:
+            try:
+                self._buffer += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return
+
+    async def read_exact(self, size: int) -> bytes | None:
+        """size 바이트를 읽습니다. 스트림이 바로 끝났으면 None, 중간에 끊겼으면 DeltaError"""
+        await self._fill(size)
+        if not self._buffer:
+            return None
+        if len(self._buffer) < size:
+            raise DeltaError("truncated delta")
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def iter_exact(self, size: int) -> AsyncIterator[bytes]:
+        """size 바이트를 들어오는 대로 나눠서 내보냅니다."""
+        while size > 0:
+            await self._fill(1)
+            if not self._buffer:
+                raise DeltaError("truncated delta")
+            piece = bytes(self._buffer[:size])
+            del self._buffer[: len(piece)]
+            size -= len(piece)
+            yield piece
+
+
+class _BaseReader:
+    """
+    기존 blob의 구간을 읽습니다.
+
+    압축된 blob은 임의 위치에서 풀 수 없으므로 한 스트림을 앞에서부터 이어 읽고,
+    뒤로 돌아가야 할 때만 다시 엽니다. 차분의 복사 명령은 대개 순서대로입니다.
+    """
+
+    def __init__(self, blob: models.Blob) -> None:
+        self.blob = blob
+        self._stream: AsyncIterator[bytes] | None = None
+        self._position = 0
+        self._buffer = b""
+
+    async def read(self, start: int, end: int) -> AsyncIterator[bytes]:
+        """[start, end) 구간을 내보냅니다."""
+        if self.blob.encoding is None:
+            async for chunk in open_blob(self.blob.path, None, start, end - 1):
+                yield chunk
+            return
+
+        if self._stream is None or start < self._position:
+            self._stream = open_blob(self.blob.path, self.blob.encoding, start).__aiter__()
+            self._position, self._buffer = start, b""
+        while self._position < end:
+            if not self._buffer:
+                try:
+                    self._buffer = await self._stream.__anext__()
+                except StopAsyncIteration:
+                    raise DeltaError("base content ended early")
+            skip = max(start - self._position, 0)
+            if skip >= len(self._buffer):
+                self._position += len(self._buffer)
+                self._buffer = b""
+                continue
+            take = min(len(self._buffer), end - self._position)
+            if take > skip:
+                yield self._buffer[skip:take]
+            self._position += take
+            self._buffer = self._buffer[take:]
+
+
+async def apply_delta(
+    blob: models.Blob, signature: Signature, chunks: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """차분을 읽으면서 새 내용을 순서대로 내보냅니다."""
+    reader = _ChunkReader(chunks)
+    base = _BaseReader(blob)
+    while (op := await reader.read_exact(1)) is not None:
+        if op == b"C":
+            header = await reader.read_exact(_COMMAND.size - 1)
+            if header is None:
+                raise DeltaError("truncated delta")
+            _, first, count = _COMMAND.unpack(op + header)
+            if count == 0 or first + count > signature.block_count:
+                raise DeltaError("copy command out of range")
+            start = first * signature.block_size
+            end = min((first + count) * signature.block_size, signature.size)
+            async for piece in base.read(start, end):
+                yield piece
+        elif op == b"L":
+            header = await reader.read_exact(_LITERAL.size - 1)
+            if header is None:
+                raise DeltaError("truncated delta")
+            _, length = _LITERAL.unpack(op + header)
+            async for piece in reader.iter_exact(length):
+                yield piece
+        else:
+            raise DeltaError("unknown delta command")
+
+
+def encode_delta(signature: Signature, data: bytes) -> Iterator[bytes]:
+    """
+    data(새 내용)를 서명과 비교해 차분 명령을 만듭니다. (클라이언트 쪽 구현)
+
+    블록 경계에서 먼저 맞춰 보고, 맞지 않을 때만 한 바이트씩 굴리며 찾으므로
+    변경이 적으면 대부분 C로 계산됩니다. 큰 파일은 mmap을 넘기면 됩니다.
+    """
+    block_size = signature.block_size
+    last_size = signature.size - (signature.block_count - 1) * block_size
+    table: dict[int, list[int]] = {}
+    # 마지막 블록은 짧을 수 있으므로 굴리는 창과 크기가 같은 블록만 표에 넣음
+    for index, weak in enumerate(signature.weak):
+        if index < signature.block_count - 1 or last_size == block_size:
+            table.setdefault(weak, []).append(index)
+
+    def match(position: int, weak: int) -> int | None:
+        for index in table.get(weak, ()):
+            if signature.strong[index] == strong_hash(data[position : position + block_size]):
+                return index
+        return None
+
+    copy_first, copy_count = 0, 0
+    literal_start = position = 0
+    size = len(data)
+    a = b = None
+
+    def flush_literal(end: int) -> Iterator[bytes]:
+        if end > literal_start:
+            chunk = data[literal_start:end]
+            yield _LITERAL.pack(b"L", len(chunk)) + bytes(chunk)
+
+    def flush_copy() -> Iterator[bytes]:
+        if copy_count:
+            yield _COMMAND.pack(b"C", copy_first, copy_count)
+
+    while position + block_size <= size:
+        if a is None:
+            weak = zlib.adler32(data[position : position + block_size])
+            a, b = weak & 0xFFFF, weak >> 16
+        index = match(position, (b << 16) | a)
+        if index is not None:
+            if copy_count and index == copy_first + copy_count and literal_start == position:
+                copy_count += 1
+            else:
+                yield from flush_copy()
+                yield from flush_literal(position)
+                copy_first, copy_count = index, 1
+            position += block_size
+            literal_start = position
+            a = None
+            continue
+        if literal_start == position:
+            yield from flush_copy()
+            copy_count = 0
+        # 창을 한 바이트 밀기 (adler32의 rolling 계산)
+        if position + block_size < size:
+            out_byte, in_byte = data[position], data[position + block_size]
+            a = (a - out_byte + in_byte) % _ADLER_MOD
+            b = (b - block_size * out_byte + a - 1) % _ADLER_MOD
+        position += 1
+
+    # 남은 부분이 기존 마지막(짧은) 블록과 같으면 복사
+    last = signature.block_count - 1
+    tail = data[position:]
+    if (
+        0 < last_size < block_size
+        and len(tail) == last_size
+        and signature.strong[last] == strong_hash(tail)
+    ):
+        if copy_count and literal_start == position and last == copy_first + copy_count:
+            copy_count += 1
+        else:
+            yield from flush_copy()
+            yield from flush_literal(position)
+            copy_first, copy_count = last, 1
+        yield from flush_copy()
+        return
+    yield from flush_copy()
+    yield from flush_literal(size)
+
+
+def encode_delta_file(signature: Signature, source_path: str, out_path: str) -> StoredUpload:
+    """
+    source_path 내용의 차분을 out_path에 쓰고, 차분의 크기와 sha256을 반환합니다.
+    (이전 버전을 차분으로 바꿔 저장할 때 프로세스 풀에서 실행)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(source_path, "rb") as source, open(out_path, "wb") as out:
+        length = os.fstat(source.fileno()).st_size
+        data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) if length else b""
+        try:
+            for command in encode_delta(signature, data):
+                digest.update(command)
+                out.write(command)
+                size += len(command)
+        finally:
+            if length:
+                data.close()
+    return StoredUpload(size=size, content_hash=digest.hexdigest())
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import secrets
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import AsyncIterator, Callable
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+# 여러 구간을 요청해도 이 개수를 넘으면 Range를 무시하고 전체를 보냄
+MAX_RANGES = 32
+
+ReadRange = Callable[[int, int], AsyncIterator[bytes]]
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header: str, size: int) -> list[tuple[int, int]] | None:
+    """
+    Range 헤더를 (start, end) 목록으로 바꿉니다. end는 포함 구간입니다.
+
+    문법이 잘못된 헤더는 None을 돌려 무시하도록 하고, 만족할 수 있는
+    구간이 하나도 없으면 RangeNotSatisfiable을 발생시킵니다.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        first, sep, last = spec.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if first == "":
+                # 마지막 N 바이트 (빈 파일에는 만족할 수 있는 구간이 없음, RFC 9110 14.1.2)
+                suffix = int(last)
+                if suffix == 0 or size == 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and end < start:
+                    return None
+                if start >= size:
+                    continue
+                end = min(end, size - 1)
+        except ValueError:
+            return None
+        if start < 0:
+            return None
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable
+    return _merge_ranges(ranges)
+
+
+def _merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """겹치거나 맞닿은 구간을 합칩니다."""
+    if len(ranges) == 1:
+        return ranges
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _etag_matches(header: str, etag: str, weak: bool) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    if weak:
+        opaque = etag.removeprefix("W/")
+        return any(tag.removeprefix("W/") == opaque for tag in candidates)
+    # If-Range는 강한 비교만 허용
+    return not etag.startswith("W/") and etag in candidates
+
+
+def _parse_http_date(value: str) -> datetime | None:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _to_http_datetime(value: datetime) -> datetime:
+    # DB에는 서버 로컬 시각(naive)으로 저장되어 있음
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def is_not_modified(request: Request, etag: str | None, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag, weak=True)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and last_modified <= since
+    return False
+
+
+def _if_range_allows(request: Request, etag: str | None, last_modified: datetime) -> bool:
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag is not None and _etag_matches(if_range, etag, weak=False)
+    since = _parse_http_date(if_range)
+    return since is not None and since == last_modified
+
+
+def content_disposition(filename: str) -> str:
+    return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+def build_download_response(
+    request: Request,
+    *,
+    size: int,
+    read_range: ReadRange,
+    media_type: str,
+    filename: str,
+    last_modified: datetime,
+    etag: str | None,
+    extra_headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    파일 다운로드 응답을 만듭니다.
+
+    ETag/Last-Modified 검증자와 If-None-Match/If-Modified-Since에 대한 304,
+    단일/다중 Range 요청에 대한 206(multipart/byteranges), 만족할 수 없는
+    Range에 대한 416을 처리합니다. 본문은 read_range(start, end)로 필요한
+    구간만 스트리밍합니다. extra_headers(Vary, Content-Encoding 등)는 모든 응답에 붙입니다.
+    """
+    last_modified = _to_http_datetime(last_modified)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Content-Disposition": content_disposition(filename),
+        "X-Content-Type-Options": "nosniff",
+    }
+    if etag is not None:
+        headers["ETag"] = etag
+    if extra_headers:
+        headers.update(extra_headers)
+
+    if is_not_modified(request, etag, last_modified):
+        headers.pop("Content-Disposition")
+        return Response(status_code=304, headers=headers)
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if range_header is not None and _if_range_allows(request, etag, last_modified):
+        try:
+            ranges = parse_range_header(range_header, size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if ranges is not None and len(ranges) > MAX_RANGES:
+            ranges = None
+
+    if not ranges:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            read_range(0, size - 1) if size else _empty(),
+            media_type=media_type,
+            headers=headers,
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            read_range(start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    boundary = secrets.token_hex(16)
+    part_headers = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        for start, end in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode()
+    content_length = (
+        sum(len(part) for part in part_headers)
+        + sum(end - start + 1 for start, end in ranges)
+        + 2 * (len(ranges) - 1)
+        + len(closing)
+    )
+
+    async def multipart_body() -> AsyncIterator[bytes]:
+        for index, ((start, end), part_header) in enumerate(zip(ranges, part_headers)):
+            if index:
+                yield b"\r\n"
+            yield part_header
+            async for chunk in read_range(start, end):
+                yield chunk
+        yield closing
+
+    headers["Content-Length"] = str(content_length)
+    return StreamingResponse(
+        multipart_body(),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
+
+
+async def _empty() -> AsyncIterator[bytes]:
+    yield b""
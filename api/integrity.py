@@ -0,0 +1,588 @@
+"""
+저장소와 DB 정합성 검사
+
+add_blob은 객체를 쓴 뒤 blob 행과 함께 커밋하고 release_blob은 커밋한 뒤에 객체를
+지우므로, 그 사이에 프로세스가 죽으면 행 없는 객체(orphan)가 남습니다. 저장소 장애나
+수동 삭제가 있으면 객체 없는 blob(missing)이 생깁니다. 파일은 blob을 통해서만 내용을 참조하므로 files 테이블 대신 blobs 테이블과
+저장소의 blobs/ 객체를 맞춰 봅니다.
+
+reconcile()은 저장소 목록(키 순서)과 blobs 행(hash 순서, 키는 blob_key(hash)라 같은
+순서)을 둘 다 조금씩 읽으면서 병합하므로 어느 쪽도 메모리에 통째로 올리지 않습니다.
+scrub()은 blob 내용을 다시 읽어 sha256을 확인하며, 읽기 속도를 scrub_rate로 제한하고
+scrub_batch_size개마다 위치를 저장해 중단되어도 이어서 검사합니다.
+
+    python -m api.integrity reconcile [--repair]
+    python -m api.integrity scrub [--restart]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from . import metrics, models
+from .blob_store import delete_unreferenced, open_blob
+from .compression import ZSTD
+from .crud import file_crud, version_crud
+from .database import SessionLocal, engine
+from .settings import settings
+from .storage import ObjectStat, close_storage, get_storage
+
+logger = logging.getLogger(__name__)
+
+RECONCILE = "reconcile"
+SCRUB = "scrub"
+
+BLOB_PREFIX = "blobs/"
+
+_owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+_tasks: set[asyncio.Task] = set()
+
+
+async def claim(name: str) -> bool:
+    """
+    검사를 실행할 권리를 얻습니다. 다른 곳에서 실행 중이면 False
+
+    실행 중인 검사가 integrity_lease_timeout 넘게 갱신되지 않았으면 죽은 것으로 보고 가져옵니다.
+    """
+    checkpoint = models.IntegrityCheckpoint
+    now = datetime.now()
+    async with SessionLocal() as db:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(checkpoint).values(name=name, status="idle"))
+        except IntegrityError:
+            pass
+        result = await db.execute(
+            update(checkpoint)
+            .where(
+                checkpoint.name == name,
+                or_(
+                    checkpoint.status != "running",
+                    checkpoint.updated_at
+                    < now - timedelta(seconds=settings.integrity_lease_timeout),
+                ),
+            )
+            .values(status="running", locked_by=_owner, started_at=now, updated_at=now)
+        )
+        await db.commit()
+    return result.rowcount == 1
+
+
+async def _save(name: str, **values: Any) -> None:
+    checkpoint = models.IntegrityCheckpoint
+    async with SessionLocal() as db:
+        await db.execute(
+            update(checkpoint)
+            .where(checkpoint.name == name, checkpoint.locked_by == _owner)
+            .values(updated_at=datetime.now(), **values)
+        )
+        await db.commit()
+
+
+async def _heartbeat(name: str) -> None:
+    while True:
+        await asyncio.sleep(settings.integrity_lease_timeout / 3)
+        try:
+            await _save(name)
+        except Exception:
+            logger.exception("integrity check %s heartbeat failed", name)
+
+
+async def get_checkpoints() -> list[models.IntegrityCheckpoint]:
+    async with SessionLocal() as db:
+        result = await db.scalars(
+            select(models.IntegrityCheckpoint).order_by(models.IntegrityCheckpoint.name)
+        )
+        return list(result.all())
+
+
+async def _run_claimed(
+    name: str, func: Callable[..., Awaitable[str]], *args: Any
+) -> dict | None:
+    """claim()으로 얻은 검사를 실행하고 결과 상태를 남긴 뒤 보고서를 반환합니다."""
+    heartbeat = asyncio.create_task(_heartbeat(name))
+    try:
+        status = await func(*args)
+    except asyncio.CancelledError:
+        # 종료 중이면 다음에 이어서 할 수 있도록 남김
+        await _save(name, status="paused", locked_by=None)
+        raise
+    except Exception:
+        logger.exception("integrity check %s failed", name)
+        await _save(name, status="failed", locked_by=None, finished_at=datetime.now())
+        raise
+    finally:
+        heartbeat.cancel()
+    await _save(name, status=status, locked_by=None, finished_at=datetime.now())
+    async with SessionLocal() as db:
+        checkpoint = await db.get(models.IntegrityCheckpoint, name)
+        return checkpoint.report if checkpoint is not None else None
+
+
+def start(name: str, func: Callable[..., Awaitable[str]], *args: Any) -> None:
+    """claim()으로 얻은 검사를 백그라운드에서 실행합니다. (관리자 API)"""
+    task = asyncio.create_task(_run_claimed(name, func, *args))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def shutdown() -> None:
+    """실행 중인 백그라운드 검사를 멈춥니다. 진행 위치는 남아 다음에 이어서 합니다."""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+
+
+# 정합성 검사
+
+
+@dataclass
+class ReconcileReport:
+    repair: bool = False
+    objects: int = 0  # 저장소에서 확인한 객체 수
+    blobs: int = 0  # 확인한 blob 행 수
+    orphans: int = 0  # 행이 없는 객체
+    orphan_bytes: int = 0
+    missing: int = 0  # 객체가 없는 blob
+    size_mismatches: int = 0  # 객체 크기가 blob의 저장 크기와 다름
+    ref_mismatches: int = 0  # ref_count가 실제 참조 수와 다름
+    orphans_deleted: int = 0
+    refs_fixed: int = 0
+    versions_deleted: int = 0
+    files_trashed: int = 0
+    # 종류별로 integrity_sample_size개까지 남기는 키(또는 hash)
+    samples: dict[str, list[str]] = field(default_factory=dict)
+
+    def note(self, kind: str, key: str) -> None:
+        metrics.INTEGRITY_ISSUES.labels(kind).inc()
+        samples = self.samples.setdefault(kind, [])
+        if len(samples) < settings.integrity_sample_size:
+            samples.append(key)
+
+
+async def _iter_blob_rows(columns: tuple) -> AsyncIterator[Any]:
+    """blob 행을 hash 순서로 integrity_batch_size개씩 나눠 읽습니다. (커넥션을 오래 잡지 않음)"""
+    after = ""
+    while True:
+        async with SessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(*columns)
+                    .where(models.Blob.hash > after)
+                    .order_by(models.Blob.hash)
+                    .limit(settings.integrity_batch_size)
+                )
+            ).all()
+        for row in rows:
+            yield row
+        if len(rows) < settings.integrity_batch_size:
+            return
+        after = rows[-1].hash
+
+
+def _is_recent(stat: ObjectStat, now: float) -> bool:
+    if stat.last_modified is None:
+        return False
+    return now - stat.last_modified.timestamp() < settings.integrity_grace_period
+
+
+async def _delete_orphan(stat: ObjectStat) -> bool:
+    """행이 없는 객체를 지웁니다. 그 사이 blob으로 등록되었거나 새로 쓰였으면 두고 False"""
+    content_hash = stat.key.rsplit("/", 1)[-1]
+    storage = get_storage()
+    async with SessionLocal() as db:
+        # 행이 없으면 InnoDB가 그 자리에 gap lock을 걸어, 지우는 동안 같은 내용의 blob 등록을 막음
+        blob = await db.scalar(
+            select(models.Blob.hash).where(models.Blob.hash == content_hash).with_for_update()
+        )
+        current = await storage.stat(stat.key)
+        if blob is not None or current is None or _is_recent(current, time.time()):
+            return False
+        await storage.delete(stat.key)
+        await db.commit()
+    return True
+
+
+async def _reconcile_objects(report: ReconcileReport, repair: bool) -> list[str]:
+    """저장소 목록과 blob 행을 병합하며 비교합니다. 복구할 missing blob의 hash를 반환합니다."""
+    storage = get_storage()
+    blob = models.Blob
+    objects = storage.iter_objects(BLOB_PREFIX)
+    rows = _iter_blob_rows((blob.hash, blob.path, blob.size, blob.stored_size))
+    now = time.time()
+    missing: list[str] = []
+
+    stat = await anext(objects, None)
+    row = await anext(rows, None)
+    while stat is not None or row is not None:
+        if row is None or (stat is not None and stat.key < row.path):
+            report.objects += 1
+            if not _is_recent(stat, now):
+                report.orphans += 1
+                report.orphan_bytes += stat.size
+                report.note("orphan", stat.key)
+                if repair and await _delete_orphan(stat):
+                    report.orphans_deleted += 1
+            stat = await anext(objects, None)
+        elif stat is None or row.path < stat.key:
+            report.blobs += 1
+            report.missing += 1
+            report.note("missing", row.hash)
+            # 저장소 장애일 때 전부 들고 있지 않도록 복구 한도까지만 모음
+            if len(missing) <= settings.integrity_max_missing_repair:
+                missing.append(row.hash)
+            row = await anext(rows, None)
+        else:
+            report.objects += 1
+            report.blobs += 1
+            expected = row.stored_size if row.stored_size is not None else row.size
+            if stat.size != expected:
+                report.size_mismatches += 1
+                report.note("size_mismatch", row.hash)
+            stat = await anext(objects, None)
+            row = await anext(rows, None)
+    return missing
+
+
+async def _repair_missing(report: ReconcileReport, content_hashes: list[str]) -> None:
+    """
+    객체가 없는 blob을 참조하는 버전은 지우고, 파일은 휴지통으로 옮깁니다.
+
+    내용을 되살릴 수는 없으므로 내려받다 실패하는 대신 동기화 클라이언트에 삭제로
+    알리고, 보관 기간 안에 백업에서 객체를 되살리면 휴지통에서 되돌릴 수 있게 합니다.
+    """
+    storage = get_storage()
+    version = models.FileVersion
+    for content_hash in content_hashes:
+        async with SessionLocal() as db:
+            blob = await db.scalar(
+                select(models.Blob).where(models.Blob.hash == content_hash).with_for_update()
+            )
+            if blob is None or await storage.stat(blob.path) is not None:
+                continue
+            db_versions = (
+                await db.scalars(
+                    select(version).where(
+                        or_(version.blob_hash == content_hash, version.base_hash == content_hash)
+                    )
+                )
+            ).all()
+            report.versions_deleted += await version_crud.delete_versions(db, list(db_versions))
+            db_files = (
+                await db.scalars(
+                    select(models.FileModel).where(
+                        models.FileModel.content_hash == content_hash, file_crud.not_deleted()
+                    )
+                )
+            ).all()
+            report.files_trashed += len(db_files)
+            await file_crud.trash_files(db, list(db_files))
+            await db.commit()
+
+
+async def _count_refs(db: Session, content_hashes: list[str]) -> dict[str, int]:
+    version = models.FileVersion
+    counts: dict[str, int] = dict.fromkeys(content_hashes, 0)
+    for column in (models.FileModel.content_hash, version.blob_hash, version.base_hash):
+        result = await db.execute(
+            select(column, func.count())
+            .where(column.in_(content_hashes))
+            .group_by(column)
+        )
+        for content_hash, count in result.all():
+            counts[content_hash] += count
+    return counts
+
+
+async def _fix_ref_count(content_hash: str) -> bool:
+    """blob 행을 잠근 채 참조 수를 다시 세어 고칩니다. 참조가 없으면 blob을 지웁니다."""
+    async with SessionLocal() as db:
+        # add_blob/release_blob도 이 행을 잠그므로 잠근 뒤에 센 값은 커밋 전까지 바뀌지 않음
+        blob = await db.scalar(
+            select(models.Blob).where(models.Blob.hash == content_hash).with_for_update()
+        )
+        if blob is None:
+            return False
+        actual = (await _count_refs(db, [content_hash]))[content_hash]
+        if actual == blob.ref_count:
+            return False
+        if actual == 0:
+            await db.delete(blob)
+            db.after_commit(lambda: delete_unreferenced([content_hash]))
+        else:
+            blob.ref_count = actual
+        await db.commit()
+    return True
+
+
+async def _reconcile_refs(report: ReconcileReport, repair: bool) -> None:
+    """blobs.ref_count를 파일과 버전이 실제로 참조하는 수와 비교합니다."""
+    blob = models.Blob
+    batch: list[str] = []
+
+    async def check() -> None:
+        # ref_count와 참조 수를 한 트랜잭션(같은 스냅샷)에서 읽어야 동시에 바뀌는 값이 섞이지 않음
+        async with SessionLocal() as db:
+            ref_counts = dict(
+                (await db.execute(select(blob.hash, blob.ref_count).where(blob.hash.in_(batch))))
+                .tuples()
+                .all()
+            )
+            counts = await _count_refs(db, list(ref_counts))
+        for content_hash, ref_count in ref_counts.items():
+            if counts[content_hash] == ref_count:
+                continue
+            report.ref_mismatches += 1
+            report.note("ref_count", content_hash)
+            if repair and await _fix_ref_count(content_hash):
+                report.refs_fixed += 1
+        batch.clear()
+
+    async for row in _iter_blob_rows((blob.hash,)):
+        batch.append(row.hash)
+        if len(batch) >= settings.integrity_batch_size:
+            await check()
+    if batch:
+        await check()
+
+
+async def reconcile(repair: bool) -> str:
+    """
+    저장소와 blobs 테이블을 맞춰 보고 보고서를 남깁니다. claim(RECONCILE)을 얻은 뒤 부릅니다.
+
+    repair면 integrity_grace_period보다 오래된 orphan 객체를 지우고, 객체가 없는
+    blob을 참조하는 파일은 휴지통으로 옮기며, 어긋난 ref_count를 고칩니다.
+    """
+    report = ReconcileReport(repair=repair)
+    missing = await _reconcile_objects(report, repair)
+    if repair and missing:
+        if len(missing) > settings.integrity_max_missing_repair:
+            logger.error(
+                "too many missing blobs, not repairing",
+                extra={"missing": report.missing},
+            )
+        else:
+            await _repair_missing(report, missing)
+    await _reconcile_refs(report, repair)
+    await _save(RECONCILE, report=asdict(report))
+    summary = asdict(report)
+    del summary["samples"]
+    logger.info("reconciled storage", extra=summary)
+    return "finished"
+
+
+async def run_reconcile(repair: bool = False) -> dict | None:
+    """정합성 검사를 실행하고 보고서를 반환합니다. 다른 곳에서 실행 중이면 None"""
+    if not await claim(RECONCILE):
+        return None
+    return await _run_claimed(RECONCILE, reconcile, repair)
+
+
+# 체크섬 검사
+
+
+class _Throttle:
+    """여러 스레드와 코루틴이 함께 읽는 속도를 초당 rate bytes 이하로 제한합니다."""
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def reserve(self, amount: int) -> float:
+        """amount만큼 읽은 뒤 쉬어야 할 시간(초)을 반환합니다."""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + amount / self.rate
+            return start - now
+
+
+def _hash_local_file(
+    path: str, encoding: str | None, chunk_size: int, throttle: _Throttle
+) -> str:
+    """
+    로컬 blob 파일의 원본 기준 sha256을 구합니다. (스레드풀에서 실행)
+    압축된 blob도 디스크에서 읽은 양으로 속도를 제한합니다.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        reader = fp
+        if encoding == ZSTD:
+            import zstandard
+
+            reader = zstandard.ZstdDecompressor().stream_reader(fp)
+        position = 0
+        while chunk := reader.read(chunk_size):
+            digest.update(chunk)
+            read, position = fp.tell() - position, fp.tell()
+            metrics.SCRUB_BYTES.inc(read)
+            time.sleep(throttle.reserve(read))
+    return digest.hexdigest()
+
+
+async def _hash_blob(row: Any, executor: ThreadPoolExecutor, throttle: _Throttle) -> str:
+    loop = asyncio.get_running_loop()
+    local_path = get_storage().local_path(row.path)
+    if local_path is not None:
+        return await loop.run_in_executor(
+            executor,
+            _hash_local_file,
+            local_path,
+            row.encoding,
+            settings.upload_chunk_size,
+            throttle,
+        )
+    digest = hashlib.sha256()
+    async for chunk in open_blob(row.path, row.encoding):
+        await loop.run_in_executor(executor, digest.update, chunk)
+        metrics.SCRUB_BYTES.inc(len(chunk))
+        await asyncio.sleep(throttle.reserve(len(chunk)))
+    return digest.hexdigest()
+
+
+async def _scrub_blob(
+    row: Any, executor: ThreadPoolExecutor, throttle: _Throttle
+) -> str | None:
+    """blob 내용을 다시 해시합니다. 문제가 있으면 그 종류를 반환합니다."""
+    try:
+        actual = await _hash_blob(row, executor, throttle)
+    except Exception:
+        reason = "missing" if await get_storage().stat(row.path) is None else "unreadable"
+    else:
+        if actual == row.hash:
+            return None
+        reason = "checksum"
+    # 읽는 동안 blob이 지워졌으면 문제가 아님
+    async with SessionLocal() as db:
+        if await db.get(models.Blob, row.hash) is None:
+            return None
+    return reason
+
+
+@dataclass
+class ScrubReport:
+    pass_started_at: str = ""
+    blobs: int = 0
+    bytes: int = 0
+    failures: int = 0
+    # integrity_sample_size개까지 남기는 '<종류>:<hash>' (checksum, missing, unreadable)
+    samples: list[str] = field(default_factory=list)
+    pass_finished_at: str | None = None
+
+
+async def scrub(restart: bool) -> str:
+    """
+    모든 blob의 sha256을 다시 확인해 보고서를 남깁니다. claim(SCRUB)을 얻은 뒤 부릅니다.
+
+    지난번에 중단된 위치부터 이어서 하며, restart면 처음부터 합니다. 읽기는 scrub_workers개
+    스레드에서 하고 합쳐서 초당 scrub_rate bytes를 넘지 않게 쉬어 가며 읽습니다.
+    """
+    async with SessionLocal() as db:
+        checkpoint = await db.get(models.IntegrityCheckpoint, SCRUB)
+        position = checkpoint.position if checkpoint is not None else None
+        previous = checkpoint.report if checkpoint is not None else None
+    if restart or position is None or not previous:
+        # 지난 검사를 끝까지 했으면 처음부터 다시
+        position = None
+        report = ScrubReport(pass_started_at=datetime.now().isoformat())
+    else:
+        report = ScrubReport(**previous)
+
+    blob = models.Blob
+    throttle = _Throttle(settings.scrub_rate)
+    semaphore = asyncio.Semaphore(settings.scrub_workers)
+    executor = ThreadPoolExecutor(settings.scrub_workers, thread_name_prefix="scrub")
+
+    async def check(row: Any) -> None:
+        async with semaphore:
+            reason = await _scrub_blob(row, executor, throttle)
+        report.blobs += 1
+        report.bytes += row.stored_size if row.stored_size is not None else row.size
+        if reason is None:
+            return
+        report.failures += 1
+        metrics.INTEGRITY_ISSUES.labels(reason).inc()
+        logger.error("blob verification failed", extra={"hash": row.hash, "reason": reason})
+        if len(report.samples) < settings.integrity_sample_size:
+            report.samples.append(f"{reason}:{row.hash}")
+
+    try:
+        while True:
+            async with SessionLocal() as db:
+                rows = (
+                    await db.execute(
+                        select(blob.hash, blob.path, blob.encoding, blob.size, blob.stored_size)
+                        .where(blob.hash > (position or ""))
+                        .order_by(blob.hash)
+                        .limit(settings.scrub_batch_size)
+                    )
+                ).all()
+            await asyncio.gather(*(check(row) for row in rows))
+            if len(rows) < settings.scrub_batch_size:
+                break
+            position = rows[-1].hash
+            await _save(SCRUB, position=position, report=asdict(report))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    report.pass_finished_at = datetime.now().isoformat()
+    await _save(SCRUB, position=None, report=asdict(report))
+    logger.info(
+        "scrubbed blobs",
+        extra={"blobs": report.blobs, "bytes": report.bytes, "failures": report.failures},
+    )
+    return "finished"
+
+
+async def run_scrub(restart: bool = False) -> dict | None:
+    """체크섬 검사를 실행하고 보고서를 반환합니다. 다른 곳에서 실행 중이면 None"""
+    if not await claim(SCRUB):
+        return None
+    return await _run_claimed(SCRUB, scrub, restart)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m api.integrity")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reconcile_parser = commands.add_parser("reconcile", help="저장소와 DB 정합성 검사")
+    reconcile_parser.add_argument(
+        "--repair", action="store_true", help="orphan 객체, missing blob, ref_count를 고침"
+    )
+    scrub_parser = commands.add_parser("scrub", help="blob 체크섬 검사")
+    scrub_parser.add_argument("--restart", action="store_true", help="처음부터 다시 검사")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "reconcile":
+            report = await run_reconcile(args.repair)
+        else:
+            report = await run_scrub(args.restart)
+    finally:
+        await close_storage()
+        await engine.dispose()
+    if report is None:
+        raise SystemExit(f"{args.command} is already running")
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,326 @@
+"""
+업로드 이후 처리 작업(체크섬 검증, OCR 등)을 위한 작업 큐
+
+작업은 jobs 테이블에 저장되므로 서버가 재시작되어도 사라지지 않습니다.
+JobWorker는 앱 프로세스 안에서 작업 종류별 동시 실행 수를 지키며 작업을
+가져와 실행하고, CPU를 많이 쓰는 부분은 background.run_in_process로 프로세스 풀에서 실행합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics, models, previews, versions
+from .background import run_in_process
+from .blob_store import open_blob
+from .compression import ZSTD
+from .crud import job_crud
+from .database import SessionLocal
+from .ocr import OCR_CONTENT_TYPES, get_ocr_provider
+from .settings import settings
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[Session, models.Job], Awaitable[dict | None]]
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    func: JobFunc
+    concurrency: int  # 서버 하나에서 동시에 실행할 수 있는 수
+    max_attempts: int
+    priority: int
+
+
+JOB_TYPES: dict[str, JobType] = {}
+
+# 내용을 그대로 검색 대상으로 쓰는 텍스트 형식 (text/* 외)
+_TEXT_CONTENT_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/x-yaml",
+}
+
+
+def is_text_type(content_type: str | None) -> bool:
+    return content_type is not None and (
+        content_type.startswith("text/") or content_type in _TEXT_CONTENT_TYPES
+    )
+
+
+def job_type(
+    name: str, *, concurrency: int = 1, max_attempts: int = 3, priority: int = 0
+) -> Callable[[JobFunc], JobFunc]:
+    """작업 처리 함수를 등록하는 데코레이터"""
+
+    def decorator(func: JobFunc) -> JobFunc:
+        JOB_TYPES[name] = JobType(
+            name=name,
+            func=func,
+            concurrency=concurrency,
+            max_attempts=max_attempts,
+            priority=priority,
+        )
+        return func
+
+    return decorator
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    file_id: str | None = None,
+    payload: dict | None = None,
+    priority: int | None = None,
+) -> models.Job:
+    """작업을 세션에 추가합니다. 커밋한 뒤 notify()를 부르면 바로 실행됩니다."""
+    job_def = JOB_TYPES[name]
+    return job_crud.add_job(
+        db,
+        job_type=name,
+        file_id=file_id,
+        payload=payload,
+        priority=job_def.priority if priority is None else priority,
+        max_attempts=job_def.max_attempts,
+    )
+
+
+def enqueue_file_jobs(
+    db: Session, file_model: models.FileModel, *, new_blob: bool
+) -> list[models.Job]:
+    """
+    새로 올라온 파일에 필요한 후처리 작업을 추가합니다.
+
+    파일 행이 먼저 flush된 뒤에 불러야 합니다. (jobs.file_id 외래 키)
+    """
+    payload = {"content_hash": file_model.content_hash}
+    queued = []
+    # 이미 있던 blob을 공유하게 된 경우에는 검증할 필요가 없음
+    if new_blob:
+        queued.append(enqueue(db, "checksum", file_id=file_model.id, payload=payload))
+    # 미리보기도 내용 해시로 공유하므로 새 blob일 때만 미리 만듦
+    if (
+        new_blob
+        and previews.can_preview(file_model.content_type)
+        and file_model.size <= settings.preview_max_source_size
+    ):
+        queued.append(enqueue(db, "thumbnail", file_id=file_model.id, payload=payload))
+    if new_blob and is_text_type(file_model.content_type):
+        queued.append(enqueue(db, "extract_text", file_id=file_model.id, payload=payload))
+    if settings.ocr_enabled and file_model.content_type in OCR_CONTENT_TYPES:
+        queued.append(enqueue(db, "ocr", file_id=file_model.id, payload=payload))
+    return queued
+
+
+def enqueue_version_jobs(db: Session, file_model: models.FileModel) -> list[models.Job]:
+    """내용이 바뀐 파일의 이전 버전을 차분으로 바꿔 저장하는 작업을 추가합니다."""
+    if not settings.version_keep_count or not settings.version_delta_max_size:
+        return []
+    return [enqueue(db, "version_delta", file_id=file_model.id)]
+
+
+class JobWorker:
+    """jobs 테이블을 폴링하며 작업을 실행하는 비동기 워커"""
+
+    def __init__(self) -> None:
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._wakeup = asyncio.Event()
+        self._running: dict[str, int] = defaultdict(int)
+        self._tasks: set[asyncio.Task] = set()
+
+    def notify(self) -> None:
+        """새 작업이 추가되었음을 알려 다음 폴링을 기다리지 않고 실행하게 합니다."""
+        self._wakeup.set()
+
+    def running(self) -> dict[str, int]:
+        return {name: count for name, count in self._running.items() if count}
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    await self._dispatch()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("job dispatch failed")
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=settings.job_poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _dispatch(self) -> None:
+        for job_def in JOB_TYPES.values():
+            free = job_def.concurrency - self._running[job_def.name]
+            if free <= 0:
+                continue
+            async with SessionLocal() as db:
+                jobs = await job_crud.claim_jobs(db, job_def.name, free, self.worker_id)
+            for job in jobs:
+                self._running[job_def.name] += 1
+                task = asyncio.create_task(self._execute(job_def, job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, job_def: JobType, job: models.Job) -> None:
+        metrics.JOBS_RUNNING.labels(job_def.name).inc()
+        try:
+            async with SessionLocal() as db:
+                result = await job_def.func(db, job)
+                await job_crud.finish_job(db, job.id, result)
+            metrics.JOBS_FINISHED.labels(job_def.name, "succeeded").inc()
+        except asyncio.CancelledError:
+            # 종료 중이면 running으로 남고, 잠금 시간이 지나면 다시 실행됨
+            raise
+        except Exception as e:
+            logger.exception("job %s (%s) failed", job.id, job.type)
+            metrics.JOBS_FINISHED.labels(job_def.name, "failed").inc()
+            delay = settings.job_retry_base_delay * 2 ** (job.attempts - 1)
+            async with SessionLocal() as db:
+                await job_crud.fail_job(db, job, error=repr(e), retry_delay=delay)
+        finally:
+            metrics.JOBS_RUNNING.labels(job_def.name).dec()
+            self._running[job_def.name] -= 1
+            self._wakeup.set()
+
+
+worker = JobWorker()
+
+
+async def release_stale_jobs() -> int:
+    """워커가 죽어 오래 running으로 남은 작업을 다시 실행 대상으로 돌립니다."""
+    async with SessionLocal() as db:
+        return await job_crud.release_stale_jobs(
+            db, older_than=datetime.now() - timedelta(seconds=settings.job_lock_timeout)
+        )
+
+
+def _hash_local_file(path: str, encoding: str | None, chunk_size: int) -> str:
+    """로컬 blob 파일의 원본 기준 sha256을 구합니다. (프로세스 풀에서 실행)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        if encoding == ZSTD:
+            import zstandard
+
+            fp = zstandard.ZstdDecompressor().stream_reader(fp)
+        while chunk := fp.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@job_type("checksum", concurrency=2, max_attempts=3)
+async def verify_checksum(db: Session, job: models.Job) -> dict | None:
+    """저장소에 쓰인 blob 내용을 다시 읽어 해시가 맞는지 확인합니다."""
+    content_hash = job.payload["content_hash"]
+    blob = await db.get(models.Blob, content_hash)
+    if blob is None:
+        return {"skipped": "blob deleted"}
+
+    local_path = get_storage().local_path(blob.path)
+    if local_path is not None:
+        actual = await run_in_process(
+            _hash_local_file, local_path, blob.encoding, settings.upload_chunk_size
+        )
+    else:
+        digest = hashlib.sha256()
+        async for chunk in open_blob(blob.path, blob.encoding):
+            await run_in_threadpool(digest.update, chunk)
+        actual = digest.hexdigest()
+
+    if actual != content_hash:
+        raise ValueError(f"checksum mismatch: expected {content_hash}, got {actual}")
+    return {"verified": True}
+
+
+@job_type("extract_text", concurrency=2, max_attempts=3)
+async def extract_text(db: Session, job: models.Job) -> dict | None:
+    """텍스트 파일의 앞부분(search_text_max_bytes)을 file_texts에 저장해 본문 검색에 씁니다."""
+    content_hash = job.payload["content_hash"]
+    blob = await db.get(models.Blob, content_hash)
+    if blob is None:
+        return {"skipped": "blob deleted"}
+    await db.commit()
+
+    text = ""
+    if blob.size:
+        end = min(blob.size, settings.search_text_max_bytes) - 1
+        data = b"".join(
+            [chunk async for chunk in open_blob(blob.path, blob.encoding, 0, end)]
+        )
+        # 잘린 멀티바이트 문자와 잘못된 바이트는 버림
+        text = data.decode("utf-8", errors="ignore")
+
+    await db.merge(models.FileText(content_hash=content_hash, source="plain", text=text))
+    await db.commit()
+    return {"chars": len(text)}
+
+
+@job_type("ocr", concurrency=1, max_attempts=5)
+async def run_ocr(db: Session, job: models.Job) -> dict | None:
+    """이미지/PDF에서 글자를 추출해 file_texts에 저장합니다. 내용이 같으면 한 번만 합니다."""
+    content_hash = job.payload["content_hash"]
+    if await db.get(models.FileText, content_hash) is not None:
+        return {"skipped": "already extracted"}
+
+    file_model = await db.get(models.FileModel, job.file_id)
+    blob = await db.get(models.Blob, content_hash)
+    if file_model is None or blob is None:
+        return {"skipped": "file deleted"}
+    if blob.size > settings.ocr_max_size:
+        return {"skipped": "too large"}
+    await db.commit()
+
+    data = b"".join([chunk async for chunk in open_blob(blob.path, blob.encoding)])
+    provider = get_ocr_provider()
+    text = await provider.extract_text(data, file_model.content_type)
+
+    await db.merge(
+        models.FileText(content_hash=content_hash, source=f"ocr:{provider.name}", text=text)
+    )
+    await db.commit()
+    return {"chars": len(text)}
+
+
+@job_type("thumbnail", concurrency=2, max_attempts=2, priority=10)
+async def generate_thumbnails(db: Session, job: models.Job) -> dict | None:
+    """모든 크기의 미리보기를 미리 만들어 캐시에 넣습니다. 사용자가 바로 보게 되므로 우선 실행합니다."""
+    file_model = await db.get(models.FileModel, job.file_id)
+    blob = await db.get(models.Blob, job.payload["content_hash"])
+    if file_model is None or blob is None:
+        return {"skipped": "file deleted"}
+    await db.commit()
+
+    for size in previews.PREVIEW_SIZES:
+        try:
+            await previews.get_preview(blob, file_model.content_type, size)
+        except previews.PreviewError as e:
+            # 손상된 파일은 다시 시도해도 같으므로 실패로 남기지 않음
+            return {"skipped": f"cannot render: {e}"}
+    return {"sizes": list(previews.PREVIEW_SIZES)}
+
+
+@job_type("version_delta", concurrency=1, max_attempts=2, priority=-10)
+async def compact_versions(db: Session, job: models.Job) -> dict | None:
+    """이전 버전을 현재 내용에 대한 차분으로 바꿔 저장 공간을 줄입니다. 급하지 않으므로 나중에 실행합니다."""
+    return await versions.compact_file_versions(db, job.file_id)
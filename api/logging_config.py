@@ -0,0 +1,53 @@
+"""
+로그 설정
+
+settings.log_level로 수준을, settings.log_format으로 형식을 정합니다.
+'json'이면 한 줄에 JSON 객체 하나를 출력하며, logger 호출 시 extra로 넘긴
+값도 필드로 함께 출력하므로 로그 수집기에서 바로 검색할 수 있습니다.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+
+from .settings import settings
+
+# LogRecord가 기본으로 가진 속성 (extra로 넘긴 값만 골라내기 위함)
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging() -> None:
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(settings.log_level.value)
+
+    # SQL 문 로그는 db_echo를 켰을 때만 (모든 쿼리를 출력하면 처리량이 크게 떨어짐)
+    logging.getLogger("sqlalchemy.engine").setLevel(
+        logging.INFO if settings.db_echo else logging.WARNING
+    )
@@ -1,12 +1,163 @@
-from fastapi import FastAPI
-from api.routers import auth, files
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from api.routers import (
+    admin,
+    archives,
+    auth,
+    batch,
+    changes,
+    delta,
+    files,
+    folders,
+    search,
+    trash,
+    uploads,
+    versions,
+)
+from api.routers import metrics as metrics_router
+from api.background import run_periodically, shutdown_process_pool
+from api import (
+    changes as change_feed,
+    integrity,
+    jobs,
+    trash as file_trash,
+    versions as file_versions,
+)
+from api.logging_config import configure_logging
+from api.error import (
+    AuthError,
+    AuthErrorCodeEnum,
+    AuthErrorResponse,
+    LogicError,
+    LogicErrorCodeEnum,
+    LogicErrorResponse,
+)
+from api.middleware import (
+    BodySizeLimitMiddleware,
+    JSONCompressionMiddleware,
+    MetricsMiddleware,
+    UploadQuotaMiddleware,
+)
+from api.quota import remaining_bytes_for
+from api.settings import settings
+from api.storage import close_storage
+from api.util import user_auth_required
 from contextlib import asynccontextmanager
 
+configure_logging()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(
+            run_periodically(
+                "upload-session-gc",
+                settings.upload_session_gc_interval,
+                uploads.purge_expired_upload_sessions,
+            )
+        ),
+        asyncio.create_task(
+            run_periodically(
+                "change-log-prune",
+                settings.changes_prune_interval,
+                change_feed.prune_changes,
+            )
+        ),
+        asyncio.create_task(
+            run_periodically(
+                "version-prune",
+                settings.version_prune_interval,
+                file_versions.prune_versions,
+            )
+        ),
+        asyncio.create_task(
+            run_periodically(
+                "trash-reaper",
+                settings.trash_reap_interval,
+                file_trash.reap_trash,
+            )
+        ),
+    ]
+    if settings.scrub_interval:
+        tasks.append(
+            asyncio.create_task(
+                run_periodically(
+                    "integrity-scrub", settings.scrub_interval, integrity.run_scrub
+                )
+            )
+        )
+    if settings.job_worker_enabled:
+        tasks += [
+            asyncio.create_task(jobs.worker.run()),
+            asyncio.create_task(
+                run_periodically(
+                    "stale-job-release",
+                    settings.job_lock_timeout / 2,
+                    jobs.release_stale_jobs,
+                )
+            ),
+        ]
     yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await integrity.shutdown()
+    await shutdown_process_pool()
+    await close_storage()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.max_request_body_size)
+app.add_middleware(
+    UploadQuotaMiddleware,
+    # multipart로 파일 본문을 받는 엔드포인트 (파트 업로드는 엔드포인트에서 직접 검사)
+    paths=[r"/api/drive/upload", r"/api/drive/batch/upload"],
+    resolve_user=user_auth_required,
+    get_remaining=remaining_bytes_for,
+    overhead=settings.quota_body_overhead,
+)
+app.add_middleware(
+    JSONCompressionMiddleware, minimum_size=settings.response_compression_min_size
+)
+# 가장 바깥에 두어 다른 미들웨어가 거절한 요청까지 기록
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(files.router)
+app.include_router(delta.router)
+app.include_router(versions.router)
+app.include_router(batch.router)
+app.include_router(archives.router)
+app.include_router(search.router)
+app.include_router(changes.router)
+app.include_router(trash.router)
+app.include_router(folders.router)
+app.include_router(uploads.router)
+app.include_router(admin.router)
+if settings.metrics_enabled:
+    app.include_router(metrics_router.router)
+
+
+_LOGIC_ERROR_STATUS = {
+    LogicErrorCodeEnum.NON_EXISTENT_OBJECT: 404,
+    LogicErrorCodeEnum.ALREADY_EXISTENT_OBJECT: 409,
+    LogicErrorCodeEnum.INACTIVE_USER: 403,
+}
+
+
+@app.exception_handler(AuthError)
+async def auth_error_handler(request: Request, exc: AuthError):
+    status_code = 403 if exc.code == AuthErrorCodeEnum.NO_PERMISSION else 401
+    return JSONResponse(
+        status_code=status_code,
+        content=AuthErrorResponse.from_exc(exc).model_dump(mode="json"),
+    )
+
+
+@app.exception_handler(LogicError)
+async def logic_error_handler(request: Request, exc: LogicError):
+    return JSONResponse(
+        status_code=_LOGIC_ERROR_STATUS.get(exc.code, 500),
+        content=LogicErrorResponse.from_exc(exc).model_dump(mode="json"),
+    )
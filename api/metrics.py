@@ -0,0 +1,137 @@
+"""
+Prometheus 지표
+
+요청 지연 시간과 처리량은 MetricsMiddleware가, DB 쿼리 시간과 커넥션 풀 상태는
+instrument_engine()이 등록하는 SQLAlchemy 이벤트가 기록합니다. 그 밖의 지표는
+상태를 가진 모듈(util의 KDF 실행기, jobs의 워커 등)이 직접 갱신합니다.
+
+uvicorn worker를 여러 개 띄우면 지표는 프로세스마다 따로 집계됩니다.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 업로드/다운로드처럼 오래 걸리는 요청까지 담을 수 있도록 버킷을 넓게 잡음
+_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300,
+)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "처리한 HTTP 요청 수", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 요청 처리 시간(응답 본문 전송 포함)",
+    ["method", "route"],
+    buckets=_LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "처리 중인 HTTP 요청 수", ["method"]
+)
+HTTP_REQUEST_BYTES = Counter(
+    "http_request_body_bytes_total", "받은 요청 본문 크기(업로드 처리량)", ["route"]
+)
+HTTP_RESPONSE_BYTES = Counter(
+    "http_response_body_bytes_total", "보낸 응답 본문 크기(다운로드 처리량)", ["route"]
+)
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL 문 실행 시간",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+DISK_WRITE_DURATION = Histogram(
+    "disk_write_duration_seconds",
+    "로컬 디스크에 청크 하나를 쓰는 데 걸린 시간",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1),
+)
+DISK_WRITE_BYTES = Counter("disk_write_bytes_total", "로컬 디스크에 쓴 크기")
+
+KDF_QUEUE_DEPTH = Gauge(
+    "kdf_queue_depth", "비밀번호 해시 실행기에서 대기 중이거나 실행 중인 작업 수"
+)
+JOBS_RUNNING = Gauge("jobs_running", "이 서버의 워커에서 실행 중인 작업 수", ["type"])
+JOBS_FINISHED = Counter(
+    "jobs_finished_total", "끝난 작업 수", ["type", "outcome"]
+)
+INTEGRITY_ISSUES = Counter(
+    "integrity_issues_total",
+    "정합성 검사와 체크섬 검사에서 찾은 문제 수",
+    ["kind"],
+)
+SCRUB_BYTES = Counter("scrub_bytes_total", "체크섬 검사로 읽은 크기")
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "BEGIN", "COMMIT", "ROLLBACK"}
+
+
+def _operation(statement: str) -> str:
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return operation if operation in _SQL_OPERATIONS else "OTHER"
+
+
+class _PoolCollector:
+    """스크랩할 때마다 커넥션 풀 상태를 읽어 보고합니다."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.pool = engine.sync_engine.pool
+
+    def collect(self):
+        pool = self.pool
+        for name, doc, read in (
+            ("db_pool_size", "커넥션 풀 크기", "size"),
+            ("db_pool_checked_out", "사용 중인 커넥션 수", "checkedout"),
+            ("db_pool_checked_in", "풀에서 쉬고 있는 커넥션 수", "checkedin"),
+            ("db_pool_overflow", "풀 크기를 넘어 만든 커넥션 수", "overflow"),
+        ):
+            if hasattr(pool, read):
+                yield GaugeMetricFamily(name, doc, value=getattr(pool, read)())
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """엔진에 쿼리 시간 측정 이벤트와 커넥션 풀 지표를 등록합니다."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_DURATION.labels(_operation(statement)).observe(elapsed)
+        if elapsed >= settings.slow_query_threshold:
+            logger.warning(
+                "slow query",
+                extra={"duration_ms": round(elapsed * 1000, 1), "statement": statement[:500]},
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    REGISTRY.register(_PoolCollector(engine))
+
+
+def render() -> tuple[bytes, str]:
+    """노출할 지표와 Content-Type을 반환합니다."""
+    return generate_latest(), CONTENT_TYPE_LATEST
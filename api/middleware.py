@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import re
+import time
+import zlib
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import compression, metrics
+from .quota import QUOTA_EXCEEDED_DETAIL
+
+_TOO_LARGE_DETAIL = "요청 본문이 허용된 크기를 초과했습니다"
+
+
+class RequestTooLargeError(HTTPException):
+    def __init__(self, detail: str = _TOO_LARGE_DETAIL) -> None:
+        super().__init__(status_code=413, detail=detail)
+
+
+class BodySizeLimitMiddleware:
+    """
+    요청 본문 크기를 제한하는 ASGI 미들웨어
+
+    Content-Length가 제한을 넘으면 본문을 읽기 전에 413으로 거절하고,
+    chunked 전송처럼 길이를 모르는 요청은 받은 바이트 수를 세다가 끊습니다.
+    multipart 파서가 본문 전체를 임시 파일로 받아두기 전에 걸러내기 위함입니다.
+    요청마다 제한이 다르면 get_limit()을 재정의합니다.
+    """
+
+    detail = _TOO_LARGE_DETAIL
+
+    def __init__(self, app: ASGIApp, max_body_size: int = 0) -> None:
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def get_limit(self, scope: Scope) -> int:
+        """이 요청의 본문 크기 제한(bytes), 0이면 제한 없음"""
+        return self.max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = await self.get_limit(scope)
+        if not limit:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    await self._reject(scope, receive, send, self.detail)
+                    return
+                break
+
+        received = 0
+        response_started = False
+        error = RequestTooLargeError(self.detail)
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise error
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLargeError as e:
+            # 바깥 미들웨어가 낸 예외는 그쪽에서 처리
+            if e is not error or response_started:
+                raise
+            await self._reject(scope, receive, send, e.detail)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, detail: str) -> None:
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": detail},
+        )
+        await response(scope, receive, send)
+
+
+class UploadQuotaMiddleware(BodySizeLimitMiddleware):
+    """
+    업로드 요청 본문을 사용자의 남은 저장 공간으로 제한하는 ASGI 미들웨어
+
+    한도를 넘는 업로드를 multipart 본문을 받기 전에(Content-Length) 또는 받는
+    도중에 거절합니다. 최종 검사는 파일을 만드는 트랜잭션에서 quota.charge()로 합니다.
+    인증 정보가 없거나 잘못된 요청은 그대로 통과시켜 엔드포인트가 처리하게 합니다.
+    """
+
+    detail = QUOTA_EXCEEDED_DETAIL
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: list[str],
+        resolve_user: Callable[[str], Awaitable[str]],
+        get_remaining: Callable[[str], Awaitable[int | None]],
+        overhead: int = 0,
+    ) -> None:
+        super().__init__(app)
+        self.paths = [re.compile(path) for path in paths]
+        self.resolve_user = resolve_user
+        self.get_remaining = get_remaining
+        self.overhead = overhead
+
+    async def get_limit(self, scope: Scope) -> int:
+        if scope["method"] not in ("POST", "PUT") or not any(
+            path.fullmatch(scope["path"]) for path in self.paths
+        ):
+            return 0
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return 0
+        try:
+            user_id = await self.resolve_user(token)
+        except HTTPException:
+            return 0
+        remaining = await self.get_remaining(user_id)
+        if remaining is None:
+            return 0
+        # 0은 제한 없음을 뜻하므로 최소 1
+        return max(remaining + self.overhead, 1)
+
+
+class MetricsMiddleware:
+    """
+    요청 수, 처리 시간, 처리 중인 요청 수와 요청/응답 본문 크기를 기록하는 ASGI 미들웨어
+
+    route 라벨은 '/api/drive/file/{safe_filename}' 같은 경로 템플릿을 쓰므로
+    파일 id마다 시계열이 늘어나지 않습니다. 일치하는 경로가 없으면 'unmatched'
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+
+        async def counting_receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = metrics.HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            matched = scope.get("route")
+            route = getattr(matched, "path", None) or "unmatched"
+            metrics.HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            metrics.HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            if request_bytes:
+                metrics.HTTP_REQUEST_BYTES.labels(route).inc(request_bytes)
+            if response_bytes:
+                metrics.HTTP_RESPONSE_BYTES.labels(route).inc(response_bytes)
+
+
+class _GzipStream:
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdStream:
+    def __init__(self) -> None:
+        self._compressor = compression.zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        flush_block = compression.zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _is_json(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type == "application/json" or media_type.endswith("+json")
+
+
+class JSONCompressionMiddleware:
+    """
+    JSON 응답을 zstd 또는 gzip으로 압축하는 ASGI 미들웨어
+
+    파일 다운로드처럼 JSON이 아닌 응답은 건드리지 않습니다. minimum_size보다
+    작은 응답은 압축 이득보다 비용이 커서 그대로 보냅니다.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def _choose_encoding(self, scope: Scope) -> str | None:
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accepted = compression.accepted_encodings(value.decode("latin-1"))
+                if compression.ZSTD in accepted and compression.zstd_available():
+                    return compression.ZSTD
+                if "gzip" in accepted:
+                    return "gzip"
+                return None
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http" and self.minimum_size:
+            encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        stream: _GzipStream | _ZstdStream | None = None
+        passthrough = False
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start_message, stream, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if (
+                    not _is_json(headers.get("content-type", ""))
+                    or "content-encoding" in headers
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(raw=start_message["headers"])
+
+            if stream is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                stream = _ZstdStream() if encoding == compression.ZSTD else _GzipStream()
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = stream.compress(body) + stream.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                # 스트리밍 응답은 길이를 미리 알 수 없음
+                del headers["Content-Length"]
+                await send(start_message)
+
+            data = stream.compress(body)
+            if not more_body:
+                data += stream.finish()
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, compressing_send)
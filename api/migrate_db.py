@@ -1,17 +1,15 @@
-from sqlalchemy import create_engine
+import asyncio
 
+from .database import engine
 from .models import Base
 
-db_url = "mysql+pymysql://root@db:3306/demo?charset=utf8"
 
-
-engine = create_engine(db_url, echo=True)
-
-
-def reset_database():
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+async def reset_database():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
 
 
 if __name__ == "__main__":
-    reset_database()
+    asyncio.run(reset_database())
@@ -1,19 +1,258 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    String,
+    Integer,
+    DateTime,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql.sqltypes import Boolean, Integer, String
 
 from .database import Base
 
 
+class Blob(Base):
+    """Model for content-addressed blob (내용이 같은 파일은 하나의 blob을 공유)"""
+    __tablename__ = "blobs"
+
+    hash = Column(String(64), primary_key=True)  # sha256 hex
+    size = Column(BigInteger, nullable=False)
+    path = Column(String(512), nullable=False)  # 저장소 키 (blobs/ab/cd/<hash>)
+    # 저장 시 압축 방식 (NULL이면 원본 그대로, 'zstd'), size는 항상 원본 크기
+    encoding = Column(String(16), nullable=True)
+    stored_size = Column(BigInteger, nullable=True)  # 저장소에 실제로 쓰인 크기
+    # 참조하는 FileModel과 FileVersion(내용 또는 차분의 기준) 수
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class Folder(Base):
+    """Model for folder
+
+    path는 루트부터의 전체 경로('/a/b')를 그대로 저장하는 materialized path입니다.
+    하위 트리 조회는 path 인덱스의 접두사 범위 스캔 한 번으로 끝나고,
+    폴더 이동/이름 변경은 하위 폴더 path를 UPDATE 한 번으로 바꿉니다.
+    파일은 folder_id로 폴더를 참조하므로 파일 행은 건드리지 않습니다.
+    """
+    __tablename__ = "folders"
+
+    id = Column(String(36), primary_key=True)
+    name = Column(String(255), nullable=False)
+    parent_id = Column(String(36), ForeignKey("folders.id"), nullable=True, index=True)
+    path = Column(String(512), nullable=False, unique=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+
 class FileModel(Base):
     """Model for file"""
     __tablename__ = "files"
+    __table_args__ = (
+        # 폴더 목록 조회(정렬 + 키셋 페이지네이션)가 인덱스 범위 스캔으로 끝나도록 함
+        # (휴지통 파일은 deleted_at IS NULL 조건으로, 다른 사용자의 파일은 owner_id로
+        # 같은 인덱스에서 걸러짐. 본인 파일과 소유자 없는 파일은 따로 읽어 합침)
+        Index("ix_files_folder_name", "folder_id", "deleted_at", "owner_id", "name", "id"),
+        Index("ix_files_folder_size", "folder_id", "deleted_at", "owner_id", "size", "id"),
+        Index(
+            "ix_files_folder_created", "folder_id", "deleted_at", "owner_id", "created_at", "id"
+        ),
+        # 검색 결과를 최신순으로 페이지네이션할 때 사용
+        Index("ix_files_created", "created_at", "id"),
+        Index("ix_files_type_created", "content_type", "created_at"),
+        Index("ix_files_owner_created", "owner_id", "created_at", "id"),
+        # 휴지통 목록(지운 순서)과 휴지통 비우기 작업용
+        Index("ix_files_owner_deleted", "owner_id", "deleted_at", "id"),
+        Index("ix_files_purge", "purge_at"),
+        # 이름 부분 일치 검색용 (ngram 파서라 한글도 단어 구분 없이 찾을 수 있음)
+        Index(
+            "ft_files_name", "name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"
+        ).ddl_if(dialect="mysql"),
+    )
+
+    id = Column(String(255), primary_key=True)
+    name = Column(String(255), index=True)  # 업로드한 원래 파일 이름
+    # 파일이 속한 폴더, NULL이면 루트
+    folder_id = Column(String(36), ForeignKey("folders.id"), nullable=True)
+    # 올린 사용자, NULL이면 소유자 기능 이전에 올린 파일 (모든 사용자가 접근 가능)
+    owner_id = Column(String(200), ForeignKey("user.id"), nullable=True)
+    path = Column(String(512))  # 저장소 안의 blob 키
+    size = Column(BigInteger)
+    content_hash = Column(String(64), ForeignKey("blobs.hash"), index=True)  # sha256 hex
+    content_type = Column(String(255))
+    created_at = Column(DateTime, default=datetime.now)
+    # 내용이 바뀔 때마다 1씩 늘어나는 현재 버전 번호 (이전 내용은 FileVersion)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # 휴지통으로 옮긴 시각, NULL이면 휴지통에 있지 않은 파일
+    deleted_at = Column(DateTime, nullable=True)
+    # 이 시각이 지나면 trash 정리 작업이 파일과 blob 참조를 실제로 지움
+    purge_at = Column(DateTime, nullable=True)
+
+
+class UploadSession(Base):
+    """Model for resumable (multipart) upload session"""
+    __tablename__ = "upload_sessions"
 
     id = Column(String(255), primary_key=True)
-    name = Column(String(255), index=True)
-    path = Column(String(512))
-    size = Column(Integer)
+    file_name = Column(String(255), nullable=False)
+    folder_id = Column(
+        String(36), ForeignKey("folders.id", ondelete="SET NULL"), nullable=True
+    )
+    total_size = Column(BigInteger, nullable=True)  # 클라이언트가 알려준 전체 크기
+    owner_id = Column(String(200), ForeignKey("user.id", ondelete="CASCADE"), nullable=True)
+    status = Column(String(20), nullable=False, default="pending")
+    file_id = Column(String(255), nullable=True)  # 완료 후 생성된 FileModel id
+    created_at = Column(DateTime, default=datetime.now)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class UploadPart(Base):
+    """Model for uploaded part of an upload session"""
+    __tablename__ = "upload_parts"
+
+    session_id = Column(
+        String(255),
+        ForeignKey("upload_sessions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    part_number = Column(Integer, primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # sha256 hex
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class Job(Base):
+    """
+    Model for background job (업로드 이후 처리 작업)
+
+    워커는 status='pending'이고 run_after가 지난 작업을 priority가 높은 순으로
+    SELECT ... FOR UPDATE SKIP LOCKED로 가져가므로 서버가 여러 대여도 한 번만 실행됩니다.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "type", "priority", "run_after"),
+    )
+
+    id = Column(String(36), primary_key=True)
+    type = Column(String(32), nullable=False)  # 작업 종류 (checksum, ocr 등)
+    file_id = Column(
+        String(255), ForeignKey("files.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    payload = Column(JSON, nullable=True)
+    # pending -> running -> succeeded / failed (재시도할 수 있으면 다시 pending)
+    status = Column(String(20), nullable=False, default="pending")
+    priority = Column(Integer, nullable=False, default=0)  # 클수록 먼저 실행
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.now)
+    locked_by = Column(String(64), nullable=True)  # 실행 중인 워커
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class FileChange(Base):
+    """
+    Model for file change log (동기화 클라이언트용 변경 기록)
+
+    seq는 사용자별로 1부터 빈틈없이 늘어나며, 파일 행을 추가하거나 지우는 트랜잭션
+    안에서 user.change_seq를 올려 매깁니다. 사용자 행 잠금이 커밋까지 유지되므로
+    커밋되는 순서와 seq 순서가 같아, 클라이언트는 마지막으로 받은 seq만 기억하면 됩니다.
+    """
+    __tablename__ = "file_changes"
+
+    user_id = Column(
+        String(200), ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    seq = Column(BigInteger, primary_key=True)
+    action = Column(String(16), nullable=False)  # created, modified, deleted
+    file_id = Column(String(255), nullable=False)  # 삭제된 뒤에도 남도록 FK 없음
+    name = Column(String(255), nullable=False)
+    folder_id = Column(String(36), nullable=True)
+    size = Column(BigInteger, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    content_type = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+
+
+class FileVersion(Base):
+    """
+    Model for previous content of file (파일 버전 기록)
+
+    내용은 blob_hash의 blob에 통째로 두거나, base_hash가 있으면 그 blob(버전을
+    정리할 때의 파일 내용)에 대한 차분으로 둡니다. 버전 행은 두 blob에 대해 각각
+    참조 하나씩을 가집니다. content_hash와 size는 항상 원래 내용 기준입니다.
+    """
+    __tablename__ = "file_versions"
+
+    file_id = Column(
+        String(255), ForeignKey("files.id", ondelete="CASCADE"), primary_key=True
+    )
+    version = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    blob_hash = Column(String(64), ForeignKey("blobs.hash"), nullable=False, index=True)
+    base_hash = Column(String(64), ForeignKey("blobs.hash"), nullable=True, index=True)
+    created_at = Column(DateTime, nullable=False)  # 이 내용이 처음 저장된 시각
+    # 다음 내용으로 바뀐 시각, 보관 기간은 이 시각부터 셈
+    replaced_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+
+
+class BlobSignature(Base):
+    """Model for block signature of blob content (차분 업로드용), 내용이 같으면 공유"""
+    __tablename__ = "blob_signatures"
+
+    content_hash = Column(
+        String(64), ForeignKey("blobs.hash", ondelete="CASCADE"), primary_key=True
+    )
+    block_size = Column(Integer, nullable=False)
+    # 블록마다 adler32(4 bytes) + blake2b(16 bytes)
+    signature = Column(
+        LargeBinary().with_variant(LargeBinary(length=2**32 - 1), "mysql"), nullable=False
+    )
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class IntegrityCheckpoint(Base):
+    """
+    Model for progress of integrity check (정합성 검사, 체크섬 검사)
+
+    한 번에 한 곳에서만 실행되도록 status='running'과 updated_at을 잠금처럼 쓰고,
+    검사를 마친 위치를 남겨 중단되어도 이어서 검사합니다.
+    """
+    __tablename__ = "integrity_checkpoints"
+
+    name = Column(String(32), primary_key=True)  # 검사 종류 (reconcile, scrub)
+    # idle -> running -> finished / paused(중단, 이어서 할 수 있음) / failed
+    status = Column(String(20), nullable=False, default="idle")
+    position = Column(String(64), nullable=True)  # 마지막으로 검사한 blob hash, NULL이면 처음부터
+    report = Column(JSON, nullable=True)  # 검사 결과 (진행 중이면 지금까지의 결과)
+    locked_by = Column(String(64), nullable=True)  # 실행 중인 프로세스
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)  # 실행 중에는 주기적으로 갱신
+    finished_at = Column(DateTime, nullable=True)
+
+
+class FileText(Base):
+    """Model for text extracted from file content (OCR 등), 내용이 같으면 공유"""
+    __tablename__ = "file_texts"
+    __table_args__ = (
+        Index(
+            "ft_file_texts_text", "text", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"
+        ).ddl_if(dialect="mysql"),
+    )
+
+    content_hash = Column(
+        String(64), ForeignKey("blobs.hash", ondelete="CASCADE"), primary_key=True
+    )
+    source = Column(String(32), nullable=False)  # 추출 방식 (ocr, plain 등)
+    text = Column(Text().with_variant(Text(length=2**32 - 1), "mysql"), nullable=False)
     created_at = Column(DateTime, default=datetime.now)
 
 
@@ -32,4 +271,15 @@ class User(Base):
         String(length=200),  # noqa: WPS432
         nullable=False,
     )
+    is_admin: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # 소유한 파일 크기의 합(bytes), 파일을 만들고 지울 때 같은 트랜잭션에서 갱신
+    used_bytes: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+    # 저장 공간 한도(bytes), NULL이면 settings.default_user_quota, 0이면 제한 없음
+    quota_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # 마지막으로 매긴 변경 기록(file_changes) 번호
+    change_seq: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
   
@@ -0,0 +1,128 @@
+"""
+OCR 제공자
+
+settings.ocr_provider로 고르며, 'stub'은 외부 API 없이 동작하는 로컬 구현이라
+개발 환경과 테스트에서 사용합니다. 테스트에서는 set_ocr_provider()로 원하는
+구현을 끼워 넣을 수 있습니다.
+"""
+from __future__ import annotations
+
+import abc
+import base64
+import json
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+from .error import LogicError, LogicErrorCodeEnum
+from .settings import settings
+
+# OCR을 시도하는 형식
+OCR_CONTENT_TYPES = {
+    "application/pdf": "pdf",
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/tiff": "tiff",
+}
+
+
+class OcrProvider(abc.ABC):
+    name: str
+
+    @abc.abstractmethod
+    async def extract_text(self, data: bytes, content_type: str) -> str:
+        """이미지/PDF 내용에서 글자를 추출합니다. 실패하면 LogicError(OCR_API_ERROR)"""
+
+
+class StubOcrProvider(OcrProvider):
+    """
+    외부 API를 부르지 않는 로컬 구현
+
+    실제 인식은 하지 않고 내용 크기와 형식을 담은 고정된 문자열을 돌려줍니다.
+    """
+
+    name = "stub"
+
+    async def extract_text(self, data: bytes, content_type: str) -> str:
+        return f"[ocr stub] {content_type} {len(data)} bytes"
+
+
+class ClovaOcrProvider(OcrProvider):
+    """네이버 CLOVA OCR(General) API 구현"""
+
+    name = "clova"
+
+    def __init__(self, api_url: str, secret: str, timeout: float) -> None:
+        self.api_url = api_url
+        self.secret = secret
+        self.timeout = timeout
+
+    def _request(self, data: bytes, content_type: str) -> dict:
+        body = json.dumps(
+            {
+                "version": "V2",
+                "requestId": str(uuid.uuid4()),
+                "timestamp": int(time.time() * 1000),
+                "images": [
+                    {
+                        "format": OCR_CONTENT_TYPES[content_type],
+                        "name": "file",
+                        "data": base64.b64encode(data).decode(),
+                    }
+                ],
+            }
+        ).encode()
+        request = urllib.request.Request(
+            self.api_url,
+            data=body,
+            headers={"Content-Type": "application/json", "X-OCR-SECRET": self.secret},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)
+
+    async def extract_text(self, data: bytes, content_type: str) -> str:
+        try:
+            result = await run_in_threadpool(self._request, data, content_type)
+        except (urllib.error.URLError, TimeoutError, ValueError) as e:
+            raise LogicError(
+                code=LogicErrorCodeEnum.OCR_API_ERROR, detail={"reason": str(e)}
+            )
+        lines = []
+        for image in result.get("images", []):
+            if image.get("inferResult") not in (None, "SUCCESS"):
+                raise LogicError(
+                    code=LogicErrorCodeEnum.OCR_API_ERROR,
+                    detail={"reason": image.get("message", "")},
+                )
+            lines.append(" ".join(field["inferText"] for field in image.get("fields", [])))
+        return "\n".join(lines)
+
+
+_provider: OcrProvider | None = None
+
+
+def create_ocr_provider() -> OcrProvider:
+    if settings.ocr_provider == "clova":
+        return ClovaOcrProvider(
+            api_url=settings.ocr_api_url,
+            secret=settings.ocr_secret,
+            timeout=settings.ocr_timeout,
+        )
+    return StubOcrProvider()
+
+
+def get_ocr_provider() -> OcrProvider:
+    global _provider  # noqa: WPS420
+    if _provider is None:
+        _provider = create_ocr_provider()
+    return _provider
+
+
+def set_ocr_provider(provider: OcrProvider | None) -> None:
+    """OCR 제공자를 바꿉니다. None이면 설정에 따라 다시 만듭니다."""
+    global _provider  # noqa: WPS420
+    _provider = provider
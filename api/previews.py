@@ -0,0 +1,132 @@
+"""
+이미지/PDF 미리보기(썸네일)
+
+정해진 크기(PREVIEW_SIZES)로 줄인 WebP 이미지를 프로세스 풀에서 만들고,
+내용 해시를 키로 디스크 LRU 캐시에 보관합니다. 내용이 같은 파일은 미리보기를 공유합니다.
+
+Pillow는 선택 사항이며, PDF 미리보기에는 PyMuPDF도 필요합니다.
+설치되어 있지 않은 형식은 can_preview()가 False를 돌려줍니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .background import run_in_process
+from .blob_store import open_blob
+from .cache import DiskLRUCache
+from .settings import settings
+from .storage import get_storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover
+    Image = ImageOps = None
+
+try:
+    import pymupdf
+except ImportError:  # pragma: no cover
+    pymupdf = None
+
+# 크기 이름 -> 긴 변의 최대 픽셀
+PREVIEW_SIZES = {"small": 128, "medium": 512, "large": 1024}
+PREVIEW_MEDIA_TYPE = "image/webp"
+
+_IMAGE_TYPES = {
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+    "image/bmp",
+    "image/tiff",
+}
+_PDF = "application/pdf"
+
+
+class PreviewError(Exception):
+    """미리보기를 만들 수 없는 내용(손상된 이미지 등)"""
+
+
+def can_preview(content_type: str | None) -> bool:
+    if Image is None:
+        return False
+    if content_type == _PDF:
+        return pymupdf is not None
+    return content_type in _IMAGE_TYPES
+
+
+def preview_key(content_hash: str, size: str) -> str:
+    return f"{content_hash}-{size}.webp"
+
+
+def render_preview(source: str | bytes, content_type: str, max_px: int) -> bytes:
+    """
+    원본(로컬 경로 또는 내용)을 긴 변이 max_px 이하가 되도록 줄여 WebP로 만듭니다.
+    프로세스 풀에서 실행합니다.
+    """
+    if content_type == _PDF:
+        doc = pymupdf.open(stream=source) if isinstance(source, bytes) else pymupdf.open(source)
+        with doc:
+            # 첫 페이지만 필요한 크기로 렌더링
+            page = doc[0]
+            zoom = max_px / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    else:
+        image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+        # JPEG은 디코딩할 때부터 줄여서 읽음
+        image.draft("RGB", (max_px, max_px))
+        image = ImageOps.exif_transpose(image)
+
+    image.thumbnail((max_px, max_px))
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    out = io.BytesIO()
+    image.save(out, "WEBP", quality=80)
+    return out.getvalue()
+
+
+preview_cache = DiskLRUCache(
+    root=settings.preview_cache_dir or os.path.join(settings.upload_dir, ".previews"),
+    max_bytes=settings.preview_cache_max_bytes,
+)
+
+# 같은 미리보기를 동시에 여러 번 만들지 않도록 진행 중인 작업을 공유
+_inflight: dict[str, asyncio.Task[bytes]] = {}
+
+
+async def _generate(blob: models.Blob, content_type: str, size: str, key: str) -> bytes:
+    local_path = get_storage().local_path(blob.path)
+    if local_path is not None and blob.encoding is None:
+        source: str | bytes = local_path
+    else:
+        source = b"".join([chunk async for chunk in open_blob(blob.path, blob.encoding)])
+    try:
+        data = await run_in_process(
+            render_preview, source, content_type, PREVIEW_SIZES[size]
+        )
+    except Exception as e:
+        raise PreviewError(str(e)) from e
+    await run_in_threadpool(preview_cache.put, key, data)
+    return data
+
+
+async def get_preview(blob: models.Blob, content_type: str, size: str) -> bytes:
+    """미리보기를 캐시에서 찾고, 없으면 만들어 캐시에 넣은 뒤 돌려줍니다."""
+    key = preview_key(blob.hash, size)
+    data = await run_in_threadpool(preview_cache.get, key)
+    if data is not None:
+        return data
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_generate(blob, content_type, size, key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # 요청이 끊겨도 다른 요청이 기다리는 작업은 계속되도록 shield
+    return await asyncio.shield(task)
@@ -0,0 +1,148 @@
+"""
+사용자별 저장 공간 한도와 사용량
+
+사용량(user.used_bytes)은 파일을 만들거나 지우는 트랜잭션 안에서 함께 늘리고
+줄이므로 SUM(size)로 다시 계산할 필요가 없습니다. 한도 검사는 조건부 UPDATE
+한 번으로 하므로 같은 사용자의 업로드가 동시에 들어와도 한도를 넘지 않습니다.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from fastapi import HTTPException
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from . import models
+from .database import SessionLocal
+from .settings import settings
+
+QUOTA_EXCEEDED_DETAIL = "저장 공간이 부족합니다"
+
+
+class QuotaExceededError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=413, detail=QUOTA_EXCEEDED_DETAIL)
+
+
+def _quota_column():
+    # quota_bytes가 NULL이면 기본 한도, 0이면 제한 없음
+    return func.coalesce(models.User.quota_bytes, settings.default_user_quota)
+
+
+def effective_quota(user: models.User) -> int | None:
+    """사용자의 한도(bytes)를 반환합니다. 제한이 없으면 None"""
+    quota = user.quota_bytes if user.quota_bytes is not None else settings.default_user_quota
+    return quota or None
+
+
+async def remaining_bytes(db: Session, user_id: str) -> int | None:
+    """남은 저장 공간(bytes)을 반환합니다. 제한이 없거나 사용자가 없으면 None"""
+    row = (
+        await db.execute(
+            select(models.User.used_bytes, _quota_column()).where(
+                models.User.id == user_id
+            )
+        )
+    ).one_or_none()
+    if row is None or not row[1]:
+        return None
+    used_bytes, quota = row
+    return max(quota - used_bytes, 0)
+
+
+async def get_usage(db: Session, user_id: str) -> dict[str, int | None] | None:
+    """사용량, 한도, 남은 용량을 반환합니다. 사용자가 없으면 None"""
+    user = await db.get(models.User, user_id, populate_existing=True)
+    if user is None:
+        return None
+    quota = effective_quota(user)
+    return {
+        "used_bytes": user.used_bytes,
+        "quota_bytes": quota,
+        "remaining_bytes": max(quota - user.used_bytes, 0) if quota else None,
+    }
+
+
+async def remaining_bytes_for(user_id: str) -> int | None:
+    """요청의 DB 세션 밖(미들웨어 등)에서 남은 공간을 조회합니다."""
+    async with SessionLocal() as db:
+        return await remaining_bytes(db, user_id)
+
+
+async def charge(db: Session, user_id: str, amount: int) -> None:
+    """
+    사용량을 amount만큼 늘립니다. 한도를 넘으면 QuotaExceededError
+
+    잡은 행 잠금은 커밋까지 유지되므로 파일 행을 추가한 뒤 커밋 직전에 부릅니다.
+    커밋은 호출한 쪽에서 합니다.
+    """
+    if amount <= 0:
+        return
+    quota = _quota_column()
+    result = await db.execute(
+        update(models.User)
+        .where(
+            models.User.id == user_id,
+            or_(quota == 0, models.User.used_bytes + amount <= quota),
+        )
+        .values(used_bytes=models.User.used_bytes + amount)
+    )
+    if result.rowcount != 1:
+        raise QuotaExceededError
+
+
+async def refund(db: Session, usage: dict[str | None, int]) -> None:
+    """
+    사용자별로 사용량을 줄입니다. usage는 {user_id: bytes}이며 소유자가 없는
+    (None) 항목은 무시합니다. 커밋은 호출한 쪽에서 합니다.
+    """
+    for user_id, amount in usage.items():
+        if user_id is None or amount <= 0:
+            continue
+        await db.execute(
+            update(models.User)
+            .where(models.User.id == user_id)
+            .values(used_bytes=models.User.used_bytes - amount)
+        )
+
+
+async def adjust(db: Session, user_id: str | None, amount: int) -> None:
+    """
+    파일 크기가 amount만큼 바뀐 만큼 사용량을 늘리거나 줄입니다. (내용을 바꿀 때)
+    늘어나서 한도를 넘으면 QuotaExceededError. 커밋은 호출한 쪽에서 합니다.
+    """
+    if user_id is None:
+        return
+    if amount > 0:
+        await charge(db, user_id, amount)
+    else:
+        await refund(db, {user_id: -amount})
+
+
+def usage_by_owner(file_models: list[models.FileModel]) -> dict[str | None, int]:
+    usage: dict[str | None, int] = defaultdict(int)
+    for file_model in file_models:
+        usage[file_model.owner_id] += file_model.size or 0
+    return usage
+
+
+async def recalculate(db: Session, user_id: str) -> int:
+    """
+    파일 크기의 합으로 사용량을 다시 계산해 저장합니다. 휴지통에 있는 파일도
+    실제로 지워지기 전까지는 사용량에 들어갑니다.
+
+    평소에는 필요 없고, 사용량이 어긋났을 때 관리자가 바로잡는 용도입니다.
+    커밋은 호출한 쪽에서 합니다.
+    """
+    used_bytes = await db.scalar(
+        select(func.coalesce(func.sum(models.FileModel.size), 0)).where(
+            models.FileModel.owner_id == user_id
+        )
+    )
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(used_bytes=used_bytes)
+    )
+    return int(used_bytes)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from fastapi import HTTPException
+
+
+class RateLimiter:
+    """
+    고정 구간(fixed window) 방식의 프로세스 내 요청 제한기
+
+    키마다 window초 동안 limit번까지 허용합니다. 키가 maxsize를 넘으면
+    가장 오래 쓰지 않은 키부터 버립니다. TTLCache와 마찬가지로 이벤트 루프
+    한 곳에서만 쓰는 것을 전제로 합니다.
+    """
+
+    def __init__(self, limit: int, window: float, maxsize: int = 100000) -> None:
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, tuple[float, int]] = OrderedDict()
+
+    def _current(self, key: Hashable) -> tuple[float, int]:
+        now = time.monotonic()
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= now:
+            return now + self.window, 0
+        return entry
+
+    def retry_after(self, key: Hashable) -> int | None:
+        """제한에 걸렸으면 다시 시도할 수 있을 때까지 남은 초, 아니면 None"""
+        if self.limit <= 0:
+            return None
+        reset_at, count = self._current(key)
+        if count < self.limit:
+            return None
+        return max(math.ceil(reset_at - time.monotonic()), 1)
+
+    def hit(self, key: Hashable) -> None:
+        if self.limit <= 0:
+            return
+        reset_at, count = self._current(key)
+        self._data[key] = (reset_at, count + 1)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def reset(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def check(self, key: Hashable) -> None:
+        """제한에 걸렸으면 Retry-After와 함께 429를 발생시킵니다."""
+        retry_after = self.retry_after(key)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="시도 횟수가 너무 많습니다. 잠시 후 다시 시도해주세요",
+                headers={"Retry-After": str(retry_after)},
+            )
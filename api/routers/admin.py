@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from starlette.concurrency import run_in_threadpool
+
+from .. import integrity, jobs, models, quota
+from ..auth_cache import cache_stats
+from ..crud import blob_crud, job_crud
+from ..database import get_db
+from ..previews import preview_cache
+from ..schemas.admin_schema import (
+    IntegrityCheckResponse,
+    QuotaUpdate,
+    StorageStatsResponse,
+)
+from ..schemas.file_schema import UsageResponse
+from ..schemas.job_schema import JobCount, JobStatsResponse
+from ..util import admin_auth_required
+
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"],
+    dependencies=[Depends(admin_auth_required)],
+)
+
+
+@router.get("/storage", response_model=StorageStatsResponse)
+async def get_storage_stats(db: Session = Depends(get_db)):
+    """중복 제거 비율과 중복 제거, 압축으로 절약한 용량을 반환합니다."""
+    stats = await blob_crud.get_storage_stats(db)
+    logical_bytes = stats["logical_bytes"]
+    unique_bytes = stats["unique_bytes"]
+    physical_bytes = stats["physical_bytes"]
+    return StorageStatsResponse(
+        **stats,
+        bytes_saved=max(logical_bytes - physical_bytes, 0),
+        compression_saved=max(unique_bytes - physical_bytes, 0),
+        dedup_ratio=logical_bytes / unique_bytes if unique_bytes else 1.0,
+    )
+
+
+@router.get("/cache")
+async def get_cache_stats() -> dict[str, dict[str, int]]:
+    """인증 캐시와 미리보기 캐시의 크기와 hit/miss 횟수를 반환합니다."""
+    return {**cache_stats(), "preview": await run_in_threadpool(preview_cache.stats)}
+
+
+@router.get("/jobs", response_model=JobStatsResponse)
+async def get_job_stats(db: Session = Depends(get_db)):
+    """작업 종류와 상태별 개수, 이 서버에서 실행 중인 작업 수를 반환합니다."""
+    counts = await job_crud.get_job_counts(db)
+    return JobStatsResponse(
+        counts=[
+            JobCount(type=job_type, status=status, count=count)
+            for job_type, status, count in counts
+        ],
+        running_in_worker=jobs.worker.running(),
+    )
+
+
+async def _get_user_or_404(db: Session, user_id: str) -> models.User:
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    return user
+
+
+@router.put("/users/{user_id}/quota", response_model=UsageResponse)
+async def update_user_quota(
+    user_id: str, body: QuotaUpdate, db: Session = Depends(get_db)
+):
+    """사용자의 저장 공간 한도를 바꿉니다. 이미 사용 중인 파일은 지우지 않습니다."""
+    user = await _get_user_or_404(db, user_id)
+    user.quota_bytes = body.quota_bytes
+    await db.commit()
+    return UsageResponse(**await quota.get_usage(db, user_id))
+
+
+@router.post("/users/{user_id}/usage/recalculate", response_model=UsageResponse)
+async def recalculate_user_usage(user_id: str, db: Session = Depends(get_db)):
+    """파일 크기의 합으로 사용량을 다시 계산합니다. (사용량이 어긋났을 때)"""
+    await _get_user_or_404(db, user_id)
+    await quota.recalculate(db, user_id)
+    await db.commit()
+    return UsageResponse(**await quota.get_usage(db, user_id))
+
+
+@router.get("/integrity", response_model=list[IntegrityCheckResponse])
+async def get_integrity_checks():
+    """정합성 검사와 체크섬 검사의 상태와 마지막(또는 진행 중인) 결과를 반환합니다."""
+    return await integrity.get_checkpoints()
+
+
+async def _start_check(name: str, func, *args) -> IntegrityCheckResponse:
+    if not await integrity.claim(name):
+        raise HTTPException(status_code=409, detail="이미 실행 중인 검사입니다")
+    integrity.start(name, func, *args)
+    checkpoints = {checkpoint.name: checkpoint for checkpoint in await integrity.get_checkpoints()}
+    return IntegrityCheckResponse.model_validate(checkpoints[name])
+
+
+@router.post(
+    "/integrity/reconcile", response_model=IntegrityCheckResponse, status_code=202
+)
+async def start_reconcile(repair: bool = False):
+    """
+    저장소와 blob 목록을 맞춰 보는 검사를 백그라운드에서 시작합니다.
+
+    repair면 오래된 orphan 객체를 지우고, 객체가 없는 파일은 휴지통으로 옮기며,
+    어긋난 참조 수를 고칩니다. 결과는 GET /api/admin/integrity로 확인합니다.
+    """
+    return await _start_check(integrity.RECONCILE, integrity.reconcile, repair)
+
+
+@router.post("/integrity/scrub", response_model=IntegrityCheckResponse, status_code=202)
+async def start_scrub(restart: bool = False):
+    """blob 체크섬 검사를 지난번 위치부터(restart면 처음부터) 백그라운드에서 시작합니다."""
+    return await _start_check(integrity.SCRUB, integrity.scrub, restart)
@@ -0,0 +1,148 @@
+import posixpath
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import blob_store, models
+from ..crud import blob_crud, file_crud, folder_crud
+from ..database import get_db
+from ..download import content_disposition
+from ..schemas.file_schema import BatchFileIds
+from ..settings import settings
+from ..util import user_auth_required
+from ..zipstream import ZipEntry, is_compressible, predict_zip_size, stream_zip
+
+router = APIRouter(prefix="/api/drive/zip", tags=["drive"])
+
+Compression = Literal["auto", "stored", "deflate"]
+
+
+def _unique_name(name: str, used: set[str]) -> str:
+    """같은 경로에 같은 이름이 있으면 'a (1).txt'처럼 번호를 붙입니다."""
+    candidate = name
+    stem, ext = posixpath.splitext(name)
+    index = 1
+    while candidate in used:
+        candidate = f"{stem} ({index}){ext}"
+        index += 1
+    used.add(candidate)
+    return candidate
+
+
+def _file_entry(
+    file_model: models.FileModel,
+    name: str,
+    compression: Compression,
+    blobs: dict[str, models.Blob],
+) -> ZipEntry:
+    key = file_model.path
+    blob = blobs.get(file_model.content_hash)
+    encoding = blob.encoding if blob is not None else None
+    if compression == "auto":
+        compress = is_compressible(file_model.content_type)
+    else:
+        compress = compression == "deflate"
+    return ZipEntry(
+        name=name,
+        size=file_model.size,
+        modified=file_model.created_at,
+        # 압축 저장된 blob은 풀어서 담음
+        read=lambda: blob_store.open_blob(key, encoding),
+        compress=compress,
+    )
+
+
+def _zip_response(entries: list[ZipEntry], filename: str) -> StreamingResponse:
+    headers = {"Content-Disposition": content_disposition(filename)}
+    size = predict_zip_size(entries)
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return StreamingResponse(
+        stream_zip(entries, compress_level=settings.zip_compress_level),
+        media_type="application/zip",
+        headers=headers,
+    )
+
+
+@router.get("/folders/{folder_id}")
+async def download_folder_zip(
+    folder_id: str,
+    compression: Compression = Query(
+        default="auto", description="auto면 이미 압축된 형식은 무압축으로 저장"
+    ),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    폴더 전체를 ZIP으로 묶어 내려받습니다.
+
+    아카이브를 미리 만들지 않고 파일을 읽는 대로 스트리밍하므로 요청당
+    메모리 사용량은 청크 크기 정도로 일정합니다.
+    """
+    folder = await folder_crud.get_folder(db, folder_id=folder_id)
+    if folder is None:
+        raise HTTPException(status_code=404, detail="폴더를 찾을 수 없습니다")
+    folders, files = await folder_crud.list_subtree(db, folder, user_id=user_id)
+    blobs = await blob_crud.get_blobs(
+        db, list({file_model.content_hash for file_model, _ in files})
+    )
+
+    # 본문을 보내는 동안 DB 커넥션을 붙잡지 않도록 트랜잭션을 먼저 끝냄
+    await db.commit()
+
+    root = posixpath.dirname(folder.path)
+    entries = [
+        ZipEntry(
+            name=posixpath.relpath(sub.path, root) + "/",
+            size=0,
+            modified=sub.created_at,
+        )
+        for sub in folders
+    ]
+    # 파일 이름이 같은 경로의 폴더 이름과 겹치지 않도록 폴더 이름도 사용한 것으로 둠
+    used = {entry.name.rstrip("/") for entry in entries}
+    for file_model, folder_path in files:
+        name = posixpath.join(posixpath.relpath(folder_path, root), file_model.name)
+        entries.append(
+            _file_entry(file_model, _unique_name(name, used), compression, blobs)
+        )
+
+    return _zip_response(entries, f"{folder.name}.zip")
+
+
+@router.post("")
+async def download_files_zip(
+    body: BatchFileIds,
+    compression: Compression = Query(
+        default="auto", description="auto면 이미 압축된 형식은 무압축으로 저장"
+    ),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """선택한 파일들을 ZIP으로 묶어 내려받습니다. 요청한 순서대로 담습니다."""
+    if len(body.ids) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 {settings.max_batch_size}개까지 처리할 수 있습니다",
+        )
+    file_models = await file_crud.get_files(db, body.ids, user_id=user_id)
+    if not file_models:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    blobs = await blob_crud.get_blobs(
+        db, list({file_model.content_hash for file_model in file_models})
+    )
+    await db.commit()
+
+    by_id = {file_model.id: file_model for file_model in file_models}
+    used: set[str] = set()
+    entries = [
+        _file_entry(
+            by_id[file_id], _unique_name(by_id[file_id].name, used), compression, blobs
+        )
+        for file_id in dict.fromkeys(body.ids)
+        if file_id in by_id
+    ]
+    return _zip_response(entries, f"files-{datetime.now():%Y%m%d-%H%M%S}.zip")
@@ -1,29 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession as Session
 from typing import List
 
 from ..schemas.auth_schema import UserCreate, UserResponse, UserLogin, TokenResponse
 from ..crud import auth_crud
 from ..database import get_db
+from ..auth_cache import CachedUser
+from ..ratelimit import RateLimiter
+from ..settings import settings
 from ..util import (
     validate_hashed_password,
     generate_token,
     generate_hashed_password,
-    user_auth_required,
+    current_user_required,
+    password_needs_rehash,
 )
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
+# IP별로는 모든 로그인 시도를, 계정별로는 실패한 시도만 셈
+login_ip_limiter = RateLimiter(
+    limit=settings.login_max_attempts_per_ip, window=settings.login_window
+)
+login_account_limiter = RateLimiter(
+    limit=settings.login_max_failures_per_account, window=settings.login_window
+)
+
 
 @router.post("/login", response_model=TokenResponse)
-async def login(user_login: UserLogin, db: Session = Depends(get_db)):
+async def login(
+    user_login: UserLogin, request: Request, db: Session = Depends(get_db)
+):
     """사용자 로그인"""
-    user = auth_crud.get_user(db, user_id=user_login.id)
+    client_ip = request.client.host if request.client else None
+    login_ip_limiter.check(client_ip)
+    login_account_limiter.check(user_login.id)
+    login_ip_limiter.hit(client_ip)
+
+    user = await auth_crud.get_user(db, user_id=user_login.id)
     if not user:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
 
     if not await validate_hashed_password(user_login.password, user.password):
+        login_account_limiter.hit(user_login.id)
         raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다")
+    login_account_limiter.reset(user_login.id)
+
+    # 예전 형식이거나 반복 횟수가 낮은 해시는 평문을 아는 지금 다시 해시해 둠
+    if password_needs_rehash(user.password):
+        user.password = await generate_hashed_password(user_login.password)
+        await db.commit()
 
     return TokenResponse(
         access_token=await generate_token(user.id), token_type="bearer"
@@ -34,17 +60,17 @@ async def login(user_login: UserLogin, db: Session = Depends(get_db)):
 async def signup(user: UserCreate, db: Session = Depends(get_db)):
     """새로운 사용자 등록"""
     # 이미 존재하는 사용자 확인
-    if auth_crud.get_user(db, user_id=user.id):
+    if await auth_crud.get_user(db, user_id=user.id):
         raise HTTPException(status_code=400, detail="이미 존재하는 사용자 ID입니다")
 
-    if auth_crud.get_user_by_email(db, email=user.email):
+    if await auth_crud.get_user_by_email(db, email=user.email):
         raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다")
 
     # 비밀번호 해시화
     hashed_password = await generate_hashed_password(user.password)
 
     # 사용자 생성
-    db_user = auth_crud.create_user(
+    db_user = await auth_crud.create_user(
         db=db,
         user_id=user.id,
         email=user.email,
@@ -59,18 +85,13 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(
-    db: Session = Depends(get_db), current_user_id: str = Depends(user_auth_required)
-):
+async def get_current_user(current_user: CachedUser = Depends(current_user_required)):
     """현재 로그인한 사용자의 정보를 반환"""
-    user = auth_crud.get_user(db, user_id=current_user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
-    return user
+    return current_user
 
 
 @router.get("/users", response_model=List[UserResponse])
 async def get_users(limit: int = 10, db: Session = Depends(get_db)):
     """사용자 목록을 반환"""
-    users = auth_crud.get_users(db, limit=limit)
+    users = await auth_crud.get_users(db, limit=limit)
     return users
@@ -0,0 +1,205 @@
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from starlette.concurrency import run_in_threadpool
+
+from .. import blob_store, changes, jobs, models, quota
+from ..crud import file_crud, folder_crud
+from ..database import get_db
+from ..schemas.file_schema import BatchFileIds, BatchItemResult, BatchResponse
+from ..settings import settings
+from ..storage import (
+    UploadTooLargeError,
+    guess_content_type,
+    remove_quietly,
+    save_upload_file,
+)
+from ..util import user_auth_required
+from .files import safe_file_name, to_file_response
+from .folders import resolve_folder
+
+router = APIRouter(prefix="/api/drive/batch", tags=["drive"])
+
+
+def _check_batch_size(count: int) -> None:
+    if count > settings.max_batch_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 {settings.max_batch_size}개까지 처리할 수 있습니다",
+        )
+
+
+async def _get_folders_by_id(
+    db: Session, file_models: list[models.FileModel]
+) -> dict[str, models.Folder]:
+    folder_ids = list({f.folder_id for f in file_models if f.folder_id is not None})
+    if not folder_ids:
+        return {}
+    folders = await folder_crud.get_folders(db, folder_ids)
+    return {folder.id: folder for folder in folders}
+
+
+@router.post("/upload", response_model=BatchResponse)
+async def upload_files(
+    file_bodies: list[UploadFile] = File(..., description="올릴 파일들"),
+    path: str = Form(default="/", description="업로드할 폴더 경로"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    여러 파일을 한 요청으로 올립니다.
+
+    파일 행은 INSERT 한 번으로 추가하고 전체를 한 번에 커밋합니다.
+    크기 제한이나 남은 저장 공간을 넘은 파일은 해당 항목만 실패로 돌려줍니다.
+    """
+    _check_batch_size(len(file_bodies))
+    folder = await resolve_folder(db, path)
+    folder_id = folder.id if folder is not None else None
+    remaining = await quota.remaining_bytes(db, user_id)
+
+    results: list[BatchItemResult] = []
+    rows: list[dict] = []
+    new_blobs: set[str] = set()
+    tmp_paths: list[str] = []
+    try:
+        for file_body in file_bodies:
+            file_name = safe_file_name(file_body.filename)
+            tmp_path = await run_in_threadpool(blob_store.new_tmp_path)
+            tmp_paths.append(tmp_path)
+            try:
+                stored = await save_upload_file(file_body, tmp_path)
+            except UploadTooLargeError as e:
+                results.append(
+                    BatchItemResult(
+                        name=file_name,
+                        status="error",
+                        detail=f"파일 크기가 제한({e.limit} bytes)을 초과했습니다",
+                    )
+                )
+                continue
+            if remaining is not None:
+                if stored.size > remaining:
+                    await run_in_threadpool(remove_quietly, tmp_path)
+                    results.append(
+                        BatchItemResult(
+                            name=file_name,
+                            status="error",
+                            detail=quota.QUOTA_EXCEEDED_DETAIL,
+                        )
+                    )
+                    continue
+                remaining -= stored.size
+
+            # 같은 내용이 이미 있으면 그 blob을 공유 (커밋은 아래에서 한 번만)
+            blob = await blob_store.add_blob(db, tmp_path, stored)
+            if blob.ref_count == 1:
+                new_blobs.add(blob.hash)
+            row = {
+                "id": str(uuid.uuid4()),
+                "name": file_name,
+                "folder_id": folder_id,
+                "owner_id": user_id,
+                "path": blob.path,
+                "size": blob.size,
+                "content_hash": blob.hash,
+                "content_type": guess_content_type(
+                    file_body.filename, file_body.content_type
+                ),
+                "created_at": datetime.now(),
+            }
+            rows.append(row)
+            results.append(
+                BatchItemResult(
+                    id=row["id"],
+                    name=file_name,
+                    status="ok",
+                    file=to_file_response(models.FileModel(**row), folder),
+                )
+            )
+
+        await file_crud.create_files(db, rows)
+        for row in rows:
+            # 같은 요청 안에서 내용이 겹치면 검증은 한 번만
+            new_blob = row["content_hash"] in new_blobs
+            new_blobs.discard(row["content_hash"])
+            jobs.enqueue_file_jobs(db, models.FileModel(**row), new_blob=new_blob)
+        # 위에서 남은 공간을 확인했지만 동시에 올린 다른 요청이 있을 수 있음
+        await quota.charge(db, user_id, sum(row["size"] for row in rows))
+        await db.commit()
+    except Exception:
+        # 중간에 실패하면 남은 임시 파일을 지우고, 롤백하면서 이번에 새로 쓴 blob 객체도 지움
+        for tmp_path in tmp_paths:
+            await run_in_threadpool(remove_quietly, tmp_path)
+        await blob_store.discard_new_blobs(db)
+        raise
+    jobs.worker.notify()
+    changes.notifier.notify([user_id])
+    return BatchResponse(items=results)
+
+
+@router.post("/get", response_model=BatchResponse)
+async def get_files(
+    body: BatchFileIds,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """여러 파일의 메타데이터를 한 번의 조회로 반환합니다."""
+    _check_batch_size(len(body.ids))
+    file_models = await file_crud.get_files(db, body.ids, user_id=user_id)
+    folders = await _get_folders_by_id(db, file_models)
+    by_id = {file_model.id: file_model for file_model in file_models}
+
+    results = []
+    for file_id in body.ids:
+        file_model = by_id.get(file_id)
+        if file_model is None:
+            results.append(BatchItemResult(id=file_id, status="not_found"))
+            continue
+        results.append(
+            BatchItemResult(
+                id=file_id,
+                name=file_model.name,
+                status="ok",
+                file=to_file_response(
+                    file_model, folders.get(file_model.folder_id)
+                ),
+            )
+        )
+    return BatchResponse(items=results)
+
+
+@router.post("/delete", response_model=BatchResponse)
+async def delete_files(
+    body: BatchFileIds,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    여러 파일을 한 번에 휴지통으로 옮깁니다.
+
+    UPDATE ... WHERE id IN 한 번과 커밋 한 번으로 처리합니다.
+    """
+    _check_batch_size(len(body.ids))
+    file_models = await file_crud.get_files(
+        db, list(dict.fromkeys(body.ids)), user_id=user_id
+    )
+    by_id = {file_model.id: file_model for file_model in file_models}
+
+    await file_crud.trash_files(db, file_models)
+    await db.commit()
+    changes.notifier.notify(
+        {file_model.owner_id for file_model in file_models} - {None}
+    )
+
+    results = []
+    for file_id in body.ids:
+        file_model = by_id.get(file_id)
+        if file_model is None:
+            results.append(BatchItemResult(id=file_id, status="not_found"))
+        else:
+            results.append(
+                BatchItemResult(id=file_id, name=file_model.name, status="ok")
+            )
+    return BatchResponse(items=results)
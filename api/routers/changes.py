@@ -0,0 +1,115 @@
+import posixpath
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+
+from .. import changes, models
+from ..schemas.change_schema import ChangeCursor, ChangeList, ChangeResponse
+from ..settings import settings
+from ..util import user_auth_required
+
+router = APIRouter(prefix="/api/drive/changes", tags=["drive"])
+
+
+def to_change_response(change: models.FileChange, folder_path: str | None) -> ChangeResponse:
+    if change.folder_id is None:
+        path = posixpath.join("/", change.name)
+    elif folder_path is not None:
+        path = posixpath.join(folder_path, change.name)
+    else:
+        path = None
+    return ChangeResponse(
+        seq=change.seq,
+        action=change.action,
+        file_id=change.file_id,
+        name=change.name,
+        folder_id=change.folder_id,
+        path=path,
+        size=change.size,
+        content_hash=change.content_hash,
+        content_type=change.content_type,
+        changed_at=change.created_at,
+    )
+
+
+@router.get("/latest", response_model=ChangeCursor)
+async def get_latest_cursor(user_id: str = Depends(user_auth_required)):
+    """지금까지의 마지막 변경 번호를 반환합니다. 전체 목록을 받기 직전에 호출합니다."""
+    return ChangeCursor(cursor=await changes.get_latest_cursor(user_id))
+
+
+@router.get("", response_model=ChangeList)
+async def list_changes(
+    since: int = Query(default=0, ge=0, description="이전 응답의 cursor"),
+    limit: int = Query(default=500, ge=1, le=1000),
+    wait: int = Query(
+        default=0, ge=0, description="변경이 없을 때 기다릴 시간(초, long-poll)"
+    ),
+    user_id: str = Depends(user_auth_required),
+) -> ChangeList:
+    """
+    since 다음의 파일 변경(생성, 삭제)을 순서대로 반환합니다.
+
+    wait를 주면 변경이 생길 때까지 최대 그 시간만큼 기다립니다. 기록이 만료되어
+    이어서 받을 수 없으면 410을 반환하며, 클라이언트는 전체 목록을 다시 받아야 합니다.
+    """
+    rows = await changes.wait_for_changes(
+        user_id, since, limit + 1, timeout=min(wait, settings.changes_max_wait)
+    )
+    has_more = len(rows) > limit
+    items = [to_change_response(change, path) for change, path in rows[:limit]]
+    return ChangeList(
+        items=items, cursor=items[-1].seq if items else since, has_more=has_more
+    )
+
+
+def _sse(event: str, data: str, event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {data}\n\n"
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    since: int = Query(default=0, ge=0, description="이전에 받은 마지막 변경 번호"),
+    last_event_id: int | None = Header(default=None),
+    user_id: str = Depends(user_auth_required),
+):
+    """
+    변경을 Server-Sent Events로 보냅니다. (event: change, id는 변경 번호)
+
+    다시 연결할 때 브라우저가 보내는 Last-Event-ID가 있으면 since 대신 씁니다.
+    기록이 만료되어 이어서 보낼 수 없으면 event: reset을 보내고 연결을 닫습니다.
+    """
+    cursor = last_event_id if last_event_id is not None else since
+    # 첫 조회에서 만료된 커서면 스트림을 열기 전에 410
+    first = await changes.read_changes(user_id, cursor, 1000)
+
+    async def events():
+        nonlocal cursor
+        rows = first
+        while True:
+            for change, path in rows:
+                yield _sse(
+                    "change",
+                    to_change_response(change, path).model_dump_json(),
+                    change.seq,
+                )
+                cursor = change.seq
+            if await request.is_disconnected():
+                return
+            try:
+                rows = await changes.wait_for_changes(
+                    user_id, cursor, 1000, timeout=settings.changes_keepalive
+                )
+            except changes.CursorExpiredError:
+                yield _sse("reset", "{}")
+                return
+            if not rows:
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,146 @@
+import os
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from starlette.concurrency import run_in_threadpool
+
+from .. import blob_store, changes, delta, jobs, models, quota
+from ..crud import blob_crud, file_crud
+from ..database import get_db
+from ..download import is_not_modified
+from ..schemas.delta_schema import SignatureResponse
+from ..schemas.file_schema import FileResponse
+from ..settings import settings
+from ..storage import UploadTooLargeError, remove_quietly, save_stream
+from ..util import user_auth_required
+from .files import to_file_response
+
+router = APIRouter(prefix="/api/drive", tags=["drive"])
+
+
+async def _get_file_and_blob(db: Session, safe_filename: str, user_id: str):
+    file_id = os.path.splitext(safe_filename)[0]
+    file = await file_crud.get_file(db, file_id=file_id, user_id=user_id)
+    if file is None:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    blob = await blob_crud.get_blob(db, file.content_hash)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="파일 내용을 찾을 수 없습니다")
+    return file, blob
+
+
+@router.get("/file/{safe_filename}/signature", response_model=SignatureResponse)
+async def get_signature(
+    safe_filename: str,
+    request: Request,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    차분 업로드에 쓸 블록 서명을 반환합니다.
+
+    서명은 내용 해시마다 한 번만 계산해 저장하므로 ETag가 같으면 304를 돌려줍니다.
+    """
+    file, blob = await _get_file_and_blob(db, safe_filename, user_id)
+    etag = f'"{blob.hash}-signature"'
+    if is_not_modified(request, etag, file.created_at):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    signature = await delta.get_signature(db, blob)
+    body = SignatureResponse(
+        content_hash=blob.hash,
+        size=signature.size,
+        block_size=signature.block_size,
+        weak=signature.weak,
+        strong=[strong.hex() for strong in signature.strong],
+    )
+    return Response(
+        content=body.model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+@router.put("/file/{safe_filename}/delta", response_model=FileResponse)
+async def upload_delta(
+    safe_filename: str,
+    request: Request,
+    base: str = Query(..., description="서명을 받은 내용의 해시(content_hash)"),
+    x_content_sha256: str | None = Header(
+        default=None, description="새 내용의 sha256 hex, 주면 적용 결과와 비교"
+    ),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    기존 내용과의 차분(delta)을 받아 파일 내용을 바꿉니다.
+
+    본문은 api.delta 형식의 복사/새 데이터 명령이며, 기존 blob에서 필요한 구간을
+    읽어 새 데이터와 이어 쓰면서 새 내용을 만듭니다. 그 사이 파일 내용이 바뀌었으면
+    409를 반환하므로 서명을 다시 받아야 합니다.
+    """
+    file, blob = await _get_file_and_blob(db, safe_filename, user_id)
+    if file.content_hash != base:
+        raise HTTPException(
+            status_code=409, detail="파일 내용이 바뀌었습니다. 서명을 다시 받아야 합니다"
+        )
+    signature = await delta.get_signature(db, blob)
+
+    # 새 내용의 최대 크기: 파일 크기 제한과 (소유자의) 남은 저장 공간 중 작은 값
+    limits = [settings.max_upload_size] if settings.max_upload_size else []
+    quota_limit = None
+    if file.owner_id is not None:
+        remaining = await quota.remaining_bytes(db, file.owner_id)
+        if remaining is not None:
+            quota_limit = file.size + remaining
+            limits.append(quota_limit)
+    max_size = min(limits) if limits else 0
+    # 차분을 받는 동안 DB 커넥션을 붙잡지 않도록 트랜잭션을 먼저 끝냄
+    await db.commit()
+
+    tmp_path = await run_in_threadpool(blob_store.new_tmp_path)
+    try:
+        stored = await save_stream(
+            delta.apply_delta(blob, signature, request.stream()),
+            tmp_path,
+            max_size=max_size,
+        )
+    except delta.DeltaError as e:
+        raise HTTPException(status_code=400, detail=f"잘못된 차분입니다: {e}")
+    except UploadTooLargeError as e:
+        if quota_limit is not None and e.limit == quota_limit:
+            raise quota.QuotaExceededError
+        raise HTTPException(
+            status_code=413, detail=f"파일 크기가 제한({e.limit} bytes)을 초과했습니다"
+        )
+    if x_content_sha256 is not None and x_content_sha256.lower() != stored.content_hash:
+        await run_in_threadpool(remove_quietly, tmp_path)
+        raise HTTPException(
+            status_code=400, detail="차분을 적용한 결과가 보낸 해시와 다릅니다"
+        )
+
+    old_size = file.size
+    new_blob = await blob_store.add_blob(db, tmp_path, stored)
+    is_new = new_blob.ref_count == 1
+    if not await file_crud.replace_content(db, file, new_blob, base_hash=base):
+        await blob_store.discard_new_blobs(db)
+        raise HTTPException(
+            status_code=409, detail="파일 내용이 바뀌었습니다. 서명을 다시 받아야 합니다"
+        )
+    try:
+        await quota.adjust(db, file.owner_id, new_blob.size - old_size)
+    except quota.QuotaExceededError:
+        await blob_store.discard_new_blobs(db)
+        raise
+    jobs.enqueue_file_jobs(db, file, new_blob=is_new)
+    jobs.enqueue_version_jobs(db, file)
+    await db.commit()
+    jobs.worker.notify()
+    if file.owner_id is not None:
+        changes.notifier.notify([file.owner_id])
+
+    folder = (
+        await db.get(models.Folder, file.folder_id) if file.folder_id is not None else None
+    )
+    return to_file_response(file, folder)
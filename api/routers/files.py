@@ -1,120 +1,423 @@
-from fastapi import APIRouter, UploadFile, Query, HTTPException, Depends
-from fastapi.responses import FileResponse as FastAPIFileResponse
+from fastapi import APIRouter, UploadFile, Query, HTTPException, Depends, Request, Form
+from fastapi.responses import RedirectResponse, Response
 
-import os, uuid
-from datetime import datetime
-from sqlalchemy.orm import Session
+import base64, json, os, posixpath, uuid
+from datetime import datetime, timezone
+from typing import Literal
+from sqlalchemy.ext.asyncio import AsyncSession as Session
 
-from ..crud import file_crud
+from .. import blob_store, changes, jobs, previews, quota
+from ..compression import accepted_encodings
+from ..crud import blob_crud, file_crud, job_crud
 
-from ..schemas.file_schema import FileResponse, FileList
-from .. import models
+from ..schemas.file_schema import FileResponse, FileList, SignedUrlResponse, UsageResponse
+from ..schemas.job_schema import JobList
+from .. import models, signing
 from ..database import get_db
+from ..download import build_download_response, content_disposition, is_not_modified
+from ..settings import settings
+from ..storage import UploadTooLargeError, get_storage, guess_content_type
+from ..util import user_auth_required
+from .folders import resolve_folder
 
 router = APIRouter(prefix="/api/drive", tags=["drive"])
 
-UPLOAD_DIR = "/uploads"  # 기본 업로드 디렉토리
 
+def safe_file_name(file_name: str | None) -> str:
+    """
+    클라이언트가 보낸 파일 이름에서 경로 부분을 떼어냅니다.
+    빈 이름이나 '.', '..'은 경로를 만들 수 없으므로 'untitled'로 바꿉니다.
+    """
+    name = posixpath.basename(file_name or "").strip()
+    return name if name not in ("", ".", "..") else "untitled"
+
+
+def to_file_response(
+    file_model: models.FileModel, folder: models.Folder | None
+) -> FileResponse:
+    folder_path = folder.path if folder is not None else "/"
+    return FileResponse(
+        id=file_model.id,
+        name=file_model.name,
+        path=posixpath.join(folder_path, file_model.name),
+        size=file_model.size,
+        created_at=file_model.created_at,
+        updated_at=file_model.created_at,  # created_at을 updated_at으로도 사용
+    )
 
-@router.post("/upload", response_model=FileResponse)
-async def create_file(file_body: UploadFile, db: Session = Depends(get_db)):
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-    file_extension = os.path.splitext(file_body.filename)[1]
+@router.post("/upload", response_model=FileResponse)
+async def create_file(
+    file_body: UploadFile,
+    path: str = Form(default="/", description="업로드할 폴더 경로"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    folder = await resolve_folder(db, path)
+    file_name = safe_file_name(file_body.filename)
     file_id = str(uuid.uuid4())
-    safe_filename = f"{file_id}{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, safe_filename)
 
     try:
-        content = await file_body.read()
-        with open(file_path, "wb") as fp:
-            fp.write(content)
+        # 청크 단위로 스트리밍 저장하고, 같은 내용이 이미 있으면 그 blob을 공유
+        blob = await blob_store.store_upload(db, file_body)
+        new_blob = blob.ref_count == 1
 
         # DB에 메타데이터 저장
-        file_model = models.FileModel(
-            id=file_id, name=safe_filename, path=file_path, size=len(content)
+        file_model = await file_crud.create_file(
+            db,
+            file_id=file_id,
+            file_name=file_name,
+            folder_id=folder.id if folder is not None else None,
+            owner_id=user_id,
+            file_path=blob.path,
+            file_size=blob.size,
+            content_hash=blob.hash,
+            content_type=guess_content_type(
+                file_body.filename, file_body.content_type
+            ),
         )
-        db.add(file_model)
-        db.commit()
-        db.refresh(file_model)
+
+        # 체크섬 검증, OCR 등 후처리 작업 추가
+        jobs.enqueue_file_jobs(db, file_model, new_blob=new_blob)
+        try:
+            await quota.charge(db, user_id, blob.size)
+        except quota.QuotaExceededError:
+            await blob_store.discard_new_blobs(db)
+            raise
+        await db.commit()
+        jobs.worker.notify()
+        changes.notifier.notify([user_id])
 
         # FileResponse 스키마로 응답 생성
-        return FileResponse(
-            id=file_model.id,
-            name=file_model.name,
-            path=file_model.path,
-            size=file_model.size,
-            created_at=file_model.created_at,
-            updated_at=file_model.created_at,  # created_at을 updated_at으로도 사용
-        )
+        return to_file_response(file_model, folder)
 
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=413, detail=f"파일 크기가 제한({e.limit} bytes)을 초과했습니다"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"파일 업로드 실패: {str(e)}")
 
 
+def _select_representation(
+    request: Request,
+    *,
+    key: str,
+    encoding: str | None,
+    size: int,
+    stored_size: int | None,
+    content_hash: str,
+) -> dict:
+    """
+    압축 저장된 blob을 클라이언트가 받을 수 있으면 압축된 그대로,
+    아니면 풀어서 보내도록 build_download_response 인자를 정합니다.
+    """
+    if encoding is None:
+        return {
+            "size": size,
+            "read_range": lambda start, end: get_storage().open_range(key, start, end),
+            # blob 해시가 곧 내용의 해시이므로 강한 ETag로 사용
+            "etag": f'"{content_hash}"',
+        }
+
+    vary = {"Vary": "Accept-Encoding"}
+    if encoding in accepted_encodings(request.headers.get("accept-encoding")):
+        return {
+            "size": stored_size,
+            "read_range": lambda start, end: get_storage().open_range(key, start, end),
+            # 표현(representation)이 다르므로 ETag도 구분
+            "etag": f'"{content_hash}-{encoding}"',
+            "extra_headers": {**vary, "Content-Encoding": encoding},
+        }
+    return {
+        "size": size,
+        "read_range": lambda start, end: blob_store.open_blob(key, encoding, start, end),
+        "etag": f'"{content_hash}"',
+        "extra_headers": vary,
+    }
+
+
 @router.get("/file/{safe_filename}")
-async def download_file(safe_filename: str):
-    file_path = os.path.join(UPLOAD_DIR, f"{safe_filename}")
+async def download_file(
+    safe_filename: str,
+    request: Request,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    파일을 내려받습니다. Range 요청과 조건부 요청(ETag)을 지원합니다.
 
-    if not os.path.exists(file_path):
+    압축 저장된 파일은 Accept-Encoding에 따라 압축된 그대로(Content-Encoding)
+    보내거나 풀면서 보냅니다.
+    """
+    file_id = os.path.splitext(safe_filename)[0]
+    file = await file_crud.get_file(db, file_id=file_id, user_id=user_id)
+    if file is None or await get_storage().stat(file.path) is None:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    blob = await blob_crud.get_blob(db, content_hash=file.content_hash)
 
-    return FastAPIFileResponse(
-        file_path,
-        filename=os.path.basename(file_path),
-        media_type="application/octet-stream",
+    # 본문을 보내는 동안 DB 커넥션을 붙잡지 않도록 트랜잭션을 먼저 끝냄
+    await db.commit()
+
+    return build_download_response(
+        request,
+        media_type=file.content_type or guess_content_type(file.name),
+        filename=file.name,
+        last_modified=file.created_at,
+        **_select_representation(
+            request,
+            key=file.path,
+            encoding=blob.encoding if blob is not None else None,
+            size=file.size,
+            stored_size=blob.stored_size if blob is not None else None,
+            content_hash=file.content_hash,
+        ),
     )
 
 
-@router.delete("/file/{safe_filename}", response_model=None, status_code=204)
-async def delete_file(safe_filename: str, db: Session = Depends(get_db)):
+@router.post("/file/{safe_filename}/url", response_model=SignedUrlResponse)
+async def create_download_url(
+    safe_filename: str,
+    request: Request,
+    expires_in: int | None = Query(
+        default=None, ge=1, description="유효 시간(초), 생략하면 기본값"
+    ),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    인증 헤더 없이 내려받을 수 있는 서명 URL을 발급합니다.
+
+    URL에는 다운로드에 필요한 정보가 서명과 함께 들어 있어, 내려받을 때는
+    DB를 조회하지 않습니다.
+    """
     file_id = os.path.splitext(safe_filename)[0]
-    file = file_crud.get_file(db, file_id=file_id)
-    if file is None:  # DB에서 파일을 찾지 못한 경우
+    file = await file_crud.get_file(db, file_id=file_id, user_id=user_id)
+    if file is None:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    blob = await blob_crud.get_blob(db, content_hash=file.content_hash)
+
+    expires_in = min(expires_in or settings.signed_url_ttl, settings.signed_url_max_ttl)
+    token, expires_at = signing.sign(
+        "download",
+        {
+            "k": file.path,
+            "n": file.name,
+            "t": file.content_type or guess_content_type(file.name),
+            "s": file.size,
+            "h": file.content_hash,
+            "m": int(file.created_at.astimezone().timestamp()),
+            "e": blob.encoding if blob is not None else None,
+            "z": blob.stored_size if blob is not None else None,
+        },
+        expires_in,
+    )
+    return SignedUrlResponse(
+        url=str(request.url_for("download_signed", token=token)),
+        expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+    )
+
+
+@router.get("/signed/{token}", name="download_signed")
+async def download_signed(token: str, request: Request):
+    """
+    서명 URL로 파일을 내려받습니다.
+
+    settings.download_offload에 따라 nginx(X-Accel-Redirect)나
+    X-Sendfile을 지원하는 웹서버에 전송을 넘기고, S3 저장소라면 저장소의
+    서명 URL로 리다이렉트해 API 워커가 본문을 옮기지 않게 합니다.
+    압축 저장된 파일을 클라이언트가 받을 수 없으면 앱이 풀면서 보냅니다.
+    """
+    try:
+        payload = signing.verify("download", token)
+    except signing.InvalidSignatureError:
+        raise HTTPException(status_code=403, detail="유효하지 않거나 만료된 URL입니다")
+
+    key, filename, media_type = payload["k"], payload["n"], payload["t"]
+    encoding = payload.get("e")
+    representation = _select_representation(
+        request,
+        key=key,
+        encoding=encoding,
+        size=payload["s"],
+        stored_size=payload.get("z"),
+        content_hash=payload["h"],
+    )
+    headers = {
+        "Content-Disposition": content_disposition(filename),
+        "ETag": representation["etag"],
+        "X-Content-Type-Options": "nosniff",
+        **representation.get("extra_headers", {}),
+    }
+
+    # 압축된 그대로 보낼 수 있을 때만 전송을 넘김
+    if encoding is None or "Content-Encoding" in headers:
+        storage = get_storage()
+        local_path = storage.local_path(key)
+        if local_path is not None and settings.download_offload == "x-accel-redirect":
+            headers["X-Accel-Redirect"] = settings.x_accel_redirect_prefix + key
+            return Response(media_type=media_type, headers=headers)
+        if local_path is not None and settings.download_offload == "x-sendfile":
+            headers["X-Sendfile"] = local_path
+            return Response(media_type=media_type, headers=headers)
 
-    file_path = os.path.join(UPLOAD_DIR, f"{safe_filename}")
-    if not os.path.exists(file_path):  # 실제 파일이 없는 경우
+        # 남은 유효 시간만큼만 저장소 URL을 발급
+        expires_in = max(int(payload["exp"] - datetime.now().timestamp()), 1)
+        presigned_url = await storage.presigned_url(
+            key, expires_in, filename, media_type, content_encoding=encoding
+        )
+        if presigned_url is not None:
+            return RedirectResponse(presigned_url, status_code=307)
+
+    return build_download_response(
+        request,
+        media_type=media_type,
+        filename=filename,
+        last_modified=datetime.fromtimestamp(payload["m"], timezone.utc),
+        **representation,
+    )
+
+
+@router.delete("/file/{safe_filename}", response_model=None, status_code=204)
+async def delete_file(
+    safe_filename: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """파일을 휴지통으로 옮깁니다. 저장소에서는 보관 기간이 지난 뒤 정리 작업이 지웁니다."""
+    file_id = os.path.splitext(safe_filename)[0]
+    file = await file_crud.get_file(db, file_id=file_id, user_id=user_id)
+    if file is None:  # DB에서 파일을 찾지 못한 경우
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
 
     try:
-        # 파일 시스템에서 삭제
-        os.remove(file_path)
-        # DB에서 삭제
-        file_crud.delete_file(db, db_file=file)
+        await file_crud.trash_file(db, db_file=file)
+        await db.commit()
+        if file.owner_id is not None:
+            changes.notifier.notify([file.owner_id])
         return None
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"파일 삭제 실패: {str(e)}")
 
 
+@router.get("/file/{safe_filename}/preview")
+async def get_file_preview(
+    safe_filename: str,
+    request: Request,
+    size: Literal["small", "medium", "large"] = Query(default="medium"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    이미지/PDF 파일의 미리보기(WebP)를 반환합니다.
+
+    처음 요청하면 만들어서 캐시에 넣고, 이후에는 캐시에서 돌려줍니다.
+    미리보기는 내용 해시로 정해지므로 ETag가 같으면 304를 돌려줍니다.
+    """
+    file_id = os.path.splitext(safe_filename)[0]
+    file = await file_crud.get_file(db, file_id=file_id, user_id=user_id)
+    if file is None:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    if (
+        not previews.can_preview(file.content_type)
+        or file.size > settings.preview_max_source_size
+    ):
+        raise HTTPException(status_code=415, detail="미리보기를 지원하지 않는 파일입니다")
+
+    headers = {
+        "ETag": f'"{file.content_hash}-{size}"',
+        "Cache-Control": f"private, max-age={settings.preview_max_age}",
+    }
+    if is_not_modified(request, headers["ETag"], file.created_at):
+        return Response(status_code=304, headers=headers)
+
+    blob = await blob_crud.get_blob(db, file.content_hash)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="파일 내용을 찾을 수 없습니다")
+    # 미리보기를 만드는 동안 DB 커넥션을 붙잡지 않도록 트랜잭션을 먼저 끝냄
+    await db.commit()
+
+    try:
+        data = await previews.get_preview(blob, file.content_type, size)
+    except previews.PreviewError:
+        raise HTTPException(status_code=415, detail="미리보기를 만들 수 없는 파일입니다")
+    return Response(content=data, media_type=previews.PREVIEW_MEDIA_TYPE, headers=headers)
+
+
+@router.get("/file/{safe_filename}/jobs", response_model=JobList)
+async def list_file_jobs(
+    safe_filename: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """파일의 후처리 작업(체크섬 검증, OCR 등) 상태를 반환합니다."""
+    file_id = os.path.splitext(safe_filename)[0]
+    if await file_crud.get_file(db, file_id=file_id, user_id=user_id) is None:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    return JobList(items=await job_crud.get_file_jobs(db, file_id))
+
+
+@router.get("/usage", response_model=UsageResponse)
+async def get_usage(
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """내 저장 공간 사용량과 한도를 반환합니다."""
+    usage = await quota.get_usage(db, user_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    return UsageResponse(**usage)
+
+
+def _encode_cursor(file_model: models.FileModel, sort: str) -> str:
+    value = getattr(file_model, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, file_model.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, last_id = json.loads(raw)
+        if sort in ("created_at", "deleted_at"):
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다")
+    return value, last_id
+
+
 @router.get("/file", response_model=FileList)
 async def list_files(
-    path: str = Query(default="/", description="조회할 경로")
+    path: str = Query(default="/", description="조회할 경로"),
+    sort: Literal["name", "size", "created_at"] = Query(default="name"),
+    order: Literal["asc", "desc"] = Query(default="asc"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="이전 응답의 next_cursor"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
 ) -> FileList:
-    """파일 목록을 반환합니다."""
-    target_path = os.path.join(UPLOAD_DIR, path.lstrip("/"))
-
-    if not os.path.exists(target_path):
-        raise HTTPException(status_code=404, detail="경로를 찾을 수 없습니다")
-
-    files = []
-    total = 0
-
-    for entry in os.scandir(target_path):
-        stats = entry.stat()
-        files.append(
-            FileResponse(
-                id=str(uuid.uuid4()),
-                name=entry.name,
-                path=os.path.join(path, entry.name),
-                size=stats.st_size,
-                type="directory" if entry.is_dir() else "file",
-                created_at=datetime.fromtimestamp(stats.st_ctime),
-                updated_at=datetime.fromtimestamp(stats.st_mtime),
-            )
-        )
-        total += 1
+    """파일 목록을 반환합니다. 커서 기반으로 페이지를 나눕니다."""
+    folder = await resolve_folder(db, path)
+    after = _decode_cursor(cursor, sort) if cursor else None
+
+    # 다음 페이지가 있는지 알기 위해 하나 더 조회
+    files = await file_crud.list_files(
+        db,
+        folder_id=folder.id if folder is not None else None,
+        sort=sort,
+        descending=order == "desc",
+        limit=limit + 1,
+        after=after,
+        user_id=user_id,
+    )
+    next_cursor = None
+    if len(files) > limit:
+        files = files[:limit]
+        next_cursor = _encode_cursor(files[-1], sort)
 
-    return FileList(items=files, total=total)
+    items = [to_file_response(file, folder) for file in files]
+    return FileList(items=items, total=len(items), next_cursor=next_cursor)
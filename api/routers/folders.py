@@ -0,0 +1,169 @@
+import base64
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import models
+from ..crud import folder_crud
+from ..database import get_db
+from ..schemas.folder_schema import (
+    FolderCreate,
+    FolderList,
+    FolderResponse,
+    FolderStats,
+    FolderUpdate,
+)
+from ..util import user_auth_required
+
+router = APIRouter(prefix="/api/drive/folders", tags=["drive"])
+
+
+def normalize_folder_path(path: str) -> str:
+    """폴더 경로를 '/a/b' 형태로 정규화합니다. 잘못된 경로면 400을 발생시킵니다."""
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    normalized = "/" + "/".join(parts)
+    if ".." in parts or len(normalized) > 512:
+        raise HTTPException(status_code=400, detail="잘못된 경로입니다")
+    return normalized
+
+
+async def resolve_folder(db: Session, path: str) -> models.Folder | None:
+    """경로에 해당하는 폴더를 찾습니다. 루트('/')는 None입니다."""
+    path = normalize_folder_path(path)
+    if path == "/":
+        return None
+    folder = await folder_crud.get_folder_by_path(db, path=path)
+    if folder is None:
+        raise HTTPException(status_code=404, detail="경로를 찾을 수 없습니다")
+    return folder
+
+
+async def _get_folder_or_404(db: Session, folder_id: str) -> models.Folder:
+    folder = await folder_crud.get_folder(db, folder_id=folder_id)
+    if folder is None:
+        raise HTTPException(status_code=404, detail="폴더를 찾을 수 없습니다")
+    return folder
+
+
+@router.post("", response_model=FolderResponse, status_code=201)
+async def create_folder(
+    body: FolderCreate,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """폴더를 생성합니다."""
+    parent = await resolve_folder(db, body.path)
+    try:
+        return await folder_crud.create_folder(
+            db, folder_id=str(uuid.uuid4()), name=body.name, parent=parent
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="이미 존재하는 폴더입니다")
+
+
+@router.get("", response_model=FolderList)
+async def list_folders(
+    path: str = Query(default="/", description="조회할 경로"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="이전 응답의 next_cursor"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """하위 폴더 목록을 이름순으로 반환합니다."""
+    parent = await resolve_folder(db, path)
+    after = None
+    if cursor:
+        try:
+            after = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="잘못된 커서입니다")
+
+    folders = await folder_crud.list_child_folders(
+        db,
+        parent_id=parent.id if parent is not None else None,
+        limit=limit + 1,
+        after=after,
+    )
+    next_cursor = None
+    if len(folders) > limit:
+        folders = folders[:limit]
+        next_cursor = (
+            base64.urlsafe_b64encode(folders[-1].name.encode()).decode().rstrip("=")
+        )
+
+    items = [FolderResponse.model_validate(folder) for folder in folders]
+    return FolderList(items=items, total=len(items), next_cursor=next_cursor)
+
+
+@router.get("/{folder_id}", response_model=FolderResponse)
+async def get_folder(
+    folder_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    return await _get_folder_or_404(db, folder_id)
+
+
+@router.get("/{folder_id}/stats", response_model=FolderStats)
+async def get_folder_stats(
+    folder_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """하위 트리 전체의 폴더 수와 사용자가 접근할 수 있는 파일 수, 크기를 반환합니다."""
+    folder = await _get_folder_or_404(db, folder_id)
+    return FolderStats(**await folder_crud.get_subtree_stats(db, folder, user_id))
+
+
+@router.patch("/{folder_id}", response_model=FolderResponse)
+async def update_folder(
+    folder_id: str,
+    body: FolderUpdate,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """폴더 이름을 바꾸거나 다른 폴더 아래로 옮깁니다."""
+    folder = await _get_folder_or_404(db, folder_id)
+
+    if body.path is not None:
+        new_parent = await resolve_folder(db, body.path)
+    elif folder.parent_id is not None:
+        new_parent = await folder_crud.get_folder(db, folder_id=folder.parent_id)
+    else:
+        new_parent = None
+    new_name = body.name if body.name is not None else folder.name
+
+    if new_parent is not None and (
+        new_parent.path == folder.path or new_parent.path.startswith(folder.path + "/")
+    ):
+        raise HTTPException(
+            status_code=400, detail="폴더를 자기 하위 폴더로 옮길 수 없습니다"
+        )
+
+    try:
+        return await folder_crud.move_folder(
+            db, folder, new_parent=new_parent, new_name=new_name
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="이미 존재하는 폴더입니다")
+
+
+@router.delete("/{folder_id}", response_model=None, status_code=204)
+async def delete_folder(
+    folder_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    빈 폴더를 삭제합니다.
+    다른 사용자의 파일이 휴지통에 남아 있는 폴더도 비어 있지 않은 것으로 봅니다.
+    """
+    folder = await _get_folder_or_404(db, folder_id)
+    if not await folder_crud.is_empty(db, folder, user_id):
+        raise HTTPException(status_code=409, detail="비어 있지 않은 폴더입니다")
+    await folder_crud.delete_folder(db, folder, user_id)
+    return None
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from .. import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus가 수집하는 지표 (settings.metrics_enabled가 꺼져 있으면 등록하지 않음)"""
+    data, content_type = metrics.render()
+    return Response(content=data, media_type=content_type)
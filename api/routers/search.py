@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from ..crud import file_crud
+from ..database import get_db
+from ..schemas.file_schema import FileList
+from ..util import user_auth_required
+from .files import _decode_cursor, _encode_cursor, to_file_response
+
+router = APIRouter(prefix="/api/drive/search", tags=["drive"])
+
+
+@router.get("", response_model=FileList)
+async def search_files(
+    name: str | None = Query(default=None, max_length=255, description="파일 이름 검색어"),
+    match: Literal["prefix", "substring"] = Query(
+        default="substring", description="이름 검색 방식"
+    ),
+    q: str | None = Query(
+        default=None, max_length=255, description="본문(OCR 등으로 추출한 글자) 검색어"
+    ),
+    type: str | None = Query(
+        default=None, example="image/*", description="content type, 'image/*'처럼 주 형식만 줄 수 있음"
+    ),
+    min_size: int | None = Query(default=None, ge=0),
+    max_size: int | None = Query(default=None, ge=0),
+    created_after: datetime | None = Query(default=None),
+    created_before: datetime | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="이전 응답의 next_cursor"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+) -> FileList:
+    """
+    이름, 본문, 형식, 크기, 생성 시각으로 파일을 검색합니다.
+
+    조건은 모두 AND로 적용하며, 결과는 최신순으로 커서 기반 페이지를 나눕니다.
+    """
+    if not any(
+        value is not None
+        for value in (name, q, type, min_size, max_size, created_after, created_before)
+    ):
+        raise HTTPException(status_code=400, detail="검색 조건을 하나 이상 지정해야 합니다")
+    after = _decode_cursor(cursor, "created_at") if cursor else None
+
+    # 다음 페이지가 있는지 알기 위해 하나 더 조회
+    rows = await file_crud.search_files(
+        db,
+        name=name,
+        name_match=match,
+        text=q,
+        content_type=type,
+        min_size=min_size,
+        max_size=max_size,
+        created_after=created_after,
+        created_before=created_before,
+        limit=limit + 1,
+        after=after,
+        user_id=user_id,
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][0], "created_at")
+
+    items = [to_file_response(file_model, folder) for file_model, folder in rows]
+    return FileList(items=items, total=len(items), next_cursor=next_cursor)
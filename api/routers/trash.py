@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import changes, models
+from ..crud import file_crud
+from ..database import get_db
+from ..schemas.file_schema import (
+    FileResponse,
+    TrashedFileResponse,
+    TrashList,
+    TrashPurgeResponse,
+)
+from ..util import user_auth_required
+from .files import _decode_cursor, _encode_cursor, to_file_response
+
+router = APIRouter(prefix="/api/drive/trash", tags=["drive"])
+
+
+def to_trashed_file_response(
+    file_model: models.FileModel, folder: models.Folder | None
+) -> TrashedFileResponse:
+    return TrashedFileResponse(
+        **to_file_response(file_model, folder).model_dump(),
+        deleted_at=file_model.deleted_at,
+        purge_at=file_model.purge_at,
+    )
+
+
+async def _get_trashed_file_or_404(
+    db: Session, file_id: str, user_id: str
+) -> models.FileModel:
+    file = await file_crud.get_file(db, file_id=file_id, user_id=user_id, trashed=True)
+    if file is None:
+        raise HTTPException(status_code=404, detail="휴지통에서 파일을 찾을 수 없습니다")
+    return file
+
+
+@router.get("", response_model=TrashList)
+async def list_trash(
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="이전 응답의 next_cursor"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """휴지통에 있는 파일을 최근에 지운 순서대로 반환합니다."""
+    after = _decode_cursor(cursor, "deleted_at") if cursor else None
+    rows = await file_crud.list_trash(db, user_id, limit=limit + 1, after=after)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][0], "deleted_at")
+    items = [to_trashed_file_response(file, folder) for file, folder in rows]
+    return TrashList(items=items, total=len(items), next_cursor=next_cursor)
+
+
+@router.post("/{file_id}/restore", response_model=FileResponse)
+async def restore_file(
+    file_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    휴지통에 있는 파일을 원래 폴더로 되돌립니다.
+    그 사이 폴더가 지워졌으면 루트로 되돌립니다.
+    """
+    file = await _get_trashed_file_or_404(db, file_id, user_id)
+    await file_crud.restore_files(db, [file])
+    await db.commit()
+    if file.owner_id is not None:
+        changes.notifier.notify([file.owner_id])
+    folder = (
+        await db.get(models.Folder, file.folder_id) if file.folder_id is not None else None
+    )
+    return to_file_response(file, folder)
+
+
+@router.delete("/{file_id}", response_model=TrashPurgeResponse, status_code=202)
+async def purge_file(
+    file_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """휴지통에 있는 파일을 완전히 지웁니다. 저장소에서는 잠시 뒤 정리 작업이 지웁니다."""
+    await _get_trashed_file_or_404(db, file_id, user_id)
+    count = await file_crud.schedule_purge(db, user_id, [file_id])
+    await db.commit()
+    return TrashPurgeResponse(count=count)
+
+
+@router.delete("", response_model=TrashPurgeResponse, status_code=202)
+async def empty_trash(
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """휴지통을 비웁니다. 저장소에서는 잠시 뒤 정리 작업이 나눠서 지웁니다."""
+    count = await file_crud.schedule_purge(db, user_id)
+    await db.commit()
+    return TrashPurgeResponse(count=count)
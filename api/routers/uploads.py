@@ -0,0 +1,379 @@
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from starlette.concurrency import run_in_threadpool
+
+from .. import blob_store, changes, jobs, models, quota, signing
+from ..crud import file_crud, upload_crud
+from ..database import SessionLocal, get_db
+from ..schemas.file_schema import FileResponse, SignedUrlResponse
+from ..schemas.upload_schema import (
+    UploadPartResponse,
+    UploadSessionCreate,
+    UploadSessionResponse,
+)
+from ..settings import settings
+from ..storage import (
+    UploadTooLargeError,
+    get_storage,
+    guess_content_type,
+    remove_quietly,
+    save_stream,
+)
+from ..util import user_auth_required
+from .files import safe_file_name, to_file_response
+from .folders import resolve_folder
+
+router = APIRouter(prefix="/api/drive/uploads", tags=["drive"])
+
+# 업로드 중인 파트는 저장소의 parts/<세션 id>/<파트 번호> 키에 보관
+# (여러 API 서버 중 어느 서버가 파트를 받아도 완료 처리할 수 있도록)
+UPLOAD_PARTS_PREFIX = "parts"
+
+
+def _session_prefix(session_id: str) -> str:
+    return f"{UPLOAD_PARTS_PREFIX}/{session_id}/"
+
+
+def _part_key(session_id: str, part_number: int) -> str:
+    return f"{_session_prefix(session_id)}{part_number}"
+
+
+async def _remove_session_parts(session_id: str) -> None:
+    await get_storage().delete_prefix(_session_prefix(session_id))
+
+
+async def _iter_parts(keys: list[str]):
+    storage = get_storage()
+    for key in keys:
+        async for chunk in storage.open_range(key):
+            yield chunk
+
+
+async def _get_session_or_404(
+    db: Session, upload_id: str, user_id: str | None = None
+) -> models.UploadSession:
+    """세션을 조회합니다. user_id를 주면 다른 사용자의 세션은 찾을 수 없는 것으로 처리"""
+    db_session = await upload_crud.get_session(db, session_id=upload_id)
+    if db_session is None or (
+        user_id is not None and db_session.owner_id not in (None, user_id)
+    ):
+        raise HTTPException(status_code=404, detail="업로드 세션을 찾을 수 없습니다")
+    return db_session
+
+
+async def _get_folder(
+    db: Session, file_model: models.FileModel
+) -> models.Folder | None:
+    if file_model.folder_id is None:
+        return None
+    return await db.get(models.Folder, file_model.folder_id)
+
+
+def _to_session_response(
+    db_session: models.UploadSession, parts: list[models.UploadPart]
+) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=db_session.id,
+        file_name=db_session.file_name,
+        total_size=db_session.total_size,
+        status=db_session.status,
+        file_id=db_session.file_id,
+        expires_at=db_session.expires_at,
+        parts=[UploadPartResponse.model_validate(part) for part in parts],
+    )
+
+
+@router.post("", response_model=UploadSessionResponse, status_code=201)
+async def create_upload_session(
+    body: UploadSessionCreate,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    대용량 파일을 위한 업로드 세션을 시작합니다.
+
+    total_size를 알려주면 남은 저장 공간이 부족한지 파트를 받기 전에 확인합니다.
+    """
+    if (
+        settings.max_upload_size
+        and body.total_size is not None
+        and body.total_size > settings.max_upload_size
+    ):
+        raise HTTPException(
+            status_code=413,
+            detail=f"파일 크기가 제한({settings.max_upload_size} bytes)을 초과했습니다",
+        )
+
+    if body.total_size is not None:
+        remaining = await quota.remaining_bytes(db, user_id)
+        if remaining is not None and body.total_size > remaining:
+            raise quota.QuotaExceededError
+
+    folder = await resolve_folder(db, body.path)
+    db_session = await upload_crud.create_session(
+        db,
+        session_id=str(uuid.uuid4()),
+        file_name=safe_file_name(body.file_name),
+        folder_id=folder.id if folder is not None else None,
+        total_size=body.total_size,
+        owner_id=user_id,
+    )
+    return _to_session_response(db_session, [])
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    upload_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """세션 상태와 이미 받은 파트 목록을 반환합니다. (이어 올리기용)"""
+    db_session = await _get_session_or_404(db, upload_id, user_id)
+    parts = await upload_crud.get_parts(db, upload_id)
+    return _to_session_response(db_session, parts)
+
+
+async def _receive_part(
+    db: Session,
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    content_sha256: str | None,
+    user_id: str | None = None,
+) -> models.UploadPart:
+    db_session = await _get_session_or_404(db, upload_id, user_id)
+    if db_session.status != "pending":
+        raise HTTPException(status_code=409, detail="진행 중인 업로드 세션이 아닙니다")
+    if part_number > settings.max_upload_parts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"파트 번호는 {settings.max_upload_parts} 이하여야 합니다",
+        )
+
+    # 이미 받은 다른 파트와 합쳐 남은 저장 공간을 넘지 않도록 파트 크기를 제한
+    max_size = settings.max_upload_part_size
+    quota_limited = False
+    remaining = (
+        await quota.remaining_bytes(db, db_session.owner_id)
+        if db_session.owner_id is not None
+        else None
+    )
+    if remaining is not None:
+        received = sum(
+            part.size
+            for part in await upload_crud.get_parts(db, upload_id)
+            if part.part_number != part_number
+        )
+        if remaining - received <= 0:
+            raise quota.QuotaExceededError
+        if not max_size or remaining - received < max_size:
+            max_size = remaining - received
+            quota_limited = True
+
+    # 본문을 받는 동안 DB 커넥션을 붙잡지 않도록 트랜잭션을 먼저 끝냄
+    await db.commit()
+
+    storage = get_storage()
+    part_key = _part_key(upload_id, part_number)
+    # 체크섬을 확인하기 전에는 기존 파트를 덮어쓰지 않도록 임시 키에 먼저 저장
+    tmp_key = f"{part_key}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        stored = await storage.put_stream(tmp_key, request.stream(), max_size=max_size)
+    except UploadTooLargeError as e:
+        if quota_limited:
+            raise quota.QuotaExceededError
+        raise HTTPException(
+            status_code=413, detail=f"파트 크기가 제한({e.limit} bytes)을 초과했습니다"
+        )
+
+    if content_sha256 is not None and content_sha256.lower() != stored.content_hash:
+        await storage.delete(tmp_key)
+        raise HTTPException(status_code=400, detail="파트 체크섬이 일치하지 않습니다")
+
+    await storage.move(tmp_key, part_key)
+
+    return await upload_crud.upsert_part(
+        db,
+        db_session,
+        part_number=part_number,
+        size=stored.size,
+        content_hash=stored.content_hash,
+    )
+
+
+@router.put("/{upload_id}/parts/{part_number}", response_model=UploadPartResponse)
+async def upload_part(
+    upload_id: str,
+    request: Request,
+    part_number: int = Path(..., ge=1),
+    content_sha256: str | None = Header(default=None, alias="X-Content-SHA256"),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    파트 하나를 요청 본문 그대로 받아 저장합니다.
+
+    파트는 서로 독립적이므로 여러 파트를 병렬로 올릴 수 있고,
+    같은 번호로 다시 올리면 덮어씁니다.
+    """
+    return await _receive_part(
+        db, upload_id, part_number, request, content_sha256, user_id=user_id
+    )
+
+
+@router.post(
+    "/{upload_id}/parts/{part_number}/url", response_model=SignedUrlResponse
+)
+async def create_part_upload_url(
+    upload_id: str,
+    request: Request,
+    part_number: int = Path(..., ge=1),
+    expires_in: int | None = Query(
+        default=None, ge=1, description="유효 시간(초), 생략하면 기본값"
+    ),
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """인증 헤더 없이 파트 하나를 올릴 수 있는 서명 URL을 발급합니다."""
+    await _get_session_or_404(db, upload_id, user_id)
+    expires_in = min(expires_in or settings.signed_url_ttl, settings.signed_url_max_ttl)
+    token, expires_at = signing.sign(
+        "upload-part", {"u": upload_id, "p": part_number}, expires_in
+    )
+    return SignedUrlResponse(
+        url=str(request.url_for("upload_part_signed", token=token)),
+        expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+    )
+
+
+@router.put(
+    "/signed/{token}", response_model=UploadPartResponse, name="upload_part_signed"
+)
+async def upload_part_signed(
+    token: str,
+    request: Request,
+    content_sha256: str | None = Header(default=None, alias="X-Content-SHA256"),
+    db: Session = Depends(get_db),
+):
+    """서명 URL로 파트를 올립니다."""
+    try:
+        payload = signing.verify("upload-part", token)
+    except signing.InvalidSignatureError:
+        raise HTTPException(status_code=403, detail="유효하지 않거나 만료된 URL입니다")
+    return await _receive_part(
+        db, payload["u"], payload["p"], request, content_sha256
+    )
+
+
+@router.post("/{upload_id}/complete", response_model=FileResponse)
+async def complete_upload(
+    upload_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """받은 파트들을 순서대로 이어 붙여 하나의 파일로 만듭니다."""
+    db_session = await _get_session_or_404(db, upload_id, user_id)
+
+    # 응답을 받지 못한 클라이언트가 다시 호출해도 같은 결과를 돌려줌
+    if db_session.status == "completed":
+        file_model = await file_crud.get_file(db, db_session.file_id)
+        if file_model is None:
+            raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+        return to_file_response(file_model, await _get_folder(db, file_model))
+
+    if not await upload_crud.claim_session(db, db_session):
+        raise HTTPException(status_code=409, detail="진행 중인 업로드 세션이 아닙니다")
+
+    tmp_path = None
+    try:
+        parts = await upload_crud.get_parts(db, upload_id)
+        part_numbers = [part.part_number for part in parts]
+        if not parts or part_numbers != list(range(1, len(parts) + 1)):
+            raise HTTPException(status_code=400, detail="누락된 파트가 있습니다")
+
+        total_size = sum(part.size for part in parts)
+        if db_session.total_size is not None and db_session.total_size != total_size:
+            raise HTTPException(
+                status_code=400, detail="파트 크기의 합이 전체 크기와 다릅니다"
+            )
+        if settings.max_upload_size and total_size > settings.max_upload_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"파일 크기가 제한({settings.max_upload_size} bytes)을 초과했습니다",
+            )
+
+        file_id = str(uuid.uuid4())
+        tmp_path = await run_in_threadpool(blob_store.new_tmp_path)
+
+        # 파트를 순서대로 읽어 로컬 임시 파일로 이어 붙이면서 전체 해시를 계산
+        stored = await save_stream(
+            _iter_parts([_part_key(upload_id, number) for number in part_numbers]),
+            tmp_path,
+            max_size=0,
+        )
+
+        blob = await blob_store.add_blob(db, tmp_path, stored)
+        file_model = await file_crud.create_file(
+            db,
+            file_id=file_id,
+            file_name=db_session.file_name,
+            folder_id=db_session.folder_id,
+            owner_id=db_session.owner_id,
+            file_path=blob.path,
+            file_size=blob.size,
+            content_hash=blob.hash,
+            content_type=guess_content_type(db_session.file_name),
+        )
+        new_blob = blob.ref_count == 1
+        jobs.enqueue_file_jobs(db, file_model, new_blob=new_blob)
+        await upload_crud.complete_session(db, db_session, file_id=file_id)
+        if db_session.owner_id is not None:
+            await quota.charge(db, db_session.owner_id, blob.size)
+        await db.commit()
+    except BaseException:
+        # 어디서 실패하든 이어 붙인 임시 파일과 새로 쓴 blob 객체를 지우고,
+        # 클라이언트가 다시 완료를 요청할 수 있도록 세션을 pending으로 되돌림
+        if tmp_path is not None:
+            await run_in_threadpool(remove_quietly, tmp_path)
+        await blob_store.discard_new_blobs(db)
+        await upload_crud.release_session(db, db_session)
+        raise
+    await db.refresh(file_model)
+    jobs.worker.notify()
+    if db_session.owner_id is not None:
+        changes.notifier.notify([db_session.owner_id])
+
+    await _remove_session_parts(upload_id)
+    return to_file_response(file_model, await _get_folder(db, file_model))
+
+
+@router.delete("/{upload_id}", response_model=None, status_code=204)
+async def abort_upload(
+    upload_id: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """업로드를 취소하고 받은 파트를 모두 지웁니다."""
+    db_session = await _get_session_or_404(db, upload_id, user_id)
+    if db_session.status == "completing":
+        raise HTTPException(status_code=409, detail="완료 처리 중인 세션입니다")
+
+    await upload_crud.delete_session(db, db_session)
+    await _remove_session_parts(upload_id)
+    return None
+
+
+async def purge_expired_upload_sessions() -> int:
+    """만료된(버려진) 업로드 세션과 파트 파일을 정리합니다."""
+    purged = 0
+    async with SessionLocal() as db:
+        while sessions := await upload_crud.get_expired_sessions(db, now=datetime.now()):
+            for db_session in sessions:
+                await _remove_session_parts(db_session.id)
+                await upload_crud.delete_session(db, db_session)
+                purged += 1
+    return purged
@@ -0,0 +1,101 @@
+import logging
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+
+from .. import blob_store, changes, jobs, models, quota, versions
+from ..crud import file_crud, version_crud
+from ..database import get_db
+from ..schemas.file_schema import FileResponse
+from ..schemas.version_schema import VersionList, VersionResponse
+from ..util import user_auth_required
+from .files import to_file_response
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/drive", tags=["drive"])
+
+
+async def _get_file_or_404(db: Session, safe_filename: str, user_id: str) -> models.FileModel:
+    file_id = os.path.splitext(safe_filename)[0]
+    file = await file_crud.get_file(db, file_id=file_id, user_id=user_id)
+    if file is None:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    return file
+
+
+def to_version_response(db_version: models.FileVersion) -> VersionResponse:
+    return VersionResponse(
+        version=db_version.version,
+        size=db_version.size,
+        content_hash=db_version.content_hash,
+        created_at=db_version.created_at,
+        replaced_at=db_version.replaced_at,
+        stored_as="full" if db_version.base_hash is None else "delta",
+    )
+
+
+@router.get("/file/{safe_filename}/versions", response_model=VersionList)
+async def list_file_versions(
+    safe_filename: str,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """파일의 이전 버전을 최신순으로 반환합니다. (보관 기간이 지난 버전은 없음)"""
+    file = await _get_file_or_404(db, safe_filename, user_id)
+    db_versions = await version_crud.list_versions(db, file.id)
+    return VersionList(
+        current_version=file.version,
+        items=[to_version_response(db_version) for db_version in db_versions],
+    )
+
+
+@router.post(
+    "/file/{safe_filename}/versions/{version}/restore", response_model=FileResponse
+)
+async def restore_file_version(
+    safe_filename: str,
+    version: int,
+    user_id: str = Depends(user_auth_required),
+    db: Session = Depends(get_db),
+):
+    """
+    파일 내용을 이전 버전으로 되돌립니다.
+
+    되돌리기도 내용을 바꾸는 것이므로 버전 번호가 올라가고, 지금 내용은 새 버전으로 남습니다.
+    """
+    file = await _get_file_or_404(db, safe_filename, user_id)
+    db_version = await version_crud.get_version(db, file.id, version)
+    if db_version is None:
+        raise HTTPException(status_code=404, detail="버전을 찾을 수 없습니다")
+    folder = (
+        await db.get(models.Folder, file.folder_id) if file.folder_id is not None else None
+    )
+    if db_version.content_hash == file.content_hash:
+        return to_file_response(file, folder)
+
+    base_hash, old_size = file.content_hash, file.size
+    try:
+        blob = await versions.restore_blob(db, db_version)
+    except versions.VersionContentError:
+        logger.exception("cannot restore version %s of file %s", version, file.id)
+        raise HTTPException(status_code=500, detail="버전 내용을 읽을 수 없습니다")
+    is_new = blob.ref_count == 1
+    if not await file_crud.replace_content(db, file, blob, base_hash=base_hash):
+        await blob_store.discard_new_blobs(db)
+        raise HTTPException(
+            status_code=409, detail="그 사이 파일 내용이 바뀌었습니다. 다시 시도해 주세요"
+        )
+    try:
+        await quota.adjust(db, file.owner_id, blob.size - old_size)
+    except quota.QuotaExceededError:
+        await blob_store.discard_new_blobs(db)
+        raise
+    jobs.enqueue_file_jobs(db, file, new_blob=is_new)
+    jobs.enqueue_version_jobs(db, file)
+    await db.commit()
+    jobs.worker.notify()
+    if file.owner_id is not None:
+        changes.notifier.notify([file.owner_id])
+    return to_file_response(file, folder)
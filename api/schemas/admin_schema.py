@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class StorageStatsResponse(BaseModel):
+    file_count: int = Field(..., ge=0)
+    blob_count: int = Field(..., ge=0, description="실제로 저장된 고유 blob 수")
+    logical_bytes: int = Field(..., ge=0, description="모든 파일 크기의 합(bytes)")
+    unique_bytes: int = Field(..., ge=0, description="중복 제거 후 blob 원본 크기의 합(bytes)")
+    physical_bytes: int = Field(..., ge=0, description="저장소에 실제로 쓰인 blob 크기의 합(bytes)")
+    bytes_saved: int = Field(..., ge=0, description="중복 제거와 압축으로 절약한 용량(bytes)")
+    compression_saved: int = Field(..., ge=0, description="압축으로 절약한 용량(bytes)")
+    dedup_ratio: float = Field(..., ge=0, description="logical_bytes / unique_bytes")
+
+
+class QuotaUpdate(BaseModel):
+    quota_bytes: int | None = Field(
+        ..., ge=0, description="저장 공간 한도(bytes), null이면 기본값, 0이면 제한 없음"
+    )
+
+
+class IntegrityCheckResponse(BaseModel):
+    name: str = Field(..., description="검사 종류 (reconcile: 정합성 검사, scrub: 체크섬 검사)")
+    status: str = Field(..., description="idle, running, finished, paused, failed")
+    position: str | None = Field(None, description="체크섬 검사를 이어서 할 위치(blob hash)")
+    report: dict | None = Field(None, description="검사 결과, 실행 중이면 지금까지의 결과")
+    locked_by: str | None = None
+    started_at: datetime | None = None
+    updated_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
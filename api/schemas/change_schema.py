@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ChangeResponse(BaseModel):
+    seq: int = Field(..., ge=1, description="사용자별 변경 번호 (다음 요청의 since로 사용)")
+    action: Literal["created", "modified", "deleted"]
+    file_id: str
+    name: str
+    folder_id: str | None = None
+    path: str | None = Field(
+        None, example="/documents/report.pdf", description="폴더의 현재 경로 기준, 폴더가 없어졌으면 null"
+    )
+    size: int | None = None
+    content_hash: str | None = None
+    content_type: str | None = None
+    changed_at: datetime
+
+
+class ChangeList(BaseModel):
+    items: list[ChangeResponse]
+    cursor: int = Field(..., ge=0, description="다음 요청의 since 값")
+    has_more: bool = Field(..., description="limit 때문에 덜 받은 변경이 있는지")
+
+
+class ChangeCursor(BaseModel):
+    cursor: int = Field(..., ge=0, description="지금까지의 마지막 변경 번호")
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+
+class SignatureResponse(BaseModel):
+    content_hash: str = Field(..., description="서명을 만든 내용의 해시, 차분을 올릴 때 base로 보냄")
+    size: int = Field(..., ge=0)
+    block_size: int = Field(..., ge=1, example=65536)
+    weak: list[int] = Field(..., description="블록별 adler32")
+    strong: list[str] = Field(..., description="블록별 blake2b(16 bytes) hex")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
+from typing import Literal
 import os
 
 
@@ -12,7 +13,7 @@ class FileBase(BaseModel):
     @field_validator("path")
     @classmethod
     def validate_path(cls, v):
-        if ".." in v or "//" in v:
+        if ".." in v.split("/") or "//" in v:
             raise ValueError("잘못된 경로입니다")
         return os.path.normpath(v)
 
@@ -36,4 +37,51 @@ class FileResponse(FileBase):
 
 class FileList(BaseModel):
     items: list[FileResponse]
-    total: int = Field(..., ge=0)
+    total: int = Field(..., ge=0, description="이번 페이지의 항목 수")
+    next_cursor: str | None = Field(
+        None, description="다음 페이지 조회에 사용할 커서, 마지막 페이지면 null"
+    )
+
+
+class TrashedFileResponse(FileResponse):
+    deleted_at: datetime = Field(..., description="휴지통으로 옮긴 시각")
+    purge_at: datetime = Field(..., description="이 시각 이후 완전히 지워짐")
+
+
+class TrashList(BaseModel):
+    items: list[TrashedFileResponse]
+    total: int = Field(..., ge=0, description="이번 페이지의 항목 수")
+    next_cursor: str | None = Field(
+        None, description="다음 페이지 조회에 사용할 커서, 마지막 페이지면 null"
+    )
+
+
+class TrashPurgeResponse(BaseModel):
+    count: int = Field(..., ge=0, description="완전히 지우도록 넘긴 파일 수")
+
+
+class SignedUrlResponse(BaseModel):
+    url: str = Field(..., description="인증 없이 사용할 수 있는 서명 URL")
+    expires_at: datetime
+
+
+class BatchFileIds(BaseModel):
+    ids: list[str] = Field(..., min_length=1, description="파일 id 목록")
+
+
+class BatchItemResult(BaseModel):
+    id: str | None = None
+    name: str | None = None
+    status: Literal["ok", "not_found", "error"]
+    file: FileResponse | None = None
+    detail: str | None = None
+
+
+class BatchResponse(BaseModel):
+    items: list[BatchItemResult] = Field(..., description="요청 순서대로의 항목별 결과")
+
+
+class UsageResponse(BaseModel):
+    used_bytes: int = Field(..., ge=0, description="사용 중인 용량(bytes)")
+    quota_bytes: int | None = Field(None, description="저장 공간 한도(bytes), 제한이 없으면 null")
+    remaining_bytes: int | None = Field(None, description="남은 용량(bytes), 제한이 없으면 null")
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class FolderCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255, example="work")
+    path: str = Field("/", example="/documents", description="폴더를 만들 상위 경로")
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, v):
+        if "/" in v or v in (".", ".."):
+            raise ValueError("잘못된 폴더 이름입니다")
+        return v
+
+
+class FolderUpdate(BaseModel):
+    name: str | None = Field(None, min_length=1, max_length=255, example="work-2024")
+    path: str | None = Field(None, example="/archive", description="옮길 상위 경로")
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, v):
+        if v is not None and ("/" in v or v in (".", "..")):
+            raise ValueError("잘못된 폴더 이름입니다")
+        return v
+
+
+class FolderResponse(BaseModel):
+    id: str
+    name: str
+    path: str = Field(..., example="/documents/work")
+    parent_id: str | None = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class FolderList(BaseModel):
+    items: list[FolderResponse]
+    total: int = Field(..., ge=0, description="이번 페이지의 항목 수")
+    next_cursor: str | None = Field(
+        None, description="다음 페이지 조회에 사용할 커서, 마지막 페이지면 null"
+    )
+
+
+class FolderStats(BaseModel):
+    folder_count: int = Field(..., ge=0, description="하위 폴더 수(재귀)")
+    file_count: int = Field(..., ge=0, description="하위 파일 수(재귀)")
+    total_size: int = Field(..., ge=0, description="하위 파일 크기 합(bytes)")
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class JobResponse(BaseModel):
+    id: str
+    type: str = Field(..., example="checksum")
+    status: str = Field(..., example="pending", description="pending, running, succeeded, failed")
+    attempts: int = Field(..., ge=0)
+    max_attempts: int = Field(..., ge=1)
+    last_error: str | None = None
+    result: dict | None = None
+    created_at: datetime
+    updated_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobList(BaseModel):
+    items: list[JobResponse]
+
+
+class JobCount(BaseModel):
+    type: str
+    status: str
+    count: int = Field(..., ge=0)
+
+
+class JobStatsResponse(BaseModel):
+    counts: list[JobCount]
+    running_in_worker: dict[str, int] = Field(
+        ..., description="이 서버의 워커에서 실행 중인 작업 수(종류별)"
+    )
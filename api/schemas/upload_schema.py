@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class UploadSessionCreate(BaseModel):
+    file_name: str = Field(..., max_length=255, example="video.mp4")
+    path: str = Field("/", example="/documents/work", description="업로드할 폴더 경로")
+    total_size: int | None = Field(
+        None, ge=0, example=5368709120, description="전체 파일 크기(bytes), 선택"
+    )
+
+
+class UploadPartResponse(BaseModel):
+    part_number: int = Field(..., ge=1)
+    size: int = Field(..., ge=0, description="파트 크기(bytes)")
+    content_hash: str = Field(..., description="파트 sha256")
+
+    class Config:
+        from_attributes = True
+
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    file_name: str
+    total_size: int | None = None
+    status: str = Field(..., example="pending")
+    file_id: str | None = None
+    expires_at: datetime
+    parts: list[UploadPartResponse] = []
+
+    class Config:
+        from_attributes = True
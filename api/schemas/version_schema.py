@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class VersionResponse(BaseModel):
+    version: int = Field(..., ge=1)
+    size: int = Field(..., ge=0, description="이 버전의 파일 크기(bytes)")
+    content_hash: str
+    created_at: datetime = Field(..., description="이 내용이 저장된 시각")
+    replaced_at: datetime = Field(..., description="다음 내용으로 바뀐 시각")
+    stored_as: Literal["full", "delta"] = Field(
+        ..., description="통째로 저장했는지, 다른 내용에 대한 차분으로 저장했는지"
+    )
+
+
+class VersionList(BaseModel):
+    current_version: int = Field(..., ge=1)
+    items: list[VersionResponse]
@@ -1,6 +1,7 @@
 import enum
 from pathlib import Path
 from tempfile import gettempdir
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from yarl import URL
@@ -41,17 +42,89 @@ class Settings(BaseSettings):
     environment: str = "dev"
 
     log_level: LogLevel = LogLevel.INFO
+    # 'json'이면 한 줄에 JSON 하나, 'text'면 사람이 읽기 쉬운 형식
+    log_format: Literal["json", "text"] = "json"
+    # /metrics 로 Prometheus 지표를 노출할지
+    metrics_enabled: bool = True
 
     # Variables for the database
-    db_host: str = "localhost"
-    db_port: int = 5432
-    db_user: str = "dblab-emr"
-    db_pass: str = "dblab-emr"
-    db_base: str = "dblab-emr"
+    db_host: str = "db"
+    db_port: int = 3306
+    db_user: str = "root"
+    db_pass: str = ""
+    db_base: str = "demo"
     db_echo: bool = False
+    # 설정하면 db_* 대신 이 URL로 접속 (예: 벤치마크용 'sqlite+aiosqlite:////tmp/bench.db')
+    database_url: str = ""
+    # 이 시간(초)보다 오래 걸린 쿼리는 WARNING으로 기록
+    slow_query_threshold: float = 0.5
+    # 커넥션 풀 설정
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+
+    # Variables for file upload
+    # 파일 내용을 저장할 곳 ('local': upload_dir, 's3': minio_* 설정의 버킷)
+    storage_backend: Literal["local", "s3"] = "local"
+    # 로컬 저장소 위치. s3를 쓸 때도 업로드 중 임시 파일은 여기에 씀
+    upload_dir: str = "/uploads"
+    # 스트리밍 업로드 시 한 번에 읽고 쓰는 청크 크기(bytes)
+    upload_chunk_size: int = 1024 * 1024
+    # 파일 하나의 최대 크기(bytes), 0이면 제한 없음
+    max_upload_size: int = 5 * 1024**3
+    # 요청 본문 전체의 최대 크기(bytes), 0이면 제한 없음
+    max_request_body_size: int = 5 * 1024**3 + 1024 * 1024
+
+    # 일괄 처리 API에서 한 번에 받을 수 있는 최대 항목 수와 저장소 동시 삭제 수
+    max_batch_size: int = 1000
+    batch_delete_concurrency: int = 16
+
+    # 저장 시 압축 ('none' 또는 'zstd', zstandard 패키지 필요)과 압축 수준
+    storage_compression: Literal["none", "zstd"] = "none"
+    storage_compression_level: int = 3
+    # JSON 응답 압축(gzip/zstd)을 적용할 최소 크기(bytes), 0이면 끔
+    response_compression_min_size: int = 1024
+
+    # ZIP 묶음 다운로드의 deflate 압축 수준 (1~9)
+    zip_compress_level: int = 6
+
+    # Variables for signed URL
+    # 서명 URL의 기본 유효 시간과 최대 유효 시간(초)
+    signed_url_ttl: int = 5 * 60
+    signed_url_max_ttl: int = 7 * 24 * 60 * 60
+    # 서명 URL 다운로드를 앞단 웹서버에 넘기는 방식
+    # 'none': 앱이 직접 전송, 'x-accel-redirect': nginx, 'x-sendfile': Apache/lighttpd
+    download_offload: Literal["none", "x-accel-redirect", "x-sendfile"] = "none"
+    # nginx의 internal location 경로 (이 뒤에 저장소 키를 붙임)
+    x_accel_redirect_prefix: str = "/_protected/"
+
+    # Variables for resumable upload session
+    # 마지막 활동 이후 세션을 유지하는 시간(초)
+    upload_session_ttl: int = 24 * 60 * 60
+    # 만료된 세션을 정리하는 주기(초)
+    upload_session_gc_interval: int = 10 * 60
+    # 완료 처리 중(completing)인 세션은 만료된 뒤에도 이 시간(초)만큼 더 두고 정리
+    upload_completing_grace: int = 24 * 60 * 60
+    max_upload_parts: int = 10000
+    max_upload_part_size: int = 1024**3
 
     # Variables for Auth
     secret_key: str = "sample_secret_key"
+    # 검증된 토큰과 사용자 정보를 캐시하는 시간(초)과 최대 항목 수
+    auth_cache_ttl: int = 60
+    auth_cache_size: int = 10000
+    # 비밀번호 해시(PBKDF2) 설정
+    kdf_iterations: int = 100000
+    kdf_workers: int = 4
+    # True면 스레드 대신 프로세스 풀에서 해시를 계산
+    kdf_use_processes: bool = False
+    # 실행 중 + 대기 중인 해시 작업이 이 수를 넘으면 429로 거절
+    kdf_max_pending: int = 64
+    # 로그인 시도 제한 (login_window초 동안)
+    login_window: int = 60
+    login_max_attempts_per_ip: int = 30
+    login_max_failures_per_account: int = 5
 
     # Variables for minio
     minio_host: str = "localhost"
@@ -59,9 +132,89 @@ class Settings(BaseSettings):
     minio_access_key: str = ""
     minio_secret_key: str = ""
     minio_default_bucket: str = "files"
+    minio_secure: bool = False
+    minio_region: str = "us-east-1"
+    # S3 커넥션 풀 크기, 멀티파트 업로드 파트 크기(5MiB 이상)와 동시 업로드 파트 수
+    s3_max_pool_connections: int = 50
+    s3_multipart_chunk_size: int = 8 * 1024 * 1024
+    s3_upload_concurrency: int = 4
 
     # Variables for OCR
     ocr_secret: str = ""
+    ocr_enabled: bool = False  # 업로드된 이미지/PDF에 OCR 작업을 추가할지
+    ocr_provider: Literal["stub", "clova"] = "stub"
+    ocr_api_url: str = ""
+    ocr_timeout: float = 30.0
+    ocr_max_size: int = 20 * 1024 * 1024  # 이보다 큰 파일은 OCR 하지 않음
+
+    # Variables for quota
+    # 사용자별 기본 저장 공간 한도(bytes), 0이면 제한 없음
+    default_user_quota: int = 10 * 1024**3
+    # 업로드 요청 본문을 남은 공간으로 제한할 때 multipart 헤더 등을 위해 더 허용하는 크기
+    quota_body_overhead: int = 64 * 1024
+
+    # Variables for search
+    # 텍스트 파일에서 검색용으로 추출하는 최대 크기(bytes)
+    search_text_max_bytes: int = 1024 * 1024
+
+    # Variables for previews (썸네일)
+    # 미리보기 캐시 위치, 비워 두면 upload_dir/.previews
+    preview_cache_dir: str = ""
+    preview_cache_max_bytes: int = 1024**3
+    preview_max_source_size: int = 50 * 1024 * 1024  # 이보다 큰 파일은 미리보기를 만들지 않음
+    preview_max_age: int = 24 * 60 * 60  # Cache-Control max-age(초)
+
+    # Variables for background jobs
+    job_worker_enabled: bool = True  # 이 프로세스에서 작업 워커를 실행할지
+    job_poll_interval: float = 1.0  # 초
+    job_lock_timeout: int = 600  # running으로 이 시간(초) 넘게 남은 작업은 다시 실행
+    job_retry_base_delay: float = 10.0  # 재시도 대기 시간(초), 실패할 때마다 두 배
+    job_process_workers: int = 2  # CPU 작업용 프로세스 수
+
+    # 차분(delta) 업로드의 블록 크기 범위(bytes), 파일 크기의 제곱근에 가까운 값을 씀
+    delta_min_block_size: int = 4 * 1024
+    delta_max_block_size: int = 1024 * 1024
+
+    # 파일 버전: 최근 version_keep_count개(0이면 이전 내용을 남기지 않음)를
+    # version_keep_days일(0이면 기간 제한 없음) 동안 보관
+    version_keep_count: int = 10
+    version_keep_days: int = 30
+    version_prune_interval: int = 3600
+    version_prune_batch_size: int = 500
+    # 이 크기 이하인 이전 버전은 현재 내용에 대한 차분으로 바꿔 저장 (0이면 끔)
+    version_delta_max_size: int = 64 * 1024 * 1024
+    # 차분이 원래 크기의 이 비율보다 크면 통째로 둠
+    version_delta_max_ratio: float = 0.5
+
+    # 휴지통: 지운 파일은 trash_retention_days일 뒤 정리 작업이 실제로 지움
+    trash_retention_days: int = 30
+    trash_reap_interval: int = 60
+    trash_reap_batch_size: int = 100
+    # 배치 사이에 쉬는 시간(초), 한꺼번에 많이 지울 때 저장소 I/O가 몰리지 않도록 함
+    trash_reap_pause: float = 1.0
+
+    # 저장소와 DB 정합성 검사 (python -m api.integrity 또는 /api/admin/integrity)
+    # 이보다 최근에 쓰인 객체는 올리는 중일 수 있으므로 orphan으로 보지 않음(초)
+    integrity_grace_period: int = 60 * 60
+    integrity_batch_size: int = 1000  # DB에서 한 번에 읽는 blob 수
+    integrity_sample_size: int = 100  # 보고서에 종류별로 남기는 키 수
+    # 객체가 없는 blob이 이보다 많으면 저장소 장애일 수 있으므로 복구하지 않고 보고만 함
+    integrity_max_missing_repair: int = 100
+    # 실행 중인 검사가 이 시간(초) 넘게 갱신되지 않으면 죽은 것으로 보고 다른 곳에서 실행
+    integrity_lease_timeout: int = 600
+    # 체크섬 검사: 초당 읽는 최대 크기(bytes, 0이면 제한 없음), 동시에 읽는 blob 수
+    scrub_rate: int = 32 * 1024 * 1024
+    scrub_workers: int = 4
+    scrub_batch_size: int = 100  # 이 수만큼 검사할 때마다 위치를 저장
+    scrub_interval: int = 0  # 주기적으로 검사하는 간격(초), 0이면 하지 않음
+
+    # 변경 기록(동기화용)
+    changes_max_wait: int = 60  # long-poll에서 기다릴 수 있는 최대 시간(초)
+    # 다른 프로세스에서 생긴 변경을 알아채기 위해 기다리는 중에 다시 조회하는 간격(초)
+    changes_poll_interval: float = 5.0
+    changes_keepalive: float = 15.0  # SSE 연결 유지용 주석을 보내는 간격(초)
+    changes_retention_days: int = 30  # 이보다 오래된 기록은 지움 (그보다 오래 쉰 클라이언트는 410)
+    changes_prune_interval: int = 3600
 
     @property
     def db_url(self) -> URL:
@@ -70,13 +223,16 @@ class Settings(BaseSettings):
 
         :return: database URL.
         """
+        if self.database_url:
+            return URL(self.database_url)
         return URL.build(
-            scheme="postgresql+asyncpg",
+            scheme="mysql+aiomysql",
             host=self.db_host,
             port=self.db_port,
             user=self.db_user,
-            password=self.db_pass,
+            password=self.db_pass or None,
             path=f"/{self.db_base}",
+            query={"charset": "utf8mb4"},
         )
 
     model_config = SettingsConfigDict(
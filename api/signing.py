@@ -0,0 +1,63 @@
+"""
+만료 시각이 있는 서명 URL 토큰
+
+토큰은 base64url(JSON 본문) + '.' + base64url(HMAC-SHA256 서명) 형태이며,
+본문에 필요한 정보를 모두 담으므로 검증할 때 DB를 조회하지 않습니다.
+서명 키는 settings.secret_key에서 용도별로 파생해 JWT 등 다른 용도와 섞이지 않게 합니다.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any
+
+from .settings import settings
+
+
+class InvalidSignatureError(Exception):
+    """서명이 맞지 않거나 만료된 토큰인 경우 발생합니다."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _signing_key(purpose: str) -> bytes:
+    return hmac.new(
+        settings.secret_key.encode(), f"signed-url:{purpose}".encode(), hashlib.sha256
+    ).digest()
+
+
+def sign(purpose: str, payload: dict[str, Any], expires_in: int) -> tuple[str, int]:
+    """payload에 만료 시각을 붙여 서명한 토큰과 만료 시각(unix time)을 반환합니다."""
+    expires_at = int(time.time()) + expires_in
+    body = _b64encode(
+        json.dumps({**payload, "exp": expires_at}, separators=(",", ":")).encode()
+    )
+    signature = hmac.new(_signing_key(purpose), body.encode(), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(signature)}", expires_at
+
+
+def verify(purpose: str, token: str) -> dict[str, Any]:
+    """토큰을 검증하고 본문을 반환합니다."""
+    body, _, signature = token.partition(".")
+    try:
+        expected = hmac.new(
+            _signing_key(purpose), body.encode(), hashlib.sha256
+        ).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            raise InvalidSignatureError("signature mismatch")
+        payload = json.loads(_b64decode(body))
+    except (ValueError, TypeError):
+        raise InvalidSignatureError("malformed token")
+
+    if payload.get("exp", 0) < time.time():
+        raise InvalidSignatureError("token expired")
+    return payload
@@ -0,0 +1,74 @@
+"""
+파일 내용 저장소
+
+settings.storage_backend로 로컬 디스크('local')와 S3 호환 저장소('s3')
+중 하나를 고릅니다. 라우터와 blob 저장소는 get_storage()가 돌려주는
+StorageBackend만 사용합니다.
+"""
+from ..settings import settings
+from .base import ObjectStat, StorageBackend
+from .local import LocalStorage
+from .streaming import (
+    StoredUpload,
+    UploadTooLargeError,
+    concat_files,
+    guess_content_type,
+    iter_file_range,
+    iter_upload_file,
+    remove_quietly,
+    save_stream,
+    save_upload_file,
+)
+
+_storage: StorageBackend | None = None
+
+
+def create_storage() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        from .s3 import S3Storage
+
+        scheme = "https" if settings.minio_secure else "http"
+        return S3Storage(
+            bucket=settings.minio_default_bucket,
+            endpoint_url=f"{scheme}://{settings.minio_host}:{settings.minio_port}",
+            access_key=settings.minio_access_key,
+            secret_key=settings.minio_secret_key,
+            region=settings.minio_region,
+            part_size=settings.s3_multipart_chunk_size,
+            max_pool_connections=settings.s3_max_pool_connections,
+            upload_concurrency=settings.s3_upload_concurrency,
+        )
+    return LocalStorage(settings.upload_dir)
+
+
+def get_storage() -> StorageBackend:
+    global _storage  # noqa: WPS420
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+
+async def close_storage() -> None:
+    global _storage  # noqa: WPS420
+    if _storage is not None:
+        await _storage.close()
+        _storage = None
+
+
+__all__ = [
+    "LocalStorage",
+    "ObjectStat",
+    "StorageBackend",
+    "StoredUpload",
+    "UploadTooLargeError",
+    "close_storage",
+    "concat_files",
+    "create_storage",
+    "get_storage",
+    "guess_content_type",
+    "iter_file_range",
+    "iter_upload_file",
+    "remove_quietly",
+    "save_stream",
+    "save_upload_file",
+]
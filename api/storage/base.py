@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import abc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+
+from .streaming import StoredUpload
+
+
+@dataclass
+class ObjectStat:
+    """저장소에 있는 객체의 메타데이터"""
+
+    key: str
+    size: int
+    last_modified: datetime | None = None
+
+
+class StorageBackend(abc.ABC):
+    """
+    파일 내용을 저장하는 저장소 인터페이스
+
+    객체는 'blobs/ab/cd/<hash>' 같은 '/' 구분 키로 구분합니다.
+    DB에는 키만 저장하므로 드라이버를 바꿔도 메타데이터는 그대로 쓸 수 있습니다.
+    """
+
+    @abc.abstractmethod
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        max_size: int | None = None,
+    ) -> StoredUpload:
+        """
+        청크 스트림을 key에 저장하면서 크기와 sha256을 계산합니다.
+
+        같은 키가 있으면 덮어쓰며, 저장이 끝나기 전에는 이전 내용이 유지됩니다.
+        크기 제한을 넘으면 UploadTooLargeError를 발생시킵니다.
+        """
+
+    @abc.abstractmethod
+    async def put_file(self, key: str, local_path: str) -> None:
+        """로컬 임시 파일을 key로 옮깁니다. 성공하면 local_path는 남지 않습니다."""
+
+    @abc.abstractmethod
+    async def move(self, src_key: str, dest_key: str) -> None:
+        """객체 키를 바꿉니다. dest_key가 있으면 덮어씁니다."""
+
+    @abc.abstractmethod
+    def open_range(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """[start, end] 구간(end 포함)을 청크 단위로 읽습니다. end가 None이면 끝까지 읽습니다."""
+
+    @abc.abstractmethod
+    async def stat(self, key: str) -> ObjectStat | None:
+        """객체 정보를 반환합니다. 없으면 None입니다."""
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        """객체를 지웁니다. 없어도 오류가 아닙니다."""
+
+    @abc.abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        """prefix로 시작하는 객체를 모두 지웁니다."""
+
+    @abc.abstractmethod
+    def iter_objects(self, prefix: str) -> AsyncIterator[ObjectStat]:
+        """
+        prefix('blobs/'처럼 '/'로 끝나는 접두사)로 시작하는 객체를 키 순서(문자열 비교)대로
+        나열합니다. 목록 전체를 메모리에 올리지 않고 조금씩 읽습니다.
+        """
+
+    def local_path(self, key: str) -> str | None:
+        """객체가 로컬 디스크에 있으면 그 경로를 반환합니다. (X-Sendfile 등에 사용)"""
+        return None
+
+    async def presigned_url(
+        self,
+        key: str,
+        expires_in: int,
+        filename: str,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> str | None:
+        """저장소가 직접 내려주는 서명 URL을 만들 수 있으면 반환합니다."""
+        return None
+
+    async def close(self) -> None:
+        """커넥션 풀 등 드라이버가 가진 자원을 정리합니다."""
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import itertools
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Iterator
+
+from starlette.concurrency import run_in_threadpool
+
+from .base import ObjectStat, StorageBackend
+from .streaming import StoredUpload, iter_file_range, remove_quietly, save_stream
+
+# iter_objects가 스레드풀에서 한 번에 읽어 오는 항목 수
+_LIST_BATCH = 1000
+
+
+class LocalStorage(StorageBackend):
+    """root 디렉토리 아래에 키를 경로로 삼아 저장하는 로컬 디스크 드라이버"""
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, *key.split("/")))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f"invalid storage key: {key}")
+        return path
+
+    def local_path(self, key: str) -> str | None:
+        return self.path(key)
+
+    def _prepare(self, key: str) -> tuple[str, str]:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 같은 키에 동시에 써도 섞이지 않도록 임시 파일에 쓴 뒤 교체
+        return path, f"{path}.{uuid.uuid4().hex}.tmp"
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        max_size: int | None = None,
+    ) -> StoredUpload:
+        path, tmp_path = await run_in_threadpool(self._prepare, key)
+        stored = await save_stream(chunks, tmp_path, max_size=max_size)
+        await run_in_threadpool(os.replace, tmp_path, path)
+        return stored
+
+    def _move(self, key: str, local_path: str) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(local_path, path)
+        except OSError:
+            # 임시 디렉토리가 다른 파일시스템에 있는 경우
+            shutil.move(local_path, path)
+
+    async def put_file(self, key: str, local_path: str) -> None:
+        await run_in_threadpool(self._move, key, local_path)
+
+    def _rename(self, src_key: str, dest_key: str) -> None:
+        dest_path = self.path(dest_key)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        os.replace(self.path(src_key), dest_path)
+
+    async def move(self, src_key: str, dest_key: str) -> None:
+        await run_in_threadpool(self._rename, src_key, dest_key)
+
+    async def open_range(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        if end is None:
+            end = (await run_in_threadpool(os.path.getsize, self.path(key))) - 1
+        async for chunk in iter_file_range(self.path(key), start, end):
+            yield chunk
+
+    def _stat(self, key: str) -> ObjectStat | None:
+        try:
+            result = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectStat(
+            key=key,
+            size=result.st_size,
+            last_modified=datetime.fromtimestamp(result.st_mtime),
+        )
+
+    async def stat(self, key: str) -> ObjectStat | None:
+        return await run_in_threadpool(self._stat, key)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(remove_quietly, self.path(key))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        # 키의 '/'가 디렉토리와 대응하므로 'parts/<id>/' 같은 접두사는 디렉토리 하나
+        path = self.path(prefix.rstrip("/"))
+        await run_in_threadpool(shutil.rmtree, path, True)
+
+    def _walk(self, path: str, key_prefix: str) -> Iterator[ObjectStat]:
+        try:
+            entries = list(os.scandir(path))
+        except FileNotFoundError:
+            return
+        # 디렉토리 아래 키는 'name/'으로 시작하므로 '/'를 붙여 비교해야 전체 키 순서와 같음
+        entries.sort(
+            key=lambda entry: (
+                entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name
+            )
+        )
+        for entry in entries:
+            key = key_prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk(entry.path, key + "/")
+                continue
+            try:
+                result = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            yield ObjectStat(
+                key=key,
+                size=result.st_size,
+                last_modified=datetime.fromtimestamp(result.st_mtime),
+            )
+
+    async def iter_objects(self, prefix: str) -> AsyncIterator[ObjectStat]:
+        # 쓰는 중인 임시 파일('<키>.<uuid>.tmp')도 객체로 나열됨
+        walker = self._walk(self.path(prefix.rstrip("/")), prefix)
+        while batch := await run_in_threadpool(list, itertools.islice(walker, _LIST_BATCH)):
+            for stat in batch:
+                yield stat
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import os
+from typing import Any, AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from ..download import content_disposition
+from ..settings import settings
+from .base import ObjectStat, StorageBackend
+from .streaming import StoredUpload, UploadTooLargeError, remove_quietly
+
+# S3는 마지막 파트를 제외한 파트가 5MiB 이상이어야 함
+_MIN_PART_SIZE = 5 * 1024 * 1024
+# DeleteObjects 한 번에 지울 수 있는 최대 키 수
+_DELETE_BATCH = 1000
+
+
+def _read_at(path: str, size: int, offset: int) -> bytes:
+    with open(path, "rb") as fp:
+        return os.pread(fp.fileno(), size, offset)
+
+
+class S3Storage(StorageBackend):
+    """
+    S3 호환 저장소(MinIO 등) 드라이버
+
+    aiobotocore 클라이언트 하나를 만들어 두고 재사용하므로 요청마다 커넥션을
+    새로 맺지 않습니다. 큰 객체는 멀티파트 업로드로 나누어 올립니다.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str | None,
+        access_key: str,
+        secret_key: str,
+        region: str,
+        part_size: int,
+        max_pool_connections: int,
+        upload_concurrency: int,
+    ) -> None:
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.part_size = max(part_size, _MIN_PART_SIZE)
+        self.max_pool_connections = max_pool_connections
+        self.upload_concurrency = upload_concurrency
+        self._client: Any = None
+        self._exit_stack: contextlib.AsyncExitStack | None = None
+        self._lock = asyncio.Lock()
+
+    async def client(self) -> Any:
+        if self._client is not None:
+            return self._client
+        async with self._lock:
+            if self._client is None:
+                # 로컬 드라이버만 쓰는 환경에서는 aiobotocore가 없어도 되도록 지연 임포트
+                from aiobotocore.config import AioConfig
+                from aiobotocore.session import get_session
+
+                exit_stack = contextlib.AsyncExitStack()
+                self._client = await exit_stack.enter_async_context(
+                    get_session().create_client(
+                        "s3",
+                        endpoint_url=self.endpoint_url,
+                        region_name=self.region,
+                        aws_access_key_id=self.access_key or None,
+                        aws_secret_access_key=self.secret_key or None,
+                        config=AioConfig(
+                            max_pool_connections=self.max_pool_connections,
+                            s3={"addressing_style": "path"},
+                        ),
+                    )
+                )
+                self._exit_stack = exit_stack
+        return self._client
+
+    async def close(self) -> None:
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._client = None
+        self._exit_stack = None
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        max_size: int | None = None,
+    ) -> StoredUpload:
+        if max_size is None:
+            max_size = settings.max_upload_size
+
+        client = await self.client()
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        upload_id = None
+        parts: list[dict] = []
+
+        async def flush() -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                response = await client.create_multipart_upload(
+                    Bucket=self.bucket, Key=key
+                )
+                upload_id = response["UploadId"]
+            part_number = len(parts) + 1
+            response = await client.upload_part(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=bytes(buffer),
+            )
+            parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+            buffer.clear()
+
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if max_size and size > max_size:
+                    raise UploadTooLargeError(max_size)
+                await run_in_threadpool(digest.update, chunk)
+                buffer += chunk
+                if len(buffer) >= self.part_size:
+                    await flush()
+
+            if upload_id is None:
+                # 파트 하나 크기보다 작으면 멀티파트 없이 한 번에 올림
+                await client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer))
+            else:
+                if buffer:
+                    await flush()
+                await client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        except BaseException:
+            if upload_id is not None:
+                await client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id
+                )
+            raise
+
+        return StoredUpload(size=size, content_hash=digest.hexdigest())
+
+    async def put_file(self, key: str, local_path: str) -> None:
+        client = await self.client()
+        size = await run_in_threadpool(os.path.getsize, local_path)
+
+        if size <= self.part_size:
+            body = await run_in_threadpool(_read_at, local_path, size, 0)
+            await client.put_object(Bucket=self.bucket, Key=key, Body=body)
+            await run_in_threadpool(remove_quietly, local_path)
+            return
+
+        response = await client.create_multipart_upload(Bucket=self.bucket, Key=key)
+        upload_id = response["UploadId"]
+        # 동시에 메모리에 올라가는 파트는 upload_concurrency개로 제한
+        semaphore = asyncio.Semaphore(self.upload_concurrency)
+
+        async def upload_part(part_number: int, offset: int) -> dict:
+            async with semaphore:
+                body = await run_in_threadpool(
+                    _read_at, local_path, self.part_size, offset
+                )
+                response = await client.upload_part(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+        try:
+            parts = await asyncio.gather(
+                *(
+                    upload_part(index + 1, offset)
+                    for index, offset in enumerate(range(0, size, self.part_size))
+                )
+            )
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": list(parts)},
+            )
+        except BaseException:
+            await client.abort_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id
+            )
+            raise
+        await run_in_threadpool(remove_quietly, local_path)
+
+    async def move(self, src_key: str, dest_key: str) -> None:
+        # S3에는 이름 바꾸기가 없으므로 서버 쪽 복사 후 원본 삭제
+        client = await self.client()
+        await client.copy_object(
+            Bucket=self.bucket,
+            Key=dest_key,
+            CopySource={"Bucket": self.bucket, "Key": src_key},
+        )
+        await client.delete_object(Bucket=self.bucket, Key=src_key)
+
+    async def open_range(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        if end is not None and end < start:
+            return
+        client = await self.client()
+        params = {}
+        # 빈 객체에 'bytes=0-'를 보내면 InvalidRange가 나므로 전체를 읽을 때는 Range 없이 요청
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-" if end is None else f"bytes={start}-{end}"
+        response = await client.get_object(Bucket=self.bucket, Key=key, **params)
+        body = response["Body"]
+        try:
+            while chunk := await body.read(settings.upload_chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    async def presigned_url(
+        self,
+        key: str,
+        expires_in: int,
+        filename: str,
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> str | None:
+        client = await self.client()
+        params = {
+            "Bucket": self.bucket,
+            "Key": key,
+            "ResponseContentType": content_type,
+            "ResponseContentDisposition": content_disposition(filename),
+        }
+        if content_encoding is not None:
+            params["ResponseContentEncoding"] = content_encoding
+        return await client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=expires_in
+        )
+
+    async def stat(self, key: str) -> ObjectStat | None:
+        from botocore.exceptions import ClientError
+
+        client = await self.client()
+        try:
+            response = await client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return ObjectStat(
+            key=key,
+            size=response["ContentLength"],
+            last_modified=response.get("LastModified"),
+        )
+
+    async def delete(self, key: str) -> None:
+        client = await self.client()
+        await client.delete_object(Bucket=self.bucket, Key=key)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        client = await self.client()
+        paginator = client.get_paginator("list_objects_v2")
+        keys: list[dict] = []
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend({"Key": item["Key"]} for item in page.get("Contents", []))
+        for index in range(0, len(keys), _DELETE_BATCH):
+            await client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": keys[index : index + _DELETE_BATCH], "Quiet": True},
+            )
+
+    async def iter_objects(self, prefix: str) -> AsyncIterator[ObjectStat]:
+        client = await self.client()
+        paginator = client.get_paginator("list_objects_v2")
+        # ListObjectsV2는 키를 UTF-8 바이트 순서로 돌려주므로 파이썬 문자열 순서와 같음
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                yield ObjectStat(
+                    key=item["Key"],
+                    size=item["Size"],
+                    last_modified=item.get("LastModified"),
+                )
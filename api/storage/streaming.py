@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, BinaryIO
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from .. import metrics
+from ..settings import settings
+
+
+class UploadTooLargeError(Exception):
+    """업로드 크기가 허용된 최대 크기를 넘은 경우 발생합니다."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+@dataclass
+class StoredUpload:
+    """스트리밍 저장 결과"""
+
+    size: int
+    content_hash: str
+
+
+def guess_content_type(filename: str, declared: str | None = None) -> str:
+    """확장자로 MIME 타입을 추정하고, 모르면 클라이언트가 보낸 값을 사용합니다."""
+    guessed, _ = mimetypes.guess_type(filename)
+    if guessed:
+        return guessed
+    if declared and "/" in declared:
+        return declared
+    return "application/octet-stream"
+
+
+def _write_chunk(fp: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+    digest.update(chunk)
+    start = time.perf_counter()
+    fp.write(chunk)
+    metrics.DISK_WRITE_DURATION.observe(time.perf_counter() - start)
+    metrics.DISK_WRITE_BYTES.inc(len(chunk))
+
+
+async def save_stream(
+    chunks: AsyncIterator[bytes],
+    file_path: str,
+    max_size: int | None = None,
+) -> StoredUpload:
+    """
+    바이트 청크 스트림을 디스크에 기록하면서 크기와 sha256을 계산합니다.
+
+    해시 계산과 쓰기는 스레드풀에서 수행해 이벤트 루프를 막지 않습니다.
+    크기 제한을 넘으면 쓰던 파일을 지우고 UploadTooLargeError를 발생시킵니다.
+    """
+    if max_size is None:
+        max_size = settings.max_upload_size
+
+    digest = hashlib.sha256()
+    size = 0
+    fp = await run_in_threadpool(open, file_path, "wb")
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise UploadTooLargeError(max_size)
+            await run_in_threadpool(_write_chunk, fp, digest, chunk)
+    except BaseException:
+        await run_in_threadpool(fp.close)
+        await run_in_threadpool(remove_quietly, file_path)
+        raise
+    await run_in_threadpool(fp.close)
+
+    return StoredUpload(size=size, content_hash=digest.hexdigest())
+
+
+async def iter_upload_file(
+    upload: UploadFile, chunk_size: int | None = None
+) -> AsyncIterator[bytes]:
+    if chunk_size is None:
+        chunk_size = settings.upload_chunk_size
+    while chunk := await upload.read(chunk_size):
+        yield chunk
+
+
+async def save_upload_file(
+    upload: UploadFile,
+    file_path: str,
+    max_size: int | None = None,
+    chunk_size: int | None = None,
+) -> StoredUpload:
+    """
+    업로드 파일을 고정 크기 청크 단위로 디스크에 복사합니다.
+
+    파일 전체를 메모리에 올리지 않으므로 업로드당 메모리 사용량은
+    청크 크기로 제한됩니다.
+    """
+    if max_size is None:
+        max_size = settings.max_upload_size
+
+    # multipart 파싱 단계에서 크기를 이미 알고 있다면 복사 전에 거절
+    if max_size and upload.size is not None and upload.size > max_size:
+        raise UploadTooLargeError(max_size)
+
+    return await save_stream(iter_upload_file(upload, chunk_size), file_path, max_size)
+
+
+def concat_files(
+    src_paths: list[str], dest_path: str, chunk_size: int | None = None
+) -> StoredUpload:
+    """
+    여러 파일을 순서대로 이어 붙여 dest_path에 기록합니다. (블로킹 함수)
+
+    청크 단위로 복사하면서 전체 sha256을 함께 계산하므로 원본 파일들을
+    메모리에 통째로 올리지 않습니다. 스레드풀에서 호출해야 합니다.
+    """
+    if chunk_size is None:
+        chunk_size = settings.upload_chunk_size
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, "wb") as dest:
+            for src_path in src_paths:
+                with open(src_path, "rb") as src:
+                    while chunk := src.read(chunk_size):
+                        digest.update(chunk)
+                        dest.write(chunk)
+                        size += len(chunk)
+    except BaseException:
+        remove_quietly(dest_path)
+        raise
+
+    return StoredUpload(size=size, content_hash=digest.hexdigest())
+
+
+def remove_quietly(file_path: str) -> None:
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+async def iter_file_range(
+    file_path: str, start: int, end: int, chunk_size: int | None = None
+) -> AsyncIterator[bytes]:
+    """
+    파일의 [start, end] 구간(end 포함)을 청크 단위로 읽습니다.
+
+    os.pread로 읽기 때문에 파일 위치를 공유하지 않고, 읽기는 스레드풀에서 수행합니다.
+    """
+    if chunk_size is None:
+        chunk_size = settings.upload_chunk_size
+
+    fd = await run_in_threadpool(os.open, file_path, os.O_RDONLY)
+    try:
+        offset = start
+        while offset <= end:
+            chunk = await run_in_threadpool(
+                os.pread, fd, min(chunk_size, end - offset + 1), offset
+            )
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+    finally:
+        await run_in_threadpool(os.close, fd)
@@ -0,0 +1,37 @@
+"""
+휴지통 정리
+
+파일을 지우면 files.deleted_at과 purge_at만 기록하고(file_crud.trash_files), 실제로
+행과 버전 기록을 지우고 blob 참조를 놓는 일은 purge_at이 지난 뒤 reap_trash()가
+합니다. 요청 처리 시간이 지우는 파일 크기나 수와 상관없게 되고, 배치 사이에 쉬면서
+지우므로 한꺼번에 많이 지워도 저장소 I/O가 몰리지 않습니다.
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+from .crud import file_crud
+from .database import SessionLocal
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def reap_trash() -> int:
+    """지울 때가 된 휴지통 파일을 trash_reap_batch_size개씩 지웁니다."""
+    now = datetime.now()
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            db_files = await file_crud.get_purgeable_files(
+                db, now, limit=settings.trash_reap_batch_size
+            )
+            await file_crud.purge_files(db, list(db_files))
+            await db.commit()
+        total += len(db_files)
+        if len(db_files) < settings.trash_reap_batch_size:
+            break
+        await asyncio.sleep(settings.trash_reap_pause)
+    if total:
+        logger.info("purged trashed files", extra={"count": total})
+    return total
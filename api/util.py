@@ -5,8 +5,10 @@ import binascii
 import dataclasses
 import datetime
 import hashlib
+import hmac
 import os
 import string
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from random import SystemRandom
 from typing import Any
 
@@ -18,8 +20,9 @@ from fastapi.security import (
     OAuth2PasswordBearer,
 )
 from sqlalchemy.ext.asyncio import AsyncSession as Session
-from sqlalchemy.sql import expression as sql_exp
 
+from . import metrics
+from .auth_cache import CachedUser, principal_cache, user_cache
 from .models import User
 from .database import get_db as get_db_session
 from .settings import settings
@@ -27,12 +30,12 @@ from .error import AuthError, AuthErrorCodeEnum
 
 _PBKDF2_SALT_LENGTH = 16
 _PBKDF2_HASH_NAME = "SHA256"
-_PBKDF2_ITERATIONS = 100000
+# 파라미터 없이 저장된 예전 해시의 반복 횟수
+_LEGACY_PBKDF2_ITERATIONS = 100000
 
 _USER_LOGIN_TTL = 12  # 12 hours
 
-# JWT 설정
-SECRET_KEY = "your-secret-key"  # 실제로는 환경변수에서 가져와야 함
+# JWT 설정 (서명 키는 settings.secret_key)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -55,39 +58,118 @@ def generate_random_token(length: int) -> str:
     )
 
 
-async def generate_hashed_password(password: str) -> str:
-    def _inner() -> str:  # noqa: WPS430
-        pbkdf2_salt = os.urandom(_PBKDF2_SALT_LENGTH)
-        pw_hash = hashlib.pbkdf2_hmac(
-            _PBKDF2_HASH_NAME,
-            password.encode(),
-            pbkdf2_salt,
-            _PBKDF2_ITERATIONS,
+def _pbkdf2(hash_name: str, password: str, salt: bytes, iterations: int) -> bytes:
+    # 프로세스 풀에서도 실행할 수 있도록 모듈 수준 함수로 둠
+    return hashlib.pbkdf2_hmac(hash_name, password.encode(), salt, iterations)
+
+
+def _create_kdf_executor() -> Executor:
+    if settings.kdf_use_processes:
+        return ProcessPoolExecutor(max_workers=settings.kdf_workers)
+    return ThreadPoolExecutor(
+        max_workers=settings.kdf_workers, thread_name_prefix="kdf"
+    )
+
+
+# 비밀번호 해시 전용 실행기. 기본 실행기(to_thread 등)와 분리해 로그인이 몰려도
+# 다른 작업이 밀리지 않도록 함
+_kdf_executor = _create_kdf_executor()
+_kdf_pending = 0
+
+
+def kdf_queue_depth() -> int:
+    """실행 중이거나 대기 중인 비밀번호 해시 작업 수"""
+    return _kdf_pending
+
+
+metrics.KDF_QUEUE_DEPTH.set_function(kdf_queue_depth)
+
+
+async def _run_kdf(hash_name: str, password: str, salt: bytes, iterations: int) -> bytes:
+    global _kdf_pending  # noqa: WPS420
+    if _kdf_pending >= settings.kdf_max_pending:
+        # 대기열이 가득 차면 기다리게 하지 않고 바로 거절
+        raise HTTPException(
+            status_code=429,
+            detail="요청이 많아 잠시 후 다시 시도해주세요",
+            headers={"Retry-After": "1"},
         )
 
-        return (
-            binascii.hexlify(pbkdf2_salt).decode()
-            + ":"
-            + binascii.hexlify(pw_hash).decode()
+    _kdf_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            _kdf_executor, _pbkdf2, hash_name, password, salt, iterations
         )
+    finally:
+        _kdf_pending -= 1
 
-    return await asyncio.get_event_loop().run_in_executor(None, _inner)
 
+@dataclasses.dataclass(frozen=True)
+class _PasswordHash:
+    algorithm: str
+    iterations: int
+    salt: bytes
+    digest: bytes
 
-async def validate_hashed_password(password: str, hashed_password: str) -> bool:
-    def _inner() -> bool:  # noqa: WPS430
-        pbkdf2_salt_hex, pw_hash_hex = hashed_password.split(":")
 
-        pw_challenge = hashlib.pbkdf2_hmac(
-            _PBKDF2_HASH_NAME,
-            password.encode(),
-            binascii.unhexlify(pbkdf2_salt_hex),
-            _PBKDF2_ITERATIONS,
+def _parse_hashed_password(hashed_password: str) -> _PasswordHash:
+    if "$" not in hashed_password:
+        # 파라미터 없이 'salt:hash'로 저장하던 예전 형식
+        pbkdf2_salt_hex, pw_hash_hex = hashed_password.split(":")
+        return _PasswordHash(
+            algorithm=_PBKDF2_HASH_NAME,
+            iterations=_LEGACY_PBKDF2_ITERATIONS,
+            salt=binascii.unhexlify(pbkdf2_salt_hex),
+            digest=binascii.unhexlify(pw_hash_hex),
         )
 
-        return pw_challenge == binascii.unhexlify(pw_hash_hex)
+    scheme, iterations, pbkdf2_salt_hex, pw_hash_hex = hashed_password.split("$")
+    return _PasswordHash(
+        algorithm=scheme.removeprefix("pbkdf2_").upper(),
+        iterations=int(iterations),
+        salt=binascii.unhexlify(pbkdf2_salt_hex),
+        digest=binascii.unhexlify(pw_hash_hex),
+    )
 
-    return await asyncio.get_event_loop().run_in_executor(None, _inner)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """저장된 해시의 알고리즘이나 반복 횟수가 현재 설정보다 낮으면 True"""
+    if "$" not in hashed_password:
+        return True
+    parsed = _parse_hashed_password(hashed_password)
+    return (
+        parsed.algorithm != _PBKDF2_HASH_NAME
+        or parsed.iterations < settings.kdf_iterations
+    )
+
+
+async def generate_hashed_password(password: str) -> str:
+    """
+    비밀번호를 해시합니다.
+
+    'pbkdf2_sha256$<반복 횟수>$<salt>$<hash>' 형식으로 파라미터를 함께 저장해
+    나중에 반복 횟수를 올려도 기존 해시를 검증하고 갱신할 수 있습니다.
+    """
+    iterations = settings.kdf_iterations
+    pbkdf2_salt = os.urandom(_PBKDF2_SALT_LENGTH)
+    pw_hash = await _run_kdf(_PBKDF2_HASH_NAME, password, pbkdf2_salt, iterations)
+
+    return "$".join(
+        [
+            f"pbkdf2_{_PBKDF2_HASH_NAME.lower()}",
+            str(iterations),
+            binascii.hexlify(pbkdf2_salt).decode(),
+            binascii.hexlify(pw_hash).decode(),
+        ]
+    )
+
+
+async def validate_hashed_password(password: str, hashed_password: str) -> bool:
+    parsed = _parse_hashed_password(hashed_password)
+    pw_challenge = await _run_kdf(
+        parsed.algorithm, password, parsed.salt, parsed.iterations
+    )
+    return hmac.compare_digest(pw_challenge, parsed.digest)
 
 
 async def generate_token(user_id: str) -> str:
@@ -96,7 +178,7 @@ async def generate_token(user_id: str) -> str:
     expire = datetime.datetime.now(datetime.UTC) + expires_delta
 
     to_encode = {"sub": str(user_id), "exp": expire}
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -104,28 +186,54 @@ async def user_auth_required(token: str = Depends(oauth2_scheme)) -> str:
     """
     토큰을 검증하고 사용자 ID를 반환합니다.
     이 함수는 보호된 엔드포인트에서 현재 사용자를 확인하는데 사용됩니다.
+    검증된 토큰은 만료 시각을 넘지 않는 범위에서 캐시해 다시 디코딩하지 않습니다.
     """
+    user_id = principal_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid authentication token")
-        return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Could not validate token")
 
+    expires_in = payload.get("exp", 0) - datetime.datetime.now(datetime.UTC).timestamp()
+    principal_cache.set(token, user_id, ttl=expires_in)
+    return user_id
+
 
-async def admin_auth_required(
+async def current_user_required(
+    user_id: str = Depends(user_auth_required),
     db_session: Session = Depends(get_db_session),
-    user_id: int = Depends(user_auth_required),
-) -> int:
-    is_admin = await db_session.scalar(
-        sql_exp.exists().where(User.id == user_id).where(User.is_admin).select(),
-    )
+) -> CachedUser:
+    """
+    현재 사용자 정보를 반환합니다.
+
+    캐시에 있으면 DB를 조회하지 않으며, 한 요청 안에서는 FastAPI가
+    결과를 재사용합니다.
+    """
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
 
-    if not is_admin:
+    db_user = await db_session.get(User, user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+
+    user = CachedUser.from_model(db_user)
+    user_cache.set(user_id, user)
+    return user
+
+
+async def admin_auth_required(
+    user: CachedUser = Depends(current_user_required),
+) -> str:
+    if not user.is_admin:
         raise AuthError(code=AuthErrorCodeEnum.NO_PERMISSION)
 
-    return user_id
+    return user.id
@@ -0,0 +1,191 @@
+"""
+파일 버전 기록
+
+파일 내용이 바뀌면(file_crud.replace_content) 이전 내용은 blob 참조를 그대로
+넘겨받은 FileVersion 행이 되므로, 버전을 남기는 데 내용을 복사하지 않습니다.
+
+그 뒤 version_delta 작업이 이전 버전들을 현재 내용에 대한 차분(api.delta 형식)으로
+바꿔 저장합니다. 모든 버전이 현재 내용 하나를 기준으로 하므로 되돌릴 때는 차분을
+한 번만 적용하면 되고, 바뀌지 않은 블록은 현재 내용과 공유됩니다. 내용이 또 바뀌면
+다음 작업이 차분의 기준을 새 내용으로 옮기므로 이전 기준 blob은 참조가 0이 되어 지워집니다.
+
+보관 조건(version_keep_count, version_keep_days)을 벗어난 버전은 prune_versions()가
+주기적으로 나눠서 지웁니다.
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession as Session
+from starlette.concurrency import run_in_threadpool
+
+from . import blob_store, delta, models
+from .background import run_in_process
+from .crud import blob_crud, version_crud
+from .database import SessionLocal
+from .settings import settings
+from .storage import StoredUpload, get_storage, remove_quietly, save_stream
+
+logger = logging.getLogger(__name__)
+
+
+class VersionContentError(Exception):
+    """저장된 버전 내용을 읽을 수 없거나 해시가 맞지 않는 경우"""
+
+
+async def _iter_content(db: Session, db_version: models.FileVersion) -> AsyncIterator[bytes]:
+    blob = await blob_crud.get_blob(db, db_version.blob_hash)
+    if blob is None:
+        raise VersionContentError("version blob is missing")
+    chunks = blob_store.open_blob(blob.path, blob.encoding)
+    if db_version.base_hash is not None:
+        base = await blob_crud.get_blob(db, db_version.base_hash)
+        if base is None:
+            raise VersionContentError("delta base blob is missing")
+        signature = await delta.get_signature(db, base)
+        chunks = delta.apply_delta(base, signature, chunks)
+    await db.commit()
+    return chunks
+
+
+async def materialize(
+    db: Session, db_version: models.FileVersion, tmp_path: str
+) -> StoredUpload:
+    """
+    버전 내용을 tmp_path에 쓰고 해시를 확인합니다. 차분이면 기준 내용에 적용하면서 씁니다.
+
+    읽는 동안 DB 커넥션을 붙잡지 않도록 트랜잭션을 끝냅니다.
+    """
+    chunks = await _iter_content(db, db_version)
+    try:
+        stored = await save_stream(chunks, tmp_path, max_size=0)
+    except delta.DeltaError as e:
+        raise VersionContentError(str(e)) from e
+    if stored.content_hash != db_version.content_hash:
+        await run_in_threadpool(remove_quietly, tmp_path)
+        raise VersionContentError(
+            f"checksum mismatch: expected {db_version.content_hash}, got {stored.content_hash}"
+        )
+    return stored
+
+
+async def restore_blob(db: Session, db_version: models.FileVersion) -> models.Blob:
+    """
+    버전 내용을 파일이 참조할 blob으로 만들고 참조 수를 1 늘립니다.
+
+    통째로 저장된 버전은 그 blob을 그대로 공유합니다. 커밋은 호출한 쪽에서 합니다.
+    """
+    if db_version.base_hash is None:
+        blob = await blob_store.retain_blob(db, db_version.blob_hash)
+        if blob is None:
+            raise VersionContentError("version blob is missing")
+        return blob
+    tmp_path = await run_in_threadpool(blob_store.new_tmp_path)
+    stored = await materialize(db, db_version, tmp_path)
+    return await blob_store.add_blob(db, tmp_path, stored)
+
+
+async def _source_path(
+    db: Session, db_version: models.FileVersion
+) -> tuple[str, bool]:
+    """차분을 만들 원래 내용의 로컬 경로와, 임시 파일이라 지워야 하는지를 반환합니다."""
+    if db_version.base_hash is None:
+        blob = await blob_crud.get_blob(db, db_version.blob_hash)
+        local_path = get_storage().local_path(blob.path) if blob is not None else None
+        if local_path is not None and blob.encoding is None:
+            return local_path, False
+    tmp_path = await run_in_threadpool(blob_store.new_tmp_path)
+    await materialize(db, db_version, tmp_path)
+    return tmp_path, True
+
+
+async def compact_file_versions(db: Session, file_id: str) -> dict:
+    """
+    파일의 이전 버전을 현재 내용에 대한 차분으로 바꿔 저장합니다. (version_delta 작업)
+
+    차분이 원래 크기의 version_delta_max_ratio보다 크면 통째로 둡니다. 통째로 저장된
+    버전의 blob을 다른 파일도 쓰고 있으면 바꿔도 공간이 줄지 않으므로 건너뜁니다.
+    """
+    file_model = await db.get(models.FileModel, file_id)
+    if file_model is None:
+        return {"skipped": "file deleted"}
+    current = file_model.content_hash
+    db_versions = [
+        db_version
+        for db_version in await version_crud.list_versions(db, file_id)
+        if db_version.base_hash != current
+        and db_version.blob_hash != current
+        and settings.delta_min_block_size <= db_version.size <= settings.version_delta_max_size
+    ]
+    # 이 파일의 다른 버전이 차분의 기준으로 쓰는 참조 (이번에 함께 옮기므로 빼고 셈)
+    base_refs = Counter(db_version.base_hash for db_version in db_versions)
+    blobs = await blob_crud.get_blobs(db, [db_version.blob_hash for db_version in db_versions])
+    db_versions = [
+        db_version
+        for db_version in db_versions
+        if db_version.base_hash is not None
+        or (
+            (blob := blobs.get(db_version.blob_hash)) is not None
+            and blob.ref_count - base_refs[db_version.blob_hash] <= 1
+        )
+    ]
+    base = await blob_crud.get_blob(db, current)
+    if not db_versions or base is None:
+        return {"compacted": 0}
+    signature = await delta.get_signature(db, base)
+
+    compacted, kept_full, saved = 0, 0, 0
+    for db_version in db_versions:
+        source_path, is_tmp = await _source_path(db, db_version)
+        out_path = await run_in_threadpool(blob_store.new_tmp_path)
+        try:
+            stored = await run_in_process(
+                delta.encode_delta_file, signature, source_path, out_path
+            )
+        finally:
+            if is_tmp:
+                await run_in_threadpool(remove_quietly, source_path)
+        if stored.size > db_version.size * settings.version_delta_max_ratio:
+            await run_in_threadpool(remove_quietly, out_path)
+            kept_full += 1
+            continue
+
+        delta_blob = await blob_store.add_blob(db, out_path, stored)
+        if await blob_store.retain_blob(db, base.hash) is None or not (
+            await version_crud.replace_storage(db, db_version, delta_blob.hash, base.hash)
+        ):
+            # 그 사이 파일 내용이 또 바뀌었거나 버전이 지워진 경우, 다음 작업이 처리함
+            await blob_store.discard_new_blobs(db)
+            break
+        await db.commit()
+        compacted += 1
+        saved += db_version.size - stored.size
+    return {"compacted": compacted, "kept_full": kept_full, "bytes_saved": saved}
+
+
+async def prune_versions() -> int:
+    """보관 조건을 벗어난 버전을 version_prune_batch_size개씩 지웁니다."""
+    older_than = (
+        datetime.now() - timedelta(days=settings.version_keep_days)
+        if settings.version_keep_days
+        else None
+    )
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            db_versions = await version_crud.get_expired_versions(
+                db,
+                keep_count=settings.version_keep_count,
+                older_than=older_than,
+                limit=settings.version_prune_batch_size,
+            )
+            total += await version_crud.delete_versions(db, list(db_versions))
+            await db.commit()
+        if len(db_versions) < settings.version_prune_batch_size:
+            break
+    if total:
+        logger.info("pruned file versions", extra={"count": total})
+    return total
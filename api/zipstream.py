@@ -0,0 +1,323 @@
+"""
+스트리밍 ZIP 작성기
+
+파일 내용을 읽는 대로 ZIP 형식으로 내보내므로 아카이브 전체를 디스크나
+메모리에 만들지 않습니다. CRC와 압축된 크기는 각 항목 뒤의 data descriptor에
+기록하고, 4GiB가 넘는 항목이나 아카이브는 ZIP64 확장을 사용합니다.
+"""
+from __future__ import annotations
+
+import struct
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# 이 값 이상이면 ZIP64 확장 필드에 기록하고 원래 자리에는 최댓값을 표시로 넣음
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+_MAX_UINT32 = 0xFFFFFFFF
+_MAX_UINT16 = 0xFFFF
+
+# bit 3: CRC와 크기를 data descriptor에 기록, bit 11: 파일 이름이 UTF-8
+_FLAGS = 0x0008 | 0x0800
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+_DIR_ATTRIBUTES = (0o40755 << 16) | 0x10
+_FILE_ATTRIBUTES = 0o100644 << 16
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct("<IIII")
+_DATA_DESCRIPTOR64 = struct.Struct("<IIQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_END_RECORD64 = struct.Struct("<IQHHIIQQQQ")
+_END_LOCATOR64 = struct.Struct("<IIQI")
+
+
+@dataclass
+class ZipEntry:
+    """
+    아카이브에 넣을 항목
+
+    read는 호출할 때마다 내용을 처음부터 읽는 비동기 반복자를 돌려줘야 합니다.
+    디렉토리 항목은 이름이 '/'로 끝나고 read가 없습니다.
+    """
+
+    name: str
+    size: int
+    modified: datetime
+    read: Callable[[], AsyncIterator[bytes]] | None = None
+    compress: bool = False
+
+    @property
+    def is_dir(self) -> bool:
+        return self.name.endswith("/")
+
+    @property
+    def method(self) -> int:
+        return ZIP_DEFLATED if self.compress and not self.is_dir else ZIP_STORED
+
+    @property
+    def zip64(self) -> bool:
+        # deflate는 압축이 안 되는 데이터에서 크기가 아주 조금 늘 수 있으므로 여유를 둠
+        margin = self.size // 1000 + 64 if self.method == ZIP_DEFLATED else 0
+        return self.size + margin >= _ZIP64_LIMIT
+
+
+@dataclass
+class _Written:
+    entry: ZipEntry
+    offset: int
+    crc: int = 0
+    compressed_size: int = 0
+    size: int = 0
+    name: bytes = field(default=b"")
+
+
+def _dos_datetime(value: datetime) -> tuple[int, int]:
+    if value.year < 1980:
+        return 0, (1 << 5) | 1
+    dos_time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    dos_date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return dos_time, dos_date
+
+
+def _local_header(entry: ZipEntry, name: bytes) -> bytes:
+    dos_time, dos_date = _dos_datetime(entry.modified)
+    extra = b""
+    sizes = 0
+    if entry.zip64:
+        # 크기는 data descriptor에 기록하므로 ZIP64 extra 필드의 값은 0
+        extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+        sizes = _MAX_UINT32
+    header = _LOCAL_HEADER.pack(
+        0x04034B50,
+        _VERSION_ZIP64 if entry.zip64 else _VERSION_DEFAULT,
+        _FLAGS,
+        entry.method,
+        dos_time,
+        dos_date,
+        0,
+        sizes,
+        sizes,
+        len(name),
+        len(extra),
+    )
+    return header + name + extra
+
+
+def _data_descriptor(written: _Written) -> bytes:
+    if written.entry.zip64:
+        return _DATA_DESCRIPTOR64.pack(
+            0x08074B50, written.crc, written.compressed_size, written.size
+        )
+    return _DATA_DESCRIPTOR.pack(
+        0x08074B50, written.crc, written.compressed_size, written.size
+    )
+
+
+def _central_header(written: _Written) -> bytes:
+    entry = written.entry
+    dos_time, dos_date = _dos_datetime(entry.modified)
+
+    zip64_fields = []
+    size, compressed_size, offset = written.size, written.compressed_size, written.offset
+    if size >= _ZIP64_LIMIT or entry.zip64:
+        zip64_fields.append(size)
+        size = _MAX_UINT32
+    if compressed_size >= _ZIP64_LIMIT or entry.zip64:
+        zip64_fields.append(compressed_size)
+        compressed_size = _MAX_UINT32
+    if offset >= _ZIP64_LIMIT:
+        zip64_fields.append(offset)
+        offset = _MAX_UINT32
+
+    extra = b""
+    if zip64_fields:
+        extra = struct.pack(
+            f"<HH{len(zip64_fields)}Q", 0x0001, 8 * len(zip64_fields), *zip64_fields
+        )
+    version = _VERSION_ZIP64 if zip64_fields else _VERSION_DEFAULT
+    header = _CENTRAL_HEADER.pack(
+        0x02014B50,
+        (3 << 8) | version,  # 만든 시스템: UNIX
+        version,
+        _FLAGS,
+        entry.method,
+        dos_time,
+        dos_date,
+        written.crc,
+        compressed_size,
+        size,
+        len(written.name),
+        len(extra),
+        0,
+        0,
+        0,
+        _DIR_ATTRIBUTES if entry.is_dir else _FILE_ATTRIBUTES,
+        offset,
+    )
+    return header + written.name + extra
+
+
+def _end_records(count: int, cd_offset: int, cd_size: int) -> bytes:
+    records = b""
+    if (
+        count >= _ZIP64_COUNT_LIMIT
+        or cd_offset >= _ZIP64_LIMIT
+        or cd_size >= _ZIP64_LIMIT
+    ):
+        end64_offset = cd_offset + cd_size
+        records += _END_RECORD64.pack(
+            0x06064B50,
+            _END_RECORD64.size - 12,
+            (3 << 8) | _VERSION_ZIP64,
+            _VERSION_ZIP64,
+            0,
+            0,
+            count,
+            count,
+            cd_size,
+            cd_offset,
+        )
+        records += _END_LOCATOR64.pack(0x07064B50, 0, end64_offset, 1)
+    zip64 = bool(records)
+    records += _END_RECORD.pack(
+        0x06054B50,
+        0,
+        0,
+        _MAX_UINT16 if zip64 else count,
+        _MAX_UINT16 if zip64 else count,
+        _MAX_UINT32 if zip64 else cd_size,
+        _MAX_UINT32 if zip64 else cd_offset,
+        0,
+    )
+    return records
+
+
+def _update_crc(crc: int, chunk: bytes) -> int:
+    return zlib.crc32(chunk, crc)
+
+
+def _compress_chunk(compressor, crc: int, chunk: bytes) -> tuple[int, bytes]:
+    return zlib.crc32(chunk, crc), compressor.compress(chunk)
+
+
+# 이미 압축된 형식이라 deflate로 더 줄지 않는 MIME 타입
+_COMPRESSED_TYPES = {
+    "application/gzip",
+    "application/pdf",
+    "application/vnd.rar",
+    "application/x-7z-compressed",
+    "application/x-bzip2",
+    "application/x-rar-compressed",
+    "application/x-xz",
+    "application/zip",
+    "application/zstd",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+}
+
+
+def is_compressible(content_type: str | None) -> bool:
+    """deflate로 압축할 가치가 있는 형식인지 판단합니다."""
+    if not content_type:
+        return True
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in _COMPRESSED_TYPES:
+        return False
+    if content_type.startswith(("video/", "audio/")) and content_type != "audio/wav":
+        return False
+    # docx/xlsx/pptx 등 OOXML은 ZIP 컨테이너
+    return "openxmlformats" not in content_type
+
+
+async def stream_zip(
+    entries: list[ZipEntry], compress_level: int = 6
+) -> AsyncIterator[bytes]:
+    """항목들을 ZIP으로 만들어 청크 단위로 내보냅니다."""
+    offset = 0
+    written_entries: list[_Written] = []
+
+    for entry in entries:
+        name = entry.name.encode()
+        written = _Written(entry=entry, offset=offset, name=name)
+        header = _local_header(entry, name)
+        offset += len(header)
+        yield header
+
+        if entry.read is not None and not entry.is_dir:
+            compressor = None
+            if entry.method == ZIP_DEFLATED:
+                compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+            async for chunk in entry.read():
+                written.size += len(chunk)
+                if compressor is None:
+                    written.crc = _update_crc(written.crc, chunk)
+                    data = chunk
+                else:
+                    # 압축은 CPU를 쓰므로 스레드풀에서 수행
+                    written.crc, data = await run_in_threadpool(
+                        _compress_chunk, compressor, written.crc, chunk
+                    )
+                if data:
+                    written.compressed_size += len(data)
+                    offset += len(data)
+                    yield data
+            if compressor is not None:
+                data = compressor.flush()
+                written.compressed_size += len(data)
+                offset += len(data)
+                yield data
+
+        if not entry.zip64 and (
+            written.size >= _ZIP64_LIMIT or written.compressed_size >= _ZIP64_LIMIT
+        ):
+            raise ValueError(f"zip entry grew past the ZIP64 threshold: {entry.name}")
+
+        descriptor = _data_descriptor(written)
+        offset += len(descriptor)
+        written_entries.append(written)
+        yield descriptor
+
+    cd_offset = offset
+    cd_size = 0
+    for written in written_entries:
+        header = _central_header(written)
+        cd_size += len(header)
+        yield header
+    yield _end_records(len(written_entries), cd_offset, cd_size)
+
+
+def predict_zip_size(entries: list[ZipEntry]) -> int | None:
+    """
+    모든 항목이 무압축이면 아카이브 전체 크기를 미리 계산합니다.
+
+    응답에 Content-Length를 넣어 클라이언트가 진행률을 표시할 수 있게 합니다.
+    압축 항목이 있으면 크기를 알 수 없으므로 None을 반환합니다.
+    """
+    if any(entry.method != ZIP_STORED for entry in entries):
+        return None
+
+    offset = 0
+    written_entries = []
+    for entry in entries:
+        name = entry.name.encode()
+        size = 0 if entry.is_dir else entry.size
+        written = _Written(
+            entry=entry, offset=offset, name=name, size=size, compressed_size=size
+        )
+        offset += len(_local_header(entry, name)) + size
+        offset += len(_data_descriptor(written))
+        written_entries.append(written)
+
+    cd_size = sum(len(_central_header(written)) for written in written_entries)
+    return offset + cd_size + len(_end_records(len(written_entries), offset, cd_size))
@@ -0,0 +1,19 @@
+"""
+드라이브/인증 API 부하 테스트와 벤치마크
+
+임시 UPLOAD_DIR과 SQLite DB로 서버(uvicorn)를 띄우거나 이미 떠 있는 서버(--url)에
+요청을 보내고, 시나리오마다 처리량, 지연 시간 백분위, 서버 RSS와 CPU 시간을 JSON으로
+저장합니다. --background를 주면 업로드나 로그인 같은 배경 부하를 계속 돌리는 동안 측정
+시나리오의 지연 시간을 재고, --baseline을 주면 그 커밋의 코드로 띄운 서버에서도 같은 조건으로
+돌려 바꾸기 전/후를 비교합니다.
+
+    python -m bench --concurrency 16 --requests 500
+    python -m bench --scenarios login,me --env DBLAB_EMR_KDF_WORKERS=8
+    python -m bench --scenarios me,download_range --background upload_large,login
+    python -m bench --baseline HEAD~1 --corpus compressible --env DBLAB_EMR_STORAGE_COMPRESSION=zstd
+    python -m bench.compare bench/results/old.json bench/results/new.json
+    python -m bench.compression  # zstd 저장 압축과 JSON 응답 압축 절감량
+
+httpx가 필요하며, 로컬 서버를 띄울 때는 aiosqlite도 필요합니다.
+백그라운드 작업이 측정에 끼어들지 않게 하려면 --env DBLAB_EMR_JOB_WORKER_ENABLED=false
+"""
@@ -0,0 +1,58 @@
+"""
+두 벤치마크 결과를 시나리오별로 비교합니다.
+
+    python -m bench.compare before.json after.json
+"""
+from __future__ import annotations
+
+import json
+import sys
+
+# (표시 이름, 결과에서 값을 꺼내는 함수)
+_COLUMNS = (
+    ("req/s", lambda r: r["throughput_rps"]),
+    ("p50 ms", lambda r: r["latency_ms"]["p50"]),
+    ("p99 ms", lambda r: r["latency_ms"]["p99"]),
+    ("rss MiB", lambda r: (r["server_rss_kib_max"] or 0) / 1024),
+    ("cpu s", lambda r: r.get("server_cpu_s") or 0),
+)
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "    -"
+    return f"{(after - before) / before * 100:+5.0f}%"
+
+
+def compare(before: dict, after: dict) -> str:
+    lines = [
+        f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}",
+        f"{'scenario':<15}"
+        + "".join(f"{name:>26}" for name, _ in _COLUMNS),
+    ]
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            continue
+        cells = []
+        for _, read in _COLUMNS:
+            old_value, new_value = read(old), read(new)
+            cells.append(f"{old_value:>9.1f} -> {new_value:>8.1f} {_change(old_value, new_value)}")
+        errors = f"  errors {old['errors']} -> {new['errors']}" if old["errors"] or new["errors"] else ""
+        lines.append(f"{name:<15}" + "".join(f"{cell:>26}" for cell in cells) + errors)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit("usage: python -m bench.compare BEFORE.json AFTER.json")
+    with open(argv[0]) as fp:
+        before = json.load(fp)
+    with open(argv[1]) as fp:
+        after = json.load(fp)
+    print(compare(before, after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+저장 시 압축과 응답 압축의 절감량 보고서
+
+zstd 저장 압축을 켠 로컬 서버(또는 --url 서버)에 코퍼스(bench.corpus)를 올린 뒤,
+종류별로 원본 크기와 저장된 크기, 다운로드 전송량을 비교합니다. 저장된 크기는
+Accept-Encoding: zstd로 받은 본문 크기(압축된 blob은 그대로 보냄)로 구하므로 관리자
+권한이 필요 없습니다. JSON 목록 응답은 압축 없이/gzip/zstd로 받아 전송량을 비교합니다.
+
+    python -m bench.compression --files-per-kind 5 --size 1048576
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from .corpus import KINDS, make_file
+from .run import RESULTS_DIR, _git_commit
+from .scenarios import PASSWORD
+from .server import ROOT, LocalServer
+
+FOLDER = "bench-corpus"
+
+
+async def _get_size(client: httpx.AsyncClient, url: str, headers: dict) -> tuple[int, str | None]:
+    """응답 본문이 전송된 크기(bytes)와 Content-Encoding"""
+    response = await client.get(url, headers=headers)
+    response.raise_for_status()
+    return response.num_bytes_downloaded, response.headers.get("content-encoding")
+
+
+async def measure(url: str, files_per_kind: int, size: int) -> dict[str, object]:
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        user_id = f"bench-corpus-{uuid.uuid4().hex[:8]}"
+        response = await client.post(
+            "/api/auth/signup",
+            json={
+                "id": user_id,
+                "password": PASSWORD,
+                "email": f"{user_id}@bench.local",
+                "first_name": "Bench",
+                "last_name": "User",
+            },
+        )
+        response.raise_for_status()
+        auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post(
+            "/api/drive/folders", json={"name": FOLDER, "path": "/"}, headers=auth
+        )
+        if response.status_code not in (201, 409):
+            response.raise_for_status()
+
+        kinds: dict[str, dict[str, int]] = {}
+        for kind in KINDS:
+            totals = kinds[kind] = {"files": 0, "logical": 0, "stored": 0, "egress_zstd": 0}
+            for seed in range(files_per_kind):
+                name, content = make_file(kind, size, seed)
+                response = await client.post(
+                    "/api/drive/upload",
+                    headers=auth,
+                    data={"path": f"/{FOLDER}"},
+                    files={"file_body": (name, content)},
+                )
+                response.raise_for_status()
+                file_url = f"/api/drive/file/{response.json()['id']}"
+                stored, encoding = await _get_size(
+                    client, file_url, {**auth, "Accept-Encoding": "zstd"}
+                )
+                totals["files"] += 1
+                totals["logical"] += len(content)
+                totals["stored"] += stored if encoding == "zstd" else len(content)
+                totals["egress_zstd"] += stored
+
+        listing: dict[str, int] = {}
+        list_url = f"/api/drive/file?path=/{FOLDER}&limit={len(KINDS) * files_per_kind}"
+        for encoding in ("identity", "gzip", "zstd"):
+            listing[encoding], _ = await _get_size(
+                client, list_url, {**auth, "Accept-Encoding": encoding}
+            )
+
+    total = {
+        key: sum(totals[key] for totals in kinds.values())
+        for key in ("files", "logical", "stored", "egress_zstd")
+    }
+    return {"kinds": kinds, "total": total, "list_json": listing}
+
+
+def _ratio(part: int, whole: int) -> str:
+    return f"{part / whole * 100:6.1f}%" if whole else "     -"
+
+
+def print_report(result: dict) -> None:
+    print(f"{'kind':<8} {'files':>5} {'logical':>12} {'stored':>12} {'stored/logical':>15}")
+    for kind, totals in [*result["kinds"].items(), ("total", result["total"])]:
+        print(
+            f"{kind:<8} {totals['files']:>5} {totals['logical']:>12,} {totals['stored']:>12,} "
+            f"{_ratio(totals['stored'], totals['logical']):>15}"
+        )
+    listing = result["list_json"]
+    print(
+        "list JSON  "
+        + "  ".join(
+            f"{encoding} {size:,} B ({_ratio(size, listing['identity']).strip()})"
+            for encoding, size in listing.items()
+        )
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m bench.compression", description="압축 절감량 보고서"
+    )
+    parser.add_argument("--url", help="이미 떠 있는 서버 주소. 없으면 zstd 저장 압축을 켜고 띄움")
+    parser.add_argument("--files-per-kind", type=int, default=5)
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="파일 하나의 크기(bytes)")
+    parser.add_argument(
+        "--output", type=Path, help=f"결과 JSON 경로 (기본: {RESULTS_DIR.relative_to(ROOT)}/)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.url:
+        result = asyncio.run(measure(args.url, args.files_per_kind, args.size))
+    else:
+        env = {
+            "DBLAB_EMR_STORAGE_COMPRESSION": "zstd",
+            "DBLAB_EMR_JOB_WORKER_ENABLED": "false",
+        }
+        with LocalServer(env) as server:
+            result = asyncio.run(measure(server.url, args.files_per_kind, args.size))
+    print_report(result)
+
+    report = {
+        "meta": {
+            **_git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "server": "external" if args.url else "local-sqlite",
+        },
+        "config": {"files_per_kind": args.files_per_kind, "size": args.size},
+        "compression": result,
+    }
+    output = args.output
+    if output is None:
+        commit = (report["meta"]["commit"] or "nocommit")[:7]
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"compression-{stamp}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+압축 효과를 재는 벤치마크 코퍼스
+
+드라이브에 흔히 올라오는 형식을 흉내 낸 파일을 seed로 결정적으로 만듭니다. 같은 seed면
+같은 내용이므로 커밋 사이에 결과를 비교할 수 있고, seed가 다르면 내용이 달라 중복
+제거로 업로드가 생략되지 않습니다.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import random
+from typing import Callable
+
+_LEVELS = ("DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR")
+_PATHS = ("/api/drive/file", "/api/drive/upload", "/api/auth/login", "/api/drive/search")
+_WORDS = (
+    "patient", "record", "visit", "diagnosis", "lab", "result", "normal", "follow",
+    "up", "medication", "dose", "daily", "report", "scan", "clinic", "note",
+)
+
+
+def _fill(rng: random.Random, size: int, line: Callable[[random.Random, int], str]) -> bytes:
+    parts: list[bytes] = []
+    total = 0
+    n = 0
+    while total < size:
+        part = line(rng, n).encode()
+        parts.append(part)
+        total += len(part)
+        n += 1
+    return b"".join(parts)[:size]
+
+
+def log_text(rng: random.Random, size: int) -> bytes:
+    """서버 로그처럼 반복이 많은 텍스트"""
+
+    def line(rng: random.Random, n: int) -> str:
+        return (
+            f"2026-01-01T{n // 3600 % 24:02d}:{n // 60 % 60:02d}:{n % 60:02d} "
+            f"{rng.choice(_LEVELS)} api.request path={rng.choice(_PATHS)}/"
+            f"{rng.getrandbits(64):016x} status={rng.choice((200, 200, 206, 404))} "
+            f"ms={rng.randint(1, 500)}\n"
+        )
+
+    return _fill(rng, size, line)
+
+
+def json_records(rng: random.Random, size: int) -> bytes:
+    """API 응답이나 내보내기 파일 같은 JSON Lines"""
+
+    def line(rng: random.Random, n: int) -> str:
+        record = {
+            "id": n,
+            "name": " ".join(rng.choices(_WORDS, k=3)),
+            "value": round(rng.uniform(0, 1000), 2),
+            "tags": rng.sample(_WORDS, 3),
+            "active": rng.random() < 0.8,
+        }
+        return json.dumps(record) + "\n"
+
+    return _fill(rng, size, line)
+
+
+def csv_table(rng: random.Random, size: int) -> bytes:
+    """숫자가 많은 CSV"""
+
+    def line(rng: random.Random, n: int) -> str:
+        if n == 0:
+            return "id,visit_date,code,value,unit,flag\n"
+        return (
+            f"{n},2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},"
+            f"L{rng.randint(100, 999)},{rng.uniform(0, 200):.3f},mg/dL,"
+            f"{rng.choice(('N', 'N', 'N', 'H', 'L'))}\n"
+        )
+
+    return _fill(rng, size, line)
+
+
+def random_binary(rng: random.Random, size: int) -> bytes:
+    """암호화된 파일이나 압축된 미디어처럼 줄지 않는 내용"""
+    return rng.randbytes(size)
+
+
+def gzip_text(rng: random.Random, size: int) -> bytes:
+    """이미 압축된 형식 (시그니처로 걸러져 다시 압축하지 않아야 함)"""
+    data = gzip.compress(log_text(rng, size * 8), compresslevel=6, mtime=0)
+    return data[:size]
+
+
+def zeros(rng: random.Random, size: int) -> bytes:
+    """디스크 이미지나 미리 할당한 파일처럼 0으로 채운 내용"""
+    return bytes(size)
+
+
+# 종류 이름 -> (확장자, 생성 함수)
+KINDS: dict[str, tuple[str, Callable[[random.Random, int], bytes]]] = {
+    "log": (".log", log_text),
+    "json": (".jsonl", json_records),
+    "csv": (".csv", csv_table),
+    "random": (".bin", random_binary),
+    "gzip": (".gz", gzip_text),
+    "zeros": (".img", zeros),
+}
+COMPRESSIBLE = ("log", "json", "csv", "zeros")
+
+
+def make_file(kind: str, size: int, seed: int | str) -> tuple[str, bytes]:
+    """(파일 이름, 내용)을 만듭니다."""
+    suffix, generate = KINDS[kind]
+    rng = random.Random(f"{kind}-{seed}")
+    content = generate(rng, size)
+    if kind == "zeros":
+        # 0만으로는 모든 seed가 같은 내용이 되므로 앞에 seed를 적음
+        content = (f"{seed:>16}".encode() + content[16:])[:size]
+    return f"{kind}-{seed}{suffix}", content
@@ -0,0 +1,334 @@
+"""벤치마크 실행과 결과 저장"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import itertools
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from .compare import compare
+from .scenarios import SCENARIOS, BenchConfig, BenchContext, BenchError, Scenario, prepare
+from .server import ROOT, LocalServer, RssSampler, git_worktree, read_cpu_seconds, read_rss
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# 배경 부하의 요청 번호. 측정 시나리오와 파일 이름, seed가 겹치지 않도록 떨어뜨림
+BACKGROUND_START = 1_000_000
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """nearest-rank 백분위"""
+    if not sorted_values:
+        return 0.0
+    # round()는 짝수 쪽으로 반올림하므로 (99.5 -> 100) 올림으로 순위를 구함
+    rank = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _git_commit(root: Path = ROOT) -> dict[str, object]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=root, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "HEAD") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+async def _run_background(
+    ctx: BenchContext, scenarios: list[Scenario], stop: asyncio.Event
+) -> dict[str, object]:
+    """stop이 설정될 때까지 scenarios를 번갈아 계속 실행합니다. (혼합 부하)"""
+    counter = itertools.count(BACKGROUND_START)
+    done: Counter[str] = Counter()
+    errors: Counter[str] = Counter()
+
+    async def worker() -> None:
+        while not stop.is_set():
+            i = next(counter)
+            scenario = scenarios[i % len(scenarios)]
+            try:
+                await scenario.func(ctx, i)
+            except (BenchError, httpx.HTTPError) as e:
+                errors[str(e) or type(e).__name__] += 1
+                continue
+            done[scenario.name] += 1
+
+    workers = [
+        asyncio.create_task(worker()) for _ in range(ctx.config.background_concurrency)
+    ]
+    await stop.wait()
+    # 측정이 끝나면 진행 중인 배경 요청은 기다리지 않고 끊음
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    return {
+        "ok": dict(done),
+        "errors": sum(errors.values()),
+        "error_kinds": dict(errors.most_common(5)),
+    }
+
+
+async def run_scenario(
+    ctx: BenchContext,
+    scenario: Scenario,
+    server_pid: int | None,
+    background: list[Scenario] | None = None,
+) -> dict[str, object]:
+    config = ctx.config
+    total = config.large_requests if scenario.large else config.requests
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors: Counter[str] = Counter()
+    transferred = 0
+
+    async def worker() -> None:
+        nonlocal transferred
+        while (i := next(counter)) < total:
+            start = time.perf_counter()
+            try:
+                # += 오른쪽에 await를 두면 기다리는 동안 다른 worker가 더한 값을 덮어씀
+                size = await scenario.func(ctx, i)
+            except (BenchError, httpx.HTTPError) as e:
+                errors[str(e) or type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            transferred += size
+
+    if scenario.setup is not None:
+        await scenario.setup(ctx)
+
+    stop = asyncio.Event()
+    background_task = (
+        asyncio.create_task(_run_background(ctx, background, stop)) if background else None
+    )
+    cpu_start = read_cpu_seconds(server_pid) if server_pid else None
+    async with RssSampler(server_pid) as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+        elapsed = time.perf_counter() - started
+    cpu_end = read_cpu_seconds(server_pid) if server_pid else None
+    stop.set()
+    background_result = await background_task if background_task else None
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "errors": sum(errors.values()),
+        "error_kinds": dict(errors.most_common(5)),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "throughput_mib_s": round(transferred / elapsed / 1024**2, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            **{
+                f"p{p}": round(percentile(latencies, p) * 1000, 2)
+                for p in (50, 90, 95, 99)
+            },
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "server_rss_kib_max": sampler.max_rss_kib or None,
+        "server_cpu_s": (
+            round(cpu_end - cpu_start, 3)
+            if cpu_start is not None and cpu_end is not None
+            else None
+        ),
+        "bytes_transferred": transferred,
+        "background": background_result,
+    }
+
+
+async def run_benchmark(
+    config: BenchConfig, scenario_names: list[str], server_pid: int | None
+) -> dict[str, dict[str, object]]:
+    background = [SCENARIOS[name] for name in config.background.split(",") if name]
+    # 배경 부하가 측정 요청의 커넥션을 빼앗아 클라이언트 쪽에서 대기하지 않도록 따로 셈
+    max_connections = config.concurrency + (config.background_concurrency if background else 0)
+    limits = httpx.Limits(max_connections=max_connections)
+    async with httpx.AsyncClient(
+        base_url=config.url, timeout=config.timeout, limits=limits
+    ) as client:
+        ctx = BenchContext(client=client, config=config)
+        await prepare(ctx)
+        for item in background:
+            if item.setup is not None:
+                await item.setup(ctx)
+        results = {}
+        for name in scenario_names:
+            result = await run_scenario(ctx, SCENARIOS[name], server_pid, background)
+            results[name] = result
+            latency = result["latency_ms"]
+            print(
+                f"{name:<15} {result['throughput_rps']:>9.1f} req/s "
+                f"{result['throughput_mib_s']:>8.1f} MiB/s  "
+                f"p50 {latency['p50']:>8.1f} ms  p99 {latency['p99']:>8.1f} ms  "
+                f"errors {result['errors']}",
+                flush=True,
+            )
+        return results
+
+
+def run_local(
+    config: BenchConfig,
+    scenario_names: list[str],
+    env: dict[str, str],
+    workers: int,
+    root: Path = ROOT,
+) -> tuple[dict[str, dict[str, object]], int | None]:
+    """root의 코드로 로컬 서버를 띄워 실행합니다. (결과, 시작할 때 서버 RSS)를 반환"""
+    with LocalServer(env, workers=workers, root=root) as server:
+        config.url = server.url
+        rss_start = read_rss(server.pid)
+        results = asyncio.run(run_benchmark(config, scenario_names, server.pid))
+    return results, rss_start
+
+
+def _parse_env(values: list[str]) -> dict[str, str]:
+    env = {}
+    for value in values:
+        key, sep, val = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"--env expects KEY=VALUE, got {value!r}")
+        env[key] = val
+    return env
+
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = BenchConfig()
+    parser = argparse.ArgumentParser(
+        prog="python -m bench", description="드라이브/인증 API 벤치마크"
+    )
+    parser.add_argument("--url", help="이미 떠 있는 서버 주소. 없으면 SQLite로 서버를 띄움")
+    parser.add_argument("--workers", type=int, default=1, help="로컬 서버의 uvicorn worker 수")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="로컬 서버에 넘길 환경 변수 (예: DBLAB_EMR_STORAGE_COMPRESSION=zstd)",
+    )
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"쉼표로 구분한 시나리오 (기본: 전부, {', '.join(SCENARIOS)})",
+    )
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--requests", type=int, default=defaults.requests)
+    parser.add_argument("--large-requests", type=int, default=defaults.large_requests)
+    parser.add_argument("--small-size", type=int, default=defaults.small_size)
+    parser.add_argument("--large-size", type=int, default=defaults.large_size)
+    parser.add_argument("--download-size", type=int, default=defaults.download_size)
+    parser.add_argument("--range-size", type=int, default=defaults.range_size)
+    parser.add_argument("--list-files", type=int, default=defaults.list_files)
+    parser.add_argument("--list-page-size", type=int, default=defaults.list_page_size)
+    parser.add_argument("--timeout", type=float, default=defaults.timeout)
+    parser.add_argument(
+        "--corpus",
+        choices=("random", "compressible"),
+        default=defaults.corpus,
+        help="업로드 내용. compressible은 zstd 저장 압축(--env ...STORAGE_COMPRESSION=zstd) 측정용",
+    )
+    parser.add_argument(
+        "--background",
+        default=defaults.background,
+        help="측정하는 동안 함께 돌릴 배경 부하 시나리오 (예: upload_large,login)",
+    )
+    parser.add_argument(
+        "--background-concurrency", type=int, default=defaults.background_concurrency
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="REV",
+        help="이 git 커밋의 코드로도 같은 조건에서 실행해 결과를 비교 (로컬 서버만)",
+    )
+    parser.add_argument(
+        "--output", type=Path, help=f"결과 JSON 경로 (기본: {RESULTS_DIR.relative_to(ROOT)}/)"
+    )
+    return parser
+
+
+def _report(
+    args: argparse.Namespace,
+    config: BenchConfig,
+    env: dict[str, str],
+    results: dict[str, dict[str, object]],
+    rss_start: int | None,
+    root: Path = ROOT,
+) -> dict[str, object]:
+    return {
+        "meta": {
+            **_git_commit(root),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "server": "external" if args.url else "local-sqlite",
+            "workers": None if args.url else args.workers,
+            "server_rss_kib_start": rss_start,
+        },
+        "config": dataclasses.asdict(config),
+        "env": env,
+        "scenarios": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    scenario_names = [name for name in args.scenarios.split(",") if name]
+    background_names = [name for name in args.background.split(",") if name]
+    unknown = [name for name in scenario_names + background_names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"unknown scenarios: {', '.join(unknown)}")
+    if args.baseline and args.url:
+        sys.exit("--baseline starts local servers and cannot be used with --url")
+    env = _parse_env(args.env)
+
+    config = BenchConfig(
+        **{
+            field.name: getattr(args, field.name)
+            for field in dataclasses.fields(BenchConfig)
+            if field.name != "url"
+        }
+    )
+
+    baseline = None
+    if args.baseline:
+        # 기준 커밋을 먼저 돌려, 같은 기계에서 같은 설정으로 바꾸기 전/후를 비교
+        print(f"baseline {args.baseline}", flush=True)
+        with git_worktree(args.baseline) as root:
+            results, rss_start = run_local(config, scenario_names, env, args.workers, root)
+            baseline = _report(args, config, env, results, rss_start, root)
+        print("current", flush=True)
+
+    if args.url:
+        config.url = args.url
+        results = asyncio.run(run_benchmark(config, scenario_names, None))
+        rss_start = None
+    else:
+        results, rss_start = run_local(config, scenario_names, env, args.workers)
+
+    report = _report(args, config, env, results, rss_start)
+    if baseline is not None:
+        report["baseline"] = baseline
+        print(compare(baseline, report))
+
+    output = args.output
+    if output is None:
+        commit = (report["meta"]["commit"] or "nocommit")[:7]
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{stamp}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+    print(f"results written to {output}")
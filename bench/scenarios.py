@@ -0,0 +1,395 @@
+"""
+벤치마크 시나리오
+
+시나리오 하나는 요청 한 번(또는 목록 전체 조회처럼 정해진 작업 한 번)을 수행하는
+코루틴이며, 주고받은 본문 크기(bytes)를 반환합니다. 실패하면 BenchError
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+from . import corpus
+
+PASSWORD = "bench-password"
+LIST_FOLDER = "bench-list"
+
+
+class BenchError(Exception):
+    """예상하지 못한 응답"""
+
+
+@dataclass
+class BenchConfig:
+    url: str = ""
+    concurrency: int = 8
+    requests: int = 200
+    # 큰 파일 업로드는 오래 걸리므로 따로 횟수를 정함
+    large_requests: int = 10
+    small_size: int = 4 * 1024
+    large_size: int = 32 * 1024 * 1024
+    download_size: int = 1024 * 1024
+    range_size: int = 64 * 1024
+    list_files: int = 1000
+    list_page_size: int = 200
+    timeout: float = 300
+    # 업로드/다운로드 내용. 'random'은 압축되지 않고, 'compressible'은 로그 텍스트라 zstd로 줄어듦
+    corpus: str = "random"
+    # 측정하는 시나리오와 동시에 계속 돌릴 배경 부하 시나리오 (쉼표로 구분, 예: upload_large,login)
+    background: str = ""
+    background_concurrency: int = 4
+
+
+@dataclass
+class BenchContext:
+    client: httpx.AsyncClient
+    config: BenchConfig
+    # 외부 서버에 여러 번 돌려도 사용자 id와 파일 내용이 겹치지 않도록 실행마다 다르게
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    headers: dict[str, str] = field(default_factory=dict)
+    users: list[str] = field(default_factory=list)
+    uploaded: list[str] = field(default_factory=list)
+    download_id: str | None = None
+    large_id: str | None = None
+    list_ready: bool = False
+    # delta_upload용 (파일 id, 기존 내용 해시, 새 내용 해시, 차분)
+    deltas: list[tuple[str, str, str, bytes]] = field(default_factory=list)
+    _block: bytes = field(default_factory=lambda: os.urandom(1024 * 1024))
+
+    def __post_init__(self) -> None:
+        if self.config.corpus == "compressible":
+            # 큰 파일(UniqueFile)도 무작위 블록 대신 로그 텍스트 블록을 반복
+            self._block = self.content(len(self._block), seed=-1)
+
+    def unique_file(self, size: int, seed: int) -> "UniqueFile":
+        return UniqueFile(self._block, size, seed)
+
+    def content(self, size: int, seed: int) -> bytes:
+        """config.corpus에 맞는 size 바이트짜리 내용. seed마다 다름"""
+        if self.config.corpus == "compressible":
+            return corpus.make_file("log", size, f"{self.run_id}-{seed}")[1]
+        return os.urandom(size)
+
+
+@dataclass
+class Scenario:
+    name: str
+    func: Callable[[BenchContext, int], Awaitable[int]]
+    setup: Callable[[BenchContext], Awaitable[None]] | None = None
+    # True면 config.requests 대신 config.large_requests만큼 실행
+    large: bool = False
+
+
+SCENARIOS: dict[str, Scenario] = {}
+
+
+def scenario(
+    name: str,
+    *,
+    setup: Callable[[BenchContext], Awaitable[None]] | None = None,
+    large: bool = False,
+):
+    def decorator(func):
+        SCENARIOS[name] = Scenario(name=name, func=func, setup=setup, large=large)
+        return func
+
+    return decorator
+
+
+class UniqueFile(io.RawIOBase):
+    """
+    무작위 블록을 파일마다 다른 위치부터 반복해 만든 size 바이트짜리 가상 파일
+
+    큰 파일도 메모리에 올리지 않고 업로드할 수 있으며, 내용이 파일마다 달라
+    중복 제거(같은 blob 공유)로 업로드가 생략되지 않습니다.
+    """
+
+    def __init__(self, block: bytes, size: int, seed: int) -> None:
+        self._block = block
+        self._size = size
+        self._offset = (seed * 7919) % len(block)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = min(max(base + offset, 0), self._size)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        want = min(len(buffer), self._size - self._pos)
+        written = 0
+        while written < want:
+            start = (self._offset + self._pos + written) % len(self._block)
+            piece = self._block[start : start + want - written]
+            buffer[written : written + len(piece)] = piece
+            written += len(piece)
+        self._pos += want
+        return want
+
+
+def _check(response: httpx.Response, *expected: int) -> httpx.Response:
+    if response.status_code not in (expected or (200,)):
+        raise BenchError(f"{response.request.method} {response.status_code}")
+    return response
+
+
+async def signup(ctx: BenchContext, user_id: str) -> str:
+    response = await ctx.client.post(
+        "/api/auth/signup",
+        json={
+            "id": user_id,
+            "password": PASSWORD,
+            "email": f"{user_id}@bench.local",
+            "first_name": "Bench",
+            "last_name": "User",
+        },
+    )
+    return _check(response).json()["access_token"]
+
+
+async def upload(
+    ctx: BenchContext, name: str, content, path: str = "/"
+) -> dict:
+    response = await ctx.client.post(
+        "/api/drive/upload",
+        headers=ctx.headers,
+        data={"path": path},
+        files={"file_body": (name, content, "application/octet-stream")},
+    )
+    return _check(response).json()
+
+
+async def prepare(ctx: BenchContext) -> None:
+    """파일 시나리오에서 쓸 사용자를 만듭니다."""
+    token = await signup(ctx, f"bench-{ctx.run_id}")
+    ctx.headers = {"Authorization": f"Bearer {token}"}
+
+
+# 인증
+
+
+@scenario("signup")
+async def run_signup(ctx: BenchContext, i: int) -> int:
+    user_id = f"bench-{ctx.run_id}-{i}"
+    await signup(ctx, user_id)
+    ctx.users.append(user_id)
+    return 0
+
+
+async def _prepare_login(ctx: BenchContext) -> None:
+    while len(ctx.users) < ctx.config.concurrency:
+        user_id = f"bench-{ctx.run_id}-login-{len(ctx.users)}"
+        await signup(ctx, user_id)
+        ctx.users.append(user_id)
+
+
+@scenario("login", setup=_prepare_login)
+async def run_login(ctx: BenchContext, i: int) -> int:
+    user_id = ctx.users[i % len(ctx.users)]
+    response = await ctx.client.post(
+        "/api/auth/login", json={"id": user_id, "password": PASSWORD}
+    )
+    _check(response)
+    return 0
+
+
+@scenario("me")
+async def run_me(ctx: BenchContext, i: int) -> int:
+    _check(await ctx.client.get("/api/auth/me", headers=ctx.headers))
+    return 0
+
+
+# 업로드
+
+
+@scenario("upload_small")
+async def run_upload_small(ctx: BenchContext, i: int) -> int:
+    size = ctx.config.small_size
+    file = await upload(ctx, f"small-{i}.bin", ctx.content(size, seed=i))
+    ctx.uploaded.append(file["id"])
+    return size
+
+
+@scenario("upload_large", large=True)
+async def run_upload_large(ctx: BenchContext, i: int) -> int:
+    size = ctx.config.large_size
+    await upload(ctx, f"large-{i}.bin", ctx.unique_file(size, seed=i))
+    return size
+
+
+async def _prepare_delta(ctx: BenchContext) -> None:
+    """
+    upload_large와 같은 크기의 파일을 올리고, 조금 고친 새 내용의 차분을 미리
+    만들어 둡니다. 서명은 여기서 한 번 받아 두므로(서버에 저장됨) 측정 구간에는
+    차분 전송과 적용만 들어갑니다.
+    """
+    from api.delta import Signature, encode_delta
+
+    size = ctx.config.large_size
+    while len(ctx.deltas) < ctx.config.large_requests:
+        seed = 100_000 + len(ctx.deltas)
+        file_id = (await upload(ctx, f"delta-{seed}.bin", ctx.unique_file(size, seed)))["id"]
+        response = _check(
+            await ctx.client.get(
+                f"/api/drive/file/{file_id}/signature", headers=ctx.headers
+            )
+        ).json()
+        signature = Signature(
+            block_size=response["block_size"],
+            size=response["size"],
+            weak=response["weak"],
+            strong=[bytes.fromhex(strong) for strong in response["strong"]],
+        )
+        # 가운데쯤에 짧은 삽입, 뒤쪽에 4KiB 덮어쓰기
+        content = bytearray(ctx.unique_file(size, seed).read())
+        content[size * 3 // 4 : size * 3 // 4 + 4096] = os.urandom(4096)
+        content[size // 2 : size // 2] = os.urandom(100)
+        delta = b"".join(encode_delta(signature, content))
+        new_hash = hashlib.sha256(content).hexdigest()
+        ctx.deltas.append((file_id, response["content_hash"], new_hash, delta))
+
+
+@scenario("delta_upload", setup=_prepare_delta, large=True)
+async def run_delta_upload(ctx: BenchContext, i: int) -> int:
+    """upload_large와 같은 크기의 파일을 차분으로 고칩니다. (보낸 차분 크기를 반환)"""
+    file_id, base_hash, new_hash, delta = ctx.deltas[i % len(ctx.deltas)]
+    response = await ctx.client.put(
+        f"/api/drive/file/{file_id}/delta",
+        params={"base": base_hash},
+        headers={**ctx.headers, "X-Content-SHA256": new_hash},
+        content=delta,
+    )
+    _check(response)
+    return len(delta)
+
+
+# 다운로드
+
+
+async def _prepare_download(ctx: BenchContext) -> None:
+    if ctx.download_id is None:
+        size = ctx.config.download_size
+        ctx.download_id = (await upload(ctx, "download.bin", ctx.content(size, seed=-2)))["id"]
+
+
+async def _prepare_range(ctx: BenchContext) -> None:
+    if ctx.large_id is None:
+        content = ctx.unique_file(ctx.config.large_size, seed=-1)
+        ctx.large_id = (await upload(ctx, "range.bin", content))["id"]
+
+
+async def _download(ctx: BenchContext, file_id: str, headers: dict, status: int) -> int:
+    received = 0
+    async with ctx.client.stream(
+        "GET", f"/api/drive/file/{file_id}", headers={**ctx.headers, **headers}
+    ) as response:
+        _check(response, status)
+        async for chunk in response.aiter_raw():
+            received += len(chunk)
+    return received
+
+
+@scenario("download", setup=_prepare_download)
+async def run_download(ctx: BenchContext, i: int) -> int:
+    return await _download(ctx, ctx.download_id, {}, 200)
+
+
+@scenario("download_range", setup=_prepare_range)
+async def run_download_range(ctx: BenchContext, i: int) -> int:
+    length = min(ctx.config.range_size, ctx.config.large_size)
+    start = random.randrange(ctx.config.large_size - length + 1)
+    # 압축 저장된 blob도 원본 기준 구간을 받도록 (zstd를 받으면 Range가 압축된 바이트 기준이 됨)
+    headers = {"Range": f"bytes={start}-{start + length - 1}", "Accept-Encoding": "identity"}
+    return await _download(ctx, ctx.large_id, headers, 206)
+
+
+# 목록과 검색
+
+
+async def _prepare_list(ctx: BenchContext) -> None:
+    """목록/검색 시나리오용으로 파일이 많은 폴더를 만듭니다. (일괄 업로드 사용)"""
+    if ctx.list_ready:
+        return
+    response = await ctx.client.post(
+        "/api/drive/folders", json={"name": LIST_FOLDER, "path": "/"}, headers=ctx.headers
+    )
+    _check(response, 201, 409)
+    batch = 100
+    for start in range(0, ctx.config.list_files, batch):
+        count = min(batch, ctx.config.list_files - start)
+        files = [
+            ("file_bodies", (f"item-{n:05d}.txt", os.urandom(64), "text/plain"))
+            for n in range(start, start + count)
+        ]
+        response = await ctx.client.post(
+            "/api/drive/batch/upload",
+            headers=ctx.headers,
+            data={"path": f"/{LIST_FOLDER}"},
+            files=files,
+        )
+        _check(response)
+    ctx.list_ready = True
+
+
+@scenario("list_dir", setup=_prepare_list)
+async def run_list_dir(ctx: BenchContext, i: int) -> int:
+    """폴더 전체를 커서로 끝까지 넘기며 조회하는 것을 한 번으로 셉니다."""
+    received = 0
+    params = {"path": f"/{LIST_FOLDER}", "limit": ctx.config.list_page_size}
+    while True:
+        response = _check(
+            await ctx.client.get("/api/drive/file", params=params, headers=ctx.headers)
+        )
+        received += len(response.content)
+        next_cursor = response.json()["next_cursor"]
+        if not next_cursor:
+            return received
+        params["cursor"] = next_cursor
+
+
+@scenario("search", setup=_prepare_list)
+async def run_search(ctx: BenchContext, i: int) -> int:
+    # 'item-001' 접두어는 list_files=1000일 때 10개와 일치
+    prefix = f"item-{i % max(ctx.config.list_files // 10, 1):03d}"
+    response = _check(
+        await ctx.client.get(
+            "/api/drive/search",
+            params={"name": prefix, "match": "prefix"},
+            headers=ctx.headers,
+        )
+    )
+    return len(response.content)
+
+
+# 삭제
+
+
+async def _prepare_delete(ctx: BenchContext) -> None:
+    # upload_small에서 올린 파일을 지우고, 모자라면 더 올림
+    while len(ctx.uploaded) < ctx.config.requests:
+        file = await upload(ctx, f"delete-{len(ctx.uploaded)}.bin", os.urandom(64))
+        ctx.uploaded.append(file["id"])
+
+
+@scenario("delete", setup=_prepare_delete)
+async def run_delete(ctx: BenchContext, i: int) -> int:
+    file_id = ctx.uploaded.pop()
+    response = await ctx.client.delete(f"/api/drive/file/{file_id}", headers=ctx.headers)
+    _check(response, 204)
+    return 0
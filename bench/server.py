@@ -0,0 +1,209 @@
+"""벤치마크용 서버 프로세스 실행과 RSS, CPU 시간 측정"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 로컬 서버의 기본 설정. 같은 이름의 환경 변수나 --env가 있으면 그 값을 씀
+DEFAULT_ENV = {
+    # 한 IP에서 로그인을 몰아서 보내므로 IP별 제한을 사실상 끔
+    "DBLAB_EMR_LOGIN_MAX_ATTEMPTS_PER_IP": "1000000000",
+    "DBLAB_EMR_KDF_MAX_PENDING": "100000",
+    "DBLAB_EMR_LOG_LEVEL": "WARNING",
+}
+
+
+def _children(pid: int) -> list[int]:
+    """자손 프로세스 (worker 아래의 프로세스 풀까지)"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as fp:
+            children = [int(child) for child in fp.read().split()]
+    except OSError:
+        return []
+    return [descendant for child in children for descendant in (child, *_children(child))]
+
+
+def read_rss(pid: int) -> int | None:
+    """
+    프로세스와 그 자식 프로세스(uvicorn worker, 프로세스 풀)의 RSS 합(KiB)을
+    읽습니다. /proc이 없으면 None
+    """
+    total = 0
+    for proc in [pid, *_children(pid)]:
+        try:
+            with open(f"/proc/{proc}/status") as fp:
+                for line in fp:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+        except OSError:
+            if proc == pid:
+                return None
+    return total
+
+
+def read_cpu_seconds(pid: int) -> float | None:
+    """
+    프로세스와 살아 있는 자손 프로세스가 쓴 CPU 시간(user + system, 초)의 합을
+    읽습니다. /proc이 없으면 None
+    """
+    ticks = 0
+    for proc in [pid, *_children(pid)]:
+        try:
+            with open(f"/proc/{proc}/stat") as fp:
+                # 두 번째 필드(comm)에 공백이 있을 수 있으므로 ')' 뒤부터 나눔
+                fields = fp.read().rsplit(")", 1)[1].split()
+        except OSError:
+            if proc == pid:
+                return None
+            continue
+        ticks += int(fields[11]) + int(fields[12])  # utime, stime
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+class RssSampler:
+    """시나리오가 도는 동안 서버 RSS를 주기적으로 읽어 최댓값을 기록합니다."""
+
+    def __init__(self, pid: int | None, interval: float = 0.05) -> None:
+        self.pid = pid
+        self.interval = interval
+        self.max_rss_kib = 0
+        self._task: asyncio.Task | None = None
+
+    def _sample(self) -> None:
+        rss = read_rss(self.pid) if self.pid else None
+        if rss is not None:
+            self.max_rss_kib = max(self.max_rss_kib, rss)
+
+    async def _run(self) -> None:
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self) -> "RssSampler":
+        self.max_rss_kib = 0
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._sample()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """
+    임시 디렉터리에 SQLite DB와 UPLOAD_DIR을 만들고 uvicorn을 띄웁니다.
+
+    테이블은 api.migrate_db로 만들며, 끝나면 프로세스와 임시 디렉터리를 정리합니다.
+    root를 주면 그 디렉터리(다른 커밋의 체크아웃 등)의 코드로 서버를 띄웁니다.
+    """
+
+    def __init__(self, env: dict[str, str], workers: int = 1, root: Path = ROOT) -> None:
+        self.workers = workers
+        self.root = root
+        self._tmp = tempfile.TemporaryDirectory(prefix="drive-bench-")
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = {
+            **os.environ,
+            "DBLAB_EMR_DATABASE_URL": f"sqlite+aiosqlite:///{self._tmp.name}/bench.db",
+            "DBLAB_EMR_UPLOAD_DIR": os.path.join(self._tmp.name, "uploads"),
+        }
+        for key, value in DEFAULT_ENV.items():
+            self.env.setdefault(key, value)
+        self.env.update(env)
+        self.process: subprocess.Popen | None = None
+
+    @property
+    def pid(self) -> int | None:
+        return self.process.pid if self.process else None
+
+    def start(self, timeout: float = 30) -> None:
+        os.makedirs(self.env["DBLAB_EMR_UPLOAD_DIR"], exist_ok=True)
+        subprocess.run(
+            [sys.executable, "-m", "api.migrate_db"], cwd=self.root, env=self.env, check=True
+        )
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "api.main:app",
+                "--host", "127.0.0.1",
+                "--port", str(self.port),
+                "--workers", str(self.workers),
+                "--no-access-log",
+                "--log-level", "warning",
+            ],
+            cwd=self.root,
+            env=self.env,
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with {self.process.returncode}")
+            try:
+                httpx.get(f"{self.url}/docs", timeout=1)
+                return
+            except httpx.TransportError:
+                time.sleep(0.2)
+        raise RuntimeError("server did not start in time")
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._tmp.cleanup()
+
+    def __enter__(self) -> "LocalServer":
+        try:
+            self.start()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+@contextlib.contextmanager
+def git_worktree(rev: str) -> Iterator[Path]:
+    """rev를 임시 디렉터리에 체크아웃합니다. 비교 기준(baseline) 서버를 띄울 때 씁니다."""
+    path = tempfile.mkdtemp(prefix="drive-bench-baseline-")
+    subprocess.run(
+        ["git", "worktree", "add", "--detach", path, rev],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+    )
+    try:
+        yield Path(path)
+    finally:
+        subprocess.run(
+            ["git", "worktree", "remove", "--force", path], cwd=ROOT, capture_output=True
+        )
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,104 @@
+"""
+라우트 단위 테스트 공통 설정
+
+api를 불러오기 전에 SQLite DB와 임시 업로드 디렉토리를 쓰도록 환경 변수를 정하고,
+테스트마다 테이블과 업로드 디렉토리를 새로 만듭니다. 앱은 httpx.AsyncClient로
+ASGI를 직접 호출하므로 lifespan(주기 작업, 작업 워커)은 실행되지 않습니다.
+"""
+import os
+import shutil
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="drive-test-")
+os.environ.update(
+    {
+        "DBLAB_EMR_DATABASE_URL": f"sqlite+aiosqlite:///{_TMP_DIR}/test.sqlite",
+        "DBLAB_EMR_UPLOAD_DIR": os.path.join(_TMP_DIR, "uploads"),
+        "DBLAB_EMR_STORAGE_BACKEND": "local",
+        "DBLAB_EMR_SECRET_KEY": "test-secret-key-" * 4,
+        "DBLAB_EMR_JOB_WORKER_ENABLED": "false",
+        "DBLAB_EMR_KDF_ITERATIONS": "1000",
+        "DBLAB_EMR_LOGIN_MAX_ATTEMPTS_PER_IP": "0",
+        "DBLAB_EMR_LOGIN_MAX_FAILURES_PER_ACCOUNT": "0",
+    }
+)
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+
+from api import auth_cache, models  # noqa: E402
+from api.database import SessionLocal, engine  # noqa: E402
+from api.main import app  # noqa: E402
+from api.settings import settings  # noqa: E402
+from api.storage import close_storage  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+async def database(anyio_backend):
+    shutil.rmtree(settings.upload_dir, ignore_errors=True)
+    os.makedirs(settings.upload_dir)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    auth_cache.principal_cache.clear()
+    auth_cache.user_cache.clear()
+    yield
+    await close_storage()
+    # 테스트마다 이벤트 루프가 바뀌므로 이전 루프에서 만든 커넥션을 남기지 않음
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def signup(client: httpx.AsyncClient, user_id: str, admin: bool = False) -> dict:
+    """사용자를 만들고 Authorization 헤더를 반환합니다."""
+    response = await client.post(
+        "/api/auth/signup",
+        json={
+            "id": user_id,
+            "password": "secret1",
+            "email": f"{user_id}@example.com",
+            "first_name": "Test",
+            "last_name": "User",
+        },
+    )
+    assert response.status_code == 200, response.text
+    if admin:
+        async with SessionLocal() as db:
+            await db.execute(
+                update(models.User).where(models.User.id == user_id).values(is_admin=True)
+            )
+            await db.commit()
+        auth_cache.invalidate_user(user_id)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def alice(client):
+    return await signup(client, "alice")
+
+
+@pytest.fixture
+async def bob(client):
+    return await signup(client, "bob")
+
+
+async def upload(
+    client: httpx.AsyncClient, headers: dict, name: str, content: bytes, **data
+) -> dict:
+    response = await client.post(
+        "/api/drive/upload", data=data, files={"file_body": (name, content)}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
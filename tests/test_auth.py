@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import anyio
+import jwt
+import pytest
+
+from api import ratelimit, util
+from api.routers import auth
+from api.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """conftest에서 꺼 둔 로그인 제한을 켭니다."""
+    monkeypatch.setattr(auth.login_ip_limiter, "limit", 10)
+    monkeypatch.setattr(auth.login_account_limiter, "limit", 2)
+    for limiter in (auth.login_ip_limiter, auth.login_account_limiter):
+        monkeypatch.setattr(limiter, "_data", OrderedDict())
+
+
+async def _login(client, user_id: str, password: str = "secret1"):
+    return await client.post("/api/auth/login", json={"id": user_id, "password": password})
+
+
+async def test_account_limit(client, alice, bob, limits):
+    assert (await _login(client, "alice", "wrong")).status_code == 401
+    # 로그인에 성공하면 실패 횟수를 지움
+    assert (await _login(client, "alice")).status_code == 200
+    assert (await _login(client, "alice", "wrong")).status_code == 401
+    assert (await _login(client, "alice", "wrong")).status_code == 401
+
+    # 비밀번호가 맞아도 거절하고, 다른 계정은 영향을 받지 않음
+    response = await _login(client, "alice")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert (await _login(client, "bob")).status_code == 200
+
+
+async def test_ip_limit(client, alice, limits, monkeypatch):
+    monkeypatch.setattr(auth.login_ip_limiter, "limit", 3)
+    for _ in range(3):
+        assert (await _login(client, "alice")).status_code == 200
+    response = await _login(client, "alice")
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= settings.login_window
+
+    # 구간이 지나면 다시 허용
+    later = time.monotonic() + settings.login_window
+    monkeypatch.setattr(ratelimit, "time", SimpleNamespace(monotonic=lambda: later))
+    assert (await _login(client, "alice")).status_code == 200
+
+
+async def test_kdf_queue_limit(client, alice, monkeypatch):
+    monkeypatch.setattr(settings, "kdf_max_pending", 1)
+    started = threading.Event()
+    release = threading.Event()
+    pbkdf2 = util._pbkdf2
+
+    def blocking_pbkdf2(*args):
+        started.set()
+        release.wait(10)
+        return pbkdf2(*args)
+
+    monkeypatch.setattr(util, "_pbkdf2", blocking_pbkdf2)
+    result = {}
+
+    async def first_login():
+        result["first"] = await _login(client, "alice")
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(first_login)
+        await anyio.to_thread.run_sync(started.wait, 10)
+        assert util.kdf_queue_depth() == 1
+        # 해시 작업이 밀려 있으면 기다리지 않고 바로 거절
+        response = await _login(client, "alice")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+        release.set()
+
+    assert result["first"].status_code == 200
+    assert util.kdf_queue_depth() == 0
+
+
+async def test_token_signed_with_settings_key(client, alice):
+    expire = datetime.now(timezone.utc) + timedelta(minutes=5)
+    # 예전에 코드에 있던 공개된 키로 만든 토큰은 받지 않음
+    forged = jwt.encode({"sub": "alice", "exp": expire}, "your-secret-key", algorithm="HS256")
+    response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {forged}"})
+    assert response.status_code == 401
+
+    token = alice["Authorization"].removeprefix("Bearer ")
+    assert jwt.decode(token, settings.secret_key, algorithms=["HS256"])["sub"] == "alice"
+    assert (await client.get("/api/auth/me", headers=alice)).status_code == 200
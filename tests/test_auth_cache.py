@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import update
+
+from api import auth_cache, models, util
+from api.crud import auth_crud
+from api.database import SessionLocal
+
+pytestmark = pytest.mark.anyio
+
+
+async def _me(client, headers) -> dict:
+    response = await client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_principal_cache(client, alice, monkeypatch):
+    assert (await _me(client, alice))["id"] == "alice"
+    token = alice["Authorization"].removeprefix("Bearer ")
+    assert auth_cache.principal_cache.get(token) == "alice"
+
+    # 캐시에 있는 토큰은 다시 디코딩하지 않음
+    def decode(*args, **kwargs):
+        raise AssertionError("token decoded again")
+
+    monkeypatch.setattr(util.jwt, "decode", decode)
+    assert (await _me(client, alice))["id"] == "alice"
+
+    # 캐시에서 지워지면 다시 검증함
+    auth_cache.principal_cache.invalidate(token)
+    with pytest.raises(AssertionError):
+        await client.get("/api/auth/me", headers=alice)
+
+
+async def test_user_cache_invalidated_on_update(client, alice):
+    assert (await _me(client, alice))["first_name"] == "Test"
+
+    # 캐시를 거치지 않고 바꾸면 TTL 동안은 이전 정보가 보임
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.User).where(models.User.id == "alice").values(first_name="Direct")
+        )
+        await db.commit()
+    assert (await _me(client, alice))["first_name"] == "Test"
+
+    async with SessionLocal() as db:
+        db_user = await auth_crud.get_user(db, "alice")
+        await auth_crud.update_user(db, db_user, first_name="Alice")
+    assert (await _me(client, alice))["first_name"] == "Alice"
+
+
+async def test_admin_change_takes_effect(client, alice):
+    response = await client.get("/api/admin/storage", headers=alice)
+    assert response.status_code == 403
+    assert auth_cache.user_cache.get("alice").is_admin is False
+
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.User).where(models.User.id == "alice").values(is_admin=True)
+        )
+        await db.commit()
+    assert (await client.get("/api/admin/storage", headers=alice)).status_code == 403
+    # 권한을 바꾼 쪽에서 캐시를 지우면 바로 반영됨
+    auth_cache.invalidate_user("alice")
+    assert (await client.get("/api/admin/storage", headers=alice)).status_code == 200
@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+from api import background
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_shutdown_process_pool_waits_for_workers():
+    assert await background.run_in_process(os.getpid) != os.getpid()
+    processes = list(background._process_pool._processes.values())
+    assert processes
+
+    await background.shutdown_process_pool()
+    assert background._process_pool is None
+    assert not any(process.is_alive() for process in processes)
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+from sqlalchemy import func, select
+
+from api import blob_store, models, quota
+from api.database import SessionLocal
+from api.storage import get_storage
+
+pytestmark = pytest.mark.anyio
+
+
+async def _batch_upload(client, headers, files: dict[str, bytes]):
+    return await client.post(
+        "/api/drive/batch/upload",
+        files=[("file_bodies", (name, content)) for name, content in files.items()],
+        headers=headers,
+    )
+
+
+async def _blob_count() -> int:
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(models.Blob))
+
+
+async def _stored_objects() -> list[str]:
+    return [stat.key async for stat in get_storage().iter_objects("blobs/")]
+
+
+def _tmp_files() -> list[str]:
+    return os.listdir(blob_store.TMP_DIR) if os.path.isdir(blob_store.TMP_DIR) else []
+
+
+async def test_batch_upload_get_delete(client, alice):
+    response = await _batch_upload(
+        client, alice, {"a.txt": b"same", "b.txt": b"same", "c.txt": b"other"}
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["status"] for item in items] == ["ok", "ok", "ok"]
+    # 같은 내용은 blob 하나를 공유
+    assert await _blob_count() == 2
+
+    ids = [item["id"] for item in items]
+    response = await client.post(
+        "/api/drive/batch/get", json={"ids": [*ids, "missing"]}, headers=alice
+    )
+    statuses = [item["status"] for item in response.json()["items"]]
+    assert statuses == ["ok", "ok", "ok", "not_found"]
+
+    response = await client.post("/api/drive/batch/delete", json={"ids": ids[:1]}, headers=alice)
+    assert response.json()["items"][0]["status"] == "ok"
+    response = await client.post("/api/drive/batch/get", json={"ids": ids}, headers=alice)
+    assert [item["status"] for item in response.json()["items"]] == ["not_found", "ok", "ok"]
+
+
+async def test_batch_upload_quota_per_item(client, alice, monkeypatch):
+    monkeypatch.setattr(quota.settings, "default_user_quota", 10)
+    response = await _batch_upload(client, alice, {"a.txt": b"12345678", "b.txt": b"12345"})
+    items = response.json()["items"]
+    assert [item["status"] for item in items] == ["ok", "error"]
+    assert items[1]["detail"] == quota.QUOTA_EXCEEDED_DETAIL
+    assert _tmp_files() == []
+
+
+async def test_batch_upload_failure_cleans_up(client, alice, monkeypatch):
+    await _batch_upload(client, alice, {"kept.txt": b"kept"})
+    add_blob = blob_store.add_blob
+    calls = 0
+
+    async def failing_add_blob(db, tmp_path, stored):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise RuntimeError("storage unavailable")
+        return await add_blob(db, tmp_path, stored)
+
+    monkeypatch.setattr(blob_store, "add_blob", failing_add_blob)
+    with pytest.raises(RuntimeError):
+        await _batch_upload(
+            client, alice, {"a.txt": b"new", "b.txt": b"kept", "c.txt": b"third"}
+        )
+
+    assert _tmp_files() == []
+    assert await _blob_count() == 1
+    assert len(await _stored_objects()) == 1
+
+
+async def test_batch_upload_charge_failure_cleans_up(client, alice, monkeypatch):
+    async def charge(db, user_id, amount):
+        raise quota.QuotaExceededError
+
+    monkeypatch.setattr(quota, "charge", charge)
+    response = await _batch_upload(client, alice, {"a.txt": b"a", "b.txt": b"b"})
+    assert response.status_code == 413
+    assert _tmp_files() == []
+    assert await _blob_count() == 0
+    assert await _stored_objects() == []
@@ -0,0 +1,125 @@
+import io
+
+import anyio
+import pytest
+
+from bench import corpus
+from bench.compare import compare
+from bench.run import BACKGROUND_START, percentile, run_scenario
+from bench.scenarios import (
+    SCENARIOS,
+    BenchConfig,
+    BenchContext,
+    BenchError,
+    Scenario,
+    UniqueFile,
+    prepare,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def test_corpus_is_deterministic():
+    for kind in corpus.KINDS:
+        name, content = corpus.make_file(kind, 4096, seed=7)
+        assert len(content) == 4096
+        assert corpus.make_file(kind, 4096, seed=7) == (name, content)
+        # seed가 다르면 내용이 달라 중복 제거로 생략되지 않음
+        assert corpus.make_file(kind, 4096, seed=8)[1] != content
+    assert corpus.make_file("log", 10, seed="a")[0] == "log-a.log"
+
+
+def test_unique_file():
+    block = bytes(range(256))
+    data = UniqueFile(block, 1000, seed=3).read()
+    assert len(data) == 1000
+    assert data == UniqueFile(block, 1000, seed=3).read()
+    assert data != UniqueFile(block, 1000, seed=4).read()
+
+    file = UniqueFile(block, 1000, seed=3)
+    assert file.seek(-10, io.SEEK_END) == 990
+    assert file.read() == data[990:]
+
+
+def test_percentile():
+    values = [float(n) for n in range(1, 101)]
+    assert [percentile(values, p) for p in (50, 90, 99, 100)] == [50.0, 90.0, 99.0, 100.0]
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0], 99) == 3.0
+
+
+def _result(rps: float, p50: float, errors: int = 0) -> dict:
+    return {
+        "throughput_rps": rps,
+        "latency_ms": {"p50": p50, "p99": p50 * 2},
+        "server_rss_kib_max": None,
+        "errors": errors,
+    }
+
+
+def test_compare():
+    before = {"meta": {"commit": "aaa"}, "scenarios": {"me": _result(100, 10), "old": _result(1, 1)}}
+    after = {
+        "meta": {"commit": "bbb"},
+        "scenarios": {"me": _result(150, 5, errors=2), "new": _result(1, 1)},
+    }
+    lines = compare(before, after).splitlines()
+    assert lines[0] == "before: aaa  after: bbb"
+    # 양쪽에 다 있는 시나리오만 비교
+    assert len(lines) == 3
+    assert lines[2].startswith("me ")
+    assert "+50%" in lines[2] and "-50%" in lines[2]
+    assert lines[2].endswith("errors 0 -> 2")
+
+
+@pytest.mark.parametrize("corpus_kind", ["random", "compressible"])
+async def test_scenarios_against_app(client, corpus_kind):
+    config = BenchConfig(
+        concurrency=2,
+        requests=6,
+        small_size=512,
+        download_size=4096,
+        list_files=30,
+        list_page_size=8,
+        corpus=corpus_kind,
+    )
+    ctx = BenchContext(client=client, config=config)
+    await prepare(ctx)
+
+    for name in ("me", "upload_small", "download", "list_dir", "search", "delete"):
+        result = await run_scenario(ctx, SCENARIOS[name], server_pid=None)
+        assert (result["ok"], result["errors"]) == (6, 0), (name, result["error_kinds"])
+        assert result["latency_ms"]["p50"] <= result["latency_ms"]["max"]
+        if name == "download":
+            assert result["bytes_transferred"] == 6 * 4096
+    assert ctx.uploaded == []
+
+
+async def test_background_load():
+    ctx = BenchContext(client=None, config=BenchConfig(concurrency=2, requests=20))
+    seen = []
+
+    async def measured(ctx, i):
+        await anyio.sleep(0.001)
+        return 1
+
+    async def background(ctx, i):
+        seen.append(i)
+        await anyio.sleep(0.001)
+        if i % 2:
+            raise BenchError("GET 500")
+        return 0
+
+    # 측정 중에만 배경 부하를 돌리고, 요청 번호가 측정 쪽과 겹치지 않음
+    result = await run_scenario(
+        ctx,
+        Scenario(name="measured", func=measured),
+        server_pid=None,
+        background=[Scenario(name="bg", func=background)],
+    )
+    assert (result["ok"], result["errors"], result["bytes_transferred"]) == (20, 0, 20)
+    assert seen and min(seen) >= BACKGROUND_START
+    background_result = result["background"]
+    assert background_result["ok"]["bg"] >= 1
+    assert background_result["error_kinds"] == {"GET 500": background_result["errors"]}
+    assert background_result["errors"] >= 1
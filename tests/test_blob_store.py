@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+from api import blob_store, models
+from api.database import SessionLocal
+from api.storage import StoredUpload, get_storage
+
+pytestmark = pytest.mark.anyio
+
+
+def _tmp_file(content: bytes) -> tuple[str, StoredUpload]:
+    tmp_path = blob_store.new_tmp_path()
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    return tmp_path, StoredUpload(len(content), hashlib.sha256(content).hexdigest())
+
+
+async def _add(content: bytes) -> models.Blob:
+    async with SessionLocal() as db:
+        blob = await blob_store.add_blob(db, *_tmp_file(content))
+        await db.commit()
+    return blob
+
+
+async def test_rollback_removes_new_object():
+    storage = get_storage()
+    async with SessionLocal() as db:
+        path = (await blob_store.add_blob(db, *_tmp_file(b"rolled back"))).path
+        assert await storage.stat(path) is not None
+        await blob_store.discard_new_blobs(db)
+    assert await storage.stat(path) is None
+
+    # 커밋하지 않고 닫아도 같음
+    async with SessionLocal() as db:
+        path = (await blob_store.add_blob(db, *_tmp_file(b"never committed"))).path
+    assert await storage.stat(path) is None
+
+
+async def test_rollback_keeps_shared_object():
+    storage = get_storage()
+    blob = await _add(b"shared")
+    async with SessionLocal() as db:
+        assert (await blob_store.add_blob(db, *_tmp_file(b"shared"))).ref_count == 2
+        await db.rollback()
+    assert await storage.stat(blob.path) is not None
+
+
+async def test_release_deletes_object_after_commit():
+    storage = get_storage()
+    blob = await _add(b"released")
+
+    async with SessionLocal() as db:
+        assert await blob_store.release_blob(db, blob.hash)
+        assert await storage.stat(blob.path) is not None
+        await db.rollback()
+    assert await storage.stat(blob.path) is not None
+
+    async with SessionLocal() as db:
+        assert await blob_store.release_blobs(db, [blob.hash]) == 1
+        assert await storage.stat(blob.path) is not None
+        await db.commit()
+    assert await storage.stat(blob.path) is None
+    async with SessionLocal() as db:
+        assert await db.get(models.Blob, blob.hash) is None
+
+
+async def test_release_keeps_object_added_again():
+    storage = get_storage()
+    blob = await _add(b"added again")
+    async with SessionLocal() as db:
+        await blob_store.release_blob(db, blob.hash)
+        # 같은 트랜잭션에서 같은 내용이 다시 등록되면 커밋 뒤에도 객체를 남김
+        await blob_store.add_blob(db, *_tmp_file(b"added again"))
+        await db.commit()
+    assert await storage.stat(blob.path) is not None
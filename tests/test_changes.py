@@ -0,0 +1,150 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import anyio
+import pytest
+from sqlalchemy import update
+
+from api import changes, models
+from api.database import SessionLocal
+from api.settings import settings
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _changes(client, headers, **params) -> dict:
+    response = await client.get("/api/drive/changes", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_change_sequence(client, alice, bob):
+    response = await client.get("/api/drive/changes/latest", headers=alice)
+    assert response.json() == {"cursor": 0}
+
+    first = await upload(client, alice, "a.txt", b"a")
+    await upload(client, alice, "b.txt", b"b")
+    await client.delete(f"/api/drive/file/{first['id']}", headers=alice)
+    await upload(client, bob, "c.txt", b"c")
+
+    body = await _changes(client, alice)
+    assert [(item["seq"], item["action"], item["path"]) for item in body["items"]] == [
+        (1, "created", "/a.txt"),
+        (2, "created", "/b.txt"),
+        (3, "deleted", "/a.txt"),
+    ]
+    assert body["cursor"] == 3
+    assert body["has_more"] is False
+    response = await client.get("/api/drive/changes/latest", headers=alice)
+    assert response.json() == {"cursor": 3}
+
+    # 사용자마다 번호를 따로 매김
+    assert [item["seq"] for item in (await _changes(client, bob))["items"]] == [1]
+
+    body = await _changes(client, alice, since=0, limit=2)
+    assert [item["seq"] for item in body["items"]] == [1, 2]
+    assert (body["cursor"], body["has_more"]) == (2, True)
+    body = await _changes(client, alice, since=body["cursor"])
+    assert [item["seq"] for item in body["items"]] == [3]
+    assert await _changes(client, alice, since=3) == {"items": [], "cursor": 3, "has_more": False}
+
+
+async def test_long_poll_wakes_on_upload(client, alice, bob, monkeypatch):
+    # 다시 조회하는 간격보다 훨씬 빨리 깨어나야 함
+    monkeypatch.setattr(settings, "changes_poll_interval", 30.0)
+    result = {}
+
+    async def poll():
+        started = time.monotonic()
+        result["body"] = await _changes(client, alice, since=0, wait=20)
+        result["elapsed"] = time.monotonic() - started
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(poll)
+        await anyio.sleep(0.2)
+        # 다른 사용자의 변경으로는 깨어나지 않음
+        await upload(client, bob, "other.txt", b"o")
+        await anyio.sleep(0.2)
+        assert "body" not in result
+        await upload(client, alice, "a.txt", b"a")
+
+    assert [item["name"] for item in result["body"]["items"]] == ["a.txt"]
+    assert result["elapsed"] < 5
+
+    started = time.monotonic()
+    body = await _changes(client, alice, since=1, wait=1)
+    assert body == {"items": [], "cursor": 1, "has_more": False}
+    assert time.monotonic() - started >= 1
+
+
+async def test_expired_cursor(client, alice):
+    await upload(client, alice, "a.txt", b"a")
+    await upload(client, alice, "b.txt", b"b")
+
+    response = await client.get("/api/drive/changes", params={"since": 5}, headers=alice)
+    assert response.status_code == 410
+    assert response.json()["detail"] == changes.CURSOR_EXPIRED_DETAIL
+
+    expired = datetime.now() - timedelta(days=settings.changes_retention_days + 1)
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.FileChange)
+            .where(models.FileChange.seq == 1)
+            .values(created_at=expired)
+        )
+        await db.commit()
+    assert await changes.prune_changes() == 1
+
+    response = await client.get("/api/drive/changes", params={"since": 0}, headers=alice)
+    assert response.status_code == 410
+    # 남은 기록부터는 이어서 받을 수 있음
+    assert [item["seq"] for item in (await _changes(client, alice, since=1))["items"]] == [2]
+    response = await client.get("/api/drive/changes/stream", params={"since": 0}, headers=alice)
+    assert response.status_code == 410
+
+
+def _parse_sse(text: str) -> list[dict]:
+    events = []
+    for block in text.split("\n\n"):
+        if not block:
+            continue
+        event = {}
+        for line in block.split("\n"):
+            field, _, value = line.partition(": ")
+            event[field] = value
+        events.append(event)
+    return events
+
+
+async def test_stream_changes(client, alice, monkeypatch):
+    for name in ("a.txt", "b.txt", "c.txt"):
+        await upload(client, alice, name, b"x")
+
+    calls = []
+
+    async def wait_for_changes(user_id, since, limit, timeout):
+        # 응답 본문을 끝까지 받을 수 있도록 한 번 쉰 뒤 기록이 만료된 것으로 함
+        calls.append(since)
+        if len(calls) == 1:
+            return []
+        raise changes.CursorExpiredError
+
+    monkeypatch.setattr(changes, "wait_for_changes", wait_for_changes)
+    response = await client.get(
+        "/api/drive/changes/stream", headers={**alice, "Last-Event-ID": "1"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+
+    events = _parse_sse(response.text)
+    assert [event.get("event") for event in events] == ["change", "change", None, "reset"]
+    assert [events[0]["id"], events[1]["id"]] == ["2", "3"]
+    assert json.loads(events[1]["data"])["name"] == "c.txt"
+    assert events[2] == {"": "keepalive"}
+    assert events[3]["data"] == "{}"
+    # 보낸 마지막 번호부터 이어서 기다림
+    assert calls == [3, 3]
@@ -0,0 +1,104 @@
+import pytest
+import zstandard
+
+from api import blob_store, models
+from api.compression import ZSTD, iter_decompressed
+from api.database import SessionLocal
+from api.settings import settings
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+# 0으로 채운 파일은 수 KB로 줄어들어, 한 번에 풀면 응답 하나가 원본 크기만큼 메모리를 씀
+ZEROS = b"\0" * (32 * 1024 * 1024)
+
+
+@pytest.fixture
+def zstd_storage(monkeypatch):
+    monkeypatch.setattr(settings, "storage_compression", ZSTD)
+
+
+async def _chunks(data: bytes, size: int = 4096):
+    for index in range(0, len(data), size):
+        yield data[index : index + size]
+
+
+async def test_iter_decompressed_caps_chunks():
+    compressed = zstandard.ZstdCompressor().compress(ZEROS)
+    sizes = [
+        len(chunk)
+        async for chunk in iter_decompressed(_chunks(compressed), chunk_size=64 * 1024)
+    ]
+    assert sum(sizes) == len(ZEROS)
+    assert max(sizes) <= 64 * 1024
+
+    content = bytes(range(256)) * 1024
+    compressed = zstandard.ZstdCompressor().compress(content)
+    parts = [
+        chunk
+        async for chunk in iter_decompressed(
+            _chunks(compressed, 100), 1000, 70_000, chunk_size=4096
+        )
+    ]
+    assert b"".join(parts) == content[1000:70_001]
+
+
+async def test_download_highly_compressible_file(zstd_storage, client, alice, monkeypatch):
+    # ASGITransport는 응답을 모아서 돌려주므로 청크 크기는 blob을 읽는 쪽에서 확인
+    sizes: list[int] = []
+
+    async def recording_iter_decompressed(*args, **kwargs):
+        async for chunk in iter_decompressed(*args, **kwargs):
+            sizes.append(len(chunk))
+            yield chunk
+
+    monkeypatch.setattr(blob_store, "iter_decompressed", recording_iter_decompressed)
+    file = await upload(client, alice, "zeros.bin", ZEROS)
+    async with SessionLocal() as db:
+        file_model = await db.get(models.FileModel, file["id"])
+        blob = await db.get(models.Blob, file_model.content_hash)
+    assert blob.encoding == ZSTD
+    assert blob.stored_size < len(ZEROS) // 1000
+
+    url = f"/api/drive/file/{file['id']}"
+    response = await client.get(url, headers={**alice, "Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.content == ZEROS
+    assert sum(sizes) == len(ZEROS)
+    assert max(sizes) <= settings.upload_chunk_size
+
+    response = await client.get(
+        url, headers={**alice, "Accept-Encoding": "identity", "Range": "bytes=-10"}
+    )
+    assert response.status_code == 206
+    assert response.content == b"\0" * 10
+
+    # zstd를 받을 수 있으면 저장된 그대로 보냄
+    response = await client.get(url, headers={**alice, "Accept-Encoding": "zstd"})
+    assert response.headers["content-encoding"] == ZSTD
+    assert response.num_bytes_downloaded == blob.stored_size
+    assert response.content == ZEROS
+
+
+@pytest.mark.parametrize("encoding", ["gzip", ZSTD])
+async def test_json_response_compression(client, alice, encoding):
+    for index in range(20):
+        await upload(client, alice, f"file-{index:02d}.txt", b"x" * index)
+    headers = {**alice, "Accept-Encoding": encoding}
+
+    response = await client.get("/api/drive/file", params={"limit": 100}, headers=headers)
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    # httpx가 풀어 준 본문보다 실제로 보낸 크기가 작음
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()["items"]) == 20
+
+    # 작은 JSON과 JSON이 아닌 응답은 그대로 보냄
+    response = await client.get("/api/auth/me", headers=headers)
+    assert "content-encoding" not in response.headers
+    file_id = (await upload(client, alice, "big.txt", b"y" * 5000))["id"]
+    response = await client.get(f"/api/drive/file/{file_id}", headers=headers)
+    assert "content-encoding" not in response.headers
+    assert response.content == b"y" * 5000
@@ -0,0 +1,110 @@
+import hashlib
+import random
+
+import pytest
+
+from api.delta import Signature, encode_delta
+
+from .conftest import signup, upload
+
+pytestmark = pytest.mark.anyio
+
+BASE = random.Random(0).randbytes(256 * 1024)
+
+
+def _edit(content: bytes) -> bytes:
+    # 가운데에 짧은 삽입, 뒤쪽에 1KiB 덮어쓰기
+    middle = len(content) // 2
+    edited = content[:middle] + b"inserted" + content[middle:]
+    return edited[:-4096] + b"x" * 1024 + edited[-3072:]
+
+
+async def _signature(client, headers, file_id: str) -> tuple[Signature, str]:
+    response = await client.get(f"/api/drive/file/{file_id}/signature", headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    signature = Signature(
+        block_size=body["block_size"],
+        size=body["size"],
+        weak=body["weak"],
+        strong=[bytes.fromhex(strong) for strong in body["strong"]],
+    )
+    return signature, body["content_hash"]
+
+
+async def _put_delta(client, headers, file_id: str, base: str, delta: bytes, sha256=None):
+    if sha256 is not None:
+        headers = {**headers, "X-Content-SHA256": sha256}
+    return await client.put(
+        f"/api/drive/file/{file_id}/delta", params={"base": base}, content=delta, headers=headers
+    )
+
+
+async def test_signature_is_cached(client, alice):
+    file_id = (await upload(client, alice, "data.bin", BASE))["id"]
+    response = await client.get(f"/api/drive/file/{file_id}/signature", headers=alice)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["size"] == len(BASE)
+    assert len(body["weak"]) == len(body["strong"]) == -(-len(BASE) // body["block_size"])
+
+    response = await client.get(
+        f"/api/drive/file/{file_id}/signature",
+        headers={**alice, "If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+
+async def test_delta_upload(client, alice):
+    file_id = (await upload(client, alice, "data.bin", BASE))["id"]
+    signature, base = await _signature(client, alice, file_id)
+    new_content = _edit(BASE)
+    delta = b"".join(encode_delta(signature, new_content))
+    # 바뀐 블록과 새 데이터만 보냄
+    assert len(delta) < len(new_content) // 10
+
+    new_hash = hashlib.sha256(new_content).hexdigest()
+    response = await _put_delta(client, alice, file_id, base, delta, new_hash)
+    assert response.status_code == 200, response.text
+    assert response.json()["size"] == len(new_content)
+
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.content == new_content
+    usage = (await client.get("/api/drive/usage", headers=alice)).json()
+    assert usage["used_bytes"] == len(new_content)
+
+    # 이미 바뀐 내용을 기준으로 한 차분은 거절
+    response = await _put_delta(client, alice, file_id, base, delta)
+    assert response.status_code == 409
+
+
+async def test_invalid_delta(client, alice, bob):
+    file_id = (await upload(client, alice, "data.bin", BASE))["id"]
+    signature, base = await _signature(client, alice, file_id)
+    delta = b"".join(encode_delta(signature, _edit(BASE)))
+
+    response = await _put_delta(client, alice, file_id, base, delta, "0" * 64)
+    assert response.status_code == 400
+    response = await _put_delta(client, alice, file_id, base, b"Xgarbage")
+    assert response.status_code == 400
+    response = await _put_delta(client, alice, file_id, base, delta[:-10])
+    assert response.status_code == 400
+
+    assert (await _put_delta(client, bob, file_id, base, delta)).status_code == 404
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.content == BASE
+
+
+async def test_delta_quota(client, alice):
+    file_id = (await upload(client, alice, "data.bin", BASE))["id"]
+    admin = await signup(client, "admin", admin=True)
+    await client.put(
+        "/api/admin/users/alice/quota", json={"quota_bytes": len(BASE) + 100}, headers=admin
+    )
+    signature, base = await _signature(client, alice, file_id)
+    delta = b"".join(encode_delta(signature, BASE + b"y" * 1000))
+    response = await _put_delta(client, alice, file_id, base, delta)
+    assert response.status_code == 413
+
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.content == BASE
@@ -0,0 +1,98 @@
+import pytest
+
+from api.download import RangeNotSatisfiable, parse_range_header
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+def test_parse_range_header():
+    assert parse_range_header("bytes=0-9", 100) == [(0, 9)]
+    assert parse_range_header("bytes=90-", 100) == [(90, 99)]
+    assert parse_range_header("bytes=-10", 100) == [(90, 99)]
+    assert parse_range_header("bytes=0-4,3-9,50-59", 100) == [(0, 9), (50, 59)]
+    assert parse_range_header("bytes=0-1000", 100) == [(0, 99)]
+    assert parse_range_header("items=0-9", 100) is None
+    assert parse_range_header("bytes=9-0", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=100-", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=-10", 0)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=0-", 0)
+
+
+async def test_single_and_suffix_range(client, alice):
+    file_id = (await upload(client, alice, "data.bin", CONTENT))["id"]
+
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "Range": "bytes=10-19"}
+    )
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.content == CONTENT[10:20]
+
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "Range": "bytes=-100"}
+    )
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 924-1023/1024"
+    assert response.content == CONTENT[-100:]
+
+
+async def test_multiple_ranges(client, alice):
+    file_id = (await upload(client, alice, "data.bin", CONTENT))["id"]
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "Range": "bytes=0-3,100-103"}
+    )
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges")
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert b"Content-Range: bytes 0-3/1024" in response.content
+    assert b"Content-Range: bytes 100-103/1024" in response.content
+    assert CONTENT[100:104] in response.content
+
+
+async def test_unsatisfiable_range(client, alice):
+    file_id = (await upload(client, alice, "data.bin", CONTENT))["id"]
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "Range": "bytes=2000-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+
+@pytest.mark.parametrize("range_header", ["bytes=-10", "bytes=0-"])
+async def test_range_on_empty_file(client, alice, range_header):
+    file_id = (await upload(client, alice, "empty.txt", b""))["id"]
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "Range": range_header}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */0"
+
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.status_code == 200
+    assert response.content == b""
+
+
+async def test_conditional_get(client, alice):
+    file_id = (await upload(client, alice, "data.bin", CONTENT))["id"]
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    etag = response.headers["etag"]
+
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    # If-Range가 맞지 않으면 Range를 무시하고 전체를 보냄
+    response = await client.get(
+        f"/api/drive/file/{file_id}",
+        headers={**alice, "Range": "bytes=0-9", "If-Range": '"stale"'},
+    )
+    assert response.status_code == 200
+    assert response.content == CONTENT
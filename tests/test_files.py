@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import update
+
+from api import models
+from api.database import SessionLocal
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _list_all(client, headers, **params) -> list[str]:
+    """next_cursor를 따라가며 모든 페이지의 파일 이름을 모읍니다."""
+    names = []
+    cursor = None
+    while True:
+        response = await client.get(
+            "/api/drive/file",
+            params={**params, **({"cursor": cursor} if cursor else {})},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+        body = response.json()
+        names += [item["name"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return names
+
+
+@pytest.mark.parametrize(
+    "sort,order", [("name", "asc"), ("name", "desc"), ("size", "asc"), ("created_at", "desc")]
+)
+async def test_list_own_and_shared_files(client, alice, bob, sort, order):
+    sizes = {}
+    for index in range(7):
+        name = f"alice-{index}.txt"
+        await upload(client, alice, name, b"a" * (index * 3 + 1))
+        sizes[name] = index * 3 + 1
+    for index in range(5):
+        await upload(client, bob, f"bob-{index}.txt", b"b" * (index * 2 + 2))
+    shared = []
+    for index in range(4):
+        name = f"shared-{index}.txt"
+        shared.append((await upload(client, bob, name, b"s" * (index * 5)))["id"])
+        sizes[name] = index * 5
+    # 소유자 기능 이전에 올린 파일은 모든 사용자가 봄
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.FileModel)
+            .where(models.FileModel.id.in_(shared))
+            .values(owner_id=None)
+        )
+        await db.commit()
+
+    names = await _list_all(client, alice, sort=sort, order=order, limit=3)
+    assert sorted(names) == sorted(sizes)
+    if sort == "name":
+        assert names == sorted(names, reverse=order == "desc")
+    elif sort == "size":
+        assert [sizes[name] for name in names] == sorted(sizes.values())
+
+    bob_names = await _list_all(client, bob, sort=sort, order=order, limit=4)
+    assert len(bob_names) == 9
+    assert not any(name.startswith("alice") for name in bob_names)
@@ -0,0 +1,70 @@
+import pytest
+
+from api import trash
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _create_folder(client, headers, name: str, path: str = "/") -> dict:
+    response = await client.post(
+        "/api/drive/folders", json={"name": name, "path": path}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def test_folders_require_auth(client, alice):
+    folder = await _create_folder(client, alice, "docs")
+    requests = [
+        ("POST", "/api/drive/folders", {"json": {"name": "x", "path": "/"}}),
+        ("GET", "/api/drive/folders", {}),
+        ("GET", f"/api/drive/folders/{folder['id']}", {}),
+        ("GET", f"/api/drive/folders/{folder['id']}/stats", {}),
+        ("PATCH", f"/api/drive/folders/{folder['id']}", {"json": {"name": "y"}}),
+        ("DELETE", f"/api/drive/folders/{folder['id']}", {}),
+    ]
+    for method, url, kwargs in requests:
+        response = await client.request(method, url, **kwargs)
+        assert response.status_code == 401, (method, url)
+
+    response = await client.get(f"/api/drive/folders/{folder['id']}", headers=alice)
+    assert response.json()["path"] == "/docs"
+
+
+async def test_folder_stats_count_own_files(client, alice, bob):
+    folder = await _create_folder(client, alice, "shared")
+    await _create_folder(client, alice, "sub", "/shared")
+    await upload(client, alice, "a.txt", b"a" * 100, path="/shared")
+    await upload(client, alice, "b.txt", b"b" * 10, path="/shared/sub")
+    await upload(client, bob, "c.txt", b"c" * 1000, path="/shared")
+
+    stats_url = f"/api/drive/folders/{folder['id']}/stats"
+    response = await client.get(stats_url, headers=alice)
+    assert response.json() == {"folder_count": 1, "file_count": 2, "total_size": 110}
+    response = await client.get(stats_url, headers=bob)
+    assert response.json() == {"folder_count": 1, "file_count": 1, "total_size": 1000}
+
+
+async def test_delete_folder_keeps_other_users_trash(client, alice, bob):
+    folder = await _create_folder(client, alice, "docs")
+    alice_file = (await upload(client, alice, "a.txt", b"a", path="/docs"))["id"]
+    bob_file = (await upload(client, bob, "b.txt", b"b", path="/docs"))["id"]
+    await client.delete(f"/api/drive/file/{alice_file}", headers=alice)
+    await client.delete(f"/api/drive/file/{bob_file}", headers=bob)
+
+    # bob의 휴지통 파일이 되돌아갈 폴더이므로 alice는 지울 수 없음
+    response = await client.delete(f"/api/drive/folders/{folder['id']}", headers=alice)
+    assert response.status_code == 409
+    listing = (await client.get("/api/drive/trash", headers=bob)).json()
+    assert listing["items"][0]["path"] == "/docs/b.txt"
+
+    await client.delete(f"/api/drive/trash/{bob_file}", headers=bob)
+    assert await trash.reap_trash() == 1
+    response = await client.delete(f"/api/drive/folders/{folder['id']}", headers=alice)
+    assert response.status_code == 204
+
+    # 폴더를 지운 사용자의 휴지통 파일은 되돌리면 루트로 감
+    response = await client.post(f"/api/drive/trash/{alice_file}/restore", headers=alice)
+    assert response.json()["path"] == "/a.txt"
@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from api import integrity, models
+from api.blob_store import blob_key
+from api.database import SessionLocal
+from api.settings import settings
+from api.storage import get_storage
+
+from .conftest import signup, upload
+
+pytestmark = pytest.mark.anyio
+
+ORPHAN = hashlib.sha256(b"orphan").hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def integrity_settings(monkeypatch):
+    # 방금 쓴 객체도 orphan으로 보고, 여러 배치로 나눠 읽는 경로를 거치게 함
+    monkeypatch.setattr(settings, "integrity_grace_period", 0)
+    monkeypatch.setattr(settings, "integrity_batch_size", 2)
+    monkeypatch.setattr(settings, "scrub_batch_size", 2)
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _content_hash(file_id: str) -> str:
+    async with SessionLocal() as db:
+        return (await db.get(models.FileModel, file_id)).content_hash
+
+
+async def _break_storage(client, headers) -> dict[str, str]:
+    """orphan 객체, 객체가 없는 blob, ref_count가 어긋난 blob을 하나씩 만듭니다."""
+    kept_id = (await upload(client, headers, "kept.txt", b"kept" * 100))["id"]
+    lost_id = (await upload(client, headers, "lost.txt", b"lost" * 100))["id"]
+    await upload(client, headers, "other.txt", b"other" * 100)
+    kept, lost = await _content_hash(kept_id), await _content_hash(lost_id)
+
+    storage = get_storage()
+    await storage.put_stream(blob_key(ORPHAN), _chunks(b"orphan"))
+    await storage.delete(blob_key(lost))
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.Blob).where(models.Blob.hash == kept).values(ref_count=5)
+        )
+        await db.commit()
+    return {"kept_id": kept_id, "lost_id": lost_id, "kept": kept, "lost": lost}
+
+
+async def test_reconcile(client, alice):
+    broken = await _break_storage(client, alice)
+
+    report = await integrity.run_reconcile(repair=False)
+    assert report["objects"] == 3
+    assert report["blobs"] == 3
+    assert (report["orphans"], report["missing"], report["ref_mismatches"]) == (1, 1, 1)
+    assert report["samples"] == {
+        "orphan": [blob_key(ORPHAN)],
+        "missing": [broken["lost"]],
+        "ref_count": [broken["kept"]],
+    }
+    # 고치지 않고 보고만 함
+    assert report["orphans_deleted"] == report["files_trashed"] == report["refs_fixed"] == 0
+    assert await get_storage().stat(blob_key(ORPHAN)) is not None
+
+    report = await integrity.run_reconcile(repair=True)
+    assert report["orphans_deleted"] == 1
+    assert report["files_trashed"] == 1
+    assert report["refs_fixed"] == 1
+    assert await get_storage().stat(blob_key(ORPHAN)) is None
+    async with SessionLocal() as db:
+        assert (await db.get(models.Blob, broken["kept"])).ref_count == 1
+    response = await client.get(f"/api/drive/file/{broken['lost_id']}", headers=alice)
+    assert response.status_code == 404
+    trash = (await client.get("/api/drive/trash", headers=alice)).json()
+    assert [item["id"] for item in trash["items"]] == [broken["lost_id"]]
+    response = await client.get(f"/api/drive/file/{broken['kept_id']}", headers=alice)
+    assert response.content == b"kept" * 100
+
+    # 객체가 없는 blob은 백업에서 되살릴 때까지 남아 있음
+    report = await integrity.run_reconcile(repair=True)
+    assert (report["orphans"], report["missing"], report["ref_mismatches"]) == (0, 1, 0)
+
+
+async def test_scrub(client, alice):
+    file_ids = []
+    for index in range(3):
+        file_ids.append((await upload(client, alice, f"{index}.txt", bytes([index]) * 100))["id"])
+    corrupt = await _content_hash(file_ids[1])
+    with open(get_storage().local_path(blob_key(corrupt)), "r+b") as fp:
+        fp.write(b"x")
+
+    report = await integrity.run_scrub()
+    assert report["blobs"] == 3
+    assert report["failures"] == 1
+    assert report["samples"] == [f"checksum:{corrupt}"]
+    assert report["pass_finished_at"] is not None
+
+    await get_storage().delete(blob_key(corrupt))
+    report = await integrity.run_scrub(restart=True)
+    assert report["blobs"] == 3
+    assert report["samples"] == [f"missing:{corrupt}"]
+
+
+async def test_admin_integrity_endpoints(client, alice):
+    await _break_storage(client, alice)
+    response = await client.post("/api/admin/integrity/reconcile", headers=alice)
+    assert response.status_code == 403
+
+    admin = await signup(client, "admin", admin=True)
+    response = await client.post(
+        "/api/admin/integrity/reconcile", params={"repair": "true"}, headers=admin
+    )
+    assert response.status_code == 202
+    assert response.json()["status"] == "running"
+    # 실행 중인 검사는 다시 시작하지 않음
+    response = await client.post("/api/admin/integrity/reconcile", headers=admin)
+    assert response.status_code == 409
+    await asyncio.gather(*integrity._tasks)
+
+    response = await client.post("/api/admin/integrity/scrub", headers=admin)
+    assert response.status_code == 202
+    await asyncio.gather(*integrity._tasks)
+
+    response = await client.get("/api/admin/integrity", headers=admin)
+    assert response.status_code == 200
+    checks = {check["name"]: check for check in response.json()}
+    assert checks["reconcile"]["status"] == "finished"
+    assert checks["reconcile"]["locked_by"] is None
+    assert checks["reconcile"]["report"]["repair"] is True
+    assert checks["reconcile"]["report"]["orphans_deleted"] == 1
+    assert checks["scrub"]["status"] == "finished"
+    # 복구하면서 객체가 없는 파일은 휴지통으로 옮겼지만 blob 행은 남아 있음
+    assert checks["scrub"]["report"]["failures"] == 1
+
+
+async def test_claim_lease():
+    assert await integrity.claim(integrity.SCRUB) is True
+    # 실행 중인 검사는 다른 곳에서 가져가지 못함
+    assert await integrity.claim(integrity.SCRUB) is False
+    assert await integrity.claim(integrity.RECONCILE) is True
+
+    # 갱신이 끊긴 지 integrity_lease_timeout이 지나면 죽은 것으로 보고 가져옴
+    stale = datetime.now() - timedelta(seconds=settings.integrity_lease_timeout + 1)
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.IntegrityCheckpoint)
+            .where(models.IntegrityCheckpoint.name == integrity.SCRUB)
+            .values(updated_at=stale)
+        )
+        await db.commit()
+    assert await integrity.claim(integrity.SCRUB) is True
+    assert await integrity.claim(integrity.SCRUB) is False
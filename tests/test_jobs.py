@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from api import jobs, models, ocr
+from api.database import SessionLocal
+from api.settings import settings
+from api.storage import get_storage
+
+from .conftest import signup, upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _run_jobs() -> None:
+    """실행할 수 있는 작업이 없을 때까지 워커를 돌립니다. (lifespan 없이)"""
+    worker = jobs.JobWorker()
+    while True:
+        await worker._dispatch()
+        # 짧은 작업은 _dispatch 안에서 이미 끝났을 수 있으므로 DB를 보고 판단
+        await asyncio.gather(*list(worker._tasks))
+        async with SessionLocal() as db:
+            left = await db.scalar(
+                select(func.count())
+                .select_from(models.Job)
+                .where(models.Job.status == "pending", models.Job.run_after <= datetime.now())
+            )
+        if not left:
+            return
+
+
+async def _file_jobs(client, headers, file_id: str) -> dict[str, dict]:
+    response = await client.get(f"/api/drive/file/{file_id}/jobs", headers=headers)
+    assert response.status_code == 200, response.text
+    return {job["type"]: job for job in response.json()["items"]}
+
+
+async def test_upload_jobs_run(client, alice, bob):
+    file = await upload(client, alice, "notes.txt", "회의록 본문".encode())
+    queued = await _file_jobs(client, alice, file["id"])
+    assert {name: job["status"] for name, job in queued.items()} == {
+        "checksum": "pending",
+        "extract_text": "pending",
+    }
+    response = await client.get(f"/api/drive/file/{file['id']}/jobs", headers=bob)
+    assert response.status_code == 404
+
+    await _run_jobs()
+    done = await _file_jobs(client, alice, file["id"])
+    assert done["checksum"]["status"] == "succeeded"
+    assert done["checksum"]["result"] == {"verified": True}
+    assert done["extract_text"]["result"] == {"chars": len("회의록 본문")}
+
+    # 내용이 같은 파일은 검증과 추출을 다시 하지 않음
+    copy = await upload(client, alice, "copy.txt", "회의록 본문".encode())
+    assert await _file_jobs(client, alice, copy["id"]) == {}
+
+    admin = await signup(client, "admin", admin=True)
+    response = await client.get("/api/admin/jobs", headers=admin)
+    assert response.status_code == 200
+    assert sorted((count["type"], count["status"]) for count in response.json()["counts"]) == [
+        ("checksum", "succeeded"),
+        ("extract_text", "succeeded"),
+    ]
+
+
+async def test_checksum_mismatch_retries(client, alice, monkeypatch):
+    monkeypatch.setattr(settings, "job_retry_base_delay", 0)
+    file = await upload(client, alice, "a.bin", b"original")
+    async with SessionLocal() as db:
+        file_model = await db.get(models.FileModel, file["id"])
+        blob = await db.get(models.Blob, file_model.content_hash)
+    with open(get_storage().local_path(blob.path), "wb") as fp:
+        fp.write(b"corrupted")
+
+    # 시도 횟수를 다 쓰면 failed로 남고 더 실행하지 않음
+    await _run_jobs()
+    job = (await _file_jobs(client, alice, file["id"]))["checksum"]
+    assert job["status"] == "failed"
+    assert job["attempts"] == job["max_attempts"] == 3
+    assert "checksum mismatch" in job["last_error"]
+
+
+class FakeOcrProvider(ocr.OcrProvider):
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def extract_text(self, data: bytes, content_type: str) -> str:
+        self.calls += 1
+        return "영수증 합계 12000원"
+
+
+async def test_ocr_job(client, alice, monkeypatch):
+    monkeypatch.setattr(settings, "ocr_enabled", True)
+    provider = FakeOcrProvider()
+    ocr.set_ocr_provider(provider)
+    try:
+        file = await upload(client, alice, "receipt.png", b"\x89PNG not really")
+        await upload(client, alice, "same.png", b"\x89PNG not really")
+        await _run_jobs()
+    finally:
+        ocr.set_ocr_provider(None)
+
+    job = (await _file_jobs(client, alice, file["id"]))["ocr"]
+    assert job["status"] == "succeeded"
+    # 내용이 같은 두 번째 파일은 추출한 글자를 함께 씀
+    assert provider.calls == 1
+    async with SessionLocal() as db:
+        file_model = await db.get(models.FileModel, file["id"])
+        text = await db.get(models.FileText, file_model.content_hash)
+    assert (text.source, text.text) == ("ocr:fake", "영수증 합계 12000원")
@@ -0,0 +1,88 @@
+import json
+import logging
+
+import pytest
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+
+from api.logging_config import JSONFormatter
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+FILE_ROUTE = "/api/drive/file/{safe_filename}"
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_request_metrics(client, alice):
+    before = {
+        "ok": _value("http_requests_total", method="GET", route=FILE_ROUTE, status="200"),
+        "missing": _value("http_requests_total", method="GET", route=FILE_ROUTE, status="404"),
+        "unmatched": _value("http_requests_total", method="GET", route="unmatched", status="404"),
+        "uploaded": _value("http_request_body_bytes_total", route="/api/drive/upload"),
+        "downloaded": _value("http_response_body_bytes_total", route=FILE_ROUTE),
+        "written": _value("disk_write_bytes_total"),
+        "selects": _value("db_query_duration_seconds_count", operation="SELECT"),
+    }
+
+    file = await upload(client, alice, "a.bin", b"m" * 5000)
+    assert (await client.get(f"/api/drive/file/{file['id']}", headers=alice)).status_code == 200
+    assert _value("http_response_body_bytes_total", route=FILE_ROUTE) == before["downloaded"] + 5000
+    assert (await client.get("/api/drive/file/missing", headers=alice)).status_code == 404
+    assert (await client.get("/nowhere")).status_code == 404
+
+    # 파일 id가 아니라 경로 템플릿으로 집계함
+    assert _value("http_requests_total", method="GET", route=FILE_ROUTE, status="200") == (
+        before["ok"] + 1
+    )
+    assert _value("http_requests_total", method="GET", route=FILE_ROUTE, status="404") == (
+        before["missing"] + 1
+    )
+    assert _value("http_requests_total", method="GET", route="unmatched", status="404") == (
+        before["unmatched"] + 1
+    )
+    assert _value("http_request_body_bytes_total", route="/api/drive/upload") > (
+        before["uploaded"] + 5000
+    )
+    assert _value("disk_write_bytes_total") == before["written"] + 5000
+    assert _value("db_query_duration_seconds_count", operation="SELECT") > before["selects"]
+    assert _value("http_requests_in_progress", method="GET") == 0
+
+
+async def test_metrics_endpoint(client, alice):
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    names = {family.name for family in text_string_to_metric_families(response.text)}
+    assert {
+        "http_requests",
+        "http_request_duration_seconds",
+        "db_query_duration_seconds",
+        "db_pool_size",
+        "kdf_queue_depth",
+    } <= names
+
+
+def test_json_log_includes_extra_fields():
+    record = logging.makeLogRecord(
+        {
+            "name": "api.test",
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "msg": "slow query %s",
+            "args": ("느림",),
+            "duration_ms": 12.5,
+        }
+    )
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "slow query 느림"
+    assert (entry["level"], entry["logger"], entry["duration_ms"]) == (
+        "WARNING",
+        "api.test",
+        12.5,
+    )
+    assert "args" not in entry
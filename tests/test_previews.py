@@ -0,0 +1,84 @@
+import io
+
+import pytest
+from PIL import Image
+
+from api import previews
+from api.cache import DiskLRUCache
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def preview_cache(tmp_path, monkeypatch):
+    cache = DiskLRUCache(root=str(tmp_path / "previews"), max_bytes=1024**2)
+    monkeypatch.setattr(previews, "preview_cache", cache)
+    return cache
+
+
+def _png(width: int, height: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, "PNG")
+    return out.getvalue()
+
+
+async def test_image_preview(client, alice, bob, preview_cache, monkeypatch):
+    file = await upload(client, alice, "photo.png", _png(800, 400))
+    url = f"/api/drive/file/{file['id']}/preview"
+
+    response = await client.get(url, params={"size": "medium"}, headers=alice)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "image/webp"
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert (image.format, image.size) == ("WEBP", (512, 256))
+    etag = response.headers["etag"]
+    response = await client.get(url, params={"size": "small"}, headers=alice)
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert image.size == (128, 64)
+    assert response.headers["etag"] != etag
+    assert preview_cache.stats()["size"] == 2
+
+    # 캐시에 있으면 다시 만들지 않음
+    async def fail(*args):
+        raise AssertionError("preview rendered again")
+
+    monkeypatch.setattr(previews, "run_in_process", fail)
+    response = await client.get(url, params={"size": "medium"}, headers=alice)
+    assert response.status_code == 200
+    assert preview_cache.hits == 1
+
+    response = await client.get(
+        url, params={"size": "medium"}, headers={**alice, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    assert (await client.get(url, headers=bob)).status_code == 404
+
+
+async def test_preview_unsupported(client, alice, preview_cache):
+    text = await upload(client, alice, "a.txt", b"text")
+    response = await client.get(f"/api/drive/file/{text['id']}/preview", headers=alice)
+    assert response.status_code == 415
+
+    # 형식은 이미지지만 내용이 깨진 파일
+    broken = await upload(client, alice, "broken.png", b"\x89PNG broken")
+    response = await client.get(f"/api/drive/file/{broken['id']}/preview", headers=alice)
+    assert response.status_code == 415
+    assert response.json()["detail"] == "미리보기를 만들 수 없는 파일입니다"
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskLRUCache(root=str(tmp_path), max_bytes=25)
+    cache.put("aa-1", b"x" * 10)
+    cache.put("bb-2", b"y" * 10)
+    assert cache.get("aa-1") == b"x" * 10
+    cache.put("cc-3", b"z" * 10)
+
+    # 가장 오래 쓰지 않은 항목부터 지움
+    assert cache.get("bb-2") is None
+    assert cache.get("aa-1") == b"x" * 10
+    assert cache.stats()["evictions"] == 1
+    # 다시 열어도 디스크에 남은 항목을 찾음
+    assert DiskLRUCache(root=str(tmp_path), max_bytes=25).get("cc-3") == b"z" * 10
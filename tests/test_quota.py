@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import update
+
+from api import models, quota
+from api.database import SessionLocal
+from api.settings import settings
+
+from .conftest import signup, upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _usage(client, headers) -> dict:
+    response = await client.get("/api/drive/usage", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def _set_quota(client, user_id: str, quota_bytes: int | None) -> dict:
+    admin = await signup(client, f"admin-{user_id}", admin=True)
+    response = await client.put(
+        f"/api/admin/users/{user_id}/quota", json={"quota_bytes": quota_bytes}, headers=admin
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_usage_follows_uploads(client, alice):
+    assert await _usage(client, alice) == {
+        "used_bytes": 0,
+        "quota_bytes": settings.default_user_quota,
+        "remaining_bytes": settings.default_user_quota,
+    }
+    await upload(client, alice, "a.txt", b"a" * 100)
+    # 같은 내용을 공유해도 파일마다 사용량에 들어감
+    await upload(client, alice, "b.txt", b"a" * 100)
+    usage = await _usage(client, alice)
+    assert usage["used_bytes"] == 200
+    assert usage["remaining_bytes"] == settings.default_user_quota - 200
+
+
+async def test_quota_enforced_on_upload(client, alice):
+    await _set_quota(client, "alice", 150)
+    await upload(client, alice, "a.txt", b"a" * 100)
+
+    response = await client.post(
+        "/api/drive/upload", files={"file_body": ("b.txt", b"b" * 100)}, headers=alice
+    )
+    assert response.status_code == 413
+    assert response.json()["detail"] == quota.QUOTA_EXCEEDED_DETAIL
+
+    # Content-Length가 남은 용량을 크게 넘으면 본문을 받기 전에 거절
+    response = await client.post(
+        "/api/drive/upload",
+        files={"file_body": ("c.bin", b"c" * (settings.quota_body_overhead + 1024))},
+        headers=alice,
+    )
+    assert response.status_code == 413
+    assert (await _usage(client, alice))["used_bytes"] == 100
+
+
+async def test_unlimited_quota(client, alice):
+    usage = await _set_quota(client, "alice", 0)
+    assert usage["quota_bytes"] is None
+    assert usage["remaining_bytes"] is None
+
+
+async def test_admin_quota_endpoints(client, alice):
+    response = await client.put(
+        "/api/admin/users/alice/quota", json={"quota_bytes": 10}, headers=alice
+    )
+    assert response.status_code == 403
+
+    await upload(client, alice, "a.txt", b"a" * 100)
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.User).where(models.User.id == "alice").values(used_bytes=12345)
+        )
+        await db.commit()
+
+    admin = await signup(client, "admin", admin=True)
+    response = await client.post("/api/admin/users/alice/usage/recalculate", headers=admin)
+    assert response.status_code == 200
+    assert response.json()["used_bytes"] == 100
+
+    response = await client.post("/api/admin/users/nobody/usage/recalculate", headers=admin)
+    assert response.status_code == 404
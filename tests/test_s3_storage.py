@@ -0,0 +1,99 @@
+"""S3 드라이버 테스트. moto 서버를 S3 대신 띄워 aiobotocore로 실제 HTTP 요청을 보냅니다."""
+import httpx
+import pytest
+from moto.server import ThreadedMotoServer
+
+from api.settings import settings
+from api.storage import close_storage, get_storage
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture(scope="module")
+def moto_server():
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    yield server.get_host_and_port()
+    server.stop()
+
+
+@pytest.fixture
+async def s3(moto_server, monkeypatch):
+    host, port = moto_server
+    for name, value in {
+        "storage_backend": "s3",
+        "minio_host": host,
+        "minio_port": port,
+        "minio_access_key": "test",
+        "minio_secret_key": "test",
+        "minio_default_bucket": "test-files",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    await close_storage()
+    storage = get_storage()
+    client = await storage.client()
+    try:
+        await client.create_bucket(Bucket=storage.bucket)
+    except client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    yield storage
+    await storage.delete_prefix("")
+    await close_storage()
+
+
+async def _read(storage, key, start=0, end=None) -> bytes:
+    return b"".join([chunk async for chunk in storage.open_range(key, start, end)])
+
+
+async def test_open_range(s3):
+    client = await s3.client()
+    await client.put_object(Bucket=s3.bucket, Key="data", Body=CONTENT)
+    await client.put_object(Bucket=s3.bucket, Key="empty", Body=b"")
+
+    assert await _read(s3, "data") == CONTENT
+    assert await _read(s3, "data", 10, 19) == CONTENT[10:20]
+    assert await _read(s3, "data", 1000) == CONTENT[1000:]
+    # 빈 객체를 통째로 읽어도 InvalidRange가 나지 않음
+    assert await _read(s3, "empty") == b""
+    assert await _read(s3, "empty", 0, -1) == b""
+    assert (await s3.stat("empty")).size == 0
+
+
+async def test_empty_file_download(s3, client, alice):
+    file_id = (await upload(client, alice, "empty.txt", b""))["id"]
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.status_code == 200
+    assert response.content == b""
+
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "Range": "bytes=0-"}
+    )
+    assert response.status_code == 416
+
+
+async def test_range_download(s3, client, alice):
+    file_id = (await upload(client, alice, "data.bin", CONTENT))["id"]
+    response = await client.get(
+        f"/api/drive/file/{file_id}", headers={**alice, "Range": "bytes=-100"}
+    )
+    assert response.status_code == 206
+    assert response.content == CONTENT[-100:]
+
+
+async def test_signed_url_redirects_to_presigned_url(s3, client, alice):
+    file_id = (await upload(client, alice, "data.bin", CONTENT))["id"]
+    response = await client.post(f"/api/drive/file/{file_id}/url", headers=alice)
+    assert response.status_code == 200
+    response = await client.get(response.json()["url"])
+    assert response.status_code == 307
+
+    # 저장소가 직접 내용을 보냄
+    async with httpx.AsyncClient() as direct:
+        response = await direct.get(response.headers["location"])
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert "data.bin" in response.headers["content-disposition"]
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from api import models
+from api.crud import file_crud
+from api.database import SessionLocal
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _search(client, headers, **params) -> list[str]:
+    response = await client.get("/api/drive/search", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return [item["name"] for item in response.json()["items"]]
+
+
+async def test_search_by_metadata(client, alice, bob):
+    await upload(client, alice, "report-2024.pdf", b"%PDF" + b"p" * 96)
+    await upload(client, alice, "annual report.txt", b"t" * 10)
+    await upload(client, alice, "photo.png", b"\x89PNG" + b"i" * 496)
+    await upload(client, alice, "100%_done.txt", b"d")
+    await upload(client, bob, "bob report.txt", b"b")
+
+    # 최신순, 다른 사용자의 파일은 보이지 않음
+    assert await _search(client, alice, name="report") == ["annual report.txt", "report-2024.pdf"]
+    assert await _search(client, alice, name="report", match="prefix") == ["report-2024.pdf"]
+    # LIKE 와일드카드는 글자 그대로 찾음
+    assert await _search(client, alice, name="%_") == ["100%_done.txt"]
+
+    assert await _search(client, alice, type="image/*") == ["photo.png"]
+    assert await _search(client, alice, type="text/plain") == ["100%_done.txt", "annual report.txt"]
+    assert await _search(client, alice, min_size=10, max_size=100) == [
+        "annual report.txt",
+        "report-2024.pdf",
+    ]
+
+    response = await client.get("/api/drive/search", headers=alice)
+    assert response.status_code == 400
+
+
+async def test_search_by_date_and_paging(client, alice):
+    ids = [(await upload(client, alice, f"file-{index}.txt", b"x"))["id"] for index in range(5)]
+    # 생성 시각을 하루씩 떨어뜨림
+    base = datetime(2024, 1, 1)
+    async with SessionLocal() as db:
+        for index, file_id in enumerate(ids):
+            await db.execute(
+                update(models.FileModel)
+                .where(models.FileModel.id == file_id)
+                .values(created_at=base + timedelta(days=index))
+            )
+        await db.commit()
+
+    names = await _search(
+        client, alice, created_after="2024-01-02T00:00:00", created_before="2024-01-04T00:00:00"
+    )
+    assert names == ["file-2.txt", "file-1.txt"]
+
+    names, cursor = [], None
+    while True:
+        params = {"name": "file-", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/drive/search", params=params, headers=alice)
+        body = response.json()
+        names += [item["name"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert names == [f"file-{index}.txt" for index in reversed(range(5))]
+
+
+async def test_search_by_text(client, alice, bob):
+    memo = await upload(client, alice, "memo.txt", b"meeting notes")
+    scan = await upload(client, alice, "scan.png", b"\x89PNG scan")
+    await upload(client, alice, "scan copy.png", b"\x89PNG scan")
+    await upload(client, bob, "bob.png", b"\x89PNG scan")
+    async with SessionLocal() as db:
+        memo_model = await db.get(models.FileModel, memo["id"])
+        scan_model = await db.get(models.FileModel, scan["id"])
+        db.add_all(
+            [
+                models.FileText(
+                    content_hash=memo_model.content_hash, source="plain", text="meeting notes"
+                ),
+                models.FileText(
+                    content_hash=scan_model.content_hash, source="ocr:stub", text="계약서 사본"
+                ),
+            ]
+        )
+        await db.commit()
+
+    # 내용이 같은 파일은 추출한 글자를 공유함
+    assert await _search(client, alice, q="계약서") == ["scan copy.png", "scan.png"]
+    assert await _search(client, alice, q="계약서", name="copy") == ["scan copy.png"]
+    assert await _search(client, alice, q="notes") == ["memo.txt"]
+    assert await _search(client, bob, q="계약서") == ["bob.png"]
+
+
+def test_fulltext_phrase_strips_operators():
+    assert file_crud._fulltext_phrase('+a -b "c" (d)*') == '"a  b  c   d"'
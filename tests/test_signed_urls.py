@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from api import signing
+from api.settings import settings
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = b"signed content " * 100
+
+
+async def _download_url(client, headers, file_id: str, **params) -> str:
+    response = await client.post(
+        f"/api/drive/file/{file_id}/url", params=params, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["url"]
+
+
+async def test_signed_download_without_auth(client, alice, bob):
+    file_id = (await upload(client, alice, "report.txt", CONTENT))["id"]
+    url = await _download_url(client, alice, file_id)
+
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert "report.txt" in response.headers["content-disposition"]
+
+    response = await client.get(url, headers={"Range": "bytes=0-5"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:6]
+
+    # 다른 사용자의 파일에는 URL을 발급하지 않음
+    response = await client.post(f"/api/drive/file/{file_id}/url", headers=bob)
+    assert response.status_code == 404
+
+
+async def test_invalid_signed_urls(client, alice, monkeypatch):
+    file_id = (await upload(client, alice, "report.txt", CONTENT))["id"]
+    url = await _download_url(client, alice, file_id, expires_in=60)
+    prefix, _, token = url.rpartition("/")
+    body, _, signature = token.partition(".")
+
+    tampered = f"{body}x.{signature}"
+    assert (await client.get(f"{prefix}/{tampered}")).status_code == 403
+    assert (await client.get(f"{prefix}/not-a-token")).status_code == 403
+
+    # 용도가 다른 토큰은 쓸 수 없음
+    other, _ = signing.sign("upload-part", {"u": "x", "p": 1}, 60)
+    assert (await client.get(f"{prefix}/{other}")).status_code == 403
+
+    now = time.time()
+    monkeypatch.setattr(signing.time, "time", lambda: now + 61)
+    assert (await client.get(url)).status_code == 403
+
+
+@pytest.mark.parametrize("offload", ["x-accel-redirect", "x-sendfile"])
+async def test_signed_download_offload(client, alice, monkeypatch, offload):
+    monkeypatch.setattr(settings, "download_offload", offload)
+    file_id = (await upload(client, alice, "report.txt", CONTENT))["id"]
+    response = await client.get(await _download_url(client, alice, file_id))
+    assert response.status_code == 200
+    assert response.content == b""
+    if offload == "x-accel-redirect":
+        assert response.headers[offload].startswith(settings.x_accel_redirect_prefix + "blobs/")
+    else:
+        with open(response.headers[offload], "rb") as fp:
+            assert fp.read() == CONTENT
+
+
+async def test_signed_part_upload(client, alice):
+    response = await client.post(
+        "/api/drive/uploads", json={"file_name": "big.bin"}, headers=alice
+    )
+    upload_id = response.json()["id"]
+    for number, content in enumerate([b"a" * 10, b"b" * 5], start=1):
+        response = await client.post(
+            f"/api/drive/uploads/{upload_id}/parts/{number}/url", headers=alice
+        )
+        assert response.status_code == 200
+        response = await client.put(response.json()["url"], content=content)
+        assert response.status_code == 200, response.text
+
+    response = await client.post(f"/api/drive/uploads/{upload_id}/complete", headers=alice)
+    file_id = response.json()["id"]
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.content == b"a" * 10 + b"b" * 5
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from api import models, trash
+from api.blob_store import blob_key
+from api.database import SessionLocal
+from api.settings import settings
+from api.storage import get_storage
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+
+async def _trash(client, headers, file_id: str) -> None:
+    response = await client.delete(f"/api/drive/file/{file_id}", headers=headers)
+    assert response.status_code == 204
+
+
+async def _trash_ids(client, headers, **params) -> list[str]:
+    response = await client.get("/api/drive/trash", params=params, headers=headers)
+    assert response.status_code == 200
+    return [item["id"] for item in response.json()["items"]]
+
+
+async def _used_bytes(client, headers) -> int:
+    return (await client.get("/api/drive/usage", headers=headers)).json()["used_bytes"]
+
+
+async def _content_hash(file_id: str) -> str:
+    async with SessionLocal() as db:
+        return (await db.get(models.FileModel, file_id)).content_hash
+
+
+async def test_trash_and_restore(client, alice, bob):
+    file_id = (await upload(client, alice, "a.txt", b"a" * 100))["id"]
+    await _trash(client, alice, file_id)
+
+    assert (await client.get(f"/api/drive/file/{file_id}", headers=alice)).status_code == 404
+    listing = (await client.get("/api/drive/file", headers=alice)).json()
+    assert listing["items"] == []
+    assert await _trash_ids(client, alice) == [file_id]
+    assert await _trash_ids(client, bob) == []
+    # 보관 기간 동안은 사용량에 그대로 포함
+    assert await _used_bytes(client, alice) == 100
+    # 보관 기간이 지나지 않았으면 정리 작업이 지우지 않음
+    assert await trash.reap_trash() == 0
+
+    response = await client.post(f"/api/drive/trash/{file_id}/restore", headers=bob)
+    assert response.status_code == 404
+    response = await client.post(f"/api/drive/trash/{file_id}/restore", headers=alice)
+    assert response.status_code == 200
+    assert response.json()["id"] == file_id
+    assert await _trash_ids(client, alice) == []
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.content == b"a" * 100
+
+
+async def test_purge_file(client, alice, bob):
+    file_id = (await upload(client, alice, "a.txt", b"a" * 100))["id"]
+    other_id = (await upload(client, alice, "b.txt", b"b" * 50))["id"]
+    content_hash = await _content_hash(file_id)
+    await _trash(client, alice, file_id)
+    await _trash(client, alice, other_id)
+
+    assert (await client.delete(f"/api/drive/trash/{file_id}", headers=bob)).status_code == 404
+    response = await client.delete(f"/api/drive/trash/{file_id}", headers=alice)
+    assert response.status_code == 202
+    assert response.json() == {"count": 1}
+    # 요청은 바로 끝나고 실제로 지우는 일은 정리 작업이 함
+    assert await get_storage().stat(blob_key(content_hash)) is not None
+
+    assert await trash.reap_trash() == 1
+    assert await _trash_ids(client, alice) == [other_id]
+    assert await _used_bytes(client, alice) == 50
+    assert await get_storage().stat(blob_key(content_hash)) is None
+    response = await client.post(f"/api/drive/trash/{file_id}/restore", headers=alice)
+    assert response.status_code == 404
+
+
+async def test_empty_trash(client, alice, monkeypatch):
+    monkeypatch.setattr(settings, "trash_reap_batch_size", 2)
+    monkeypatch.setattr(settings, "trash_reap_pause", 0)
+    kept_id = (await upload(client, alice, "kept.txt", b"k" * 10))["id"]
+    # 같은 내용을 공유하는 파일이 남아 있으면 blob은 지우지 않음
+    shared_id = (await upload(client, alice, "shared.txt", b"k" * 10))["id"]
+    file_ids = [shared_id]
+    for index in range(4):
+        file_id = (await upload(client, alice, f"{index}.txt", bytes([index]) * 10))["id"]
+        file_ids.append(file_id)
+    for file_id in file_ids:
+        await _trash(client, alice, file_id)
+
+    response = await client.get("/api/drive/trash", params={"limit": 3}, headers=alice)
+    first = [item["id"] for item in response.json()["items"]]
+    rest = await _trash_ids(client, alice, cursor=response.json()["next_cursor"])
+    assert len(first) == 3
+    assert sorted(first + rest) == sorted(file_ids)
+
+    response = await client.delete("/api/drive/trash", headers=alice)
+    assert response.status_code == 202
+    assert response.json() == {"count": 5}
+    assert await trash.reap_trash() == 5
+    assert await _trash_ids(client, alice) == []
+    assert await _used_bytes(client, alice) == 10
+    response = await client.get(f"/api/drive/file/{kept_id}", headers=alice)
+    assert response.content == b"k" * 10
+
+
+async def test_reap_after_retention(client, alice):
+    file_id = (await upload(client, alice, "old.txt", b"o" * 30))["id"]
+    recent_id = (await upload(client, alice, "recent.txt", b"r" * 20))["id"]
+    await _trash(client, alice, file_id)
+    await _trash(client, alice, recent_id)
+
+    # 보관 기간이 지난 파일만 정리 작업이 지움
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.FileModel)
+            .where(models.FileModel.id == file_id)
+            .values(purge_at=datetime.now() - timedelta(seconds=1))
+        )
+        await db.commit()
+    assert await trash.reap_trash() == 1
+    assert await _trash_ids(client, alice) == [recent_id]
+    assert await _used_bytes(client, alice) == 20
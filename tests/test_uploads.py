@@ -0,0 +1,129 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from api import blob_store, models
+from api.crud import file_crud
+from api.database import SessionLocal
+from api.routers.uploads import purge_expired_upload_sessions
+from api.settings import settings
+from api.storage import get_storage
+
+pytestmark = pytest.mark.anyio
+
+
+async def _start_session(client, headers, parts: list[bytes]) -> str:
+    response = await client.post(
+        "/api/drive/uploads", json={"file_name": "big.bin"}, headers=headers
+    )
+    assert response.status_code == 201
+    upload_id = response.json()["id"]
+    for number, content in enumerate(parts, start=1):
+        response = await client.put(
+            f"/api/drive/uploads/{upload_id}/parts/{number}", content=content, headers=headers
+        )
+        assert response.status_code == 200
+    return upload_id
+
+
+async def _set_session(upload_id: str, **values) -> None:
+    async with SessionLocal() as db:
+        await db.execute(
+            update(models.UploadSession)
+            .where(models.UploadSession.id == upload_id)
+            .values(**values)
+        )
+        await db.commit()
+
+
+async def test_complete_joins_parts(client, alice):
+    upload_id = await _start_session(client, alice, [b"a" * 10, b"b" * 5])
+    response = await client.post(f"/api/drive/uploads/{upload_id}/complete", headers=alice)
+    assert response.status_code == 200
+    file_id = response.json()["id"]
+
+    response = await client.get(f"/api/drive/file/{file_id}", headers=alice)
+    assert response.content == b"a" * 10 + b"b" * 5
+
+    # 응답을 못 받은 클라이언트가 다시 호출해도 같은 파일
+    response = await client.post(f"/api/drive/uploads/{upload_id}/complete", headers=alice)
+    assert response.json()["id"] == file_id
+
+
+async def test_gc_skips_sessions_being_completed(client, alice):
+    expired = datetime.now() - timedelta(seconds=1)
+    pending = await _start_session(client, alice, [b"x"])
+    completing = await _start_session(client, alice, [b"y"])
+    stuck = await _start_session(client, alice, [b"z"])
+    await _set_session(pending, expires_at=expired)
+    await _set_session(completing, status="completing", expires_at=expired)
+    await _set_session(
+        stuck,
+        status="completing",
+        expires_at=expired - timedelta(seconds=settings.upload_completing_grace),
+    )
+
+    assert await purge_expired_upload_sessions() == 2
+
+    storage = get_storage()
+    async with SessionLocal() as db:
+        assert await db.get(models.UploadSession, pending) is None
+        assert await db.get(models.UploadSession, stuck) is None
+        assert await db.get(models.UploadSession, completing) is not None
+    assert await storage.stat(f"parts/{completing}/1") is not None
+    assert await storage.stat(f"parts/{pending}/1") is None
+
+
+async def test_complete_failure_releases_session(client, alice, monkeypatch):
+    upload_id = await _start_session(client, alice, [b"a" * 10, b"b" * 5])
+
+    async def failing_create_file(db, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(file_crud, "create_file", failing_create_file)
+        with pytest.raises(RuntimeError):
+            await client.post(f"/api/drive/uploads/{upload_id}/complete", headers=alice)
+
+    # 이어 붙인 임시 파일과 새로 쓴 blob 객체는 남지 않고, 세션은 다시 완료할 수 있음
+    assert not os.path.isdir(blob_store.TMP_DIR) or os.listdir(blob_store.TMP_DIR) == []
+    assert [stat.key async for stat in get_storage().iter_objects("blobs/")] == []
+    response = await client.get(f"/api/drive/uploads/{upload_id}", headers=alice)
+    assert response.json()["status"] == "pending"
+
+    response = await client.post(f"/api/drive/uploads/{upload_id}/complete", headers=alice)
+    assert response.status_code == 200
+    response = await client.get(f"/api/drive/file/{response.json()['id']}", headers=alice)
+    assert response.content == b"a" * 10 + b"b" * 5
+
+
+@pytest.mark.parametrize("file_name", ["..", ".", "a/..", "  "])
+async def test_unsafe_file_names(client, alice, file_name):
+    response = await client.post(
+        "/api/drive/upload", files={"file_body": (file_name, b"single")}, headers=alice
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["path"] == "/untitled"
+
+    response = await client.post(
+        "/api/drive/batch/upload",
+        files=[("file_bodies", (file_name, b"batch"))],
+        headers=alice,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["items"][0]["file"]["path"] == "/untitled"
+
+    response = await client.post(
+        "/api/drive/uploads", json={"file_name": file_name}, headers=alice
+    )
+    assert response.status_code == 201
+    upload_id = response.json()["id"]
+    await client.put(f"/api/drive/uploads/{upload_id}/parts/1", content=b"multi", headers=alice)
+    response = await client.post(f"/api/drive/uploads/{upload_id}/complete", headers=alice)
+    assert response.status_code == 200, response.text
+    assert response.json()["path"] == "/untitled"
+
+    listing = (await client.get("/api/drive/file", headers=alice)).json()
+    assert [item["name"] for item in listing["items"]] == ["untitled"] * 3
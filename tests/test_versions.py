@@ -0,0 +1,134 @@
+import random
+
+import pytest
+
+from api import jobs, versions
+from api.blob_store import blob_key
+from api.crud import job_crud
+from api.database import SessionLocal
+from api.delta import Signature, encode_delta
+from api.settings import settings
+from api.storage import get_storage
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+_rng = random.Random(1)
+V1 = _rng.randbytes(64 * 1024)
+V2 = V1[:30_000] + b"second" + V1[30_000:]
+V3 = V2[:50_000] + b"third" * 100 + V2[50_500:]
+
+
+async def _replace(client, headers, file_id: str, content: bytes) -> None:
+    """차분 업로드로 파일 내용을 바꿉니다."""
+    body = (
+        await client.get(f"/api/drive/file/{file_id}/signature", headers=headers)
+    ).json()
+    signature = Signature(
+        block_size=body["block_size"],
+        size=body["size"],
+        weak=body["weak"],
+        strong=[bytes.fromhex(strong) for strong in body["strong"]],
+    )
+    response = await client.put(
+        f"/api/drive/file/{file_id}/delta",
+        params={"base": body["content_hash"]},
+        content=b"".join(encode_delta(signature, content)),
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+
+
+async def _versions(client, headers, file_id: str) -> dict:
+    response = await client.get(f"/api/drive/file/{file_id}/versions", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def _content(client, headers, file_id: str) -> bytes:
+    return (await client.get(f"/api/drive/file/{file_id}", headers=headers)).content
+
+
+async def _make_versions(client, headers) -> str:
+    file_id = (await upload(client, headers, "doc.bin", V1))["id"]
+    await _replace(client, headers, file_id, V2)
+    await _replace(client, headers, file_id, V3)
+    return file_id
+
+
+async def test_list_and_restore(client, alice, bob):
+    file_id = await _make_versions(client, alice)
+    listing = await _versions(client, alice, file_id)
+    assert listing["current_version"] == 3
+    assert [item["version"] for item in listing["items"]] == [2, 1]
+    assert [item["size"] for item in listing["items"]] == [len(V2), len(V1)]
+
+    response = await client.post(
+        f"/api/drive/file/{file_id}/versions/1/restore", headers=alice
+    )
+    assert response.status_code == 200
+    assert await _content(client, alice, file_id) == V1
+    listing = await _versions(client, alice, file_id)
+    assert listing["current_version"] == 4
+    assert [item["version"] for item in listing["items"]] == [3, 2, 1]
+
+    response = await client.post(
+        f"/api/drive/file/{file_id}/versions/99/restore", headers=alice
+    )
+    assert response.status_code == 404
+    response = await client.get(f"/api/drive/file/{file_id}/versions", headers=bob)
+    assert response.status_code == 404
+
+
+async def test_versions_stored_as_deltas(client, alice):
+    file_id = await _make_versions(client, alice)
+    async with SessionLocal() as db:
+        result = await versions.compact_file_versions(db, file_id)
+    assert result["compacted"] == 2
+    assert result["bytes_saved"] > len(V1)
+
+    listing = await _versions(client, alice, file_id)
+    assert [item["stored_as"] for item in listing["items"]] == ["delta", "delta"]
+    # 통째로 저장되어 있던 이전 내용은 더 이상 필요 없음
+    storage = get_storage()
+    for item in listing["items"]:
+        assert await storage.stat(blob_key(item["content_hash"])) is None
+
+    # 차분으로 저장된 버전도 원래 내용으로 되돌림
+    response = await client.post(
+        f"/api/drive/file/{file_id}/versions/1/restore", headers=alice
+    )
+    assert response.status_code == 200
+    assert await _content(client, alice, file_id) == V1
+
+
+async def test_prune_versions(client, alice, monkeypatch):
+    file_id = await _make_versions(client, alice)
+    v1_hash = (await _versions(client, alice, file_id))["items"][-1]["content_hash"]
+
+    monkeypatch.setattr(settings, "version_keep_count", 1)
+    assert await versions.prune_versions() == 1
+    listing = await _versions(client, alice, file_id)
+    assert [item["version"] for item in listing["items"]] == [2]
+    assert await get_storage().stat(blob_key(v1_hash)) is None
+    assert await _content(client, alice, file_id) == V3
+
+
+async def test_version_delta_job(client, alice):
+    file_id = await _make_versions(client, alice)
+    async with SessionLocal() as db:
+        queued = [
+            job for job in await job_crud.get_file_jobs(db, file_id) if job.type == "version_delta"
+        ]
+    # 내용이 바뀔 때마다 이전 버전을 차분으로 바꾸는 작업이 쌓임
+    assert len(queued) == 2
+
+    job_def = jobs.JOB_TYPES["version_delta"]
+    async with SessionLocal() as db:
+        result = await job_def.func(db, queued[0])
+    assert result["compacted"] == 2
+    async with SessionLocal() as db:
+        result = await job_def.func(db, queued[1])
+    assert result["compacted"] == 0
+    assert await _content(client, alice, file_id) == V3
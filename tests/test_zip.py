@@ -0,0 +1,144 @@
+import io
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from api import zipstream
+from api.zipstream import ZipEntry, predict_zip_size, stream_zip
+
+from .conftest import upload
+
+pytestmark = pytest.mark.anyio
+
+MODIFIED = datetime(2024, 3, 20, 10, 0, 0)
+
+
+def _entry(name: str, content: bytes, compress: bool = False) -> ZipEntry:
+    async def read():
+        for start in range(0, len(content), 1000):
+            yield content[start:start + 1000]
+
+    return ZipEntry(
+        name=name, size=len(content), modified=MODIFIED, read=read, compress=compress
+    )
+
+
+async def _build(entries: list[ZipEntry]) -> bytes:
+    return b"".join([chunk async for chunk in stream_zip(entries)])
+
+
+def _read_zip(data: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {info.filename: archive.read(info) for info in archive.infolist()}
+
+
+async def test_stream_zip_roundtrip():
+    text = b"hello zip " * 1000
+    entries = [
+        ZipEntry(name="docs/", size=0, modified=MODIFIED),
+        _entry("docs/text.txt", text, compress=True),
+        _entry("docs/random.bin", bytes(range(256)) * 20),
+        _entry("docs/empty.txt", b""),
+        _entry("한글 이름.txt", b"utf-8"),
+    ]
+    data = await _build(entries)
+    assert _read_zip(data) == {
+        "docs/": b"",
+        "docs/text.txt": text,
+        "docs/random.bin": bytes(range(256)) * 20,
+        "docs/empty.txt": b"",
+        "한글 이름.txt": b"utf-8",
+    }
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.getinfo("docs/").is_dir()
+        info = archive.getinfo("docs/text.txt")
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert info.compress_size < len(text) // 10
+        assert info.date_time == (2024, 3, 20, 10, 0, 0)
+    # 압축 항목이 있으면 크기를 미리 알 수 없음
+    assert predict_zip_size(entries) is None
+
+
+async def test_stream_zip64(monkeypatch):
+    # 4GiB 대신 작은 기준으로 ZIP64 항목과 끝 레코드를 만들어 봄
+    monkeypatch.setattr(zipstream, "_ZIP64_LIMIT", 1000)
+    monkeypatch.setattr(zipstream, "_ZIP64_COUNT_LIMIT", 3)
+    entries = [
+        _entry("small.txt", b"s" * 10),
+        _entry("large.bin", b"l" * 5000),
+        ZipEntry(name="dir/", size=0, modified=MODIFIED),
+        _entry("dir/after.txt", b"a" * 100),
+    ]
+    data = await _build(entries)
+    assert _read_zip(data) == {
+        "small.txt": b"s" * 10,
+        "large.bin": b"l" * 5000,
+        "dir/": b"",
+        "dir/after.txt": b"a" * 100,
+    }
+    assert predict_zip_size(entries) == len(data)
+
+
+def _zip_contents(response) -> dict[str, bytes]:
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/zip"
+    return _read_zip(response.content)
+
+
+async def test_folder_zip(client, alice, bob):
+    response = await client.post(
+        "/api/drive/folders", json={"name": "docs", "path": "/"}, headers=alice
+    )
+    folder_id = response.json()["id"]
+    await client.post("/api/drive/folders", json={"name": "sub", "path": "/docs"}, headers=alice)
+    await upload(client, alice, "a.txt", b"first", path="/docs")
+    await upload(client, alice, "a.txt", b"second", path="/docs")
+    # 하위 폴더와 이름이 같은 파일
+    await upload(client, alice, "sub", b"file named sub", path="/docs")
+    await upload(client, alice, "b.txt", b"nested", path="/docs/sub")
+    await upload(client, bob, "secret.txt", b"bob", path="/docs")
+
+    response = await client.get(f"/api/drive/zip/folders/{folder_id}", headers=alice)
+    assert "docs.zip" in response.headers["content-disposition"]
+    files = _zip_contents(response)
+    assert sorted(files) == [
+        "docs/", "docs/a (1).txt", "docs/a.txt", "docs/sub (1)", "docs/sub/", "docs/sub/b.txt"
+    ]
+    assert sorted([files["docs/a.txt"], files["docs/a (1).txt"]]) == [b"first", b"second"]
+    assert files["docs/sub (1)"] == b"file named sub"
+    assert files["docs/sub/b.txt"] == b"nested"
+
+    # 무압축이면 Content-Length를 미리 알려줌
+    response = await client.get(
+        f"/api/drive/zip/folders/{folder_id}", params={"compression": "stored"}, headers=alice
+    )
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert len(_zip_contents(response)) == 6
+
+    response = await client.get("/api/drive/zip/folders/missing", headers=alice)
+    assert response.status_code == 404
+
+
+async def test_files_zip(client, alice, bob):
+    ids = [
+        (await upload(client, alice, "a.txt", b"one"))["id"],
+        (await upload(client, alice, "a.txt", b"two"))["id"],
+        (await upload(client, alice, "c.png", b"\x89PNG image"))["id"],
+    ]
+    bob_id = (await upload(client, bob, "b.txt", b"bob"))["id"]
+
+    response = await client.post(
+        "/api/drive/zip", json={"ids": [ids[1], bob_id, *ids]}, headers=alice
+    )
+    files = _zip_contents(response)
+    # 요청한 순서대로, 중복 id와 접근할 수 없는 파일은 빼고 담음
+    assert list(files) == ["a.txt", "a (1).txt", "c.png"]
+    assert files == {"a.txt": b"two", "a (1).txt": b"one", "c.png": b"\x89PNG image"}
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        # 이미 압축된 형식은 무압축으로 담음
+        assert archive.getinfo("c.png").compress_type == zipfile.ZIP_STORED
+
+    response = await client.post("/api/drive/zip", json={"ids": [bob_id]}, headers=alice)
+    assert response.status_code == 404